@@ -4,7 +4,7 @@ load_dotenv()  # Load .env file before any other imports that might need env var
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.database import init_db
-from app.routes import memories, policies, compliance, test, agent_variants, jobs, agents
+from app.routes import memories, policies, compliance, test, agent_variants, jobs, agents, llm
 
 app = FastAPI(title="Policy Compliance Framework")
 
@@ -24,6 +24,10 @@ app.add_middleware(
 @app.on_event("startup")
 async def startup_event():
     init_db()
+    # Requeue jobs orphaned by a restart and start draining the job queue
+    jobs.start_job_workers()
+    # Resume offline batch jobs once their provider batches finish
+    jobs.start_batch_poller()
 
 # Include routers
 app.include_router(agents.router)
@@ -32,6 +36,7 @@ app.include_router(policies.router)
 app.include_router(compliance.router)
 app.include_router(agent_variants.router)
 app.include_router(jobs.router)
+app.include_router(llm.router)
 app.include_router(test.router)
 
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Float, Boolean, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Float, Boolean, UniqueConstraint, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -33,10 +33,35 @@ class Policy(Base):
     _nocode_nodes = Column(JSON, nullable=True)  # Store no-code editor nodes for re-editing
 
     evaluations = relationship("ComplianceEvaluation", back_populates="policy", cascade="all, delete-orphan")
+    versions = relationship("PolicyVersion", back_populates="policy", cascade="all, delete-orphan", order_by="PolicyVersion.version")
+
+
+class PolicyVersion(Base):
+    """
+    Immutable snapshot of a policy's evaluated inputs (type and config).
+
+    A new version is recorded only when the config hash changes, so edits to
+    name, description, severity or enabled never create one. Rows are never
+    updated; evaluations reference the version they were computed with.
+    """
+    __tablename__ = "policy_versions"
+    __table_args__ = (UniqueConstraint('policy_id', 'version', name='uq_policy_version'),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    policy_id = Column(Integer, ForeignKey("policies.id"), nullable=False, index=True)
+    version = Column(Integer, nullable=False)  # 1, 2, ... per policy
+    policy_type = Column(String, nullable=False)
+    config = Column(JSON, nullable=False)
+    config_hash = Column(String, nullable=False, index=True)  # services/content_hash.policy_hash
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    policy = relationship("Policy", back_populates="versions")
 
 
 class ComplianceEvaluation(Base):
     __tablename__ = "compliance_evaluations"
+    # One evaluation per session and policy: writers upsert on this key
+    __table_args__ = (UniqueConstraint('agent_id', 'memory_id', 'policy_id', name='uq_evaluation_agent_memory_policy'),)
 
     id = Column(Integer, primary_key=True, index=True)
     agent_id = Column(String, nullable=False, index=True)
@@ -45,6 +70,10 @@ class ComplianceEvaluation(Base):
     is_compliant = Column(Boolean, nullable=False)
     violations = Column(JSON, default=[])  # List of violation details
     evaluated_at = Column(DateTime, default=datetime.utcnow)
+    # Inputs the verdict was computed from (see services/content_hash.py); NULL for older rows
+    session_hash = Column(String, nullable=True)  # Hash of the session's messages
+    policy_hash = Column(String, nullable=True)  # Hash of the policy's type and config
+    policy_version_id = Column(Integer, ForeignKey("policy_versions.id"), nullable=True, index=True)
 
     policy = relationship("Policy", back_populates="evaluations")
 
@@ -106,14 +135,15 @@ class ProcessingJob(Base):
     Tracks async processing jobs for batch session evaluation.
 
     Jobs are created when user submits batch processing request,
-    and polled for status until completion.
+    and polled for status until completion. Pending rows are the job
+    queue: a worker claims one by moving it to 'running'.
     """
     __tablename__ = "processing_jobs"
 
     id = Column(String, primary_key=True, index=True)  # UUID
     agent_id = Column(String, nullable=False, index=True)
-    status = Column(String, nullable=False, default='pending')  # pending | running | completed | failed
-    job_type = Column(String, nullable=False, default='batch_evaluate')  # batch_evaluate | single_evaluate
+    status = Column(String, nullable=False, default='pending')  # pending | running | waiting_on_batch | paused | completed | cancelled | failed
+    job_type = Column(String, nullable=False, default='batch_evaluate')  # batch_evaluate | delta_evaluate | generate_sessions | synthesize_sessions
 
     # Progress tracking
     total_items = Column(Integer, default=0)
@@ -122,10 +152,70 @@ class ProcessingJob(Base):
 
     # Input/output
     input_data = Column(JSON, default={})  # memory_ids, policy_ids, etc.
-    results = Column(JSON, default=[])  # Results for each processed item
+    results = Column(JSON, default=[])  # Legacy per-item results; new jobs append to job_items
     error_message = Column(Text, nullable=True)
+    batch_state = Column(JSON, nullable=True)  # Submitted provider batches for offline_batch jobs
+
+    # Job queue: the worker that claimed the job and its last sign of life
+    worker_id = Column(String, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True, index=True)
+    attempts = Column(Integer, default=0)  # Times a worker claimed the job
+    control_action = Column(String, nullable=True)  # cancel | pause requested for a running job
+    priority = Column(String, nullable=False, default='bulk')  # interactive | bulk | nightly (see services/job_priority.py)
+    telemetry = Column(JSON, nullable=True)  # Telemetry of work done outside chunks (see services/job_telemetry.py)
+    chunk_claimed_at = Column(DateTime, nullable=True)  # Last claim of one of its chunks (or when they became claimable): starvation aging of chunk claims
 
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow)
     started_at = Column(DateTime, nullable=True)
     completed_at = Column(DateTime, nullable=True)
+
+
+class JobChunk(Base):
+    """
+    A claimable work item of a job: the sessions in [item_start, item_end).
+
+    Any worker of any backend process claims pending chunks of running jobs
+    (see routes/jobs.py claim_next_chunk). A claim is a lease that the
+    claiming process's heartbeat renews; a running chunk whose lease expired
+    is claimed again and resumes from the job's checkpoint (job_items).
+    """
+    __tablename__ = "job_chunks"
+    __table_args__ = (
+        UniqueConstraint('job_id', 'chunk_index', name='uq_job_chunk'),
+        Index('ix_job_chunks_job_status', 'job_id', 'status'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String, ForeignKey("processing_jobs.id"), nullable=False, index=True)
+    chunk_index = Column(Integer, nullable=False)
+    item_start = Column(Integer, nullable=False)  # First item_index of the chunk
+    item_end = Column(Integer, nullable=False)  # One past the last item_index
+    session_policy_ids = Column(JSON, nullable=True)  # Delta jobs: {memory_id: [policy_id]} of the chunk's planned sessions
+    status = Column(String, nullable=False, default='pending')  # pending | running | completed
+    worker_id = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    attempts = Column(Integer, default=0)  # Times a worker claimed the chunk
+    completed_at = Column(DateTime, nullable=True)
+    telemetry = Column(JSON, nullable=True)  # Telemetry of the chunk's runs, written by its lease holder
+
+
+class JobItem(Base):
+    """
+    One processed item (session) of a job, appended as the job runs.
+
+    Append-only: workers insert one row per finished item instead of
+    rewriting ProcessingJob.results, so writes stay O(1) per item however
+    large the job is. Results are read back ordered by item_index. An item
+    is recorded once: a second write of the same index is ignored.
+    """
+    __tablename__ = "job_items"
+    __table_args__ = (UniqueConstraint('job_id', 'item_index', name='uq_job_item'),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String, nullable=False, index=True)
+    item_index = Column(Integer, nullable=False)  # Position of the item in the job's input
+    memory_id = Column(String, nullable=True)
+    status = Column(String, nullable=False)  # success | deferred | not_found | error
+    result = Column(JSON, nullable=False)  # Full per-item result, as returned by /api/jobs/{id}/result
+    created_at = Column(DateTime, default=datetime.utcnow)
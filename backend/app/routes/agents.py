@@ -4,32 +4,43 @@ Agent routes for multi-agent support.
 Provides endpoints to list available agents and get agent details.
 """
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import or_, text
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
 import shutil
 import json
-import threading
-import time
+import random
 import uuid
 from pathlib import Path
 from datetime import datetime
 
-from app.database import get_db
+from app.database import get_db, SessionLocal
 from app.models import Policy, ComplianceEvaluation, AgentVariant, ToolTransition, SessionStatus, ProcessingJob
 from app.services.memory_loader import memory_loader
-from app.services.agent_generator import AgentGenerator
+from app.services.agent_generator import AgentGenerator, SESSION_GENERATION_CONCURRENCY
+from app.services.session_pipeline import run_bounded
+from app.services.session_synthesizer import SessionSynthesizer, fit_transitions, write_sessions
 from app.schemas import (
     CreateAgentRequest,
     CreateAgentResponse,
     AgentConfigResponse,
     GenerateSessionsRequest,
+    SynthesizeSessionsRequest,
     SubmitJobResponse
 )
-from app.routes.jobs import update_job_status
+from app.routes.jobs import update_job_status, record_job_item, record_job_items, load_checkpoint, stop_job, job_event, job_pool
+from app.services.job_events import job_events
+from app.services.job_control import job_control, JobInterrupted
 
 router = APIRouter(prefix="/api/agents", tags=["agents"])
 
+# Job types that write numbered session files into an agent directory
+SESSION_WRITING_JOB_TYPES = ['generate_sessions', 'synthesize_sessions']
+
+# Synthetic sessions written (and their job items recorded) per transaction
+SYNTHESIS_BATCH_SESSIONS = 500
+
 
 class AgentResponse(BaseModel):
     id: str
@@ -245,7 +256,6 @@ def create_agent(request: CreateAgentRequest):
             policy_suggestions = generator.generate_policy_suggestions(metadata)
 
             # Save policies to database
-            from app.database import SessionLocal
             db = SessionLocal()
             try:
                 # Map LLM severity to database severity
@@ -287,6 +297,36 @@ def create_agent(request: CreateAgentRequest):
     )
 
 
+def _load_agent_metadata(agent_id: str) -> dict:
+    """The agent's .agent_metadata.json (tools, business identifiers, LLM config).
+
+    Raises:
+        HTTPException 404: If agent not found
+        HTTPException 400: If agent metadata not found (only API-created agents supported)
+    """
+    # Validate agent exists
+    agents = memory_loader.list_agents()
+    agent = next((a for a in agents if a["id"] == agent_id), None)
+    if not agent:
+        raise HTTPException(status_code=404, detail=f"Agent '{agent_id}' not found")
+
+    # Load agent metadata
+    agent_dir = Path(agent["path"])
+    metadata_file = agent_dir / ".agent_metadata.json"
+
+    if not metadata_file.exists():
+        raise HTTPException(
+            status_code=400,
+            detail="Agent metadata not found. Only agents created via API can generate sessions."
+        )
+
+    try:
+        with open(metadata_file, 'r') as f:
+            return json.load(f)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to load agent metadata: {str(e)}")
+
+
 @router.post("/{agent_id}/generate-sessions", response_model=SubmitJobResponse)
 def generate_sessions(
     agent_id: str,
@@ -313,27 +353,7 @@ def generate_sessions(
         HTTPException 404: If agent not found
         HTTPException 400: If agent metadata not found (only API-created agents supported)
     """
-    # Validate agent exists
-    agents = memory_loader.list_agents()
-    agent = next((a for a in agents if a["id"] == agent_id), None)
-    if not agent:
-        raise HTTPException(status_code=404, detail=f"Agent '{agent_id}' not found")
-
-    # Load agent metadata
-    agent_dir = Path(agent["path"])
-    metadata_file = agent_dir / ".agent_metadata.json"
-
-    if not metadata_file.exists():
-        raise HTTPException(
-            status_code=400,
-            detail="Agent metadata not found. Only agents created via API can generate sessions."
-        )
-
-    try:
-        with open(metadata_file, 'r') as f:
-            agent_metadata = json.load(f)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to load agent metadata: {str(e)}")
+    agent_metadata = _load_agent_metadata(agent_id)
 
     # Create job record
     job_id = str(uuid.uuid4())
@@ -342,6 +362,7 @@ def generate_sessions(
         agent_id=agent_id,
         status='pending',
         job_type='generate_sessions',
+        priority=request.priority,
         total_items=request.num_sessions,
         completed_items=0,
         failed_items=0,
@@ -353,20 +374,18 @@ def generate_sessions(
             'session_time_definition': request.session_time_definition,
             'include_edge_cases': request.include_edge_cases,
             'llm_provider': request.llm_provider or agent_metadata['llm_config']['provider'],
-            'model': request.model or agent_metadata['llm_config']['model']
+            'model': request.model or agent_metadata['llm_config']['model'],
+            'sessions_per_call': request.sessions_per_call,
+            'concurrency': request.concurrency
         },
         results=[]
     )
     db.add(job)
     db.commit()
+    job_events.publish(job_event(job))
 
-    # Start background thread
-    thread = threading.Thread(
-        target=generate_sessions_background,
-        args=(job_id, agent_id, agent_metadata, request),
-        daemon=True
-    )
-    thread.start()
+    # The pending row is the queue entry: wake a worker to claim it
+    job_pool.notify()
 
     return SubmitJobResponse(
         job_id=job_id,
@@ -376,6 +395,119 @@ def generate_sessions(
     )
 
 
+@router.post("/{agent_id}/synthesize-sessions", response_model=SubmitJobResponse)
+def synthesize_sessions(
+    agent_id: str,
+    request: SynthesizeSessionsRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Submit async job to synthesize sessions for an agent offline.
+
+    No LLM calls: sessions follow a tool-sequence Markov model with
+    parameter distributions and injected violations (see
+    session_synthesizer), for load tests and benchmarks. The job stores its
+    seed and profile, so the same corpus can be produced again.
+
+    Args:
+        agent_id: The agent identifier
+        request: SynthesizeSessionsRequest with count, seed, format and profile
+        db: Database session
+
+    Returns:
+        SubmitJobResponse with job_id for tracking progress
+
+    Raises:
+        HTTPException 404: If agent not found
+        HTTPException 400: If agent metadata not found or the profile is invalid
+    """
+    agent_metadata = _load_agent_metadata(agent_id)
+
+    profile = dict(request.profile or agent_metadata.get('synthesis') or {})
+    if request.fit_transitions:
+        # Learned once here, so a resumed job keeps the same model after its own sessions are added
+        transitions = fit_transitions(
+            memory_loader.list_memories(agent_id), [tool['name'] for tool in agent_metadata.get('tools', [])]
+        )
+        if not transitions:
+            raise HTTPException(status_code=400, detail="No existing sessions with tool calls to learn transitions from")
+        profile['transitions'] = transitions
+    seed = request.seed if request.seed is not None else random.randrange(2 ** 31)
+
+    try:
+        SessionSynthesizer(agent_metadata, profile, seed, request.format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid synthesis profile: {str(e)}")
+
+    job_id = str(uuid.uuid4())
+    job = ProcessingJob(
+        id=job_id,
+        agent_id=agent_id,
+        status='pending',
+        job_type='synthesize_sessions',
+        priority=request.priority,
+        total_items=request.num_sessions,
+        completed_items=0,
+        failed_items=0,
+        input_data={
+            'agent_id': agent_id,
+            'agent_metadata': agent_metadata,
+            'num_sessions': request.num_sessions,
+            'seed': seed,
+            'format': request.format,
+            'profile': profile
+        },
+        results=[]
+    )
+    db.add(job)
+    db.commit()
+    job_events.publish(job_event(job))
+
+    # The pending row is the queue entry: wake a worker to claim it
+    job_pool.notify()
+
+    return SubmitJobResponse(
+        job_id=job_id,
+        status='pending',
+        total_items=request.num_sessions,
+        message=f"Synthesizing {request.num_sessions} sessions for {agent_id} (seed {seed})"
+    )
+
+
+def _reserve_session_numbers(job_id: str, agent_id: str) -> int:
+    """First session number of a generation job: session i of the job is numbered base + i + 1.
+
+    Reserved once and stored in the job's input_data ('session_number_base'),
+    so a resumed job keeps its numbers. The base follows the agent's existing
+    session files and the ranges reserved by its other unfinished generation
+    and synthesis jobs; their rows are locked while reserving, so jobs starting at the same
+    time (in any process) never get overlapping numbers. SQLite ignores FOR UPDATE,
+    so there the reservation takes the database write lock (BEGIN IMMEDIATE) first.
+    """
+    db = SessionLocal()
+    try:
+        if db.get_bind().dialect.name == 'sqlite':
+            db.execute(text("BEGIN IMMEDIATE"))
+        jobs = db.query(ProcessingJob).filter(
+            ProcessingJob.agent_id == agent_id,
+            ProcessingJob.job_type.in_(SESSION_WRITING_JOB_TYPES),
+            or_(ProcessingJob.id == job_id, ProcessingJob.status.in_(['pending', 'running', 'paused']))
+        ).with_for_update().all()
+        job = next(j for j in jobs if j.id == job_id)
+        base = (job.input_data or {}).get('session_number_base')
+        if base is None:
+            base = memory_loader.max_session_number(agent_id)
+            for other in jobs:
+                other_base = (other.input_data or {}).get('session_number_base')
+                if other.id != job_id and other_base is not None:
+                    base = max(base, other_base + other.input_data['num_sessions'])
+            job.input_data = {**(job.input_data or {}), 'session_number_base': base}
+        db.commit()
+        return base
+    finally:
+        db.close()
+
+
 def generate_sessions_background(
     job_id: str,
     agent_id: str,
@@ -388,9 +520,18 @@ def generate_sessions_background(
     Strategy:
     1. Parse scenario_variations into list of scenario hints
     2. Add edge case scenarios if requested
-    3. Generate sessions with varied scenarios
-    4. Save each session as JSON file in agent directory
-    5. Update job progress after each session
+    3. Reserve the job's session numbers (see _reserve_session_numbers)
+    4. Generate sessions `sessions_per_call` per LLM call, with up to
+       `concurrency` calls (default SESSION_GENERATION_CONCURRENCY) in flight;
+       every call goes through the shared rate limiter
+    5. Write each session atomically to its own JSON file in agent directory
+    6. Record the sessions' job items and update job progress as each call finishes
+
+    A cancel or pause request stops the job before the next call (or before
+    the LLM calls in progress). Sessions already recorded in the job's
+    checkpoint are skipped when a paused or recovered job runs again, and so
+    are sessions whose file was written but not recorded before a crash: the
+    file with the session's number is recorded instead of generating another.
 
     Args:
         job_id: Job identifier for tracking
@@ -406,9 +547,11 @@ def generate_sessions_background(
             model=request.model or agent_metadata['llm_config']['model']
         )
 
-        agent_dir = Path(memory_loader.base_dir) / agent_id
-        results = []
-        failed_count = 0
+        checkpoint = load_checkpoint(job_id)
+        progress = {
+            'completed': len(checkpoint),
+            'failed': sum(1 for status in checkpoint.values() if status == 'error')
+        }
 
         # Parse scenario variations
         scenarios = []
@@ -430,90 +573,94 @@ def generate_sessions_background(
             scenarios = ["standard workflow", "high priority request", "complex case with multiple steps"]
 
         # Start numbering after existing sessions (use numeric prefix before "__" in filenames)
-        existing_memories = memory_loader.list_memories(agent_id=agent_id)
-        max_existing_num = 0
-        for mem in existing_memories:
-            try:
-                prefix = mem["id"].split("__", 1)[0]
-                num = int(prefix)
-                if num > max_existing_num:
-                    max_existing_num = num
-            except (ValueError, AttributeError, KeyError):
-                continue
+        base_number = _reserve_session_numbers(job_id, agent_id)
+
+        # Select scenario hint (cycle through if more sessions than scenarios)
+        scenario_for = lambda i: scenarios[i % len(scenarios)]
 
+        remaining = []
         for i in range(request.num_sessions):
+            if i in checkpoint:
+                continue
+            # Written before a crash but not recorded: a new session would get a different filename
+            existing = memory_loader.find_session_file(agent_id, base_number + i + 1)
+            if existing is None:
+                remaining.append(i)
+                continue
+            record_job_item(job_id, i, {
+                "session_number": i + 1,
+                "filename": existing,
+                "status": "success",
+                "scenario": scenario_for(i)
+            })
+            progress['completed'] += 1
+        if len(checkpoint) + len(remaining) < request.num_sessions:
+            update_job_status(job_id, completed_items=progress['completed'], failed_items=progress['failed'])
+
+        calls = [
+            remaining[start:start + request.sessions_per_call]
+            for start in range(0, len(remaining), request.sessions_per_call)
+        ]
+
+        def generate(indexes: List[int]) -> List[tuple]:
+            """Generate one call's sessions on a pool thread and write their files; returns (index, job item result)."""
+            sessions = [(base_number + i + 1, scenario_for(i)) for i in indexes]
+            generated = generator.generate_sessions(agent_metadata, sessions, request.session_time_definition)
+            results = []
+            for i, (session_number, scenario_hint), session_data in zip(indexes, sessions, generated):
+                try:
+                    if isinstance(session_data, Exception):
+                        raise session_data
+                    filename = memory_loader.session_filename(session_number, session_data, scenario_hint)
+                    memory_loader.write_session(agent_id, filename, session_data)
+                    results.append((i, {
+                        "session_number": i + 1,
+                        "filename": filename,
+                        "status": "success",
+                        "scenario": scenario_hint
+                    }))
+                except Exception as e:
+                    results.append((i, {
+                        "session_number": i + 1,
+                        "status": "error",
+                        "error": str(e),
+                        "scenario": scenario_hint
+                    }))
+            return results
+
+        def record(indexes: List[int], future):
             try:
-                # Select scenario hint (cycle through if more sessions than scenarios)
-                scenario_hint = scenarios[i % len(scenarios)] if scenarios else None
-
-                session_number = max_existing_num + i + 1
-
-                # Generate session
-                session_data = generator.generate_session(
-                    agent_metadata=agent_metadata,
-                    session_number=session_number,
-                    scenario_hint=scenario_hint,
-                    session_time_definition=request.session_time_definition
-                )
-
-                # Generate unique filename
-                biz_ids = session_data["metadata"].get("business_identifiers", {})
-                # Take first 2 business identifier key-value pairs for filename
-                biz_id_parts = []
-                for k, v in list(biz_ids.items())[:2]:
-                    # Clean value for filename (remove spaces, limit length)
-                    clean_val = str(v).replace(" ", "_")[:20]
-                    biz_id_parts.append(f"{k}_{clean_val}")
-
-                biz_id_str = "__".join(biz_id_parts) if biz_id_parts else "NO_BIZ_ID"
-
-                # Clean scenario hint for filename
-                scenario_clean = scenario_hint.replace(" ", "_")[:30] if scenario_hint else "STANDARD"
-
-                filename = f"{session_number:05d}__{biz_id_str}__{scenario_clean}.json"
-                # Ensure filename isn't too long
-                if len(filename) > 200:
-                    filename = filename[:190] + ".json"
-
-                # Save to file
-                session_file = agent_dir / filename
-                with open(session_file, 'w') as f:
-                    json.dump(session_data, f, indent=2)
-
-                results.append({
-                    "session_number": i + 1,
-                    "filename": filename,
-                    "status": "success",
-                    "scenario": scenario_hint
-                })
-
-                # Update progress
-                update_job_status(
-                    job_id,
-                    completed_items=i + 1,
-                    results=results,
-                    failed_items=failed_count
-                )
-
-                # Small delay to avoid rate limits
-                time.sleep(0.5)
-
+                results = future.result()
+            except JobInterrupted:
+                # Stopped mid-call: not part of the checkpoint, generated again on resume
+                return
             except Exception as e:
-                failed_count += 1
-                results.append({
-                    "session_number": i + 1,
-                    "status": "error",
-                    "error": str(e),
-                    "scenario": scenario_hint
-                })
-
-                update_job_status(
-                    job_id,
-                    failed_items=failed_count,
-                    results=results
-                )
+                results = [
+                    (i, {"session_number": i + 1, "status": "error", "error": str(e), "scenario": scenario_for(i)})
+                    for i in indexes
+                ]
+            for i, result in results:
+                record_job_item(job_id, i, result)
+                progress['completed'] += 1
+                if result['status'] == 'error':
+                    progress['failed'] += 1
+            update_job_status(
+                job_id,
+                completed_items=progress['completed'],
+                failed_items=progress['failed']
+            )
+
+        run_bounded(
+            calls,
+            generate,
+            record,
+            concurrency=request.concurrency or SESSION_GENERATION_CONCURRENCY,
+            stop=lambda: job_control.requested(job_id) is not None
+        )
+        job_control.check(job_id)
 
         # Complete job
+        failed_count = progress['failed']
         completion_message = f"Generated {request.num_sessions - failed_count} sessions successfully"
         if failed_count > 0:
             completion_message += f" ({failed_count} failed)"
@@ -522,10 +669,60 @@ def generate_sessions_background(
             job_id,
             status='completed',
             completed_at=datetime.utcnow(),
-            results=results,
             message=completion_message
         )
 
+    except JobInterrupted as interrupted:
+        stop_job(job_id, interrupted.action)
+
+    except Exception as e:
+        update_job_status(
+            job_id,
+            status='failed',
+            error_message=str(e),
+            completed_at=datetime.utcnow()
+        )
+
+
+def synthesize_sessions_background(job_id: str, input_data: dict):
+    """
+    Background task to synthesize sessions offline.
+
+    Sessions are written SYNTHESIS_BATCH_SESSIONS at a time; each batch's job
+    items and progress are recorded in one transaction, and a cancel or pause
+    request is honored between batches. Synthesis is deterministic, so a
+    resumed job writes exactly the sessions it had not recorded.
+
+    Args:
+        job_id: Job identifier for tracking
+        input_data: The job's input_data (agent_id, agent_metadata, num_sessions, seed, format, profile)
+    """
+    try:
+        update_job_status(job_id, status='running', started_at=datetime.utcnow())
+
+        agent_id = input_data['agent_id']
+        synthesizer = SessionSynthesizer(
+            input_data['agent_metadata'], input_data.get('profile'), input_data['seed'], input_data.get('format', 'anthropic')
+        )
+        base_number = _reserve_session_numbers(job_id, agent_id)
+
+        checkpoint = load_checkpoint(job_id)
+        remaining = [i for i in range(input_data['num_sessions']) if i not in checkpoint]
+        for start in range(0, len(remaining), SYNTHESIS_BATCH_SESSIONS):
+            job_control.check(job_id)
+            batch = remaining[start:start + SYNTHESIS_BATCH_SESSIONS]
+            record_job_items(job_id, write_sessions(synthesizer, memory_loader, agent_id, batch, base_number))
+
+        update_job_status(
+            job_id,
+            status='completed',
+            completed_at=datetime.utcnow(),
+            message=f"Synthesized {input_data['num_sessions']} sessions (seed {input_data['seed']})"
+        )
+
+    except JobInterrupted as interrupted:
+        stop_job(job_id, interrupted.action)
+
     except Exception as e:
         update_job_status(
             job_id,
@@ -533,3 +730,29 @@ def generate_sessions_background(
             error_message=str(e),
             completed_at=datetime.utcnow()
         )
+
+
+def _run_synthesize_sessions_job(job_id: str, input_data: dict):
+    """Queue handler for synthesize_sessions jobs."""
+    with job_control.bind(job_id):
+        synthesize_sessions_background(job_id, input_data)
+
+
+def _run_generate_sessions_job(job_id: str, input_data: dict):
+    """Queue handler: rebuild the request from the job's input_data."""
+    request = GenerateSessionsRequest(
+        num_sessions=input_data['num_sessions'],
+        scenario_variations=input_data.get('scenario_variations'),
+        session_time_definition=input_data.get('session_time_definition'),
+        include_edge_cases=input_data.get('include_edge_cases', True),
+        llm_provider=input_data.get('llm_provider'),
+        model=input_data.get('model'),
+        sessions_per_call=input_data.get('sessions_per_call', 1),
+        concurrency=input_data.get('concurrency')
+    )
+    with job_control.bind(job_id):
+        generate_sessions_background(job_id, input_data['agent_id'], input_data['agent_metadata'], request)
+
+
+job_pool.register('generate_sessions', _run_generate_sessions_job)
+job_pool.register('synthesize_sessions', _run_synthesize_sessions_job)
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
 from copy import deepcopy
+from datetime import datetime
 
 from app.database import get_db
 from app.models import Policy, ComplianceEvaluation, AgentVariant, ToolTransition, SessionStatus
@@ -14,7 +15,11 @@ from app.schemas import (
 )
 from app.services.policy_evaluator import PolicyEvaluator
 from app.services.memory_loader import memory_loader
+from app.services.llm_stats import collect_check_results, summarize_policy_checks
+from app.services.content_hash import session_hash
 from app.routes.agent_variants import _compute_and_store_variants
+from app.routes.policies import current_policy_version
+from app.routes.memories import _evaluation_stale, _policy_hashes
 
 router = APIRouter(prefix="/api/compliance", tags=["compliance"])
 
@@ -49,6 +54,71 @@ def _collect_llm_usage(data):
     return usages
 
 
+# Rows per executemany batch in bulk evaluation upserts
+UPSERT_BATCH_SIZE = 500
+
+# Sessions per write transaction in /process-batch
+PROCESS_BATCH_FLUSH_SESSIONS = 50
+
+
+def upsert_evaluations(db: Session, rows: List[dict]):
+    """Insert or replace evaluations keyed by (agent_id, memory_id, policy_id).
+
+    Uses INSERT ... ON CONFLICT DO UPDATE (PostgreSQL and SQLite) with
+    executemany batches, instead of a DELETE and an INSERT per pair. The caller
+    commits, so a whole flush lands in one transaction.
+
+    Args:
+        rows: Dicts with agent_id, memory_id, policy_id, is_compliant, violations,
+            and the session_hash, policy_hash and policy_version_id the verdict
+            was computed from
+    """
+    # A statement may not touch the same row twice: the last evaluation of a pair wins
+    deduped = {}
+    now = datetime.utcnow()
+    for row in rows:
+        deduped[(row['agent_id'], row['memory_id'], row['policy_id'])] = {
+            'session_hash': None,
+            'policy_hash': None,
+            'policy_version_id': None,
+            **row,
+            'evaluated_at': row.get('evaluated_at') or now
+        }
+    rows = list(deduped.values())
+    if not rows:
+        return
+
+    dialect = db.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        for row in rows:
+            db.query(ComplianceEvaluation).filter(
+                ComplianceEvaluation.agent_id == row['agent_id'],
+                ComplianceEvaluation.memory_id == row['memory_id'],
+                ComplianceEvaluation.policy_id == row['policy_id']
+            ).delete()
+            db.add(ComplianceEvaluation(**row))
+        return
+
+    stmt = insert(ComplianceEvaluation.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['agent_id', 'memory_id', 'policy_id'],
+        set_={
+            'is_compliant': stmt.excluded.is_compliant,
+            'violations': stmt.excluded.violations,
+            'evaluated_at': stmt.excluded.evaluated_at,
+            'session_hash': stmt.excluded.session_hash,
+            'policy_hash': stmt.excluded.policy_hash,
+            'policy_version_id': stmt.excluded.policy_version_id
+        }
+    )
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        db.execute(stmt, rows[start:start + UPSERT_BATCH_SIZE])
+
+
 @router.post("/{agent_id}/evaluate", response_model=List[ComplianceEvaluationResponse])
 async def evaluate_memory(agent_id: str, request: EvaluateMemoryRequest, db: Session = Depends(get_db)):
     """Evaluate an agent memory against policies."""
@@ -69,17 +139,11 @@ async def evaluate_memory(agent_id: str, request: EvaluateMemoryRequest, db: Ses
         ).all()
 
     evaluator = PolicyEvaluator()
-    results = []
+    rows = []
+    memory_hash = session_hash(memory["messages"])
 
     for policy in policies:
-        # Delete existing evaluation for this memory-policy pair
-        db.query(ComplianceEvaluation).filter(
-            ComplianceEvaluation.memory_id == request.memory_id,
-            ComplianceEvaluation.policy_id == policy.id,
-            ComplianceEvaluation.agent_id == agent_id
-        ).delete()
-        db.commit()  # Commit the deletion before creating new evaluation
-
+        version = current_policy_version(db, policy)
         # Evaluate - add policy metadata to config
         config_with_metadata = {
             **policy.config,
@@ -92,25 +156,34 @@ async def evaluate_memory(agent_id: str, request: EvaluateMemoryRequest, db: Ses
             config_with_metadata
         )
 
-        # Save evaluation
         # Store details in violations column (holds violations when non-compliant, compliance details when compliant)
-        evaluation = ComplianceEvaluation(
-            agent_id=agent_id,
-            memory_id=request.memory_id,
-            policy_id=policy.id,
-            is_compliant=is_compliant,
-            violations=details
-        )
-        db.add(evaluation)
-        results.append(evaluation)
+        rows.append({
+            'agent_id': agent_id,
+            'memory_id': request.memory_id,
+            'policy_id': policy.id,
+            'is_compliant': is_compliant,
+            'violations': details,
+            'session_hash': memory_hash,
+            'policy_hash': version.config_hash,
+            'policy_version_id': version.id
+        })
 
+    upsert_evaluations(db, rows)
     db.commit()
 
-    # Refresh to get IDs and transform to response format
+    # Read back the stored rows (IDs and policy relationship) in policy order
+    stored = {
+        e.policy_id: e for e in db.query(ComplianceEvaluation).filter(
+            ComplianceEvaluation.agent_id == agent_id,
+            ComplianceEvaluation.memory_id == request.memory_id,
+            ComplianceEvaluation.policy_id.in_([p.id for p in policies])
+        ).all()
+    }
+    results = [stored[p.id] for p in policies if p.id in stored]
+
+    # Transform to response format
     response_results = []
     for evaluation in results:
-        db.refresh(evaluation)
-
         eval_dict = {
             "id": evaluation.id,
             "memory_id": evaluation.memory_id,
@@ -143,6 +216,7 @@ async def get_compliance_summary(agent_id: str, db: Session = Depends(get_db)):
         Policy.agent_id == agent_id
     ).all()
     enabled_policy_ids = {p.id for p in policies}
+    policy_hashes = _policy_hashes(policies)
 
     # Get list of current memory IDs
     current_memory_ids = {m["id"] for m in memories}
@@ -157,12 +231,7 @@ async def get_compliance_summary(agent_id: str, db: Session = Depends(get_db)):
         ).all()
         latest_by_policy = _latest_evaluations_by_policy(evals)
         evaluated_policy_ids = set(latest_by_policy.keys())
-        stale = False
-        for policy in policies:
-            ev = latest_by_policy.get(policy.id)
-            if ev and policy.updated_at and ev.evaluated_at and policy.updated_at > ev.evaluated_at:
-                stale = True
-                break
+        stale = _evaluation_stale(policies, list(latest_by_policy.values()), memory["messages"], policy_hashes)
         if enabled_policy_ids and enabled_policy_ids.issubset(evaluated_policy_ids) and not stale:
             processed_memory_ids.add(memory_id)
 
@@ -209,6 +278,7 @@ async def get_compliance_summary(agent_id: str, db: Session = Depends(get_db)):
     llm_usage_totals = {
         "total_calls": 0,
         "input_tokens": 0,
+        "cached_input_tokens": 0,
         "output_tokens": 0,
         "total_tokens": 0,
         "cost_usd": 0.0
@@ -227,12 +297,7 @@ async def get_compliance_summary(agent_id: str, db: Session = Depends(get_db)):
         # Check if fully evaluated
         latest_by_policy = _latest_evaluations_by_policy(memory_evals)
         evaluated_policy_ids = set(latest_by_policy.keys())
-        stale = False
-        for policy in policies:
-            ev = latest_by_policy.get(policy.id)
-            if ev and policy.updated_at and ev.evaluated_at and policy.updated_at > ev.evaluated_at:
-                stale = True
-                break
+        stale = _evaluation_stale(policies, list(latest_by_policy.values()), memory["messages"], policy_hashes)
         is_fully_evaluated = enabled_policy_ids and enabled_policy_ids.issubset(evaluated_policy_ids) and not stale
 
         # Calculate compliance status
@@ -275,6 +340,7 @@ async def get_compliance_summary(agent_id: str, db: Session = Depends(get_db)):
                     # Tokens
                     input_tokens = usage.get("input_tokens") or usage.get("total_input_tokens") or sum(c.get("input_tokens", 0) for c in per_calls)
                     output_tokens = usage.get("output_tokens") or usage.get("total_output_tokens") or sum(c.get("output_tokens", 0) for c in per_calls)
+                    cached_input_tokens = usage.get("total_cached_input_tokens") or sum(c.get("cached_input_tokens", 0) for c in per_calls)
                     total_tokens = usage.get("total_tokens") or usage.get("total_tokens") or (input_tokens + output_tokens)
 
                     # Cost
@@ -288,6 +354,7 @@ async def get_compliance_summary(agent_id: str, db: Session = Depends(get_db)):
 
                     llm_usage_totals["total_calls"] += total_calls
                     llm_usage_totals["input_tokens"] += input_tokens or 0
+                    llm_usage_totals["cached_input_tokens"] += cached_input_tokens or 0
                     llm_usage_totals["output_tokens"] += output_tokens or 0
                     llm_usage_totals["total_tokens"] += total_tokens or 0
                     llm_usage_totals["cost_usd"] += cost
@@ -369,6 +436,42 @@ async def get_memory_evaluations(agent_id: str, memory_id: str, db: Session = De
     return result
 
 
+@router.get("/{agent_id}/llm-stats")
+async def get_llm_stats(agent_id: str, db: Session = Depends(get_db)):
+    """Per-policy LLM usage, cascade escalation, consensus agreement and normalization collapse rates.
+
+    Uses the latest evaluation of each session/policy pair.
+    """
+    evaluations = db.query(ComplianceEvaluation).filter(ComplianceEvaluation.agent_id == agent_id).all()
+
+    evals_by_memory = {}
+    for ev in evaluations:
+        evals_by_memory.setdefault(ev.memory_id, []).append(ev)
+
+    checks_by_policy = {}
+    sessions_by_policy = {}
+    for memory_evals in evals_by_memory.values():
+        for policy_id, ev in _latest_evaluations_by_policy(memory_evals).items():
+            llm_checks = [c for c in collect_check_results(ev.violations) if c['check_type'].startswith('llm_')]
+            checks_by_policy.setdefault(policy_id, []).extend(llm_checks)
+            sessions_by_policy[policy_id] = sessions_by_policy.get(policy_id, 0) + 1
+
+    policies = {p.id: p for p in db.query(Policy).filter(Policy.agent_id == agent_id).all()}
+    stats = []
+    for policy_id, checks in checks_by_policy.items():
+        if not checks:
+            continue
+        policy = policies.get(policy_id)
+        stats.append({
+            "policy_id": policy_id,
+            "policy_name": policy.name if policy else None,
+            "sessions": sessions_by_policy[policy_id],
+            **summarize_policy_checks(checks)
+        })
+
+    return {"agent_id": agent_id, "policies": sorted(stats, key=lambda s: s["cost_usd"], reverse=True)}
+
+
 @router.post("/{agent_id}/process-batch", response_model=ProcessBatchResponse)
 async def process_batch(agent_id: str, request: ProcessBatchRequest, db: Session = Depends(get_db)):
     """Process multiple memories: evaluate compliance and optionally refresh variants."""
@@ -377,7 +480,10 @@ async def process_batch(agent_id: str, request: ProcessBatchRequest, db: Session
         Policy.enabled == True,
         Policy.agent_id == agent_id
     ).all()
+    versions = {policy.id: current_policy_version(db, policy) for policy in policies}
     results = []
+    pending_rows = []
+    pending_sessions = 0
 
     for memory_id in request.memory_ids:
         memory = memory_loader.get_memory(agent_id=agent_id, memory_id=memory_id)
@@ -386,15 +492,9 @@ async def process_batch(agent_id: str, request: ProcessBatchRequest, db: Session
             continue
 
         # Evaluate against all enabled policies
-        eval_count = 0
+        rows = []
+        memory_hash = session_hash(memory["messages"])
         for policy in policies:
-            # Delete existing evaluation for this memory-policy pair
-            db.query(ComplianceEvaluation).filter(
-                ComplianceEvaluation.memory_id == memory_id,
-                ComplianceEvaluation.policy_id == policy.id,
-                ComplianceEvaluation.agent_id == agent_id
-            ).delete()
-
             # Evaluate
             config_with_metadata = {
                 **policy.config,
@@ -407,24 +507,34 @@ async def process_batch(agent_id: str, request: ProcessBatchRequest, db: Session
                 config_with_metadata
             )
 
-            # Save evaluation
-            evaluation = ComplianceEvaluation(
-                agent_id=agent_id,
-                memory_id=memory_id,
-                policy_id=policy.id,
-                is_compliant=is_compliant,
-                violations=details
-            )
-            db.add(evaluation)
-            eval_count += 1
-
-        db.commit()
+            rows.append({
+                'agent_id': agent_id,
+                'memory_id': memory_id,
+                'policy_id': policy.id,
+                'is_compliant': is_compliant,
+                'violations': details,
+                'session_hash': memory_hash,
+                'policy_hash': versions[policy.id].config_hash,
+                'policy_version_id': versions[policy.id].id
+            })
+
+        pending_rows.extend(rows)
+        pending_sessions += 1
         results.append({
             "memory_id": memory_id,
             "status": "success",
-            "evaluations": eval_count
+            "evaluations": len(rows)
         })
 
+        # Write in bulk every PROCESS_BATCH_FLUSH_SESSIONS sessions
+        if pending_sessions >= PROCESS_BATCH_FLUSH_SESSIONS:
+            upsert_evaluations(db, pending_rows)
+            db.commit()
+            pending_rows, pending_sessions = [], 0
+
+    upsert_evaluations(db, pending_rows)
+    db.commit()
+
     # Refresh agent variants if requested
     if request.refresh_variants:
         _compute_and_store_variants(db, agent_id=agent_id)
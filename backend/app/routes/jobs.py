@@ -1,165 +1,1176 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, or_, and_, case, exists
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Callable, Dict, List, Optional
+import json
+import os
 import uuid
 import threading
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 
 from app.database import get_db, SessionLocal
-from app.models import Policy, ComplianceEvaluation, ProcessingJob
+from app.models import Policy, PolicyVersion, ProcessingJob, JobChunk, JobItem, ComplianceEvaluation
 from app.schemas import (
     SubmitJobRequest,
     SubmitJobResponse,
     JobStatus,
-    JobResult
+    JobResult,
+    JobEstimate,
+    JobReport,
+    JobTelemetrySummary,
+    JobDeadLetters,
+    DeadLetter
 )
 from app.services.policy_evaluator import PolicyEvaluator
 from app.services.memory_loader import memory_loader
+from app.services.llm_batching import BatchCollector
+from app.services.llm_batch_providers import submit_pending, collect_results
+from app.services.job_estimator import estimate_collected
+from app.services.job_queue import (
+    JobWorkerPool, JOB_WORKERS, JOB_INTERACTIVE_WORKERS, JOB_STALE_SECONDS, JOB_MAX_ATTEMPTS,
+    JOB_PRIORITY_MAX_WAIT_SECONDS, split_work
+)
+from app.services.job_priority import PRIORITY_RANK, BULK, bind_priority
+from app.services.check_pool import check_pool
+from app.services.job_control import job_control, JobInterrupted, CANCEL, PAUSE
+from app.services.job_events import job_events, TERMINAL_STATUSES
+from app.services.content_hash import session_hash, stale_policy_ids, reusable_check_results
+from app.services.check_types import CheckResult
+from app.services.llm_stats import collect_check_results, summarize_policy_checks
+from app.services import job_telemetry
+from app.services.job_telemetry import JobTelemetry
+from app.services.item_retry import call_with_retries, failure_details, PERMANENT
+from app.services.session_pipeline import run_bounded, FlushBuffer, ProgressThrottle, JOB_SESSION_CONCURRENCY
+from app.routes.compliance import upsert_evaluations
 from app.routes.agent_variants import _compute_and_store_variants
+from app.routes.policies import current_policy_version
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+# Sessions whose LLM validations are pooled into shared batches when llm_batch_size > 1
+BATCH_WINDOW_SESSIONS = 20
+
+# How often jobs in 'waiting_on_batch' check for provider batch results
+BATCH_POLL_INTERVAL_SECONDS = int(os.getenv('BATCH_POLL_INTERVAL_SECONDS', '60'))
+
+# Sessions per stored-hash query when planning a delta job (keeps IN lists under SQLite's variable limit)
+DELTA_PLAN_CHUNK = 500
+
+# Page size of /result (and of the reads behind /items)
+RESULT_PAGE_SIZE = 500
+RESULT_MAX_PAGE_SIZE = 5000
+
+# How often a running job stores its telemetry (see services/job_telemetry.py)
+JOB_TELEMETRY_INTERVAL_SECONDS = float(os.getenv('JOB_TELEMETRY_INTERVAL_SECONDS', '5'))
+
+# Comment line sent on idle event streams so proxies keep them open
+JOB_EVENTS_KEEPALIVE_SECONDS = 15
+
+# Queue entries that run one chunk of a job rather than the job itself
+CHUNK_JOB_TYPE = 'job_chunk'
+
+# Item statuses counted in failed_items
+FAILED_ITEM_STATUSES = ('not_found', 'error')
+
+# Item statuses /retry-failed evaluates again: dead letters, and sessions with checks deferred
+# (timed out or circuit open) whose previous verdict was kept
+RETRY_ITEM_STATUSES = FAILED_ITEM_STATUSES + ('deferred',)
+
+# Job statuses from which /retry-failed can run a job again for its dead letters
+RETRYABLE_JOB_STATUSES = ('completed', 'failed', 'cancelled')
+
+_resume_lock = threading.Lock()
+
+
+class ChunkLeaseLost(Exception):
+    """The worker running a chunk no longer holds its lease: another worker may have claimed it."""
+
+
+def update_job_status(job_id: str, **updates):
+    """Update job status with a short-lived DB session and publish the new status."""
+    db = SessionLocal()
+    try:
+        job = db.query(ProcessingJob).filter(ProcessingJob.id == job_id).first()
+        if job:
+            for key, value in updates.items():
+                setattr(job, key, value)
+            # Built before commit: committing expires the row and reading it back would cost a query
+            event = job_event(job)
+            db.commit()
+            job_events.publish(event)
+    finally:
+        db.close()
+
+
+def job_event(job: ProcessingJob) -> dict:
+    """The event published for a job: its JobStatus as JSON-ready data."""
+    return _job_status(job).model_dump(mode='json')
+
+
+def _evaluate_memory(
+    evaluator: PolicyEvaluator,
+    memory: dict,
+    policies_data: List[dict],
+    precomputed: Optional[dict] = None
+) -> List[dict]:
+    """Evaluate one memory against all policies. No DB session is held here.
+
+    `precomputed` holds deterministic check results per policy id (from the
+    check process pool); only the remaining checks are evaluated here. Each
+    evaluation carries the session and policy hashes it was computed from.
+    """
+    evaluations = []
+    memory_hash = session_hash(memory["messages"])
+    for policy_data in policies_data:
+        # Build config for evaluation
+        config_with_metadata = {
+            **policy_data['config'],
+            'name': policy_data['name'],
+            'description': policy_data['description']
+        }
+
+        # This is the slow LLM call - NO DB session held here
+        is_compliant, details = evaluator.evaluate(
+            memory["messages"],
+            policy_data['policy_type'],
+            config_with_metadata,
+            memory_metadata=memory.get("metadata") or {},
+            precomputed_checks=(precomputed or {}).get(policy_data['id'])
+        )
+
+        evaluations.append({
+            'memory_id': memory['id'],
+            'policy_id': policy_data['id'],
+            'is_compliant': is_compliant,
+            'violations': details,
+            'session_hash': memory_hash,
+            'policy_hash': policy_data['config_hash'],
+            'policy_version_id': policy_data['version_id'],
+            'deferred': any(d.get('deferred_checks') for d in details)
+        })
+    return evaluations
+
+
+def _collect_llm_validations(
+    collector: BatchCollector,
+    memories: List[dict],
+    policies_data: List[dict],
+    precomputed: Optional[dict] = None
+):
+    """First pass of a batched job window: let LLM checks defer their validations.
+
+    Checks with a `precomputed` result (reused ones) are not collected.
+    """
+    evaluator = PolicyEvaluator(collector=collector)
+    for memory in memories:
+        try:
+            _evaluate_memory(evaluator, memory, policies_data, precomputed)
+        except Exception:
+            # Surfaced again (and recorded) during the second pass
+            continue
+
+
+def _load_policies_data(agent_id: str, policy_ids: List[int]) -> List[dict]:
+    """Load policies, and the version of each one's current config, once with a short-lived session."""
+    db = SessionLocal()
+    try:
+        policies = db.query(Policy).filter(Policy.id.in_(policy_ids), Policy.agent_id == agent_id).all() if policy_ids else \
+                   db.query(Policy).filter(Policy.enabled == True, Policy.agent_id == agent_id).all()
+        versions = {p.id: current_policy_version(db, p) for p in policies}
+        policies_data = [
+            {
+                'id': p.id,
+                'name': p.name,
+                'description': p.description,
+                'policy_type': p.policy_type,
+                'config': p.config,
+                'config_hash': versions[p.id].config_hash,
+                'version_id': versions[p.id].id
+            }
+            for p in policies
+        ]
+        db.commit()
+        return policies_data
+    finally:
+        db.close()
+
+
+def _session_tasks(
+    agent_id: str,
+    sessions: List[tuple],
+    policies_for: Callable[[str], List[dict]],
+    llm_batch_size: int,
+    collector: Optional[BatchCollector],
+    reuse_checks: bool = False
+):
+    """Yield (index, memory_id, evaluator, memory, policies) for every (index, memory_id) in `sessions`, in order.
+
+    `policies_for(memory_id)` gives the policies to evaluate the session against.
+
+    When llm_batch_size > 1, sessions are processed in windows: LLM validations
+    from every session in the window are collected first and sent as shared
+    multi-item requests, then the window is evaluated with the resolved verdicts.
+    Otherwise memories are not preloaded (memory is None) and each session's
+    task loads its own file.
+    """
+    if llm_batch_size > 1 and collector is None:
+        for window_start in range(0, len(sessions), BATCH_WINDOW_SESSIONS):
+            window = sessions[window_start:window_start + BATCH_WINDOW_SESSIONS]
+
+            # Load memories from file (no DB needed)
+            with job_telemetry.stage('load'):
+                memories = {
+                    memory_id: memory_loader.get_memory(agent_id=agent_id, memory_id=memory_id)
+                    for _, memory_id in window
+                }
+            window_collector = BatchCollector()
+            with job_telemetry.stage('batch_collection'):
+                for memory in memories.values():
+                    if memory:
+                        policies = policies_for(memory['id'])
+                        reused = _reusable_checks(agent_id, memory, policies) if reuse_checks else None
+                        _collect_llm_validations(window_collector, [memory], policies, reused)
+                window_collector.resolve(batch_size=llm_batch_size)
+            evaluator = PolicyEvaluator(collector=window_collector)
+
+            for idx, memory_id in window:
+                yield idx, memory_id, evaluator, memories[memory_id], policies_for(memory_id)
+    else:
+        # Evaluators hold no per-session state: one is shared by every session in flight
+        evaluator = PolicyEvaluator(collector=collector)
+        for idx, memory_id in sessions:
+            yield idx, memory_id, evaluator, None, policies_for(memory_id)
+
+
+def _reusable_checks(agent_id: str, memory: dict, policies_data: List[dict]) -> Dict[int, Dict[str, CheckResult]]:
+    """Check results from earlier policy versions that still apply to a session.
+
+    Reads the session's stored evaluations that were computed from the same
+    messages with another policy version, and keeps the results of checks
+    that are unchanged in the current version (see reusable_check_results).
+    Reused results carry no llm_usage, because no LLM call is made for them.
+
+    Returns:
+        {policy_id: {check_id: CheckResult}}
+    """
+    policies_by_id = {p['id']: p for p in policies_data}
+    db = SessionLocal()
+    try:
+        rows = db.query(ComplianceEvaluation.policy_id, ComplianceEvaluation.violations, PolicyVersion.config).join(
+            PolicyVersion, PolicyVersion.id == ComplianceEvaluation.policy_version_id
+        ).filter(
+            ComplianceEvaluation.agent_id == agent_id,
+            ComplianceEvaluation.memory_id == memory['id'],
+            ComplianceEvaluation.policy_id.in_(list(policies_by_id)),
+            ComplianceEvaluation.session_hash == session_hash(memory["messages"])
+        ).all()
+    finally:
+        db.close()
+
+    fields = set(CheckResult.__dataclass_fields__)
+    reused = {}
+    for policy_id, violations, previous_config in rows:
+        results = reusable_check_results(previous_config, collect_check_results(violations), policies_by_id[policy_id]['config'])
+        if results:
+            reused[policy_id] = {
+                check_id: CheckResult(**{k: v for k, v in result.items() if k in fields and k != 'llm_usage'})
+                for check_id, result in results.items()
+            }
+    return reused
+
+
+def _evaluate_session(agent_id: str, task, reuse_checks: bool = False) -> tuple:
+    """Load and evaluate one session on a pool thread, retrying transient errors (see item_retry).
+
+    With reuse_checks, results of checks unchanged since an earlier policy
+    version are reused instead of being evaluated again.
+
+    The session's latency (retries included) and the time of each stage are
+    recorded into the job's telemetry.
+
+    Returns:
+        Tuple of (evaluations, or None if the session is gone; attempts made)
+
+    Raises:
+        ItemFailed: The session failed permanently, or on every attempt
+    """
+    started = time.monotonic()
+    try:
+        return call_with_retries(
+            lambda: _evaluate_session_once(agent_id, task, reuse_checks),
+            before_retry=job_control.checkpoint
+        )
+    finally:
+        job_telemetry.observe_session(time.monotonic() - started)
+
+
+def _evaluate_session_once(agent_id: str, task, reuse_checks: bool) -> Optional[List[dict]]:
+    _, memory_id, evaluator, memory, policies_data = task
+    if memory is None:
+        with job_telemetry.stage('load'):
+            memory = memory_loader.get_memory(agent_id=agent_id, memory_id=memory_id)
+    if not memory:
+        return None
+
+    with job_telemetry.stage('deterministic_checks'):
+        precomputed = check_pool.evaluate(memory["messages"], memory.get("metadata") or {}, policies_data)
+    if reuse_checks:
+        with job_telemetry.stage('check_reuse'):
+            reused = _reusable_checks(agent_id, memory, policies_data)
+        job_telemetry.increment('reused_checks', sum(len(results) for results in reused.values()))
+        job_telemetry.increment('reusable_checks', sum(len(p['config'].get('checks', [])) for p in policies_data))
+        for policy_id, results in reused.items():
+            precomputed[policy_id] = {**results, **precomputed.get(policy_id, {})}
+    with job_telemetry.stage('policy_evaluation'):
+        evaluations = _evaluate_memory(evaluator, memory, policies_data, precomputed)
+    usage = summarize_policy_checks(collect_check_results([e['violations'] for e in evaluations]))
+    job_telemetry.increment('input_tokens', usage['input_tokens'])
+    job_telemetry.increment('cached_input_tokens', usage['cached_input_tokens'])
+    return evaluations
+
+
+def append_job_item(db: Session, job_id: str, item_index: int, result: dict) -> bool:
+    """Append one item's result to job_items (committed by the caller).
+
+    Uses INSERT ... ON CONFLICT DO NOTHING (PostgreSQL and SQLite) on
+    (job_id, item_index): an item some worker already recorded is left as it
+    is, so a chunk re-run after a lost lease cannot record it twice.
+
+    Returns:
+        True if the item was inserted, False if it was already recorded
+    """
+    row = {
+        'job_id': job_id,
+        'item_index': item_index,
+        'memory_id': result.get('memory_id'),
+        'status': result['status'],
+        'result': result
+    }
+    dialect = db.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        if db.query(exists().where(JobItem.job_id == job_id, JobItem.item_index == item_index)).scalar():
+            return False
+        db.add(JobItem(**row))
+        db.flush()
+        return True
+
+    stmt = insert(JobItem.__table__).values(**row).on_conflict_do_nothing(index_elements=['job_id', 'item_index'])
+    return db.execute(stmt).rowcount == 1
+
+
+def record_job_item(job_id: str, item_index: int, result: dict):
+    """Append one item's result to job_items with a short-lived session."""
+    db = SessionLocal()
+    try:
+        append_job_item(db, job_id, item_index, result)
+        db.commit()
+    finally:
+        db.close()
+
+
+def record_job_items(job_id: str, items: List[tuple]):
+    """Append (item_index, result) pairs to job_items and count the new ones in one transaction, then publish progress."""
+    db = SessionLocal()
+    try:
+        _count_items(db, job_id, [
+            result for item_index, result in items if append_job_item(db, job_id, item_index, result)
+        ])
+        db.commit()
+        job = db.query(ProcessingJob).filter(ProcessingJob.id == job_id).first()
+        if job:
+            job_events.publish(job_event(job))
+    finally:
+        db.close()
+
+
+def load_checkpoint(job_id: str, items: Optional[range] = None) -> dict:
+    """The job's checkpoint: {item_index: status} of every item already recorded in job_items.
+
+    `items` limits it to one chunk's item indexes.
+    """
+    db = SessionLocal()
+    try:
+        query = db.query(JobItem.item_index, JobItem.status).filter(JobItem.job_id == job_id)
+        if items is not None:
+            query = query.filter(JobItem.item_index >= items.start, JobItem.item_index < items.stop)
+        return {index: status for index, status in query}
+    finally:
+        db.close()
+
+
+def _checkpoint_counts(checkpoint: dict) -> tuple:
+    """(completed_items, failed_items) matching a checkpoint."""
+    return len(checkpoint), sum(1 for status in checkpoint.values() if status in FAILED_ITEM_STATUSES)
+
+
+def _count_items(db: Session, job_id: str, results: List[dict]):
+    """Add recorded items to the job's progress counters (committed by the caller).
+
+    Counters are incremented in the transaction that appends the items, so
+    they always match job_items, whichever processes write the job's chunks.
+    """
+    db.query(ProcessingJob).filter(ProcessingJob.id == job_id).update({
+        ProcessingJob.completed_items: func.coalesce(ProcessingJob.completed_items, 0) + len(results),
+        ProcessingJob.failed_items: func.coalesce(ProcessingJob.failed_items, 0)
+            + sum(1 for result in results if result['status'] in FAILED_ITEM_STATUSES)
+    }, synchronize_session=False)
+
+
+def _publish_progress(job_id: str):
+    """Publish the job's current counters."""
+    db = SessionLocal()
+    try:
+        job = db.query(ProcessingJob).filter(ProcessingJob.id == job_id).first()
+        if job:
+            job_events.publish(job_event(job))
+    finally:
+        db.close()
+
+
+def _hold_lease(db: Session, lease: Optional[tuple]):
+    """Renew a chunk's lease as the first write of a transaction, or raise ChunkLeaseLost.
+
+    The renewal locks the chunk row until the transaction ends, so the chunk
+    cannot be claimed by another worker between this check and the commit.
+
+    Args:
+        lease: (chunk_id, worker_id), or None for writes outside a chunk
+    """
+    if lease is None:
+        return
+    chunk_id, worker_id = lease
+    held = db.query(JobChunk).filter(
+        JobChunk.id == chunk_id,
+        JobChunk.worker_id == worker_id,
+        JobChunk.status == 'running'
+    ).update({
+        JobChunk.lease_expires_at: datetime.utcnow() + timedelta(seconds=JOB_STALE_SECONDS)
+    }, synchronize_session=False)
+    if held != 1:
+        raise ChunkLeaseLost(f"Worker {worker_id} lost the lease of chunk {chunk_id}")
+
+
+def _write_sessions(job_id: str, agent_id: str, sessions: List[tuple], lease: Optional[tuple] = None) -> List[tuple]:
+    """Upsert the evaluations and append the job items of finished sessions in one transaction.
+
+    Within a chunk (`lease`), nothing is written unless the worker still
+    holds the chunk's lease (raises ChunkLeaseLost).
+
+    Args:
+        sessions: (item_index, result, evaluations_to_save) per finished session
+        lease: (chunk_id, worker_id) of the chunk being run
+
+    Returns:
+        The sessions whose job items were inserted (not already recorded)
+    """
+    db = SessionLocal()
+    try:
+        _hold_lease(db, lease)
+        upsert_evaluations(db, [
+            {
+                'agent_id': agent_id,
+                'memory_id': e['memory_id'],
+                'policy_id': e['policy_id'],
+                'is_compliant': e['is_compliant'],
+                'violations': e['violations'],
+                'session_hash': e['session_hash'],
+                'policy_hash': e['policy_hash'],
+                'policy_version_id': e['policy_version_id']
+            }
+            for _, _, evaluations in sessions
+            for e in evaluations
+        ])
+        inserted = [
+            (item_index, result, evaluations) for item_index, result, evaluations in sessions
+            if append_job_item(db, job_id, item_index, result)
+        ]
+        _count_items(db, job_id, [result for _, result, _ in inserted])
+        db.commit()
+        return inserted
+    finally:
+        db.close()
+
+
+def _record_error_item(job_id: str, item_index: int, error: dict, lease: Optional[tuple] = None) -> bool:
+    db = SessionLocal()
+    try:
+        _hold_lease(db, lease)
+        inserted = append_job_item(db, job_id, item_index, error)
+        _count_items(db, job_id, [error] if inserted else [])
+        db.commit()
+        return inserted
+    finally:
+        db.close()
+
+
+def _flush_sessions(job_id: str, agent_id: str, sessions: List[tuple], lease: Optional[tuple] = None) -> List[tuple]:
+    """Write a flush group; if the transaction fails, retry each session alone.
+
+    A session whose own write fails is recorded as an error item. A lost
+    chunk lease (ChunkLeaseLost) is raised, not retried.
+
+    Returns:
+        The (item_index, result, evaluations) actually recorded
+    """
+    try:
+        return _write_sessions(job_id, agent_id, sessions, lease)
+    except ChunkLeaseLost:
+        raise
+    except Exception:
+        pass
+
+    recorded = []
+    for item_index, result, evaluations in sessions:
+        try:
+            recorded.extend(_write_sessions(job_id, agent_id, [(item_index, result, evaluations)], lease))
+        except ChunkLeaseLost:
+            raise
+        except Exception as e:
+            error = {"memory_id": result.get('memory_id'), "status": "error", **failure_details(e)}
+            if _record_error_item(job_id, item_index, error, lease):
+                recorded.append((item_index, error, []))
+    return recorded
+
+
+def _run_evaluations(
+    job_id: str,
+    agent_id: str,
+    memory_ids: List[str],
+    policies_data: List[dict],
+    llm_batch_size: int = 1,
+    collector: Optional[BatchCollector] = None,
+    session_concurrency: Optional[int] = None,
+    session_policies: Optional[Dict[str, List[dict]]] = None,
+    reuse_checks: bool = False,
+    items: Optional[range] = None,
+    telemetry: Optional[JobTelemetry] = None,
+    save_telemetry: Optional[Callable[[dict], None]] = None,
+    lease: Optional[tuple] = None
+):
+    """Evaluate and persist every memory (or the `items` of one chunk), updating job progress as it goes.
+
+    Up to `session_concurrency` sessions (default JOB_SESSION_CONCURRENCY) are
+    evaluated at once; their deterministic checks run in the check process
+    pool and their LLM calls share the process-wide clients and rate limiter.
+    Evaluations and the session's job item are persisted from this thread
+    only, as sessions finish; item_index keeps results in memory_ids order.
+    Finished sessions are written in groups (every JOB_FLUSH_SESSIONS sessions
+    or JOB_FLUSH_INTERVAL_MS): one transaction upserts their evaluations,
+    appends their job items and increments the job's progress counters.
+    Progress is published at most once per JOB_PROGRESS_INTERVAL_SECONDS and
+    once more at the end.
+
+    A session failing with a transient error is retried with backoff (see
+    item_retry); one that still fails is recorded as an 'error' item with
+    its error_class and attempts.
+
+    Sessions already in the job's checkpoint (job_items) are skipped, so a
+    paused or requeued job resumes where it stopped. A cancel or pause request
+    stops the job between sessions (those in flight are finished and written)
+    or before its next LLM call, and raises JobInterrupted once the finished
+    sessions are written.
+
+    A pre-resolved collector (offline batch jobs) skips the collection pass.
+
+    `session_policies` (delta jobs) limits each session to the given subset of
+    policies_data; sessions missing from it are skipped. With reuse_checks
+    (delta jobs too), check results that an earlier policy version produced
+    from the same messages are reused for checks that did not change.
+
+    Session latency, stage timings, LLM calls and cache hits are recorded
+    into `telemetry`, whose snapshot is passed to `save_telemetry` at most
+    once per JOB_TELEMETRY_INTERVAL_SECONDS and once more at the end.
+
+    A chunk's `lease` (chunk_id, worker_id) fences every write: once another
+    worker holds the chunk, the sessions in flight are dropped, nothing more
+    is written and ChunkLeaseLost is raised.
+
+    Returns:
+        Tuple of (completed_count, failed_count) of the sessions this call recorded
+    """
+    checkpoint = load_checkpoint(job_id, items)
+    progress = {'completed': 0, 'failed': 0}
+    candidates = enumerate(memory_ids) if items is None else ((idx, memory_ids[idx]) for idx in items)
+    remaining = [(idx, memory_id) for idx, memory_id in candidates if idx not in checkpoint]
+    if session_policies is None:
+        policies_for = lambda memory_id: policies_data
+    else:
+        remaining = [(idx, memory_id) for idx, memory_id in remaining if memory_id in session_policies]
+        policies_for = session_policies.__getitem__
+    throttle = ProgressThrottle()
+    telemetry = telemetry or JobTelemetry()
+    telemetry_throttle = ProgressThrottle(JOB_TELEMETRY_INTERVAL_SECONDS)
+    # Starts the interval: the first snapshot is stored one interval in, not at the first flush
+    telemetry_throttle.ready()
+
+    lease_lost = threading.Event()
+
+    def flush(sessions):
+        if lease_lost.is_set():
+            return
+        started = time.monotonic()
+        try:
+            recorded = _flush_sessions(job_id, agent_id, sessions, lease)
+        except ChunkLeaseLost:
+            lease_lost.set()
+            return
+        telemetry.add_stage('db_flush', time.monotonic() - started)
+        for _, result, _ in recorded:
+            progress['completed'] += 1
+            if result['status'] in FAILED_ITEM_STATUSES:
+                progress['failed'] += 1
+        if throttle.ready():
+            _publish_progress(job_id)
+        if save_telemetry and telemetry_throttle.ready():
+            save_telemetry(telemetry.snapshot())
+
+    buffer = FlushBuffer(flush)
+
+    def record(task, future):
+        idx, memory_id = task[:2]
+        evaluations_to_save = []
+        try:
+            evaluations, attempts = future.result()
+            if evaluations is None:
+                result = {
+                    "memory_id": memory_id,
+                    "status": "not_found",
+                    "error": "Memory not found"
+                }
+            else:
+                # Deferred evaluations have no verdict yet: keep the previous one instead
+                evaluations_to_save = [e for e in evaluations if not e['deferred']]
+                deferred_policy_ids = [e['policy_id'] for e in evaluations if e['deferred']]
+
+                if deferred_policy_ids:
+                    result = {
+                        "memory_id": memory_id,
+                        "status": "deferred",
+                        "evaluations": len(evaluations_to_save),
+                        "deferred_policy_ids": deferred_policy_ids
+                    }
+                else:
+                    result = {
+                        "memory_id": memory_id,
+                        "status": "success",
+                        "evaluations": len(evaluations_to_save)
+                    }
+            if attempts > 1:
+                result["attempts"] = attempts
+        except JobInterrupted:
+            # Stopped mid-session: not part of the checkpoint, evaluated again on resume
+            return
+        except Exception as e:
+            # A dead letter: listed by /dead-letters and evaluated again by /retry-failed
+            result = {
+                "memory_id": memory_id,
+                "status": "error",
+                **failure_details(e)
+            }
+        buffer.add((idx, result, evaluations_to_save))
+
+    try:
+        with job_control.bind(job_id), job_telemetry.bind(telemetry):
+            run_bounded(
+                _session_tasks(agent_id, remaining, policies_for, llm_batch_size, collector, reuse_checks),
+                lambda task: _evaluate_session(agent_id, task, reuse_checks),
+                record,
+                concurrency=session_concurrency or JOB_SESSION_CONCURRENCY,
+                stop=lambda: lease_lost.is_set() or job_control.requested(job_id) is not None
+            )
+    finally:
+        buffer.flush()
+        _publish_progress(job_id)
+        if save_telemetry:
+            save_telemetry(telemetry.snapshot())
+
+    if lease_lost.is_set():
+        raise ChunkLeaseLost(f"Lease of job {job_id} items {items} lost")
+    job_control.check(job_id)
+    return progress['completed'], progress['failed']
+
+
+def _finish_job(job_id: str, agent_id: str, refresh_variants: bool):
+    """Refresh variants if requested and mark the job completed."""
+    error_msg = None
+    if refresh_variants:
+        db = SessionLocal()
+        try:
+            _compute_and_store_variants(db, agent_id=agent_id)
+        except Exception as e:
+            error_msg = f"Variants refresh failed: {str(e)}"
+        finally:
+            db.close()
+
+    # A stop request that arrived after the last session has nothing left to stop
+    job_control.clear(job_id)
+    update_job_status(
+        job_id,
+        status='completed',
+        completed_at=datetime.utcnow(),
+        error_message=error_msg,
+        control_action=None
+    )
+
+
+def stop_job(job_id: str, action: str) -> str:
+    """Settle a job that honored a cancel or pause request.
+
+    Returns:
+        The job's new status ('cancelled' or 'paused')
+    """
+    job_control.clear(job_id)
+    if action == CANCEL:
+        update_job_status(job_id, status='cancelled', control_action=None, completed_at=datetime.utcnow())
+        return 'cancelled'
+    update_job_status(job_id, status='paused', control_action=None)
+    return 'paused'
+
+
+def plan_delta(agent_id: str, memory_ids: List[str], policies_data: List[dict]) -> Dict[str, List[dict]]:
+    """Decide which (session, policy) pairs a delta job evaluates.
+
+    A pair is evaluated when it has no stored evaluation, or when the stored
+    session_hash / policy_hash differ from the session's messages and the
+    policy's current config. Stored hashes are read in chunks; every session
+    file is read and hashed once.
+
+    Returns:
+        {memory_id: policies to evaluate} for the sessions with work to do;
+        missing sessions are kept (with every policy) so the job reports them
+    """
+    policy_ids = [p['id'] for p in policies_data]
+    stored: Dict[str, Dict[int, tuple]] = {}
+    db = SessionLocal()
+    try:
+        for start in range(0, len(memory_ids), DELTA_PLAN_CHUNK):
+            rows = db.query(
+                ComplianceEvaluation.memory_id,
+                ComplianceEvaluation.policy_id,
+                ComplianceEvaluation.session_hash,
+                ComplianceEvaluation.policy_hash
+            ).filter(
+                ComplianceEvaluation.agent_id == agent_id,
+                ComplianceEvaluation.memory_id.in_(memory_ids[start:start + DELTA_PLAN_CHUNK]),
+                ComplianceEvaluation.policy_id.in_(policy_ids)
+            ).all()
+            for memory_id, policy_id, stored_session_hash, stored_policy_hash in rows:
+                stored.setdefault(memory_id, {})[policy_id] = (stored_session_hash, stored_policy_hash)
+    finally:
+        db.close()
+
+    policies_by_id = {p['id']: p for p in policies_data}
+    plan = {}
+    for memory_id in memory_ids:
+        memory = memory_loader.get_memory(agent_id=agent_id, memory_id=memory_id)
+        if not memory:
+            plan[memory_id] = policies_data
+            continue
+        stale = stale_policy_ids(session_hash(memory["messages"]), policies_data, stored.get(memory_id, {}))
+        if stale:
+            plan[memory_id] = [policies_by_id[policy_id] for policy_id in stale]
+    return plan
+
+
+def _collect_pending(
+    agent_id: str,
+    memory_ids: List[str],
+    policies_data: List[dict],
+    session_policies: Optional[Dict[str, List[dict]]] = None
+) -> BatchCollector:
+    """Run the collection pass over every memory: LLM validations are deferred, none are sent.
+
+    `session_policies` (delta jobs) limits each session to its planned policies.
+    """
+    collector = BatchCollector()
+    evaluator = PolicyEvaluator(collector=collector)
+    for memory_id in memory_ids:
+        if session_policies is not None and memory_id not in session_policies:
+            continue
+        memory = memory_loader.get_memory(agent_id=agent_id, memory_id=memory_id)
+        if not memory:
+            continue
+        try:
+            _evaluate_memory(evaluator, memory, session_policies[memory_id] if session_policies is not None else policies_data)
+        except Exception:
+            # Surfaced again (and recorded) during the evaluation pass
+            continue
+    return collector
+
+
+def _submit_offline_batches(job_id: str, agent_id: str, memory_ids: List[str], policies_data: List[dict], llm_batch_size: int) -> bool:
+    """Collect every LLM validation in the job and submit them to provider batch APIs.
+
+    The policies snapshot the prompts were built from is stored in the job's
+    input_data ('policies_data') with the batch state, so resume_batch_job
+    evaluates against the same policy versions even if a policy is edited
+    while the batch runs.
+
+    Returns:
+        True if the job is now waiting on provider batches, False if nothing needed submitting
+    """
+    collector = _collect_pending(agent_id, memory_ids, policies_data)
+    if collector.pending_count == 0:
+        return False
+
+    batch_state = submit_pending(collector, items_per_request=llm_batch_size)
+    batch_state['submitted_at'] = datetime.utcnow().isoformat()
+    db = SessionLocal()
+    try:
+        job = db.query(ProcessingJob).filter(ProcessingJob.id == job_id).first()
+        job.input_data = {**(job.input_data or {}), 'policies_data': policies_data}
+        job.status = 'waiting_on_batch'
+        job.batch_state = batch_state
+        event = job_event(job)
+        db.commit()
+        job_events.publish(event)
+    finally:
+        db.close()
+    return True
+
+
+def process_job_background(
+    job_id: str,
+    agent_id: str,
+    memory_ids: List[str],
+    policy_ids: List[int],
+    refresh_variants: bool,
+    llm_batch_size: int = 1,
+    mode: str = 'realtime',
+    session_concurrency: Optional[int] = None,
+    delta: bool = False
+):
+    """Background task to process compliance evaluations.
+
+    Plans the job: its sessions are split into chunks (job_chunks) that every
+    worker of every backend process claims and evaluates (see
+    claim_next_chunk and _run_job_chunk); whoever completes the last chunk
+    finishes the job. A job that was planned before (resumed or requeued)
+    keeps its chunks. Sessions are evaluated `session_concurrency` at a time
+    per chunk (see _run_evaluations).
+
+    Delta jobs (delta_evaluate) evaluate only the (session, policy) pairs
+    whose content hashes changed or were never stored (see plan_delta).
+
+    In 'offline_batch' mode all LLM validations are gathered first and submitted
+    through provider batch APIs; the job then suspends in 'waiting_on_batch'
+    until resume_batch_job() finds the results and finishes the evaluation.
+    """
+    telemetry = JobTelemetry(_load_job_telemetry(job_id))
+    try:
+        # Mark job as running
+        update_job_status(job_id, status='running', started_at=datetime.utcnow())
+
+        with job_telemetry.bind(telemetry), job_telemetry.stage('planning'):
+            policies_data = _load_policies_data(agent_id, policy_ids)
+
+            if mode == 'offline_batch' and _submit_offline_batches(job_id, agent_id, memory_ids, policies_data, llm_batch_size):
+                return
+
+            planned = _plan_chunks(job_id, agent_id, memory_ids, policies_data, delta)
+
+        if planned:
+            # Any idle worker, this one included, claims the chunks
+            job_pool.notify()
+            _settle_stop(job_id)
+        elif _claim_finish(job_id):
+            _finish_job(job_id, agent_id, refresh_variants)
+
+    except JobInterrupted as e:
+        stop_job(job_id, e.action)
+    except Exception as e:
+        update_job_status(
+            job_id,
+            status='failed',
+            error_message=str(e),
+            completed_at=datetime.utcnow()
+        )
+    finally:
+        _save_job_telemetry(job_id, telemetry.snapshot())
+
+
+def _load_job_telemetry(job_id: str) -> Optional[dict]:
+    db = SessionLocal()
+    try:
+        row = db.query(ProcessingJob.telemetry).filter(ProcessingJob.id == job_id).first()
+        return row.telemetry if row else None
+    finally:
+        db.close()
+
+
+def _save_job_telemetry(job_id: str, snapshot: dict):
+    """Store the telemetry of work done outside chunks (planning, offline batch evaluation) on the job row."""
+    db = SessionLocal()
+    try:
+        db.query(ProcessingJob).filter(ProcessingJob.id == job_id).update(
+            {ProcessingJob.telemetry: snapshot}, synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def _plan_chunks(job_id: str, agent_id: str, memory_ids: List[str], policies_data: List[dict], delta: bool) -> int:
+    """Split a job into chunks of JOB_CHUNK_SESSIONS sessions, once.
+
+    Sessions already in the job's checkpoint are left out. The chunks, the
+    policies snapshot every chunk evaluates against (input_data
+    'policies_data', so all chunks use the same policy versions), delta
+    jobs' total_items and counters matching the checkpoint are written in
+    one transaction.
+
+    The job's chunk_claimed_at is set whenever it is (re)planned: its chunks
+    start waiting to be claimed now, even for a resumed or requeued job
+    created long ago.
+
+    Returns:
+        Number of chunks not completed yet (0: nothing left to evaluate)
+    """
+    db = SessionLocal()
+    try:
+        planned = db.query(JobChunk.status).filter(JobChunk.job_id == job_id).all()
+        if planned:
+            db.query(ProcessingJob).filter(ProcessingJob.id == job_id).update(
+                {ProcessingJob.chunk_claimed_at: datetime.utcnow()}, synchronize_session=False
+            )
+            db.commit()
+    finally:
+        db.close()
+    if planned:
+        return sum(1 for (status,) in planned if status != 'completed')
+
+    session_policies = plan_delta(agent_id, memory_ids, policies_data) if delta else None
+    checkpoint = load_checkpoint(job_id)
+    todo = [
+        idx for idx, memory_id in enumerate(memory_ids)
+        if idx not in checkpoint and (session_policies is None or memory_id in session_policies)
+    ]
+    todo_set = set(todo)
+    ranges = split_work(len(memory_ids), todo)
+
+    db = SessionLocal()
+    try:
+        for chunk_index, (start, end) in enumerate(ranges):
+            db.add(JobChunk(
+                job_id=job_id,
+                chunk_index=chunk_index,
+                item_start=start,
+                item_end=end,
+                session_policy_ids=None if session_policies is None else {
+                    memory_ids[idx]: [p['id'] for p in session_policies[memory_ids[idx]]]
+                    for idx in range(start, end) if idx in todo_set
+                },
+                status='pending',
+                attempts=0
+            ))
+        job = db.query(ProcessingJob).filter(ProcessingJob.id == job_id).first()
+        job.input_data = {**(job.input_data or {}), 'policies_data': policies_data}
+        job.chunk_claimed_at = datetime.utcnow()
+        if delta:
+            job.total_items = len(checkpoint) + len(todo)
+        job.completed_items, job.failed_items = _checkpoint_counts(checkpoint)
+        event = job_event(job)
+        db.commit()
+        job_events.publish(event)
+    finally:
+        db.close()
+    return len(ranges)
+
+
+def _claim_finish(job_id: str) -> bool:
+    """True for exactly one caller once every chunk of a running job is completed.
+
+    The winner marks completed_at (a compare-and-set on the job row) and then
+    finishes the job with _finish_job.
+    """
+    db = SessionLocal()
+    try:
+        unfinished = db.query(JobChunk.id).filter(JobChunk.job_id == job_id, JobChunk.status != 'completed').first()
+        if unfinished:
+            return False
+        claimed = db.query(ProcessingJob).filter(
+            ProcessingJob.id == job_id,
+            ProcessingJob.status == 'running',
+            ProcessingJob.completed_at.is_(None)
+        ).update({ProcessingJob.completed_at: datetime.utcnow()}, synchronize_session=False)
+        db.commit()
+        return claimed == 1
+    finally:
+        db.close()
+
+
+def _settle_stop(job_id: str) -> Optional[str]:
+    """Settle a chunked job asked to stop once no worker holds a live lease on its chunks.
+
+    Chunks stop being claimed as soon as control_action is set; every worker
+    that stops a chunk calls this after releasing it, so the last one moves
+    the job to 'cancelled' or 'paused'. The recovery sweep calls it too, for
+    jobs whose chunks were not running when the request came in.
+
+    Returns:
+        The job's new status, or None if it is not settled (yet)
+    """
+    db = SessionLocal()
+    try:
+        job = db.query(ProcessingJob.control_action).filter(
+            ProcessingJob.id == job_id,
+            ProcessingJob.status == 'running'
+        ).first()
+        if not job or not job.control_action:
+            return None
+        chunks = db.query(JobChunk.status, JobChunk.lease_expires_at).filter(JobChunk.job_id == job_id).all()
+        # Not planned yet: the planner settles it once the chunks exist
+        if not chunks:
+            return None
+        now = datetime.utcnow()
+        if any(status == 'running' and lease_expires_at >= now for status, lease_expires_at in chunks):
+            return None
+        action = job.control_action
+    finally:
+        db.close()
+    return stop_job(job_id, action)
+
+
+def _update_chunk(chunk_id: int, worker_id: str, **updates) -> bool:
+    """Update a chunk only while `worker_id` still holds its lease."""
+    db = SessionLocal()
+    try:
+        changed = db.query(JobChunk).filter(
+            JobChunk.id == chunk_id,
+            JobChunk.worker_id == worker_id,
+            JobChunk.status == 'running'
+        ).update(updates, synchronize_session=False)
+        db.commit()
+        return changed == 1
+    finally:
+        db.close()
 
-router = APIRouter(prefix="/api/jobs", tags=["jobs"])
 
+def _run_job_chunk(job_id: str, input_data: dict):
+    """Queue handler for a claimed chunk: evaluate its sessions, then finish the job if it was the last one.
 
-def update_job_status(job_id: str, **updates):
-    """Update job status with a short-lived DB session."""
+    A stopped chunk goes back to pending (its finished sessions are in the
+    checkpoint) and the job is settled once no chunk is running. If the
+    lease was lost meanwhile (the worker stalled past JOB_STALE_SECONDS and
+    another one claimed the chunk), the worker stops writing at its next
+    flush and completing the chunk is left to the new owner.
+    """
+    chunk_id, worker_id = input_data['chunk_id'], input_data['worker_id']
     db = SessionLocal()
     try:
+        chunk = db.query(JobChunk).filter(JobChunk.id == chunk_id).first()
         job = db.query(ProcessingJob).filter(ProcessingJob.id == job_id).first()
-        if job:
-            for key, value in updates.items():
-                setattr(job, key, value)
-            db.commit()
+        items = range(chunk.item_start, chunk.item_end)
+        session_policy_ids = chunk.session_policy_ids
+        telemetry = JobTelemetry(chunk.telemetry)
+        job_input = dict(job.input_data or {})
+        delta = job.job_type == 'delta_evaluate'
     finally:
         db.close()
 
+    # Chunks are only claimed without a stop request: drop one this process kept from before a resume
+    job_control.clear(job_id)
 
-def process_job_background(job_id: str, agent_id: str, memory_ids: List[str], policy_ids: List[int], refresh_variants: bool):
-    """Background task to process compliance evaluations.
+    agent_id = job_input['agent_id']
+    policies_data = job_input['policies_data']
+    session_policies = None
+    if session_policy_ids is not None:
+        policies_by_id = {p['id']: p for p in policies_data}
+        session_policies = {
+            memory_id: [policies_by_id[policy_id] for policy_id in policy_ids]
+            for memory_id, policy_ids in session_policy_ids.items()
+        }
 
-    Uses short-lived DB sessions to avoid holding locks during LLM calls.
-    """
     try:
-        # Mark job as running
-        update_job_status(job_id, status='running', started_at=datetime.utcnow())
+        _run_evaluations(
+            job_id, agent_id, job_input['memory_ids'], policies_data,
+            llm_batch_size=job_input.get('llm_batch_size', 1),
+            session_concurrency=job_input.get('session_concurrency'),
+            session_policies=session_policies,
+            reuse_checks=delta,
+            items=items,
+            telemetry=telemetry,
+            save_telemetry=lambda snapshot: _update_chunk(chunk_id, worker_id, telemetry=snapshot),
+            lease=(chunk_id, worker_id)
+        )
+    except ChunkLeaseLost:
+        return
+    except JobInterrupted:
+        _update_chunk(chunk_id, worker_id, status='pending', worker_id=None, lease_expires_at=None)
+        _settle_stop(job_id)
+        return
+    except Exception as e:
+        _update_chunk(chunk_id, worker_id, status='pending', worker_id=None, lease_expires_at=None)
+        fail_job(job_id, str(e))
+        return
+
+    if _update_chunk(chunk_id, worker_id, status='completed', lease_expires_at=None, completed_at=datetime.utcnow()) \
+            and _claim_finish(job_id):
+        _finish_job(job_id, agent_id, job_input.get('refresh_variants', True))
+
+
+def resume_batch_job(job_id: str) -> str:
+    """Resume a job waiting on provider batches if its results are ready.
 
-        # Load policies once (short-lived session)
+    Applies the batch verdicts (items the batch could not answer are validated
+    synchronously), runs violation_logic and persists ComplianceEvaluation rows.
+    Sessions are evaluated against the policies snapshot stored at submit
+    time; jobs submitted before snapshots were stored reload the policies.
+
+    Returns:
+        The job status after this attempt
+    """
+    with _resume_lock:
         db = SessionLocal()
         try:
-            policies_data = []
-            policies = db.query(Policy).filter(Policy.id.in_(policy_ids), Policy.agent_id == agent_id).all() if policy_ids else \
-                       db.query(Policy).filter(Policy.enabled == True, Policy.agent_id == agent_id).all()
-            for p in policies:
-                policies_data.append({
-                    'id': p.id,
-                    'name': p.name,
-                    'description': p.description,
-                    'policy_type': p.policy_type,
-                    'config': p.config
-                })
+            job = db.query(ProcessingJob).filter(ProcessingJob.id == job_id).first()
+            if not job or job.status != 'waiting_on_batch':
+                return job.status if job else 'not_found'
+            input_data = dict(job.input_data or {})
+            batch_state = dict(job.batch_state or {})
+            priority = job.priority or BULK
+            telemetry = JobTelemetry(job.telemetry)
         finally:
             db.close()
 
-        evaluator = PolicyEvaluator()
-        results = []
-        failed_count = 0
+        try:
+            finished, verdicts = collect_results(batch_state)
+            if not finished:
+                return 'waiting_on_batch'
 
-        for idx, memory_id in enumerate(memory_ids):
-            try:
-                # Load memory from file (no DB needed)
-                memory = memory_loader.get_memory(agent_id=agent_id, memory_id=memory_id)
-                if not memory:
-                    results.append({
-                        "memory_id": memory_id,
-                        "status": "not_found",
-                        "error": "Memory not found"
-                    })
-                    failed_count += 1
-                else:
-                    evaluations_to_save = []
-
-                    for policy_data in policies_data:
-                        # Build config for evaluation
-                        config_with_metadata = {
-                            **policy_data['config'],
-                            'name': policy_data['name'],
-                            'description': policy_data['description']
-                        }
-
-                        # This is the slow LLM call - NO DB session held here
-                        is_compliant, details = evaluator.evaluate(
-                            memory["messages"],
-                            policy_data['policy_type'],
-                            config_with_metadata
-                        )
-
-                        evaluations_to_save.append({
-                            'memory_id': memory_id,
-                            'policy_id': policy_data['id'],
-                            'is_compliant': is_compliant,
-                            'violations': details
-                        })
-
-                    # Now save all evaluations with a short-lived session
-                    db = SessionLocal()
-                    try:
-                        for eval_data in evaluations_to_save:
-                            # Delete existing evaluation
-                            db.query(ComplianceEvaluation).filter(
-                                ComplianceEvaluation.memory_id == eval_data['memory_id'],
-                                ComplianceEvaluation.policy_id == eval_data['policy_id'],
-                                ComplianceEvaluation.agent_id == agent_id
-                            ).delete()
-
-                            # Save new evaluation
-                            evaluation = ComplianceEvaluation(
-                                agent_id=agent_id,
-                                memory_id=eval_data['memory_id'],
-                                policy_id=eval_data['policy_id'],
-                                is_compliant=eval_data['is_compliant'],
-                                violations=eval_data['violations']
-                            )
-                            db.add(evaluation)
-                        db.commit()
-                    finally:
-                        db.close()
-
-                    results.append({
-                        "memory_id": memory_id,
-                        "status": "success",
-                        "evaluations": len(evaluations_to_save)
-                    })
+            # Claim the job before evaluating so concurrent pollers skip it
+            update_job_status(job_id, status='running', heartbeat_at=datetime.utcnow())
+        except Exception as e:
+            update_job_status(job_id, status='failed', error_message=f"Batch results unavailable: {str(e)}", completed_at=datetime.utcnow())
+            return 'failed'
 
-                # Update job progress
-                update_job_status(job_id, completed_items=idx + 1, results=results, failed_items=failed_count)
+    try:
+        agent_id = input_data['agent_id']
+        collector = BatchCollector()
+        collector.load_verdicts(verdicts)
 
-            except Exception as e:
-                results.append({
-                    "memory_id": memory_id,
-                    "status": "error",
-                    "error": str(e)
-                })
-                failed_count += 1
-                update_job_status(job_id, failed_items=failed_count, results=results)
-
-        # Refresh variants if requested
-        error_msg = None
-        if refresh_variants:
-            db = SessionLocal()
-            try:
-                _compute_and_store_variants(db, agent_id=agent_id)
-            except Exception as e:
-                error_msg = f"Variants refresh failed: {str(e)}"
-            finally:
-                db.close()
+        with job_pool.track(job_id), bind_priority(priority):
+            completed, failed = _checkpoint_counts(load_checkpoint(job_id))
+            update_job_status(job_id, completed_items=completed, failed_items=failed)
+            policies_data = input_data.get('policies_data') or \
+                _load_policies_data(agent_id, input_data.get('policy_ids', []))
+            _run_evaluations(
+                job_id, agent_id, input_data['memory_ids'], policies_data,
+                collector=collector, session_concurrency=input_data.get('session_concurrency'),
+                telemetry=telemetry, save_telemetry=lambda snapshot: _save_job_telemetry(job_id, snapshot)
+            )
+            _finish_job(job_id, agent_id, input_data.get('refresh_variants', True))
+        return 'completed'
 
-        # Mark job as completed
-        update_job_status(
-            job_id,
-            status='completed',
-            completed_at=datetime.utcnow(),
-            results=results,
-            error_message=error_msg
-        )
+    except JobInterrupted as e:
+        return stop_job(job_id, e.action)
 
     except Exception as e:
         update_job_status(
@@ -168,14 +1179,333 @@ def process_job_background(job_id: str, agent_id: str, memory_ids: List[str], po
             error_message=str(e),
             completed_at=datetime.utcnow()
         )
+        return 'failed'
 
 
-@router.post("/submit", response_model=SubmitJobResponse)
-async def submit_job(
-    request: SubmitJobRequest,
-    db: Session = Depends(get_db)
-):
-    """Submit an async processing job for batch evaluation."""
+def poll_batch_jobs():
+    """Resume every job currently waiting on provider batches whose results are ready."""
+    db = SessionLocal()
+    try:
+        job_ids = [j.id for j in db.query(ProcessingJob.id).filter(ProcessingJob.status == 'waiting_on_batch').all()]
+    finally:
+        db.close()
+
+    for job_id in job_ids:
+        try:
+            resume_batch_job(job_id)
+        except Exception as e:
+            print(f"Warning: Failed to resume batch job {job_id}: {str(e)}")
+
+
+def start_batch_poller():
+    """Start a daemon thread polling jobs in 'waiting_on_batch' state."""
+    def run():
+        while True:
+            time.sleep(BATCH_POLL_INTERVAL_SECONDS)
+            poll_batch_jobs()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def _lane_rank(waiting_since):
+    """Sort key of a job's lane; work waiting since longer than JOB_PRIORITY_MAX_WAIT_SECONDS ranks as interactive.
+
+    Args:
+        waiting_since: Column holding when the work started waiting to be
+            claimed (NULL: no aging)
+    """
+    starved_before = datetime.utcnow() - timedelta(seconds=JOB_PRIORITY_MAX_WAIT_SECONDS)
+    return case(
+        (waiting_since < starved_before, 0),
+        else_=case(PRIORITY_RANK, value=ProcessingJob.priority, else_=PRIORITY_RANK[BULK])
+    )
+
+
+def claim_next_job(worker_id: str, lanes: Optional[tuple] = None) -> Optional[dict]:
+    """Atomically move the next pending job of `lanes` to 'running' for `worker_id`.
+
+    Jobs are claimed in lane order (interactive, bulk, nightly), oldest first
+    within a lane; a job pending longer than JOB_PRIORITY_MAX_WAIT_SECONDS
+    ranks as interactive so bulk and nightly work is never starved.
+
+    The UPDATE only matches while the row is still pending, so when several
+    workers race for the same job exactly one sees rowcount 1; the others
+    move on to the next candidate.
+    """
+    db = SessionLocal()
+    try:
+        query = db.query(ProcessingJob.id).filter(ProcessingJob.status == 'pending')
+        if lanes is not None:
+            query = query.filter(ProcessingJob.priority.in_(lanes))
+        candidates = query.order_by(_lane_rank(ProcessingJob.created_at), ProcessingJob.created_at).limit(5).all()
+
+        for (job_id,) in candidates:
+            now = datetime.utcnow()
+            claimed = db.query(ProcessingJob).filter(
+                ProcessingJob.id == job_id,
+                ProcessingJob.status == 'pending'
+            ).update({
+                ProcessingJob.status: 'running',
+                ProcessingJob.worker_id: worker_id,
+                ProcessingJob.heartbeat_at: now,
+                ProcessingJob.attempts: func.coalesce(ProcessingJob.attempts, 0) + 1
+            }, synchronize_session=False)
+            db.commit()
+            if claimed == 1:
+                job = db.query(ProcessingJob).filter(ProcessingJob.id == job_id).first()
+                job_events.publish(job_event(job))
+                return {'id': job.id, 'job_type': job.job_type, 'input_data': job.input_data or {}, 'priority': job.priority}
+        return None
+    finally:
+        db.close()
+
+
+def claim_next_chunk(worker_id: str, lanes: Optional[tuple] = None) -> Optional[dict]:
+    """Claim a chunk of a running job for `worker_id`: a pending one, or one whose lease expired.
+
+    Candidates are read with SELECT ... FOR UPDATE SKIP LOCKED, so on
+    Postgres the workers of every replica get different chunks without
+    waiting on each other's row locks. SQLite drops the clause (it has no
+    row locks, and serializes writes), and the compare-and-set UPDATE makes a
+    worker that lost a race move on to the next candidate: one code path for
+    both. Chunks are claimed in their job's lane order, then job age.
+
+    Aging is keyed on the job's chunk_claimed_at, not on its age: a bulk or
+    nightly job none of whose chunks was claimed for
+    JOB_PRIORITY_MAX_WAIT_SECONDS gets its next chunk claimed like an
+    interactive one, and that claim resets its wait. A long job that keeps
+    getting chunks claimed therefore never outranks interactive work.
+
+    Returns:
+        A queue entry of type CHUNK_JOB_TYPE for the chunk's job, or None
+    """
+    now = datetime.utcnow()
+    claimable = or_(
+        JobChunk.status == 'pending',
+        and_(
+            JobChunk.status == 'running',
+            JobChunk.lease_expires_at < now,
+            func.coalesce(JobChunk.attempts, 0) < JOB_MAX_ATTEMPTS
+        )
+    )
+    db = SessionLocal()
+    try:
+        query = db.query(JobChunk.id, JobChunk.job_id, ProcessingJob.priority).join(
+            ProcessingJob, ProcessingJob.id == JobChunk.job_id
+        ).filter(
+            ProcessingJob.status == 'running',
+            ProcessingJob.control_action.is_(None),
+            claimable
+        )
+        if lanes is not None:
+            query = query.filter(ProcessingJob.priority.in_(lanes))
+        candidates = query.order_by(_lane_rank(ProcessingJob.chunk_claimed_at), ProcessingJob.created_at, JobChunk.chunk_index) \
+            .limit(5).with_for_update(skip_locked=True, of=JobChunk).all()
+
+        for chunk_id, job_id, priority in candidates:
+            claimed = db.query(JobChunk).filter(JobChunk.id == chunk_id, claimable).update({
+                JobChunk.status: 'running',
+                JobChunk.worker_id: worker_id,
+                JobChunk.lease_expires_at: now + timedelta(seconds=JOB_STALE_SECONDS),
+                JobChunk.attempts: func.coalesce(JobChunk.attempts, 0) + 1
+            }, synchronize_session=False)
+            if claimed == 1:
+                db.query(ProcessingJob).filter(ProcessingJob.id == job_id).update(
+                    {ProcessingJob.chunk_claimed_at: now}, synchronize_session=False
+                )
+                db.commit()
+                return {
+                    'id': job_id,
+                    'job_type': CHUNK_JOB_TYPE,
+                    'input_data': {'chunk_id': chunk_id, 'worker_id': worker_id},
+                    'priority': priority
+                }
+        # Releases the candidates' row locks
+        db.commit()
+        return None
+    finally:
+        db.close()
+
+
+def claim_work(worker_id: str, lanes: Optional[tuple] = None) -> Optional[dict]:
+    """The pool's claim: plan the next pending job if there is one, otherwise evaluate a chunk."""
+    return claim_next_job(worker_id, lanes) or claim_next_chunk(worker_id, lanes)
+
+
+def heartbeat_jobs(job_ids: List[str]):
+    """Refresh the heartbeat of jobs this process is running, and the leases of its chunks.
+
+    Also picks up cancel/pause requests made through another backend process.
+    """
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        db.query(ProcessingJob).filter(
+            ProcessingJob.id.in_(job_ids),
+            ProcessingJob.status == 'running'
+        ).update({ProcessingJob.heartbeat_at: now}, synchronize_session=False)
+        db.query(JobChunk).filter(
+            JobChunk.worker_id.in_(list(job_pool.active_workers())),
+            JobChunk.status == 'running'
+        ).update({JobChunk.lease_expires_at: now + timedelta(seconds=JOB_STALE_SECONDS)}, synchronize_session=False)
+        db.commit()
+
+        requests = db.query(ProcessingJob.id, ProcessingJob.control_action).filter(
+            ProcessingJob.id.in_(job_ids),
+            ProcessingJob.control_action.isnot(None)
+        ).all()
+        for job_id, action in requests:
+            job_control.request(job_id, action)
+    finally:
+        db.close()
+
+
+def fail_job(job_id: str, message: str):
+    update_job_status(job_id, status='failed', error_message=message, completed_at=datetime.utcnow())
+
+
+def recover_stale_jobs(stale_after_seconds: float = JOB_STALE_SECONDS) -> int:
+    """Requeue 'running' jobs whose worker stopped heartbeating.
+
+    They resume from their checkpoint. A pending cancel or pause request is
+    applied instead. Offline batch jobs that already submitted provider
+    batches go back to 'waiting_on_batch' rather than resubmitting. Jobs claimed JOB_MAX_ATTEMPTS
+    times are failed instead of requeued, so a job that crashes the backend
+    cannot loop forever.
+
+    Planned jobs have no single worker: a chunk whose lease expired is simply
+    claimed again, and the job is failed once one of its chunks expired after
+    JOB_MAX_ATTEMPTS claims. Planned jobs asked to stop are settled here when
+    none of their chunks is running.
+
+    Returns:
+        Number of jobs requeued, failed or settled, plus chunks ready to be claimed again
+    """
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=stale_after_seconds)
+    planned = exists().where(JobChunk.job_id == ProcessingJob.id)
+    db = SessionLocal()
+    try:
+        stale = db.query(ProcessingJob).filter(
+            ProcessingJob.status == 'running',
+            or_(ProcessingJob.heartbeat_at.is_(None), ProcessingJob.heartbeat_at < cutoff),
+            ~planned
+        ).all()
+
+        for job in stale:
+            job.worker_id = None
+            if job.control_action == CANCEL:
+                job.status = 'cancelled'
+                job.completed_at = datetime.utcnow()
+            elif job.control_action == PAUSE:
+                job.status = 'paused'
+            elif job.batch_state:
+                job.status = 'waiting_on_batch'
+            elif (job.attempts or 0) >= JOB_MAX_ATTEMPTS:
+                job.status = 'failed'
+                job.error_message = f"Job abandoned after {job.attempts} attempts (worker stopped responding)"
+                job.completed_at = datetime.utcnow()
+            else:
+                job.status = 'pending'
+            job.control_action = None
+
+        expired = db.query(JobChunk.job_id, JobChunk.chunk_index, JobChunk.attempts).join(
+            ProcessingJob, ProcessingJob.id == JobChunk.job_id
+        ).filter(
+            ProcessingJob.status == 'running',
+            JobChunk.status == 'running',
+            JobChunk.lease_expires_at < now
+        ).all()
+        abandoned = {}
+        reclaimable = 0
+        for job_id, chunk_index, attempts in expired:
+            if (attempts or 0) >= JOB_MAX_ATTEMPTS:
+                abandoned.setdefault(job_id, f"Chunk {chunk_index} abandoned after {attempts} attempts (worker stopped responding)")
+            else:
+                reclaimable += 1
+        failed = db.query(ProcessingJob).filter(ProcessingJob.id.in_(list(abandoned))).all() if abandoned else []
+        for job in failed:
+            job.status = 'failed'
+            job.error_message = abandoned[job.id]
+            job.completed_at = now
+            job.control_action = None
+
+        stopping = [job_id for (job_id,) in db.query(ProcessingJob.id).filter(
+            ProcessingJob.status == 'running',
+            ProcessingJob.control_action.isnot(None),
+            planned
+        ).all() if job_id not in abandoned]
+
+        events = [job_event(job) for job in stale + failed]
+        db.commit()
+        for event in events:
+            job_events.publish(event)
+    finally:
+        db.close()
+
+    settled = sum(1 for job_id in stopping if _settle_stop(job_id))
+    return len(stale) + len(failed) + settled + reclaimable
+
+
+def _run_batch_evaluate_job(job_id: str, input_data: dict):
+    process_job_background(
+        job_id,
+        input_data['agent_id'],
+        input_data['memory_ids'],
+        input_data['policy_ids'],
+        input_data.get('refresh_variants', True),
+        input_data.get('llm_batch_size', 1),
+        input_data.get('mode', 'realtime'),
+        input_data.get('session_concurrency')
+    )
+
+
+def _run_delta_evaluate_job(job_id: str, input_data: dict):
+    process_job_background(
+        job_id,
+        input_data['agent_id'],
+        input_data['memory_ids'],
+        input_data['policy_ids'],
+        input_data.get('refresh_variants', True),
+        input_data.get('llm_batch_size', 1),
+        session_concurrency=input_data.get('session_concurrency'),
+        delta=True
+    )
+
+
+# Global instance
+job_pool = JobWorkerPool(
+    size=JOB_WORKERS,
+    claim=claim_work,
+    heartbeat=heartbeat_jobs,
+    fail=fail_job,
+    recover=recover_stale_jobs,
+    reserved=JOB_INTERACTIVE_WORKERS
+)
+job_pool.register('batch_evaluate', _run_batch_evaluate_job)
+job_pool.register('delta_evaluate', _run_delta_evaluate_job)
+job_pool.register(CHUNK_JOB_TYPE, _run_job_chunk)
+
+
+def start_job_workers():
+    """Recover jobs orphaned by a previous run, then start the worker pool."""
+    recovered = recover_stale_jobs()
+    if recovered:
+        print(f"Recovered {recovered} orphaned job(s)")
+    job_pool.start()
+
+
+def _resolve_job_inputs(request: SubmitJobRequest, db: Session):
+    """Validate a job request's sessions and policies.
+
+    Returns:
+        Tuple of (valid_memory_ids, policy_ids)
+    """
+    if request.job_type == 'delta_evaluate' and request.mode == 'offline_batch':
+        raise HTTPException(status_code=400, detail="delta_evaluate jobs run in realtime mode only")
+
     # Validate memory_ids
     valid_memory_ids = []
     for memory_id in request.memory_ids:
@@ -203,13 +1533,65 @@ async def submit_job(
     if not policy_ids:
         raise HTTPException(status_code=400, detail="No policies available for evaluation")
 
+    return valid_memory_ids, policy_ids
+
+
+@router.post("/estimate", response_model=JobEstimate)
+def estimate_job(
+    request: SubmitJobRequest,
+    db: Session = Depends(get_db)
+):
+    """Estimate LLM calls, tokens, cost and wall time for a job before submitting it.
+
+    Runs the job's collection pass without calling any LLM, so first-stage calls are
+    counted exactly and values already in the verdict cache are excluded. Cascade
+    escalations and tie-break judges depend on verdicts not made yet: they are only
+    bounded, by max_follow_up_calls. Defined as a sync endpoint
+    because it evaluates every session's deterministic checks.
+    """
+    valid_memory_ids, policy_ids = _resolve_job_inputs(request, db)
+    policies_data = _load_policies_data(request.agent_id, policy_ids)
+
+    started = time.monotonic()
+    session_policies = plan_delta(request.agent_id, valid_memory_ids, policies_data) \
+        if request.job_type == 'delta_evaluate' else None
+    collector = _collect_pending(request.agent_id, valid_memory_ids, policies_data, session_policies)
+    collect_seconds = time.monotonic() - started
+
+    return estimate_collected(
+        collector,
+        session_count=len(session_policies) if session_policies is not None else len(valid_memory_ids),
+        llm_batch_size=request.llm_batch_size or 1,
+        mode=request.mode,
+        collect_seconds=collect_seconds
+    )
+
+
+@router.post("/submit", response_model=SubmitJobResponse)
+async def submit_job(
+    request: SubmitJobRequest,
+    db: Session = Depends(get_db)
+):
+    """Submit an async processing job for batch evaluation.
+
+    A 'delta_evaluate' job evaluates only the pairs whose session content or
+    policy config changed since they were last evaluated; its total_items is
+    narrowed to the changed sessions once the worker has planned it.
+
+    `priority` picks the job's lane: interactive jobs are claimed first (and
+    by workers reserved for them) and get the LLM capacity held back from
+    bulk and nightly jobs.
+    """
+    valid_memory_ids, policy_ids = _resolve_job_inputs(request, db)
+
     # Create job record
     job_id = str(uuid.uuid4())
     job = ProcessingJob(
         id=job_id,
         agent_id=request.agent_id,
         status='pending',
-        job_type='batch_evaluate',
+        job_type=request.job_type,
+        priority=request.priority,
         total_items=len(valid_memory_ids),
         completed_items=0,
         failed_items=0,
@@ -217,46 +1599,64 @@ async def submit_job(
             'agent_id': request.agent_id,
             'memory_ids': valid_memory_ids,
             'policy_ids': policy_ids,
-            'refresh_variants': request.refresh_variants
+            'refresh_variants': request.refresh_variants,
+            'llm_batch_size': request.llm_batch_size or 1,
+            'mode': request.mode,
+            'session_concurrency': request.session_concurrency
         },
         results=[]
     )
     db.add(job)
     db.commit()
+    job_events.publish(job_event(job))
 
-    # Start background processing in a separate thread (non-blocking)
-    thread = threading.Thread(
-        target=process_job_background,
-        args=(job_id, request.agent_id, valid_memory_ids, policy_ids, request.refresh_variants),
-        daemon=True
-    )
-    thread.start()
+    # The pending row is the queue entry: wake a worker to claim it
+    job_pool.notify()
 
     return SubmitJobResponse(
         job_id=job_id,
         status='pending',
         total_items=len(valid_memory_ids),
-        message=f"Job submitted. Processing {len(valid_memory_ids)} sessions against {len(policy_ids)} policies."
+        message=(
+            f"Job submitted. Checking {len(valid_memory_ids)} sessions against {len(policy_ids)} policies for changes."
+            if request.job_type == 'delta_evaluate' else
+            f"Job submitted. Processing {len(valid_memory_ids)} sessions against {len(policy_ids)} policies."
+        )
     )
 
 
-@router.get("/{job_id}/status", response_model=JobStatus)
-async def get_job_status(job_id: str, db: Session = Depends(get_db)):
-    """Poll for job status."""
+@router.post("/{job_id}/resume-batch", response_model=JobStatus)
+async def resume_batch(job_id: str, db: Session = Depends(get_db)):
+    """Check provider batch results for a job in 'waiting_on_batch' and resume it if ready.
+
+    Resuming evaluates every session, so it runs in the background; poll /status afterwards.
+    """
     job = db.query(ProcessingJob).filter(ProcessingJob.id == job_id).first()
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
+    if job.status != 'waiting_on_batch':
+        raise HTTPException(status_code=400, detail=f"Job is not waiting on a provider batch (status: {job.status})")
 
+    thread = threading.Thread(target=resume_batch_job, args=(job_id,), daemon=True)
+    thread.start()
+
+    return await get_job_status(job_id, db)
+
+
+def _job_status(job: ProcessingJob) -> JobStatus:
     progress_percent = (job.completed_items / job.total_items * 100) if job.total_items > 0 else 0
 
     return JobStatus(
         id=job.id,
+        agent_id=job.agent_id,
         status=job.status,
         job_type=job.job_type,
         total_items=job.total_items,
         completed_items=job.completed_items,
         failed_items=job.failed_items,
         progress_percent=round(progress_percent, 1),
+        control_action=job.control_action,
+        priority=job.priority or BULK,
         error_message=job.error_message,
         created_at=job.created_at,
         started_at=job.started_at,
@@ -264,13 +1664,241 @@ async def get_job_status(job_id: str, db: Session = Depends(get_db)):
     )
 
 
+def _get_job_or_404(db: Session, job_id: str) -> ProcessingJob:
+    job = db.query(ProcessingJob).filter(ProcessingJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+def _transition(db: Session, job_id: str, from_statuses: List[str], **updates) -> bool:
+    """Atomically update a job only while it is in one of `from_statuses` (races with workers claiming it)."""
+    changed = db.query(ProcessingJob).filter(
+        ProcessingJob.id == job_id,
+        ProcessingJob.status.in_(from_statuses)
+    ).update(updates, synchronize_session=False)
+    db.commit()
+    return changed == 1
+
+
+def _publish_current(db: Session, job_id: str) -> JobStatus:
+    """Re-read a job after a conditional update and publish its status."""
+    db.expire_all()
+    status = _job_status(_get_job_or_404(db, job_id))
+    job_events.publish(status.model_dump(mode='json'))
+    return status
+
+
+def _request_stop(db: Session, job_id: str, action: str) -> bool:
+    """Ask a running job to stop; the worker honors it between sessions or before its next LLM call."""
+    if not _transition(db, job_id, ['running'], control_action=action):
+        return False
+    job_control.request(job_id, action)
+    # A planned job with no chunk running has nobody to honor it: settle it now
+    _settle_stop(job_id)
+    return True
+
+
+@router.post("/{job_id}/cancel", response_model=JobStatus)
+async def cancel_job(job_id: str, db: Session = Depends(get_db)):
+    """Cancel a job.
+
+    Jobs not yet running (pending, paused, waiting on a provider batch) are
+    cancelled immediately. A running job stops cooperatively: sessions in
+    flight finish and are saved, then the job moves to 'cancelled'.
+    """
+    job = _get_job_or_404(db, job_id)
+    stoppable = ['pending', 'paused', 'waiting_on_batch']
+    if not _transition(db, job_id, stoppable, status='cancelled', control_action=None, completed_at=datetime.utcnow()) \
+            and not _request_stop(db, job_id, CANCEL):
+        raise HTTPException(status_code=400, detail=f"Job cannot be cancelled (status: {job.status})")
+
+    return _publish_current(db, job_id)
+
+
+@router.post("/{job_id}/pause", response_model=JobStatus)
+async def pause_job(job_id: str, db: Session = Depends(get_db)):
+    """Pause a job. A running job checkpoints the sessions it finished and moves to 'paused'."""
+    job = _get_job_or_404(db, job_id)
+    if not _transition(db, job_id, ['pending'], status='paused') and not _request_stop(db, job_id, PAUSE):
+        raise HTTPException(status_code=400, detail=f"Job cannot be paused (status: {job.status})")
+
+    return _publish_current(db, job_id)
+
+
+@router.post("/{job_id}/resume", response_model=JobStatus)
+async def resume_job(job_id: str, db: Session = Depends(get_db)):
+    """Resume a paused job from its checkpoint; sessions already evaluated are not evaluated again.
+
+    Offline batch jobs go back to waiting on their provider batches.
+    """
+    job = _get_job_or_404(db, job_id)
+    next_status = 'waiting_on_batch' if job.batch_state else 'pending'
+    if not _transition(db, job_id, ['paused'], status=next_status, control_action=None):
+        raise HTTPException(status_code=400, detail=f"Job is not paused (status: {job.status})")
+
+    job_control.clear(job_id)
+    job_pool.notify()
+
+    return _publish_current(db, job_id)
+
+
+def _job_telemetry(db: Session, job: ProcessingJob) -> tuple:
+    """The job's merged telemetry snapshot (job row and every chunk), and its chunks."""
+    chunks = db.query(JobChunk).filter(JobChunk.job_id == job.id).order_by(JobChunk.chunk_index).all()
+    return job_telemetry.merge_snapshots([job.telemetry] + [chunk.telemetry for chunk in chunks]), chunks
+
+
+@router.get("/{job_id}/status", response_model=JobStatus)
+async def get_job_status(job_id: str, db: Session = Depends(get_db)):
+    """Poll for job status, with a telemetry summary (throughput, latency percentiles, cache hit rates).
+
+    Prefer /{job_id}/events to follow progress: it pushes changes without DB
+    reads, but carries no telemetry.
+    """
+    job = _get_job_or_404(db, job_id)
+    snapshot, _ = _job_telemetry(db, job)
+    return _job_status(job).model_copy(update={'telemetry': JobTelemetrySummary(**job_telemetry.summarize(snapshot))})
+
+
+@router.get("/{job_id}/report", response_model=JobReport)
+async def get_job_report(job_id: str, db: Session = Depends(get_db)):
+    """Performance report of a job: session and LLM latency histograms, time per stage,
+    per-model LLM latency, cache hit rates and the throughput of every chunk.
+
+    Telemetry is stored every JOB_TELEMETRY_INTERVAL_SECONDS while the job
+    runs, so a running job's report trails its progress slightly.
+    """
+    job = _get_job_or_404(db, job_id)
+    snapshot, chunks = _job_telemetry(db, job)
+    chunk_reports = []
+    for chunk in chunks:
+        summary = job_telemetry.summarize(job_telemetry.merge_snapshots([chunk.telemetry]))
+        chunk_reports.append({
+            'chunk_index': chunk.chunk_index,
+            'item_start': chunk.item_start,
+            'item_end': chunk.item_end,
+            'status': chunk.status,
+            'worker_id': chunk.worker_id,
+            'attempts': chunk.attempts or 0,
+            'sessions': summary['sessions'],
+            'sessions_per_second': summary['sessions_per_second'],
+            'session_p95_seconds': summary['session_latency']['p95_seconds']
+        })
+    return JobReport(
+        id=job.id,
+        status=job.status,
+        job_type=job.job_type,
+        chunks=chunk_reports,
+        **job_telemetry.report(snapshot)
+    )
+
+
+def _read_job_events(agent_id: Optional[str] = None, job_id: Optional[str] = None) -> List[dict]:
+    """Current status of one job, or of an agent's unfinished jobs, read once when a stream opens."""
+    db = SessionLocal()
+    try:
+        query = db.query(ProcessingJob)
+        if job_id is not None:
+            query = query.filter(ProcessingJob.id == job_id)
+        else:
+            query = query.filter(
+                ProcessingJob.agent_id == agent_id,
+                ProcessingJob.status.notin_(TERMINAL_STATUSES)
+            )
+        return [job_event(job) for job in query.order_by(ProcessingJob.created_at).all()]
+    finally:
+        db.close()
+
+
+async def _job_event_stream(request: Request, until_terminal: bool, agent_id: Optional[str] = None, job_id: Optional[str] = None):
+    """Server-sent events: the current status, then every change published by the workers."""
+    with job_events.subscribe(agent_id=agent_id, job_id=job_id) as subscription:
+        # Read after subscribing, so a change made in between is not missed
+        events = await run_in_threadpool(_read_job_events, agent_id, job_id)
+        while True:
+            for event in events:
+                yield f"event: job\ndata: {json.dumps(event)}\n\n"
+                if until_terminal and event['status'] in TERMINAL_STATUSES:
+                    return
+            if await request.is_disconnected():
+                return
+            events = await subscription.get(timeout=JOB_EVENTS_KEEPALIVE_SECONDS)
+            if not events:
+                yield ": keepalive\n\n"
+
+
+_EVENT_STREAM_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+
+@router.get("/{job_id}/events")
+async def stream_job_events(job_id: str, request: Request):
+    """Stream a job's status as server-sent events until it completes, fails, is cancelled or deleted.
+
+    Each `job` event carries a JobStatus; a deleted job's last event only has
+    id, agent_id and status 'deleted'.
+    """
+    if job_events.latest(job_id) is None and not await run_in_threadpool(_read_job_events, None, job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return StreamingResponse(
+        _job_event_stream(request, until_terminal=True, job_id=job_id),
+        media_type="text/event-stream",
+        headers=_EVENT_STREAM_HEADERS
+    )
+
+
+@router.get("/events")
+async def stream_agent_job_events(request: Request, agent_id: str):
+    """Stream the status of every job of an agent as server-sent events on one connection.
+
+    Starts with the agent's unfinished jobs, then sends a `job` event whenever
+    any of its jobs changes, including jobs submitted after the stream opened.
+    """
+    return StreamingResponse(
+        _job_event_stream(request, until_terminal=False, agent_id=agent_id),
+        media_type="text/event-stream",
+        headers=_EVENT_STREAM_HEADERS
+    )
+
+
+def _job_items_query(db: Session, job_id: str, status: Optional[str] = None):
+    query = db.query(JobItem).filter(JobItem.job_id == job_id)
+    if status:
+        query = query.filter(JobItem.status == status)
+    return query
+
+
 @router.get("/{job_id}/result", response_model=JobResult)
-async def get_job_result(job_id: str, db: Session = Depends(get_db)):
-    """Get full job results (typically after completion)."""
+async def get_job_result(
+    job_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(RESULT_PAGE_SIZE, ge=1, le=RESULT_MAX_PAGE_SIZE),
+    status: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Get a page of job results in item order (typically after completion).
+
+    Results are read from job_items; follow next_offset until it is null, or
+    use /items to stream every result. `status` filters items (e.g. 'error').
+    Jobs from before job_items return their stored results JSON.
+    """
     job = db.query(ProcessingJob).filter(ProcessingJob.id == job_id).first()
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
 
+    has_items = db.query(JobItem.id).filter(JobItem.job_id == job_id).first() is not None
+    if has_items or not job.results:
+        items = _job_items_query(db, job_id, status).order_by(JobItem.item_index, JobItem.id) \
+            .offset(offset).limit(limit + 1).all()
+        results = [item.result for item in items[:limit]]
+        has_more = len(items) > limit
+    else:
+        # Legacy job: results were rewritten into processing_jobs.results
+        legacy = [r for r in job.results if not status or r.get('status') == status]
+        results = legacy[offset:offset + limit]
+        has_more = len(legacy) > offset + limit
+
     return JobResult(
         id=job.id,
         status=job.status,
@@ -278,7 +1906,9 @@ async def get_job_result(job_id: str, db: Session = Depends(get_db)):
         total_items=job.total_items,
         completed_items=job.completed_items,
         failed_items=job.failed_items,
-        results=job.results or [],
+        results=results,
+        offset=offset,
+        next_offset=offset + limit if has_more else None,
         error_message=job.error_message,
         created_at=job.created_at,
         started_at=job.started_at,
@@ -286,6 +1916,128 @@ async def get_job_result(job_id: str, db: Session = Depends(get_db)):
     )
 
 
+@router.get("/{job_id}/dead-letters", response_model=JobDeadLetters)
+async def get_dead_letters(
+    job_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(RESULT_PAGE_SIZE, ge=1, le=RESULT_MAX_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
+    """A page of the job's dead letters: items that failed permanently or on every retry.
+
+    Each carries its error, error_class (transient | permanent) and the
+    attempts made. POST /{job_id}/retry-failed evaluates them again, along
+    with the job's deferred items (listed by /result?status=deferred).
+    """
+    job = _get_job_or_404(db, job_id)
+    query = _job_items_query(db, job_id).filter(JobItem.status.in_(FAILED_ITEM_STATUSES))
+    total = query.count()
+    items = query.order_by(JobItem.item_index, JobItem.id).offset(offset).limit(limit).all()
+    return JobDeadLetters(
+        id=job.id,
+        status=job.status,
+        total=total,
+        items=[
+            DeadLetter(
+                item_index=item.item_index,
+                memory_id=item.memory_id,
+                status=item.status,
+                error=(item.result or {}).get('error'),
+                error_class=(item.result or {}).get('error_class', PERMANENT),
+                attempts=(item.result or {}).get('attempts', 1)
+            )
+            for item in items
+        ],
+        offset=offset,
+        next_offset=offset + limit if offset + limit < total else None
+    )
+
+
+@router.post("/{job_id}/retry-failed", response_model=JobStatus)
+async def retry_failed_items(job_id: str, db: Session = Depends(get_db)):
+    """Run a finished evaluation job again for its dead letters and deferred items only.
+
+    The job's failed items, and its deferred ones (sessions with checks that
+    timed out or hit an open circuit, whose previous verdicts were kept), are
+    removed from its checkpoint and the job is requeued with its counters
+    reduced accordingly. Planning it again
+    chunks only the sessions missing from the checkpoint, so the sessions
+    that succeeded are neither evaluated nor paid for again; a cancelled
+    job also evaluates the sessions it never reached. Offline batch jobs
+    retry in realtime mode.
+    """
+    job = _get_job_or_404(db, job_id)
+    if job.job_type not in ('batch_evaluate', 'delta_evaluate'):
+        raise HTTPException(status_code=400, detail=f"Jobs of type '{job.job_type}' cannot retry items")
+    if job.status not in RETRYABLE_JOB_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Job has not finished (status: {job.status})")
+
+    # One transaction: a worker claiming the requeued job must not see the old checkpoint
+    retried = _job_items_query(db, job_id).filter(JobItem.status.in_(RETRY_ITEM_STATUSES))
+    removed_failed = retried.filter(JobItem.status.in_(FAILED_ITEM_STATUSES)).count()
+    removed = retried.delete(synchronize_session=False)
+    if not removed:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Job has no failed or deferred items")
+    changed = db.query(ProcessingJob).filter(
+        ProcessingJob.id == job_id,
+        ProcessingJob.status.in_(RETRYABLE_JOB_STATUSES)
+    ).update({
+        ProcessingJob.status: 'pending',
+        ProcessingJob.completed_items: ProcessingJob.completed_items - removed,
+        ProcessingJob.failed_items: ProcessingJob.failed_items - removed_failed,
+        ProcessingJob.input_data: {**(job.input_data or {}), 'mode': 'realtime'},
+        ProcessingJob.batch_state: None,
+        ProcessingJob.error_message: None,
+        ProcessingJob.control_action: None,
+        ProcessingJob.completed_at: None,
+        ProcessingJob.worker_id: None,
+        ProcessingJob.heartbeat_at: None,
+        ProcessingJob.attempts: 0
+    }, synchronize_session=False)
+    if changed != 1:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Job changed while retrying its failed items")
+    db.query(JobChunk).filter(JobChunk.job_id == job_id).delete(synchronize_session=False)
+    db.commit()
+
+    job_control.clear(job_id)
+    job_pool.notify()
+
+    return _publish_current(db, job_id)
+
+
+@router.get("/{job_id}/items")
+def stream_job_items(job_id: str, status: Optional[str] = None, db: Session = Depends(get_db)):
+    """Stream every job result as newline-delimited JSON, in item order.
+
+    Reads job_items in pages with its own short-lived sessions, so memory use
+    stays flat however many items the job has.
+    """
+    if not db.query(ProcessingJob.id).filter(ProcessingJob.id == job_id).first():
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    def generate():
+        last = (-1, 0)
+        while True:
+            page_db = SessionLocal()
+            try:
+                items = _job_items_query(page_db, job_id, status).filter(
+                    or_(JobItem.item_index > last[0], and_(JobItem.item_index == last[0], JobItem.id > last[1]))
+                ).order_by(JobItem.item_index, JobItem.id).limit(RESULT_PAGE_SIZE).all()
+                rows = [(item.item_index, item.id, item.result) for item in items]
+            finally:
+                page_db.close()
+
+            for item_index, item_id, result in rows:
+                yield json.dumps(result) + "\n"
+            if len(rows) < RESULT_PAGE_SIZE:
+                return
+            last = rows[-1][:2]
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
 @router.get("/", response_model=List[JobStatus])
 async def list_jobs(
     status: str = None,
@@ -300,24 +2052,7 @@ async def list_jobs(
 
     jobs = query.order_by(ProcessingJob.created_at.desc()).limit(limit).all()
 
-    results = []
-    for job in jobs:
-        progress_percent = (job.completed_items / job.total_items * 100) if job.total_items > 0 else 0
-        results.append(JobStatus(
-            id=job.id,
-            status=job.status,
-            job_type=job.job_type,
-            total_items=job.total_items,
-            completed_items=job.completed_items,
-            failed_items=job.failed_items,
-            progress_percent=round(progress_percent, 1),
-            error_message=job.error_message,
-            created_at=job.created_at,
-            started_at=job.started_at,
-            completed_at=job.completed_at
-        ))
-
-    return results
+    return [_job_status(job) for job in jobs]
 
 
 @router.delete("/{job_id}")
@@ -328,9 +2063,13 @@ async def delete_job(job_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Job not found")
 
     if job.status == 'running':
-        raise HTTPException(status_code=400, detail="Cannot delete a running job")
+        raise HTTPException(status_code=400, detail="Cannot delete a running job; cancel it first")
 
+    agent_id = job.agent_id
+    db.query(JobItem).filter(JobItem.job_id == job_id).delete()
+    db.query(JobChunk).filter(JobChunk.job_id == job_id).delete()
     db.delete(job)
     db.commit()
+    job_events.publish({'id': job_id, 'agent_id': agent_id, 'status': 'deleted'})
 
     return {"message": "Job deleted", "job_id": job_id}
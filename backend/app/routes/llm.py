@@ -0,0 +1,35 @@
+"""
+LLM infrastructure routes.
+
+Exposes process-wide LLM state shared by checks and generators: rate
+limiter, circuit breakers, verdict cache and normalization counters.
+"""
+from fastapi import APIRouter
+
+from app.services.llm_rate_limiter import rate_limiter
+from app.services.llm_resilience import resilient_caller
+from app.services.llm_batching import verdict_cache
+from app.services.llm_normalization import normalization_stats
+
+router = APIRouter(prefix="/api/llm", tags=["llm"])
+
+
+@router.get("/limits")
+async def get_llm_limits():
+    """Current per-provider/model limits, adaptive concurrency, in-flight calls and queue depth."""
+    return rate_limiter.snapshot()
+
+
+@router.get("/health")
+async def get_llm_health():
+    """Per-model circuit breaker state, timeouts, hedged requests and p95 latency."""
+    return resilient_caller.snapshot()
+
+
+@router.get("/cache")
+async def get_llm_cache_stats():
+    """Verdict cache size/hit counts and normalized-input collapse and drift counters."""
+    return {
+        "verdict_cache": verdict_cache.stats(),
+        "normalization": normalization_stats.snapshot()
+    }
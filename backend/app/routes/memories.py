@@ -6,6 +6,7 @@ from datetime import datetime
 from app.database import get_db
 from app.models import Policy, ComplianceEvaluation, AgentVariant, SessionStatus
 from app.services.memory_loader import memory_loader
+from app.services.content_hash import session_hash, policy_hash
 from app.schemas import ResolveSessionRequest
 
 router = APIRouter(prefix="/api/memories", tags=["memories"])
@@ -72,16 +73,36 @@ def _format_metadata(raw_metadata: Optional[Dict[str, Any]]) -> Optional[Dict[st
     return result
 
 
-def _evaluation_stale(enabled_policies: List[Policy], evaluations: List[ComplianceEvaluation]) -> bool:
+def _policy_hashes(policies: List[Policy]) -> Dict[int, str]:
+    return {p.id: policy_hash(p.policy_type, p.config) for p in policies}
+
+
+def _evaluation_stale(
+    enabled_policies: List[Policy],
+    evaluations: List[ComplianceEvaluation],
+    messages: List[dict],
+    policy_hashes: Dict[int, str]
+) -> bool:
     """
-    Returns True if any enabled policy was updated after the last evaluation for that policy.
+    Returns True if any enabled policy's evaluation no longer matches its inputs.
+
+    Evaluations that store content hashes are stale when the session's messages
+    or the policy's type/config changed, the same rule delta_evaluate jobs use;
+    editing a policy's name, description or severity does not make them stale.
+    Older evaluations without hashes fall back to the policy's updated_at.
     """
     eval_map = {e.policy_id: e for e in evaluations}
+    memory_hash = None
     for policy in enabled_policies:
         ev = eval_map.get(policy.id)
         if not ev:
             continue  # handled elsewhere as not fully evaluated
-        if policy.updated_at and ev.evaluated_at and policy.updated_at > ev.evaluated_at:
+        if ev.session_hash and ev.policy_hash:
+            if memory_hash is None:
+                memory_hash = session_hash(messages)
+            if (ev.session_hash, ev.policy_hash) != (memory_hash, policy_hashes[policy.id]):
+                return True
+        elif policy.updated_at and ev.evaluated_at and policy.updated_at > ev.evaluated_at:
             return True
     return False
 
@@ -97,6 +118,7 @@ async def list_memories(agent_id: str, db: Session = Depends(get_db)) -> List[Di
         Policy.agent_id == agent_id
     ).all()
     enabled_policy_ids = {p.id for p in enabled_policies}
+    policy_hashes = _policy_hashes(enabled_policies)
 
     # Get all variants to check which memories are in variant patterns (filtered by agent)
     variants = db.query(AgentVariant).filter(AgentVariant.agent_id == agent_id).all()
@@ -120,8 +142,8 @@ async def list_memories(agent_id: str, db: Session = Depends(get_db)) -> List[Di
         ).all()
         evaluated_policy_ids = {e.policy_id for e in evals}
 
-        # Determine staleness (policy updated after evaluation)
-        stale = _evaluation_stale(enabled_policies, evals) if evals else False
+        # Determine staleness (session or policy changed since evaluation)
+        stale = _evaluation_stale(enabled_policies, evals, m["messages"], policy_hashes) if evals else False
 
         # Determine if fully evaluated (all enabled policies) and fresh
         all_policies_evaluated = enabled_policy_ids.issubset(evaluated_policy_ids) if enabled_policy_ids else False
@@ -178,7 +200,7 @@ async def get_memory(agent_id: str, memory_id: str, db: Session = Depends(get_db
         ComplianceEvaluation.agent_id == agent_id
     ).all()
     evaluated_policy_ids = {e.policy_id for e in evals}
-    stale = _evaluation_stale(enabled_policies, evals) if evals else False
+    stale = _evaluation_stale(enabled_policies, evals, memory["messages"], _policy_hashes(enabled_policies)) if evals else False
     has_compliance = enabled_policy_ids.issubset(evaluated_policy_ids) and not stale if enabled_policy_ids else False
 
     # Check variants (filtered by agent)
@@ -1,15 +1,43 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import or_, and_
 from sqlalchemy.orm import Session
 from typing import List
 
 from app.database import get_db
-from app.models import Policy, ComplianceEvaluation
+from app.models import Policy, PolicyVersion, ComplianceEvaluation
 from app.services.memory_loader import memory_loader
-from app.schemas import PolicyCreate, PolicyUpdate, PolicyResponse
+from app.services.content_hash import policy_hash
+from app.schemas import PolicyCreate, PolicyUpdate, PolicyResponse, PolicyVersionResponse
 
 router = APIRouter(prefix="/api/policies", tags=["policies"])
 
 
+def current_policy_version(db: Session, policy: Policy) -> PolicyVersion:
+    """The version matching the policy's current config, recorded if it is new.
+
+    Versions are immutable: a config whose hash differs from the latest
+    version becomes a new version; an identical config (including one only
+    reformatted) reuses it. Flushed, not committed.
+    """
+    config_hash = policy_hash(policy.policy_type, policy.config)
+    latest = db.query(PolicyVersion).filter(
+        PolicyVersion.policy_id == policy.id
+    ).order_by(PolicyVersion.version.desc()).first()
+    if latest and latest.config_hash == config_hash:
+        return latest
+
+    version = PolicyVersion(
+        policy_id=policy.id,
+        version=(latest.version + 1) if latest else 1,
+        policy_type=policy.policy_type,
+        config=policy.config,
+        config_hash=config_hash
+    )
+    db.add(version)
+    db.flush()
+    return version
+
+
 @router.post("/{agent_id}/", response_model=PolicyResponse)
 async def create_policy(agent_id: str, policy: PolicyCreate, db: Session = Depends(get_db)):
     """Create a new policy."""
@@ -24,6 +52,8 @@ async def create_policy(agent_id: str, policy: PolicyCreate, db: Session = Depen
         _nocode_nodes=policy._nocode_nodes
     )
     db.add(db_policy)
+    db.flush()
+    current_policy_version(db, db_policy)
     db.commit()
     db.refresh(db_policy)
     return db_policy
@@ -44,9 +74,17 @@ async def list_policies(agent_id: str, skip: int = 0, limit: int = 100, db: Sess
             ComplianceEvaluation.agent_id == agent_id,
             ComplianceEvaluation.policy_id == policy.id
         )
-        # If policy was updated, only consider evaluations after the update
+        # Up to date: computed with the current config (cosmetic edits keep the hash).
+        # Evaluations stored before hashes fall back to the last update time.
+        current = ComplianceEvaluation.policy_hash == policy_hash(policy.policy_type, policy.config)
         if policy.updated_at:
-            eval_query = eval_query.filter(ComplianceEvaluation.evaluated_at >= policy.updated_at)
+            current = or_(current, and_(
+                ComplianceEvaluation.policy_hash.is_(None),
+                ComplianceEvaluation.evaluated_at >= policy.updated_at
+            ))
+        else:
+            current = or_(current, ComplianceEvaluation.policy_hash.is_(None))
+        eval_query = eval_query.filter(current)
 
         evaluated_sessions = eval_query.distinct().count()
         pending = max(total_sessions - evaluated_sessions, 0)
@@ -97,11 +135,29 @@ async def update_policy(agent_id: str, policy_id: int, policy: PolicyUpdate, db:
     if policy._nocode_nodes is not None:
         db_policy._nocode_nodes = policy._nocode_nodes
 
+    if policy.config is not None:
+        current_policy_version(db, db_policy)
+
     db.commit()
     db.refresh(db_policy)
     return db_policy
 
 
+@router.get("/{agent_id}/{policy_id}/versions", response_model=List[PolicyVersionResponse])
+async def list_policy_versions(agent_id: str, policy_id: int, db: Session = Depends(get_db)):
+    """List a policy's config versions, newest first."""
+    policy = db.query(Policy).filter(
+        Policy.id == policy_id,
+        Policy.agent_id == agent_id
+    ).first()
+    if not policy:
+        raise HTTPException(status_code=404, detail="Policy not found")
+
+    return db.query(PolicyVersion).filter(
+        PolicyVersion.policy_id == policy_id
+    ).order_by(PolicyVersion.version.desc()).all()
+
+
 @router.delete("/{agent_id}/{policy_id}")
 async def delete_policy(agent_id: str, policy_id: int, db: Session = Depends(get_db)):
     """Delete a policy."""
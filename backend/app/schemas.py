@@ -59,6 +59,20 @@ class PolicyResponse(BaseModel):
         from_attributes = True
 
 
+class PolicyVersionResponse(BaseModel):
+    """An immutable snapshot of a policy's config."""
+    id: int
+    policy_id: int
+    version: int
+    policy_type: str
+    config: Dict[str, Any]
+    config_hash: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
 # Compliance Evaluation Schemas
 class ViolationDetail(BaseModel):
     message_index: Optional[int] = None
@@ -79,6 +93,7 @@ class ComplianceEvaluationResponse(BaseModel):
     violations: List[Dict[str, Any]]
     compliance_details: Optional[List[Dict[str, Any]]] = None
     evaluated_at: datetime
+    policy_version_id: Optional[int] = None  # Policy version the verdict was computed with
 
     class Config:
         from_attributes = True
@@ -219,24 +234,121 @@ class ProcessBatchResponse(BaseModel):
 
 
 # Async Processing Job Schemas
+class LatencySummary(BaseModel):
+    """Percentiles of a latency histogram, in seconds (None when nothing was observed)."""
+    count: int
+    mean_seconds: Optional[float] = None
+    p50_seconds: Optional[float] = None
+    p95_seconds: Optional[float] = None
+    p99_seconds: Optional[float] = None
+    max_seconds: Optional[float] = None
+
+
+class JobTelemetrySummary(BaseModel):
+    """Throughput, latency and cache effectiveness of a job (see services/job_telemetry.py)."""
+    sessions: int
+    wall_seconds: float
+    sessions_per_second: Optional[float] = None
+    session_latency: LatencySummary
+    llm_calls: int
+    llm_errors: int
+    llm_rate_limited: int
+    llm_latency: LatencySummary
+    llm_queue_wait: LatencySummary
+    llm_call_seconds: float
+    llm_queue_seconds: float
+    db_flushes: int
+    db_flush_seconds: float
+    stage_seconds: Dict[str, float]  # load | deterministic_checks | check_reuse | policy_evaluation | batch_collection | db_flush | planning
+    cache_hit_rates: Dict[str, Optional[float]]  # verdict_cache | reused_checks | prompt_cache
+    counters: Dict[str, int]
+
+
+class HistogramBucket(BaseModel):
+    le: Optional[float] = None  # Upper bound in seconds; None for the unbounded last bucket
+    count: int
+
+
+class StageTiming(BaseModel):
+    count: int
+    seconds: float
+
+
+class ModelTelemetry(BaseModel):
+    model: str  # provider:model
+    calls: int
+    latency: LatencySummary
+    latency_histogram: List[HistogramBucket]
+
+
+class ChunkTelemetry(BaseModel):
+    chunk_index: int
+    item_start: int
+    item_end: int
+    status: str
+    worker_id: Optional[str] = None
+    attempts: int
+    sessions: int
+    sessions_per_second: Optional[float] = None
+    session_p95_seconds: Optional[float] = None
+
+
+class JobReport(BaseModel):
+    """Full telemetry of a job: summary, latency histograms, stages, per-model and per-chunk breakdowns."""
+    id: str
+    status: str
+    job_type: str
+    summary: JobTelemetrySummary
+    session_latency_histogram: List[HistogramBucket]
+    llm_latency_histogram: List[HistogramBucket]
+    llm_queue_wait_histogram: List[HistogramBucket]
+    stages: Dict[str, StageTiming]
+    models: List[ModelTelemetry]
+    chunks: List[ChunkTelemetry]
+
+
 class JobStatus(BaseModel):
     """Status of a processing job."""
     id: str
-    status: str  # pending | running | completed | failed
+    agent_id: Optional[str] = None
+    status: str  # pending | running | waiting_on_batch | paused | completed | cancelled | failed
     job_type: str
     total_items: int
     completed_items: int
     failed_items: int
     progress_percent: float
+    control_action: Optional[str] = None  # cancel | pause, requested and not yet honored by the worker
+    priority: str = 'bulk'  # interactive | bulk | nightly
     error_message: Optional[str] = None
     created_at: datetime
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
+    telemetry: Optional[JobTelemetrySummary] = None  # Only on /{job_id}/status, not in events or listings
 
     class Config:
         from_attributes = True
 
 
+class DeadLetter(BaseModel):
+    """A job item that failed permanently, or transiently on every retry."""
+    item_index: int
+    memory_id: Optional[str] = None
+    status: str  # error | not_found
+    error: Optional[str] = None
+    error_class: str  # transient | permanent
+    attempts: int = 1
+
+
+class JobDeadLetters(BaseModel):
+    """One page of a job's dead letters, in item order."""
+    id: str
+    status: str
+    total: int  # Dead letters in the job
+    items: List[DeadLetter]
+    offset: int = 0
+    next_offset: Optional[int] = None  # Offset of the next page; None on the last page
+
+
 class JobResult(BaseModel):
     """Result details for a completed job."""
     id: str
@@ -245,7 +357,9 @@ class JobResult(BaseModel):
     total_items: int
     completed_items: int
     failed_items: int
-    results: List[Dict[str, Any]]
+    results: List[Dict[str, Any]]  # One page of per-item results, in item order
+    offset: int = 0
+    next_offset: Optional[int] = None  # Offset of the next page; None on the last page
     error_message: Optional[str] = None
     created_at: datetime
     started_at: Optional[datetime] = None
@@ -261,6 +375,55 @@ class SubmitJobRequest(BaseModel):
     memory_ids: List[str]
     policy_ids: Optional[List[int]] = None  # If None, use all enabled policies
     refresh_variants: bool = True
+    job_type: Literal['batch_evaluate', 'delta_evaluate'] = Field(
+        'batch_evaluate',
+        description="'delta_evaluate' evaluates only pairs whose session content or policy config changed"
+    )
+    llm_batch_size: Optional[int] = Field(
+        None, ge=1, le=50,
+        description="Pack up to N LLM validations (across sessions) into one request; 1 or None disables batching"
+    )
+    mode: Literal['realtime', 'offline_batch'] = Field(
+        'realtime',
+        description="'offline_batch' submits LLM validations through provider batch APIs (cheaper, results within 24h)"
+    )
+    session_concurrency: Optional[int] = Field(
+        None, ge=1, le=64,
+        description="Sessions evaluated in parallel within the job; None uses JOB_SESSION_CONCURRENCY"
+    )
+    priority: Literal['interactive', 'bulk', 'nightly'] = Field(
+        'bulk',
+        description="Lane for worker slots and LLM capacity; 'interactive' is for jobs a user is waiting on"
+    )
+
+
+class JobEstimateModel(BaseModel):
+    """Projected LLM usage for one provider/model in a job."""
+    provider: str
+    model: str
+    validations: int
+    llm_calls: int
+    estimated_input_tokens: int
+    estimated_output_tokens: int
+    estimated_cost_usd: float
+
+
+class JobEstimate(BaseModel):
+    """Pre-flight estimate for a batch evaluation job."""
+    session_count: int
+    mode: str
+    llm_batch_size: int
+    llm_check_invocations: int  # LLM validations requested across all sessions/policies
+    verdict_cache_hits: int  # Already answered by the verdict cache (free)
+    duplicate_validations: int  # Identical values within the job, sent once
+    llm_validations: int  # Unique validations that need the LLM
+    llm_calls: int  # API requests after batching (a lower bound when max_follow_up_calls > 0)
+    max_follow_up_calls: int = 0  # Worst-case cascade escalations and tie-break judges, not included above
+    estimated_input_tokens: int
+    estimated_output_tokens: int
+    estimated_cost_usd: float
+    estimated_seconds: Optional[float] = None  # None for offline_batch jobs (provider-dependent, up to 24h)
+    per_model: List[JobEstimateModel]
 
 
 class SubmitJobResponse(BaseModel):
@@ -310,7 +473,7 @@ class CreateAgentResponse(BaseModel):
 
 class GenerateSessionsRequest(BaseModel):
     """Request to generate simulated sessions for an agent."""
-    num_sessions: int = Field(..., ge=1, le=100, description="Number of sessions to generate (1-100)")
+    num_sessions: int = Field(..., ge=1, le=1000, description="Number of sessions to generate (1-1000)")
     scenario_variations: Optional[str] = Field(None, description="Comma-separated scenario descriptions")
     session_time_definition: Optional[str] = Field(
         None,
@@ -319,3 +482,31 @@ class GenerateSessionsRequest(BaseModel):
     include_edge_cases: bool = Field(default=True, description="Include error scenarios and edge cases")
     llm_provider: Optional[str] = Field(None, description="Override agent's default LLM provider")
     model: Optional[str] = Field(None, description="Override agent's default model")
+    sessions_per_call: int = Field(1, ge=1, le=5, description="Sessions generated per LLM call (1-5)")
+    concurrency: Optional[int] = Field(
+        None, ge=1, le=32,
+        description="LLM calls in flight at once (default SESSION_GENERATION_CONCURRENCY)"
+    )
+    priority: Literal['interactive', 'bulk', 'nightly'] = Field(
+        'bulk',
+        description="Lane for worker slots and LLM capacity; 'interactive' is for jobs a user is waiting on"
+    )
+
+
+class SynthesizeSessionsRequest(BaseModel):
+    """Request to synthesize sessions for an agent offline, without LLM calls (see session_synthesizer)."""
+    num_sessions: int = Field(..., ge=1, le=1_000_000, description="Number of sessions to synthesize (1-1000000)")
+    seed: Optional[int] = Field(
+        None,
+        description="Corpus seed; the same seed, profile and count produce the same sessions (random if omitted)"
+    )
+    format: Literal['anthropic', 'openai'] = Field('anthropic', description="Message format of the sessions")
+    profile: Optional[Dict[str, Any]] = Field(
+        None,
+        description="Tool transitions, parameter distributions and violation rates (default: the 'synthesis' block of the agent metadata)"
+    )
+    fit_transitions: bool = Field(False, description="Learn tool transitions from the agent's existing sessions")
+    priority: Literal['interactive', 'bulk', 'nightly'] = Field(
+        'bulk',
+        description="Lane for worker slots and LLM capacity; 'interactive' is for jobs a user is waiting on"
+    )
@@ -4,13 +4,31 @@ Agent and session generation service using LLM.
 This service provides LLM-powered generation of:
 1. Agent configurations (use case, tools, business identifiers)
 2. Realistic session data with multi-turn conversations and tool use
+
+Session generation jobs run up to SESSION_GENERATION_CONCURRENCY LLM calls
+at once (all through the shared rate limiter), and a call can produce up to
+MAX_SESSIONS_PER_CALL sessions (see generate_sessions).
+
+Environment:
+    SESSION_GENERATION_CONCURRENCY   generation calls in flight per job (4)
 """
 import json
 import os
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple, Union
 from anthropic import Anthropic
 from openai import OpenAI
 
+from .llm_rate_limiter import rate_limiter, estimate_tokens
+from .job_control import job_control
+from .llm_client import shared_client
+
+SESSION_GENERATION_CONCURRENCY = int(os.getenv('SESSION_GENERATION_CONCURRENCY', '4'))
+
+# Output budget of one generated session, sessions per call, and the cap for a multi-session call
+SESSION_MAX_TOKENS = 4000
+MAX_SESSIONS_PER_CALL = 5
+MAX_OUTPUT_TOKENS = 16000
+
 
 class AgentGenerator:
     """Generate agent configurations and simulated sessions using LLM."""
@@ -267,11 +285,96 @@ Make policies realistic and relevant to the agent's use case. Use proper JSON sy
         Raises:
             Exception: If LLM call fails or response is invalid
         """
+        prompt = self._session_prompt(agent_metadata, [(session_number, scenario_hint)], session_time_definition)
+        response_text = self._call_llm(prompt, max_tokens=SESSION_MAX_TOKENS)
+
+        # Parse and validate
+        try:
+            response_text = self._strip_markdown(response_text)
+            session = json.loads(response_text)
+            self._validate_session(session)
+            return session
+
+        except (json.JSONDecodeError, ValueError) as e:
+            raise Exception(f"Failed to parse session JSON: {str(e)}\nResponse: {response_text[:500]}")
+
+    def generate_sessions(
+        self,
+        agent_metadata: Dict[str, Any],
+        sessions: List[Tuple[int, Optional[str]]],
+        session_time_definition: Optional[str] = None
+    ) -> List[Union[Dict[str, Any], ValueError]]:
+        """
+        Generate several simulated sessions with one LLM call.
+
+        The response schema is {"sessions": [...]}, one complete session per
+        requested (session_number, scenario_hint), which the caller writes to
+        separate files. A single session goes through generate_session.
+
+        Args:
+            agent_metadata: Agent metadata dict with use_case, tools, business_identifiers
+            sessions: (session_number, scenario_hint) of every session to generate (at most MAX_SESSIONS_PER_CALL)
+            session_time_definition: Optional human-readable constraints for when the sessions occur
+
+        Returns:
+            One entry per requested session, in order: the session dict, or the
+            ValueError explaining why that session of the response was invalid
+
+        Raises:
+            Exception: If LLM call fails or the response is not a sessions array
+        """
+        if len(sessions) == 1:
+            number, hint = sessions[0]
+            return [self.generate_session(agent_metadata, number, hint, session_time_definition)]
+        if len(sessions) > MAX_SESSIONS_PER_CALL:
+            raise ValueError(f"At most {MAX_SESSIONS_PER_CALL} sessions per call, got {len(sessions)}")
+
+        prompt = self._session_prompt(agent_metadata, sessions, session_time_definition)
+        response_text = self._call_llm(prompt, max_tokens=min(SESSION_MAX_TOKENS * len(sessions), MAX_OUTPUT_TOKENS))
 
+        try:
+            response_text = self._strip_markdown(response_text)
+            generated = json.loads(response_text).get("sessions")
+            if not isinstance(generated, list):
+                raise ValueError("Missing sessions array in response JSON")
+        except (json.JSONDecodeError, ValueError, AttributeError) as e:
+            raise Exception(f"Failed to parse sessions JSON: {str(e)}\nResponse: {response_text[:500]}")
+
+        results: List[Union[Dict[str, Any], ValueError]] = []
+        for index in range(len(sessions)):
+            if index >= len(generated):
+                results.append(ValueError(f"Response has {len(generated)} sessions, expected {len(sessions)}"))
+                continue
+            try:
+                self._validate_session(generated[index])
+                results.append(generated[index])
+            except ValueError as e:
+                results.append(e)
+        return results
+
+    def _validate_session(self, session: Any):
+        """Raise ValueError unless `session` has the session file structure."""
+        if not isinstance(session, dict) or "metadata" not in session or "messages" not in session:
+            raise ValueError("Missing metadata or messages in session JSON")
+
+        if not isinstance(session["messages"], list) or len(session["messages"]) < 3:
+            raise ValueError(f"Invalid messages array - expected at least 3 messages, got {len(session.get('messages', []))}")
+
+        # Validate metadata has required fields
+        metadata = session["metadata"]
+        if not all(k in metadata for k in ["session_id", "timestamp", "business_identifiers"]):
+            raise ValueError("Metadata missing required fields (session_id, timestamp, business_identifiers)")
+
+    def _session_prompt(
+        self,
+        agent_metadata: Dict[str, Any],
+        sessions: List[Tuple[int, Optional[str]]],
+        session_time_definition: Optional[str]
+    ) -> str:
+        """Prompt generating one session (raw session JSON) or several ({"sessions": [...]})."""
         tools_desc = "\n".join([f"- {t['name']}: {t['description']}" for t in agent_metadata["tools"]])
         biz_ids = agent_metadata["business_identifiers"]
-
-        scenario_text = f"\nSCENARIO FOCUS: {scenario_hint}\nMake this session demonstrate this specific scenario." if scenario_hint else ""
+        session_number, scenario_hint = sessions[0]
 
         # Calculate varied timestamp components
         day = (session_number % 28) + 1
@@ -281,12 +384,57 @@ Make policies realistic and relevant to the agent's use case. Use proper JSON sy
         if session_time_definition:
             time_guidance += f"- Generate a timestamp within these constraints: {session_time_definition}\n"
             time_guidance += "- Vary day/time within the allowed window across sessions\n"
-        else:
+        elif len(sessions) == 1:
             # Fall back to deterministic-but-varied schedule
             time_guidance += f"- Default to a realistic weekday timestamp: 2026-01-{day:02d}T{hour:02d}:00:00Z (UTC)\n"
             time_guidance += "- Keep within typical business hours (08:00-19:00 UTC) when possible\n"
+        else:
+            time_guidance += "- Default to the realistic weekday timestamp listed for each session (UTC)\n"
+            time_guidance += "- Keep within typical business hours (08:00-19:00 UTC) when possible\n"
 
-        prompt = f"""You are simulating a realistic AI agent conversation. Generate a complete session JSON.
+        if len(sessions) == 1:
+            scenario_text = f"\nSCENARIO FOCUS: {scenario_hint}\nMake this session demonstrate this specific scenario." if scenario_hint else ""
+            task = "Generate a complete session JSON."
+            session_schema = f"""{{
+  "metadata": {{
+    "session_id": "session_{session_number:05d}",
+    "timestamp": "<ISO 8601 UTC timestamp that satisfies the session time constraints (e.g., 2026-01-{day:02d}T{hour:02d}:00:00Z)>",
+    "duration_seconds": <realistic float between 10 and 120>,
+    "business_identifiers": {{<populate with realistic values based on the biz_ids schema>}}
+  }},
+  "messages": [<array of conversation messages following the format above>]
+}}"""
+            output = f"Output ONLY this JSON structure (no markdown, no code blocks):\n{session_schema}"
+        else:
+            specs = []
+            for number, hint in sessions:
+                spec = f'- session_id "session_{number:05d}"'
+                if not session_time_definition:
+                    spec += f", default timestamp 2026-01-{(number % 28) + 1:02d}T{8 + (number % 12):02d}:00:00Z"
+                spec += f", scenario focus: {hint}" if hint else ", scenario focus: standard workflow"
+                specs.append(spec)
+            scenario_text = (
+                f"\nSESSIONS TO GENERATE ({len(sessions)}, each an independent conversation with its own business identifier values):\n"
+                + "\n".join(specs)
+                + "\nMake each session demonstrate its own scenario focus."
+            )
+            task = f"Generate {len(sessions)} complete, independent sessions."
+            output = f"""Output ONLY this JSON structure (no markdown, no code blocks), with the sessions in the order listed:
+{{
+  "sessions": [
+    {{
+      "metadata": {{
+        "session_id": "<the session's session_id>",
+        "timestamp": "<ISO 8601 UTC timestamp that satisfies the session time constraints>",
+        "duration_seconds": <realistic float between 10 and 120>,
+        "business_identifiers": {{<populate with realistic values based on the biz_ids schema>}}
+      }},
+      "messages": [<array of conversation messages following the format above>]
+    }}
+  ]
+}}"""
+
+        return f"""You are simulating a realistic AI agent conversation. {task}
 
 AGENT: {agent_metadata["agent_name"]}
 USE CASE: {agent_metadata["use_case"]}
@@ -319,44 +467,10 @@ IMPORTANT:
 - Use realistic values for business identifiers
 - Each tool_use needs a unique ID like "toolu_01ABC123"
 
-Output ONLY this JSON structure (no markdown, no code blocks):
-{{
-  "metadata": {{
-    "session_id": "session_{session_number:05d}",
-    "timestamp": "<ISO 8601 UTC timestamp that satisfies the session time constraints (e.g., 2026-01-{day:02d}T{hour:02d}:00:00Z)>",
-    "duration_seconds": <realistic float between 10 and 120>,
-    "business_identifiers": {{<populate with realistic values based on the biz_ids schema>}}
-  }},
-  "messages": [<array of conversation messages following the format above>]
-}}
+{output}
 
 Do not include markdown. Output raw JSON only."""
 
-        response_text = self._call_llm(prompt, max_tokens=4000)
-
-        # Parse and validate
-        try:
-            response_text = self._strip_markdown(response_text)
-
-            session = json.loads(response_text)
-
-            # Validate structure
-            if "metadata" not in session or "messages" not in session:
-                raise ValueError("Missing metadata or messages in session JSON")
-
-            if not isinstance(session["messages"], list) or len(session["messages"]) < 3:
-                raise ValueError(f"Invalid messages array - expected at least 3 messages, got {len(session.get('messages', []))}")
-
-            # Validate metadata has required fields
-            metadata = session["metadata"]
-            if not all(k in metadata for k in ["session_id", "timestamp", "business_identifiers"]):
-                raise ValueError("Metadata missing required fields (session_id, timestamp, business_identifiers)")
-
-            return session
-
-        except (json.JSONDecodeError, ValueError) as e:
-            raise Exception(f"Failed to parse session JSON: {str(e)}\nResponse: {response_text[:500]}")
-
     def _call_llm(self, prompt: str, max_tokens: int = 2000) -> str:
         """
         Call LLM API.
@@ -370,17 +484,23 @@ Do not include markdown. Output raw JSON only."""
 
         Raises:
             Exception: If API key is missing or API call fails
+            JobInterrupted: If the job this call belongs to was cancelled or paused
         """
+        job_control.checkpoint()
         if self.llm_provider == "anthropic":
             api_key = os.getenv("ANTHROPIC_API_KEY")
             if not api_key:
                 raise Exception("ANTHROPIC_API_KEY not configured in environment")
 
-            client = Anthropic(api_key=api_key)
-            response = client.messages.create(
-                model=self.model,
-                max_tokens=max_tokens,
-                messages=[{"role": "user", "content": prompt}]
+            client = shared_client(Anthropic, api_key)
+            response = rate_limiter.call(
+                "anthropic", self.model, estimate_tokens(prompt) + max_tokens,
+                lambda: client.messages.create(
+                    model=self.model,
+                    max_tokens=max_tokens,
+                    messages=[{"role": "user", "content": prompt}]
+                ),
+                actual_tokens=lambda r: r.usage.input_tokens + r.usage.output_tokens
             )
             return response.content[0].text
 
@@ -389,10 +509,14 @@ Do not include markdown. Output raw JSON only."""
             if not api_key:
                 raise Exception("OPENAI_API_KEY not configured in environment")
 
-            client = OpenAI(api_key=api_key)
-            response = client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}]
+            client = shared_client(OpenAI, api_key)
+            response = rate_limiter.call(
+                "openai", self.model, estimate_tokens(prompt) + max_tokens,
+                lambda: client.chat.completions.create(
+                    model=self.model,
+                    messages=[{"role": "user", "content": prompt}]
+                ),
+                actual_tokens=lambda r: r.usage.total_tokens
             )
             return response.choices[0].message.content
 
@@ -0,0 +1,119 @@
+"""
+Process pool for deterministic checks.
+
+Checks that do not call an LLM (tool calls, tool responses, response length,
+call counts) are CPU-bound, so evaluating them on the job's worker threads
+serializes on the GIL. When a job evaluates several sessions at once, each
+session's deterministic checks for every policy are sent to a worker process
+as one task; the session's thread only runs the LLM checks and applies the
+violation logic with the precomputed results.
+
+Each task pickles the session's messages to a spawned process, which only
+pays off when the checks cost more than that copy (large sessions, many
+policies). The pool is therefore off unless JOB_CHECK_PROCESSES is set.
+
+Environment:
+    JOB_CHECK_PROCESSES     Worker processes (default: 0, deterministic checks
+                            are evaluated on the job threads)
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, List, Optional
+
+from .check_types import CHECK_REGISTRY, CheckResult
+
+JOB_CHECK_PROCESSES = int(os.getenv('JOB_CHECK_PROCESSES', '0'))
+
+# {policy_id: {check_id: CheckResult}}
+PrecomputedChecks = Dict[Any, Dict[str, CheckResult]]
+
+
+def has_deterministic_checks(policies_data: List[dict]) -> bool:
+    for policy in policies_data:
+        for check_config in policy['config'].get('checks', []):
+            check_class = CHECK_REGISTRY.get(check_config.get('type'))
+            if check_class is not None and not check_class.uses_llm:
+                return True
+    return False
+
+
+def evaluate_deterministic_checks(
+    messages: List[Dict[str, Any]],
+    memory_metadata: Dict[str, Any],
+    policies_data: List[dict]
+) -> PrecomputedChecks:
+    """Evaluate every non-LLM check of every policy against one session.
+
+    Module-level so it can run in a worker process. Errors propagate, exactly
+    as they would from the composite evaluator's own thread pool.
+    """
+    results: PrecomputedChecks = {}
+    for policy in policies_data:
+        policy_results = {}
+        for check_config in policy['config'].get('checks', []):
+            check_class = CHECK_REGISTRY.get(check_config.get('type'))
+            if check_class is None or check_class.uses_llm:
+                continue
+            check_id = check_config.get('id')
+            check = check_class(check_id, check_config.get('name', f'Check {check_id}'), check_config)
+            policy_results[check_id] = check.evaluate(messages, memory_metadata)
+        results[policy['id']] = policy_results
+    return results
+
+
+class DeterministicCheckPool:
+    """Lazily started process pool shared by every job in the backend process."""
+
+    def __init__(self, processes: int = JOB_CHECK_PROCESSES):
+        self.processes = processes
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.processes > 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process that runs server and worker threads is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def evaluate(
+        self,
+        messages: List[Dict[str, Any]],
+        memory_metadata: Dict[str, Any],
+        policies_data: List[dict]
+    ) -> PrecomputedChecks:
+        """Precompute a session's deterministic checks in a worker process.
+
+        Returns an empty dict when the pool is disabled or broken; the composite
+        evaluator then evaluates those checks itself.
+        """
+        if not self.enabled or not has_deterministic_checks(policies_data):
+            return {}
+        try:
+            future = self._get_executor().submit(evaluate_deterministic_checks, messages, memory_metadata, policies_data)
+            return future.result()
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed): start a fresh pool next time
+            with self._lock:
+                self._executor = None
+            return {}
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+# Global instance
+check_pool = DeterministicCheckPool()
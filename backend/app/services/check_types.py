@@ -4,41 +4,174 @@ Check type definitions and base classes for the extensible policy system.
 from abc import ABC, abstractmethod
 from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass
-
-
-def calculate_llm_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+from .llm_batching import validate_many, usage_entries
+from .llm_cascade import cascade_validate
+from .llm_consensus import consensus_validate
+from .llm_normalization import NormalizationConfig, summarize_results as summarize_normalization
+from .llm_input_budget import InputBudget
+from .llm_verdict import build_validation_prefix, validate_with_verdict
+
+
+def calculate_llm_cost(
+    model: str,
+    input_tokens: int,
+    output_tokens: int,
+    cached_input_tokens: int = 0,
+    cache_write_tokens: int = 0
+) -> float:
     """
     Calculate the cost of an LLM API call based on model pricing.
 
     Pricing as of January 2025 (per million tokens):
-    - GPT-4o: $2.50 input / $10 output
-    - GPT-4o-mini: $0.150 input / $0.600 output
-    - Claude Sonnet 4.5: $3 input / $15 output
-    - Claude Opus 4: $15 input / $75 output
-    - Claude Haiku 3.5: $0.80 input / $4 output
+    - GPT-4o: $2.50 input / $1.25 cached input / $10 output
+    - GPT-4o-mini: $0.150 input / $0.075 cached input / $0.600 output
+    - Claude Sonnet 4.5: $3 input / $0.30 cache read / $3.75 cache write / $15 output
+    - Claude Opus 4: $15 input / $1.50 cache read / $18.75 cache write / $75 output
+    - Claude Haiku 3.5: $0.80 input / $0.08 cache read / $1 cache write / $4 output
+
+    input_tokens is the total prompt size; cached_input_tokens (prompt-cache
+    reads) and cache_write_tokens (prefixes written to the cache) are the
+    portions of it billed at the cache rates.
 
     Returns cost in USD.
     """
     pricing = {
-        # OpenAI models
-        'gpt-4o': {'input': 2.50, 'output': 10.00},
-        'gpt-4o-mini': {'input': 0.150, 'output': 0.600},
+        # OpenAI models (caching is automatic; writes cost the normal input rate)
+        'gpt-4o': {'input': 2.50, 'cached_input': 1.25, 'cache_write': 2.50, 'output': 10.00},
+        'gpt-4o-mini': {'input': 0.150, 'cached_input': 0.075, 'cache_write': 0.150, 'output': 0.600},
         # Anthropic models
-        'claude-sonnet-4-5-20250929': {'input': 3.00, 'output': 15.00},
-        'claude-opus-4-20250514': {'input': 15.00, 'output': 75.00},
-        'claude-haiku-3-5-20241022': {'input': 0.80, 'output': 4.00},
+        'claude-sonnet-4-5-20250929': {'input': 3.00, 'cached_input': 0.30, 'cache_write': 3.75, 'output': 15.00},
+        'claude-opus-4-20250514': {'input': 15.00, 'cached_input': 1.50, 'cache_write': 18.75, 'output': 75.00},
+        'claude-haiku-3-5-20241022': {'input': 0.80, 'cached_input': 0.08, 'cache_write': 1.00, 'output': 4.00},
     }
 
     # Get pricing for model, default to GPT-4o if unknown
     model_pricing = pricing.get(model, pricing['gpt-4o'])
 
     # Calculate cost (pricing is per million tokens)
-    input_cost = (input_tokens / 1_000_000) * model_pricing['input']
+    uncached_input_tokens = max(0, input_tokens - cached_input_tokens - cache_write_tokens)
+    input_cost = (uncached_input_tokens / 1_000_000) * model_pricing['input']
+    input_cost += (cached_input_tokens / 1_000_000) * model_pricing['cached_input']
+    input_cost += (cache_write_tokens / 1_000_000) * model_pricing['cache_write']
     output_cost = (output_tokens / 1_000_000) * model_pricing['output']
 
     return input_cost + output_cost
 
 
+def apply_few_shot_examples(prompt: str, examples: Optional[List[Dict[str, Any]]]) -> str:
+    """Append labelled examples ({value, compliant, reason}) to the user's criteria.
+
+    Examples become part of the criteria, so they share the cached prompt
+    prefix and are part of verdict cache keys.
+    """
+    import json
+
+    if not examples:
+        return prompt
+
+    lines = [prompt, '', 'EXAMPLES:']
+    for example in examples:
+        verdict = {'compliant': bool(example.get('compliant')), 'reason': example.get('reason', '')}
+        lines.append(f"Value: {example.get('value', '')}")
+        lines.append(f"Verdict: {json.dumps(verdict)}")
+    return '\n'.join(lines)
+
+
+def aggregate_llm_usage(all_usage: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Aggregate per-call usage dicts into a CheckResult.llm_usage summary.
+
+    Batched items share one API call, so calls are counted by batch_call_id.
+    """
+    if not all_usage:
+        return None
+
+    total_input = sum(u['input_tokens'] for u in all_usage)
+    total_cached_input = sum(u.get('cached_input_tokens', 0) for u in all_usage)
+    total_cache_write = sum(u.get('cache_write_tokens', 0) for u in all_usage)
+    total_output = sum(u['output_tokens'] for u in all_usage)
+    total_cost = sum(u['cost_usd'] for u in all_usage)
+    batch_call_ids = {u['batch_call_id'] for u in all_usage if u.get('batch_call_id')}
+    unbatched_calls = sum(1 for u in all_usage if not u.get('batch_call_id'))
+
+    summary = {
+        'provider': all_usage[0]['provider'],
+        'model': all_usage[0]['model'],
+        'api_calls': unbatched_calls + len(batch_call_ids),
+        'total_input_tokens': total_input,
+        'total_cached_input_tokens': total_cached_input,
+        'total_cache_write_tokens': total_cache_write,
+        'total_output_tokens': total_output,
+        'total_tokens': total_input + total_output,
+        'total_cost_usd': round(total_cost, 6),
+        'per_call': all_usage
+    }
+
+    # Cascades and consensus judges mix models: break the totals down per model
+    per_model: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for u in all_usage:
+        entry = per_model.setdefault((u['provider'], u['model']), {
+            'provider': u['provider'], 'model': u['model'], 'validations': 0, 'total_tokens': 0, 'cost_usd': 0.0
+        })
+        entry['validations'] += 1
+        entry['total_tokens'] += u['input_tokens'] + u['output_tokens']
+        entry['cost_usd'] = round(entry['cost_usd'] + u['cost_usd'], 6)
+    if len(per_model) > 1:
+        summary['per_model'] = list(per_model.values())
+    return summary
+
+
+def run_llm_validations(
+    values: List[Any],
+    prompt: str,
+    provider: str,
+    model: str,
+    validator,
+    config: Dict[str, Any],
+    collector=None
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Validate values per the check config (input budget, batching, verdict cache, normalization,
+    model cascade or consensus voting).
+
+    Returns:
+        Tuple of (one result per value, stats keyed by feature: 'input_budget', 'consensus', 'cascade', 'normalization')
+    """
+    batch_size = int(config.get('batch_size', 1) or 1)
+    use_cache = config.get('cache_verdicts', True)
+    normalization = NormalizationConfig.from_check_config(config)
+    budget = InputBudget.from_check_config(config)
+    stats = {}
+
+    if budget:
+        values, groups, truncations = budget.prepare(values)
+
+    if config.get('consensus', {}).get('models'):
+        results, stats['consensus'] = consensus_validate(
+            values, prompt, provider, model, validator, config['consensus'],
+            batch_size=batch_size, collector=collector, use_cache=use_cache, normalization=normalization
+        )
+    elif config.get('cascade', {}).get('model'):
+        results, stats['cascade'] = cascade_validate(
+            values, prompt, provider, model, validator, config['cascade'],
+            batch_size=batch_size, collector=collector, use_cache=use_cache, normalization=normalization
+        )
+    else:
+        results = validate_many(
+            values, prompt, provider, model, validator,
+            batch_size=batch_size, collector=collector, use_cache=use_cache, normalization=normalization
+        )
+
+    if normalization:
+        stats['normalization'] = summarize_normalization(results)
+    if budget:
+        results = budget.combine(results, groups, truncations)
+        stats['input_budget'] = {
+            'max_tokens': budget.max_tokens,
+            'strategy': budget.strategy,
+            'truncated': sum(1 for t in truncations if t)
+        }
+    return results, stats
+
+
 @dataclass
 class CheckResult:
     """Result of evaluating a single check."""
@@ -50,15 +183,20 @@ class CheckResult:
     details: Optional[Dict[str, Any]] = None
     matched_items: Optional[List[Dict[str, Any]]] = None  # Tool calls, messages, etc. that matched
     llm_usage: Optional[Dict[str, Any]] = None  # LLM token usage and cost information
+    deferred: bool = False  # No verdict yet: an LLM call timed out or the provider circuit is open
 
 
 class BaseCheck(ABC):
     """Base class for all check types."""
 
-    def __init__(self, check_id: str, name: str, config: Dict[str, Any]):
+    # Deterministic checks (uses_llm False) may be evaluated in a worker process
+    uses_llm = False
+
+    def __init__(self, check_id: str, name: str, config: Dict[str, Any], collector=None):
         self.check_id = check_id
         self.name = name
         self.config = config
+        self.collector = collector  # Optional BatchCollector for job-level LLM batching
 
     @abstractmethod
     def evaluate(self, messages: List[Dict[str, Any]], memory_metadata: Dict[str, Any]) -> CheckResult:
@@ -391,10 +529,12 @@ class ToolResponseCheck(BaseCheck):
 class LLMToolResponseCheck(BaseCheck):
     """Use LLM to validate tool response parameter."""
 
+    uses_llm = True
+
     def evaluate(self, messages: List[Dict[str, Any]], memory_metadata: Dict[str, Any]) -> CheckResult:
         tool_name = self.config.get('tool_name')
         target_parameter = self.config.get('parameter')
-        validation_prompt = self.config.get('validation_prompt')
+        validation_prompt = apply_few_shot_examples(self.config.get('validation_prompt'), self.config.get('few_shot_examples'))
         llm_provider = self.config.get('llm_provider', 'anthropic')
         model = self.config.get('model', 'claude-sonnet-4-5-20250929')
 
@@ -405,16 +545,20 @@ class LLMToolResponseCheck(BaseCheck):
         failed_validations = []
         all_usage = []  # Track all LLM API calls
 
+        param_values = []
         for result in tool_results:
             content = result.get('content', {})
-            param_value = content.get(target_parameter) if isinstance(content, dict) else str(content)
+            param_values.append(content.get(target_parameter) if isinstance(content, dict) else str(content))
 
-            # Validate with LLM
-            llm_result = self._validate_with_llm(param_value, validation_prompt, llm_provider, model)
+        # Validate with LLM (batched into multi-item requests when batch_size > 1)
+        llm_results, llm_stats = run_llm_validations(
+            param_values, validation_prompt, llm_provider, model, self._validate_with_llm,
+            self.config, collector=self.collector
+        )
 
+        for result, param_value, llm_result in zip(tool_results, param_values, llm_results):
             # Track usage if available
-            if llm_result.get('usage'):
-                all_usage.append(llm_result['usage'])
+            all_usage.extend(usage_entries(llm_result))
 
             validation_info = {
                 'message_index': result['message_index'],
@@ -422,6 +566,12 @@ class LLMToolResponseCheck(BaseCheck):
                 'llm_response': llm_result['response'],
                 'passed': llm_result['passed']
             }
+            if llm_result.get('reason_code'):
+                validation_info['reason_code'] = llm_result['reason_code']
+            if llm_result.get('truncation'):
+                validation_info['truncation'] = llm_result['truncation']
+            if llm_result.get('consensus'):
+                validation_info['consensus'] = llm_result['consensus']
 
             if llm_result['passed']:
                 passed_validations.append(validation_info)
@@ -445,26 +595,16 @@ class LLMToolResponseCheck(BaseCheck):
             'failed_validations': failed_validations,
             'params': {target_parameter: param_value} if param_value is not None else {}
         }
+        details.update(llm_stats)
+        deferred = any(r.get('deferred') for r in llm_results)
 
-        message = self.generate_violation_message(details) if not passed else f"LLM validation passed for '{tool_name}.{target_parameter}'"
+        if deferred and not passed:
+            message = f"LLM validation deferred for '{tool_name}.{target_parameter}': provider timed out or unavailable"
+        else:
+            message = self.generate_violation_message(details) if not passed else f"LLM validation passed for '{tool_name}.{target_parameter}'"
 
         # Aggregate LLM usage across all API calls
-        total_usage = None
-        if all_usage:
-            total_input = sum(u['input_tokens'] for u in all_usage)
-            total_output = sum(u['output_tokens'] for u in all_usage)
-            total_cost = sum(u['cost_usd'] for u in all_usage)
-
-            total_usage = {
-                'provider': all_usage[0]['provider'],
-                'model': all_usage[0]['model'],
-                'api_calls': len(all_usage),
-                'total_input_tokens': total_input,
-                'total_output_tokens': total_output,
-                'total_tokens': total_input + total_output,
-                'total_cost_usd': round(total_cost, 6),
-                'per_call': all_usage
-            }
+        total_usage = aggregate_llm_usage(all_usage)
 
         return CheckResult(
             passed=passed,
@@ -474,7 +614,8 @@ class LLMToolResponseCheck(BaseCheck):
             message=message,
             details=details,
             matched_items=passed_validations if passed else failed_validations,
-            llm_usage=total_usage
+            llm_usage=total_usage,
+            deferred=deferred
         )
 
     def _find_tool_results(self, messages: List[Dict[str, Any]], tool_name: str) -> List[Dict[str, Any]]:
@@ -563,157 +704,8 @@ class LLMToolResponseCheck(BaseCheck):
         return results
 
     def _validate_with_llm(self, value: str, prompt: str, provider: str, model: str) -> Dict[str, Any]:
-        """Call LLM to validate the value.
-
-        The user's natural language prompt is automatically enhanced with:
-        1. Clear binary decision instructions (compliant or not)
-        2. Request for structured JSON output
-        3. Format enforcement (no markdown, just JSON)
-
-        This ensures reliable parsing while keeping prompt writing simple for users.
-        Falls back to keyword detection only if JSON parsing fails.
-        """
-        import os
-        import json
-
-        try:
-            # Enhance user's prompt with binary decision instructions and structured output request
-            structured_prompt = f"""You are a compliance validator. Evaluate the following value against the criteria below.
-
-USER CRITERIA:
-{prompt}
-
-VALUE TO EVALUATE:
-{value}
-
-INSTRUCTIONS:
-1. Make a binary decision: does the value meet the criteria or not?
-2. Provide a brief explanation for your decision
-3. Respond ONLY with valid JSON in this exact format:
-
-{{"compliant": true, "reason": "your explanation"}}
-
-OR
-
-{{"compliant": false, "reason": "your explanation"}}
-
-Do not include any text outside the JSON. Do not use markdown code blocks."""
-
-            # Track token usage and cost
-            usage_info = None
-
-            if provider == 'anthropic':
-                from anthropic import Anthropic
-                api_key = os.getenv('ANTHROPIC_API_KEY')
-                if not api_key:
-                    return {'passed': False, 'response': 'Anthropic API key not configured', 'error': True}
-
-                client = Anthropic(api_key=api_key)
-                response = client.messages.create(
-                    model=model,
-                    max_tokens=1000,
-                    messages=[{
-                        'role': 'user',
-                        'content': structured_prompt
-                    }]
-                )
-                eval_result = response.content[0].text
-
-                # Extract token usage from Anthropic response
-                input_tokens = response.usage.input_tokens
-                output_tokens = response.usage.output_tokens
-                cost = calculate_llm_cost(model, input_tokens, output_tokens)
-
-                usage_info = {
-                    'provider': 'anthropic',
-                    'model': model,
-                    'input_tokens': input_tokens,
-                    'output_tokens': output_tokens,
-                    'total_tokens': input_tokens + output_tokens,
-                    'cost_usd': round(cost, 6)
-                }
-
-            elif provider == 'openai':
-                from openai import OpenAI
-                api_key = os.getenv('OPENAI_API_KEY')
-                if not api_key:
-                    return {'passed': False, 'response': 'OpenAI API key not configured', 'error': True}
-
-                client = OpenAI(api_key=api_key)
-                response = client.chat.completions.create(
-                    model=model,
-                    messages=[{
-                        'role': 'user',
-                        'content': structured_prompt
-                    }]
-                )
-                eval_result = response.choices[0].message.content
-
-                # Extract token usage from OpenAI response
-                input_tokens = response.usage.prompt_tokens
-                output_tokens = response.usage.completion_tokens
-                cost = calculate_llm_cost(model, input_tokens, output_tokens)
-
-                usage_info = {
-                    'provider': 'openai',
-                    'model': model,
-                    'input_tokens': input_tokens,
-                    'output_tokens': output_tokens,
-                    'total_tokens': input_tokens + output_tokens,
-                    'cost_usd': round(cost, 6)
-                }
-            else:
-                return {'passed': False, 'response': f'Unknown LLM provider: {provider}', 'error': True}
-
-            # Try to parse structured JSON response
-            try:
-                # Handle markdown code blocks that LLMs often add
-                eval_cleaned = eval_result.strip()
-                if eval_cleaned.startswith('```'):
-                    # Extract JSON from code block
-                    lines = eval_cleaned.split('\n')
-                    eval_cleaned = '\n'.join(lines[1:-1]) if len(lines) > 2 else eval_cleaned
-                    eval_cleaned = eval_cleaned.replace('```json', '').replace('```', '').strip()
-
-                result_json = json.loads(eval_cleaned)
-
-                # Check for compliant field (boolean)
-                if 'compliant' in result_json:
-                    passed = bool(result_json['compliant'])
-                    reason = result_json.get('reason', eval_result)
-                    return {'passed': passed, 'response': reason, 'error': False, 'usage': usage_info}
-
-            except (json.JSONDecodeError, ValueError):
-                # Fall back to keyword detection if JSON parsing fails
-                pass
-
-            # Fallback: Check for rejection/approval keywords
-            eval_lower = eval_result.lower()
-
-            # Check for explicit approval first
-            approval_keywords = ['compliant', 'approved', 'yes', 'pass', 'valid', 'correct', 'acceptable']
-            has_approval = any(word in eval_lower for word in approval_keywords)
-
-            # Check for rejection keywords
-            rejection_keywords = ['violation', 'non-compliant', 'does not comply', 'fails', 'rejected', 'denied', 'invalid', 'incorrect']
-            has_rejection = any(word in eval_lower for word in rejection_keywords)
-
-            # Determine result based on keywords
-            if has_rejection and not has_approval:
-                passed = False
-            elif has_approval and not has_rejection:
-                passed = True
-            elif has_rejection and has_approval:
-                # Both present - rejection takes precedence for safety
-                passed = False
-            else:
-                # No clear keywords - treat as rejection for safety
-                passed = False
-
-            return {'passed': passed, 'response': eval_result, 'error': False, 'usage': usage_info}
-
-        except Exception as e:
-            return {'passed': False, 'response': f'LLM validation error: {str(e)}', 'error': True, 'usage': None}
+        """Judge one value with a structured verdict (see llm_verdict)."""
+        return validate_with_verdict(value, prompt, provider, model, 'value', self.config)
 
     def _auto_generate_message(self, details: Dict[str, Any]) -> str:
         tool_name = details['tool_name']
@@ -912,9 +904,11 @@ class ToolCallCountCheck(BaseCheck):
 class LLMResponseValidationCheck(BaseCheck):
     """Use LLM to validate agent response content."""
 
+    uses_llm = True
+
     def evaluate(self, messages: List[Dict[str, Any]], memory_metadata: Dict[str, Any]) -> CheckResult:
         scope = self.config.get('scope', 'final_message')
-        validation_prompt = self.config.get('validation_prompt')
+        validation_prompt = apply_few_shot_examples(self.config.get('validation_prompt'), self.config.get('few_shot_examples'))
         llm_provider = self.config.get('llm_provider', 'anthropic')
         model = self.config.get('model', 'claude-sonnet-4-5-20250929')
 
@@ -930,46 +924,45 @@ class LLMResponseValidationCheck(BaseCheck):
         validations = []
         all_usage = []  # Track all LLM API calls
 
-        for idx, message in messages_to_check:
-            content_text = self._extract_text(message)
-            llm_result = self._validate_with_llm(content_text, validation_prompt, llm_provider, model)
+        content_texts = [self._extract_text(message) for _, message in messages_to_check]
+        llm_results, llm_stats = run_llm_validations(
+            content_texts, validation_prompt, llm_provider, model, self._validate_with_llm,
+            self.config, collector=self.collector
+        )
 
+        for (idx, message), content_text, llm_result in zip(messages_to_check, content_texts, llm_results):
             # Track usage if available
-            if llm_result.get('usage'):
-                all_usage.append(llm_result['usage'])
+            all_usage.extend(usage_entries(llm_result))
 
-            validations.append({
+            validation_info = {
                 'message_index': idx,
                 'llm_response': llm_result['response'],
                 'passed': llm_result['passed'],
                 'content_preview': content_text[:200]
-            })
+            }
+            if llm_result.get('reason_code'):
+                validation_info['reason_code'] = llm_result['reason_code']
+            if llm_result.get('truncation'):
+                validation_info['truncation'] = llm_result['truncation']
+            if llm_result.get('consensus'):
+                validation_info['consensus'] = llm_result['consensus']
+            validations.append(validation_info)
 
         passed = all(v['passed'] for v in validations)
         details = {
             'scope': scope,
             'validations': validations
         }
+        details.update(llm_stats)
+        deferred = any(r.get('deferred') for r in llm_results)
 
-        message = self.generate_violation_message(details) if not passed else "LLM response validation passed"
+        if deferred and not passed:
+            message = "LLM response validation deferred: provider timed out or unavailable"
+        else:
+            message = self.generate_violation_message(details) if not passed else "LLM response validation passed"
 
         # Aggregate LLM usage across all API calls
-        total_usage = None
-        if all_usage:
-            total_input = sum(u['input_tokens'] for u in all_usage)
-            total_output = sum(u['output_tokens'] for u in all_usage)
-            total_cost = sum(u['cost_usd'] for u in all_usage)
-
-            total_usage = {
-                'provider': all_usage[0]['provider'],
-                'model': all_usage[0]['model'],
-                'api_calls': len(all_usage),
-                'total_input_tokens': total_input,
-                'total_output_tokens': total_output,
-                'total_tokens': total_input + total_output,
-                'total_cost_usd': round(total_cost, 6),
-                'per_call': all_usage
-            }
+        total_usage = aggregate_llm_usage(all_usage)
 
         return CheckResult(
             passed=passed,
@@ -979,7 +972,8 @@ class LLMResponseValidationCheck(BaseCheck):
             message=message,
             details=details,
             matched_items=validations,
-            llm_usage=total_usage
+            llm_usage=total_usage,
+            deferred=deferred
         )
 
     def _extract_text(self, message: Dict[str, Any]) -> str:
@@ -990,157 +984,8 @@ class LLMResponseValidationCheck(BaseCheck):
         return str(content)
 
     def _validate_with_llm(self, content: str, prompt: str, provider: str, model: str) -> Dict[str, Any]:
-        """Call LLM to validate response content.
-
-        The user's natural language prompt is automatically enhanced with:
-        1. Clear binary decision instructions (compliant or not)
-        2. Request for structured JSON output
-        3. Format enforcement (no markdown, just JSON)
-
-        This ensures reliable parsing while keeping prompt writing simple for users.
-        Falls back to keyword detection only if JSON parsing fails.
-        """
-        import os
-        import json
-
-        try:
-            # Enhance user's prompt with binary decision instructions and structured output request
-            structured_prompt = f"""You are a compliance validator. Evaluate the following content against the criteria below.
-
-USER CRITERIA:
-{prompt}
-
-CONTENT TO EVALUATE:
-{content}
-
-INSTRUCTIONS:
-1. Make a binary decision: does the content meet the criteria or not?
-2. Provide a brief explanation for your decision
-3. Respond ONLY with valid JSON in this exact format:
-
-{{"compliant": true, "reason": "your explanation"}}
-
-OR
-
-{{"compliant": false, "reason": "your explanation"}}
-
-Do not include any text outside the JSON. Do not use markdown code blocks."""
-
-            # Track token usage and cost
-            usage_info = None
-
-            if provider == 'anthropic':
-                from anthropic import Anthropic
-                api_key = os.getenv('ANTHROPIC_API_KEY')
-                if not api_key:
-                    return {'passed': False, 'response': 'Anthropic API key not configured', 'error': True}
-
-                client = Anthropic(api_key=api_key)
-                response = client.messages.create(
-                    model=model,
-                    max_tokens=1000,
-                    messages=[{
-                        'role': 'user',
-                        'content': structured_prompt
-                    }]
-                )
-                eval_result = response.content[0].text
-
-                # Extract token usage from Anthropic response
-                input_tokens = response.usage.input_tokens
-                output_tokens = response.usage.output_tokens
-                cost = calculate_llm_cost(model, input_tokens, output_tokens)
-
-                usage_info = {
-                    'provider': 'anthropic',
-                    'model': model,
-                    'input_tokens': input_tokens,
-                    'output_tokens': output_tokens,
-                    'total_tokens': input_tokens + output_tokens,
-                    'cost_usd': round(cost, 6)
-                }
-
-            elif provider == 'openai':
-                from openai import OpenAI
-                api_key = os.getenv('OPENAI_API_KEY')
-                if not api_key:
-                    return {'passed': False, 'response': 'OpenAI API key not configured', 'error': True}
-
-                client = OpenAI(api_key=api_key)
-                response = client.chat.completions.create(
-                    model=model,
-                    messages=[{
-                        'role': 'user',
-                        'content': structured_prompt
-                    }]
-                )
-                eval_result = response.choices[0].message.content
-
-                # Extract token usage from OpenAI response
-                input_tokens = response.usage.prompt_tokens
-                output_tokens = response.usage.completion_tokens
-                cost = calculate_llm_cost(model, input_tokens, output_tokens)
-
-                usage_info = {
-                    'provider': 'openai',
-                    'model': model,
-                    'input_tokens': input_tokens,
-                    'output_tokens': output_tokens,
-                    'total_tokens': input_tokens + output_tokens,
-                    'cost_usd': round(cost, 6)
-                }
-            else:
-                return {'passed': False, 'response': f'Unknown LLM provider: {provider}', 'error': True}
-
-            # Try to parse structured JSON response
-            try:
-                # Handle markdown code blocks that LLMs often add
-                eval_cleaned = eval_result.strip()
-                if eval_cleaned.startswith('```'):
-                    # Extract JSON from code block
-                    lines = eval_cleaned.split('\n')
-                    eval_cleaned = '\n'.join(lines[1:-1]) if len(lines) > 2 else eval_cleaned
-                    eval_cleaned = eval_cleaned.replace('```json', '').replace('```', '').strip()
-
-                result_json = json.loads(eval_cleaned)
-
-                # Check for compliant field (boolean)
-                if 'compliant' in result_json:
-                    passed = bool(result_json['compliant'])
-                    reason = result_json.get('reason', eval_result)
-                    return {'passed': passed, 'response': reason, 'error': False, 'usage': usage_info}
-
-            except (json.JSONDecodeError, ValueError):
-                # Fall back to keyword detection if JSON parsing fails
-                pass
-
-            # Fallback: Check for rejection/approval keywords
-            eval_lower = eval_result.lower()
-
-            # Check for explicit approval first
-            approval_keywords = ['compliant', 'approved', 'yes', 'pass', 'valid', 'correct', 'acceptable']
-            has_approval = any(word in eval_lower for word in approval_keywords)
-
-            # Check for rejection keywords
-            rejection_keywords = ['violation', 'non-compliant', 'does not comply', 'fails', 'rejected', 'denied', 'invalid', 'incorrect']
-            has_rejection = any(word in eval_lower for word in rejection_keywords)
-
-            # Determine result based on keywords
-            if has_rejection and not has_approval:
-                passed = False
-            elif has_approval and not has_rejection:
-                passed = True
-            elif has_rejection and has_approval:
-                # Both present - rejection takes precedence for safety
-                passed = False
-            else:
-                # No clear keywords - treat as rejection for safety
-                passed = False
-
-            return {'passed': passed, 'response': eval_result, 'error': False, 'usage': usage_info}
-
-        except Exception as e:
-            return {'passed': False, 'response': f'LLM validation error: {str(e)}', 'error': True, 'usage': None}
+        """Judge one content with a structured verdict (see llm_verdict)."""
+        return validate_with_verdict(content, prompt, provider, model, 'content', self.config)
 
     def _auto_generate_message(self, details: Dict[str, Any]) -> str:
         validations = details.get('validations', [])
@@ -1,7 +1,8 @@
 """
 Composite policy evaluator with extensible violation logic types.
 """
-from typing import Dict, Any, List, Tuple
+import contextvars
+from typing import Dict, Any, List, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from .check_types import CHECK_REGISTRY, CheckResult
 
@@ -17,7 +18,21 @@ class CompositePolicyEvaluator:
         'FORBID_ALL',           # None of the forbidden checks should pass (unless requirements met)
     ]
 
-    def evaluate(self, messages: List[Dict[str, Any]], memory_metadata: Dict[str, Any], policy_config: Dict[str, Any]) -> Tuple[bool, List[Dict[str, Any]]]:
+    def __init__(self, collector=None):
+        """
+        Args:
+            collector: Optional BatchCollector shared across evaluations so LLM
+                checks can defer their validations into cross-session batches
+        """
+        self.collector = collector
+
+    def evaluate(
+        self,
+        messages: List[Dict[str, Any]],
+        memory_metadata: Dict[str, Any],
+        policy_config: Dict[str, Any],
+        precomputed_checks: Optional[Dict[str, CheckResult]] = None
+    ) -> Tuple[bool, List[Dict[str, Any]]]:
         """
         Evaluate a composite policy against agent memory.
 
@@ -25,6 +40,8 @@ class CompositePolicyEvaluator:
             messages: List of messages from agent memory
             memory_metadata: Metadata about the agent memory
             policy_config: Policy configuration with checks and violation_logic
+            precomputed_checks: Results already evaluated elsewhere (e.g. deterministic
+                checks from the check process pool), keyed by check id
 
         Returns:
             Tuple of (is_compliant, violations)
@@ -33,7 +50,8 @@ class CompositePolicyEvaluator:
         violation_logic = policy_config.get('violation_logic', {})
 
         # Evaluate all checks in parallel
-        check_results = {}
+        check_results = dict(precomputed_checks or {})
+        checks_config = [c for c in checks_config if c.get('id') not in check_results]
 
         def evaluate_check(check_config):
             """Helper function to evaluate a single check."""
@@ -48,14 +66,15 @@ class CompositePolicyEvaluator:
                 return check_id, None
 
             # Create and evaluate check
-            check_instance = check_class(check_id, check_name, check_config)
+            check_instance = check_class(check_id, check_name, check_config, collector=self.collector)
             result = check_instance.evaluate(messages, memory_metadata)
             return check_id, result
 
         # Execute checks in parallel using ThreadPoolExecutor
         with ThreadPoolExecutor(max_workers=10) as executor:
             # Submit all check evaluations
-            future_to_check = {executor.submit(evaluate_check, check_config): check_config
+            # Each check runs in a copy of this context so job cancellation reaches its LLM calls
+            future_to_check = {executor.submit(contextvars.copy_context().run, evaluate_check, check_config): check_config
                              for check_config in checks_config}
 
             # Collect results as they complete
@@ -72,6 +91,12 @@ class CompositePolicyEvaluator:
             policy_config.get('description', '')
         )
 
+        # Checks without a verdict (LLM timeout / open circuit) make the outcome provisional
+        deferred_checks = [check_id for check_id, result in check_results.items() if result.deferred]
+        if deferred_checks:
+            for details in violation_details:
+                details['deferred_checks'] = deferred_checks
+
         return is_compliant, violation_details
 
     def _apply_violation_logic(
@@ -493,7 +518,8 @@ class CompositePolicyEvaluator:
             'message': result.message,
             'details': result.details,
             'matched_items': result.matched_items,
-            'llm_usage': result.llm_usage
+            'llm_usage': result.llm_usage,
+            'deferred': result.deferred
         }
 
     # Violation message generators
@@ -0,0 +1,99 @@
+"""
+Content hashes that decide whether a stored evaluation is still current.
+
+An evaluation depends on the session's messages and on the policy's type
+and check configuration. Each evaluation stores both hashes, and a
+delta_evaluate job re-evaluates only the (session, policy) pairs whose
+hashes are missing or changed.
+
+The policy's name, description, severity and enabled flag are not part of
+the hash. Editing them doesn't change a verdict (name and description only
+label the violation details), so it doesn't trigger re-evaluation.
+
+Each distinct config hash is an immutable policy version (policy_versions).
+When a policy's config does change, checks are hashed individually too: a
+check whose configuration (ignoring its id and display name) is unchanged keeps its
+stored result for a session whose messages are unchanged, and only the new
+or modified checks are evaluated.
+"""
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def _digest(value: Any) -> str:
+    canonical = json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def session_hash(messages: List[dict]) -> str:
+    """Hash of a session's messages, the only part of a session that policies evaluate."""
+    return _digest(messages)
+
+
+def policy_hash(policy_type: str, config: Dict[str, Any]) -> str:
+    """Hash of the policy inputs that decide a verdict: its type and check configuration."""
+    return _digest({'policy_type': policy_type, 'config': config})
+
+
+def stale_policy_ids(
+    session_digest: str,
+    policies_data: List[dict],
+    stored: Dict[int, Tuple[Optional[str], Optional[str]]]
+) -> List[int]:
+    """Policies a session has to be (re-)evaluated against.
+
+    Args:
+        session_digest: session_hash() of the session's current messages
+        policies_data: Policies with 'id' and 'config_hash'
+        stored: {policy_id: (session_hash, policy_hash)} of the session's stored evaluations
+
+    Returns:
+        Ids of the policies with no evaluation, or whose stored hashes differ
+    """
+    return [
+        p['id'] for p in policies_data
+        if stored.get(p['id']) != (session_digest, p['config_hash'])
+    ]
+
+
+def check_hash(check_config: Dict[str, Any]) -> str:
+    """Hash of what one check evaluates: its configuration without its id and display name."""
+    return _digest({k: v for k, v in check_config.items() if k not in ('id', 'name')})
+
+
+def reusable_check_results(
+    previous_config: Dict[str, Any],
+    previous_results: List[dict],
+    config: Dict[str, Any]
+) -> Dict[str, dict]:
+    """Stored check results of an earlier policy version that still apply.
+
+    Args:
+        previous_config: Config of the version the stored evaluation was made with
+        previous_results: Serialized CheckResult dicts from that evaluation
+        config: The policy's current config
+
+    Returns:
+        {check_id: result dict} for every current check with an identical check
+        in the earlier version (matched by check_hash, so renamed ids and
+        display names still match), relabelled with the current id and name.
+        Deferred results are never reused.
+    """
+    results_by_id = {r.get('check_id'): r for r in previous_results if not r.get('deferred')}
+    previous_by_hash = {}
+    for check in previous_config.get('checks', []):
+        result = results_by_id.get(check.get('id'))
+        if result is not None:
+            previous_by_hash[check_hash(check)] = result
+
+    reused = {}
+    for check in config.get('checks', []):
+        result = previous_by_hash.get(check_hash(check))
+        if result is not None:
+            reused[check['id']] = {
+                **result,
+                'check_id': check['id'],
+                'check_name': check.get('name', f"Check {check['id']}")
+            }
+    return reused
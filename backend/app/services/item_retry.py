@@ -0,0 +1,166 @@
+"""
+Per-item retries for job sessions.
+
+A session whose evaluation fails with a transient error is evaluated again
+after an exponential backoff with full jitter, up to JOB_ITEM_MAX_RETRIES
+times (see call_with_retries). Transient errors are the ones a later attempt
+can succeed on:
+
+- LLM provider 5xx, 408/409 and 429 responses that outlasted the rate
+  limiter's own retries, connection errors and timeouts
+- database disconnects and lock timeouts (OperationalError)
+
+Every other error is permanent (an unreadable session file, an invalid
+policy config, a 4xx response) and fails the item at once.
+
+LLM checks normally record a failed LLM call as an errored validation.
+While a job item is being evaluated they raise TransientItemError for a
+transient error instead (see raise_for_item_retry), so the session is
+retried as a whole rather than stored with a verdict that was never made.
+API requests keep the errored validation.
+
+Items that still fail are the job's dead letters: job items with status
+'error' or 'not_found' carrying their error_class and attempts. The jobs API
+lists them and can run the job again for those items only.
+
+Environment:
+    JOB_ITEM_MAX_RETRIES          retries of a session after a transient error (2)
+    JOB_ITEM_RETRY_BASE_SECONDS   backoff base (1); retry n waits up to base * 2**(n-1)
+    JOB_ITEM_RETRY_MAX_SECONDS    backoff cap (30)
+"""
+import os
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+from .llm_rate_limiter import is_rate_limit_error, RateLimitTimeout
+from .llm_resilience import LLMTimeoutError, CircuitOpenError
+from . import job_telemetry
+
+T = TypeVar('T')
+
+JOB_ITEM_MAX_RETRIES = int(os.getenv('JOB_ITEM_MAX_RETRIES', '2'))
+JOB_ITEM_RETRY_BASE_SECONDS = float(os.getenv('JOB_ITEM_RETRY_BASE_SECONDS', '1'))
+JOB_ITEM_RETRY_MAX_SECONDS = float(os.getenv('JOB_ITEM_RETRY_MAX_SECONDS', '30'))
+
+TRANSIENT = 'transient'
+PERMANENT = 'permanent'
+
+# SDK and driver errors matched by class name, so the optional provider SDKs are not imported here
+TRANSIENT_ERROR_NAMES = {
+    'APIConnectionError', 'APITimeoutError', 'InternalServerError', 'ServiceUnavailableError',
+    'OverloadedError', 'OperationalError', 'DisconnectionError'
+}
+
+_escalating: ContextVar[bool] = ContextVar('escalate_transient_errors', default=False)
+
+
+class TransientItemError(Exception):
+    """A transient LLM error raised out of a check so the job retries the whole session."""
+    pass
+
+
+class ItemFailed(Exception):
+    """A job item that failed permanently, or transiently on every attempt."""
+
+    def __init__(self, error: Exception, attempts: int):
+        super().__init__(str(error))
+        self.error = error
+        self.attempts = attempts
+        self.error_class = error_class(error)
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """Whether retrying the item later can succeed."""
+    if isinstance(error, (TransientItemError, LLMTimeoutError, CircuitOpenError, RateLimitTimeout, TimeoutError, ConnectionError)):
+        return True
+    if is_rate_limit_error(error):
+        return True
+    status = getattr(error, 'status_code', None)
+    if isinstance(status, int):
+        return status >= 500 or status in (408, 409, 429)
+    return type(error).__name__ in TRANSIENT_ERROR_NAMES
+
+
+def error_class(error: BaseException) -> str:
+    return TRANSIENT if is_transient_error(error) else PERMANENT
+
+
+def backoff_seconds(
+    retry: int,
+    base_seconds: float = JOB_ITEM_RETRY_BASE_SECONDS,
+    max_seconds: float = JOB_ITEM_RETRY_MAX_SECONDS,
+    rng: Callable[[], float] = random.random
+) -> float:
+    """Delay before retry number `retry` (1-based): exponential backoff with full jitter."""
+    return rng() * min(max_seconds, base_seconds * 2 ** (retry - 1))
+
+
+@contextmanager
+def escalate_transient_errors():
+    """Make raise_for_item_retry raise in the calling context (a job item being evaluated)."""
+    token = _escalating.set(True)
+    try:
+        yield
+    finally:
+        _escalating.reset(token)
+
+
+def raise_for_item_retry(error: Exception):
+    """Raise TransientItemError for a transient error caught while a job item is being evaluated.
+
+    Called by the LLM checks before they record an error as a failed
+    validation; a no-op outside job items and for permanent errors.
+    """
+    if _escalating.get() and is_transient_error(error):
+        raise TransientItemError(f'Transient LLM error: {error}') from error
+
+
+def call_with_retries(
+    fn: Callable[[], T],
+    max_retries: int = JOB_ITEM_MAX_RETRIES,
+    base_seconds: float = JOB_ITEM_RETRY_BASE_SECONDS,
+    max_seconds: float = JOB_ITEM_RETRY_MAX_SECONDS,
+    sleep: Callable[[float], None] = time.sleep,
+    before_retry: Optional[Callable[[], None]] = None
+) -> Tuple[T, int]:
+    """
+    Evaluate one job item, retrying transient errors.
+
+    Args:
+        fn: Zero-argument function evaluating the item
+        max_retries: Retries after the first attempt
+        base_seconds: Backoff base
+        max_seconds: Backoff cap
+        sleep: Sleep function (injectable for tests)
+        before_retry: Called after each backoff, before the next attempt
+            (e.g. job_control.checkpoint, so a stop request ends the retries)
+
+    Returns:
+        Tuple of (fn's result, attempts made)
+
+    Raises:
+        ItemFailed: On a permanent error, or a transient one once retries are exhausted
+    """
+    attempt = 1
+    while True:
+        try:
+            with escalate_transient_errors():
+                return fn(), attempt
+        except Exception as e:
+            if attempt > max_retries or not is_transient_error(e):
+                raise ItemFailed(e, attempt) from e
+        sleep(backoff_seconds(attempt, base_seconds, max_seconds))
+        if before_retry is not None:
+            before_retry()
+        job_telemetry.increment('item_retries')
+        attempt += 1
+
+
+def failure_details(error: Exception) -> Dict[str, Any]:
+    """The error, error_class and attempts of a failed item, for its job item result."""
+    if isinstance(error, ItemFailed):
+        return {'error': str(error), 'error_class': error.error_class, 'attempts': error.attempts}
+    return {'error': str(error), 'error_class': error_class(error), 'attempts': 1}
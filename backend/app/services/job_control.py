@@ -0,0 +1,90 @@
+"""
+Cooperative cancellation and pausing of running jobs.
+
+A cancel or pause request is recorded on the job row (control_action) and in
+this process-wide registry; the heartbeat copies requests made through other
+backend processes into the registry. Running jobs check the registry:
+
+- between sessions: the job stops pulling new sessions, lets the ones in
+  flight finish and writes them, so the checkpoint (the job's job_items)
+  covers everything already paid for;
+- before every LLM call: llm_client calls checkpoint(), which raises
+  JobInterrupted in any thread working for the job. The session it
+  interrupts is simply not recorded, and is evaluated again on resume.
+
+The job is found through a context variable bound while the job runs
+(bind()); thread pools inside the evaluation propagate it with
+contextvars.copy_context().
+"""
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+CANCEL = 'cancel'
+PAUSE = 'pause'
+ACTIONS = (CANCEL, PAUSE)
+
+_current_job: ContextVar[Optional[str]] = ContextVar('current_job', default=None)
+
+
+class JobInterrupted(BaseException):
+    """Raised inside a job that was asked to stop.
+
+    A BaseException (like asyncio.CancelledError) so the `except Exception`
+    handlers that turn LLM failures into error verdicts let it through.
+    """
+
+    def __init__(self, job_id: str, action: str):
+        super().__init__(f"Job {job_id} interrupted: {action}")
+        self.job_id = job_id
+        self.action = action
+
+
+class JobControl:
+    """Registry of stop requests for jobs running in this process."""
+
+    def __init__(self):
+        self._requests: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def request(self, job_id: str, action: str):
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown job control action '{action}'")
+        with self._lock:
+            # A cancel is never downgraded to a pause
+            if self._requests.get(job_id) != CANCEL:
+                self._requests[job_id] = action
+
+    def requested(self, job_id: str) -> Optional[str]:
+        with self._lock:
+            return self._requests.get(job_id)
+
+    def clear(self, job_id: str):
+        with self._lock:
+            self._requests.pop(job_id, None)
+
+    def check(self, job_id: str):
+        """Raise JobInterrupted if `job_id` was asked to stop."""
+        action = self.requested(job_id)
+        if action:
+            raise JobInterrupted(job_id, action)
+
+    def checkpoint(self):
+        """Raise JobInterrupted if the job bound to the calling context was asked to stop."""
+        job_id = _current_job.get()
+        if job_id is not None:
+            self.check(job_id)
+
+    @contextmanager
+    def bind(self, job_id: str):
+        """Bind `job_id` to the calling context for checkpoint()."""
+        token = _current_job.set(job_id)
+        try:
+            yield
+        finally:
+            _current_job.reset(token)
+
+
+# Global instance
+job_control = JobControl()
@@ -0,0 +1,123 @@
+"""
+Pre-flight cost and duration estimates for batch evaluation jobs.
+
+The estimate runs the job's collection pass (every deterministic check is
+evaluated and every LLM validation is deferred to a BatchCollector, no API
+calls are made), so the count of first-stage LLM calls is exact for the
+current policies, sessions and verdict cache. Calls that depend on those
+verdicts - cascade escalations and consensus tie-break judges - are not known
+until they exist, so llm_calls, tokens, cost and wall time are lower bounds
+for policies using either; max_follow_up_calls reports how many such calls
+the job could add at most. Tokens are estimated from prompt lengths, cost
+comes from calculate_llm_cost, and wall time from the rate limiter's
+observed latency and concurrency for each model.
+"""
+from typing import Dict, Any, Optional
+
+from .check_types import calculate_llm_cost
+from .llm_verdict import build_validation_prefix
+from .llm_batching import BatchCollector, batch_chunks, build_batch_prefix, build_batch_prompt
+from .llm_batch_providers import BATCH_API_DISCOUNT
+from .llm_rate_limiter import rate_limiter, estimate_tokens
+
+# Typical verdict length in output tokens: a structured single-item verdict
+# ({compliant, reason_code, short_reason}) and one entry of a batched verdict array
+SINGLE_VERDICT_OUTPUT_TOKENS = 40
+BATCHED_VERDICT_OUTPUT_TOKENS = 45
+
+# Used until the rate limiter has observed real latency for a model
+DEFAULT_CALL_LATENCY_SECONDS = 3.0
+
+
+def estimate_model_seconds(provider: str, model: str, calls: int, tokens: int) -> float:
+    """Projected wall time for `calls` requests using observed latency and current limits."""
+    if calls == 0:
+        return 0.0
+
+    limiter = rate_limiter.get(provider, model).snapshot()
+    latency = limiter['latency_ewma_seconds'] or DEFAULT_CALL_LATENCY_SECONDS
+    by_concurrency = calls * latency / max(1, limiter['concurrency_limit'])
+    by_rpm = calls / (limiter['rpm_limit'] / 60.0)
+    by_tpm = tokens / (limiter['tpm_limit'] / 60.0)
+    return max(by_concurrency, by_rpm, by_tpm)
+
+
+def estimate_collected(
+    collector: BatchCollector,
+    session_count: int,
+    llm_batch_size: int = 1,
+    mode: str = 'realtime',
+    collect_seconds: float = 0.0
+) -> Dict[str, Any]:
+    """
+    Build an estimate from a collector that has seen every session once.
+
+    Args:
+        collector: Collector after the collection pass (still collecting)
+        session_count: Number of sessions in the job
+        llm_batch_size: Items per multi-item request (1 = one call per item)
+        mode: 'realtime' or 'offline_batch' (batch API discount, no wall-time estimate)
+        collect_seconds: Measured duration of the collection pass, i.e. the
+            deterministic share of the job's work
+
+    Returns:
+        Estimate dict matching schemas.JobEstimate
+    """
+    llm_batch_size = max(1, llm_batch_size)
+    per_model = []
+    llm_seconds = 0.0
+
+    for provider, model, items in collector.pending_items():
+        if llm_batch_size > 1:
+            chunks = batch_chunks(items, llm_batch_size)
+            input_tokens = sum(
+                estimate_tokens(build_batch_prefix(chunk[0].prompt)) + estimate_tokens(build_batch_prompt(chunk))
+                for chunk in chunks
+            )
+            output_tokens = len(items) * BATCHED_VERDICT_OUTPUT_TOKENS
+            calls = len(chunks)
+        else:
+            input_tokens = sum(
+                estimate_tokens(build_validation_prefix(item.prompt)) + estimate_tokens(str(item.value))
+                for item in items
+            )
+            output_tokens = len(items) * SINGLE_VERDICT_OUTPUT_TOKENS
+            calls = len(items)
+
+        cost = calculate_llm_cost(model, input_tokens, output_tokens)
+        if mode == 'offline_batch':
+            cost *= BATCH_API_DISCOUNT
+        else:
+            llm_seconds += estimate_model_seconds(provider, model, calls, input_tokens + output_tokens)
+
+        per_model.append({
+            'provider': provider,
+            'model': model,
+            'validations': len(items),
+            'llm_calls': calls,
+            'estimated_input_tokens': input_tokens,
+            'estimated_output_tokens': output_tokens,
+            'estimated_cost_usd': round(cost, 6)
+        })
+
+    unique_validations = sum(m['validations'] for m in per_model)
+    estimated_seconds: Optional[float] = None
+    if mode != 'offline_batch':
+        estimated_seconds = round(collect_seconds + llm_seconds, 1)
+
+    return {
+        'session_count': session_count,
+        'mode': mode,
+        'llm_batch_size': llm_batch_size,
+        'llm_check_invocations': collector.requested,
+        'verdict_cache_hits': collector.cache_hits,
+        'duplicate_validations': max(0, collector.requested - collector.cache_hits - unique_validations),
+        'llm_validations': unique_validations,
+        'llm_calls': sum(m['llm_calls'] for m in per_model),
+        'max_follow_up_calls': collector.follow_up_calls,
+        'estimated_input_tokens': sum(m['estimated_input_tokens'] for m in per_model),
+        'estimated_output_tokens': sum(m['estimated_output_tokens'] for m in per_model),
+        'estimated_cost_usd': round(sum(m['estimated_cost_usd'] for m in per_model), 6),
+        'estimated_seconds': estimated_seconds,
+        'per_model': per_model
+    }
@@ -0,0 +1,124 @@
+"""
+In-process event bus for job progress.
+
+Every write to a job's status or counters publishes the job's new status
+here (see routes/jobs.py), and the server-sent-events endpoints stream it to
+subscribers, so clients following a job no longer poll /status and the
+database sees no reads on their behalf.
+
+Subscribers follow one job or all jobs of an agent. Each subscriber keeps
+only the latest unread event per job, so a slow client skips intermediate
+progress instead of queueing it, and publishing never blocks a worker.
+Publishers are worker threads; subscribers are woken on their event loop.
+
+Events come from jobs running in this backend process; the job queue runs
+every job of a single-node deployment here.
+"""
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set
+
+TERMINAL_STATUSES = ('completed', 'failed', 'cancelled', 'deleted')
+
+# Latest status kept for this many jobs, so a new subscriber starts without a DB read
+JOB_EVENTS_RETAIN = 1000
+
+
+class JobSubscription:
+    """Latest unread status of each job a subscriber follows."""
+
+    def __init__(self, bus: 'JobEventBus', agent_id: Optional[str], job_id: Optional[str], loop: asyncio.AbstractEventLoop):
+        self.agent_id = agent_id
+        self.job_id = job_id
+        self._bus = bus
+        self._loop = loop
+        self._wake = asyncio.Event()
+        self._pending: 'OrderedDict[str, dict]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def matches(self, event: dict) -> bool:
+        if self.job_id is not None and event.get('id') != self.job_id:
+            return False
+        return self.agent_id is None or event.get('agent_id') == self.agent_id
+
+    def deliver(self, event: dict):
+        """Queue an event (any thread); replaces an unread event of the same job."""
+        with self._lock:
+            self._pending.pop(event['id'], None)
+            self._pending[event['id']] = event
+        try:
+            self._loop.call_soon_threadsafe(self._wake.set)
+        except RuntimeError:
+            # The subscriber's event loop is closed
+            pass
+
+    async def get(self, timeout: float) -> List[dict]:
+        """Wait up to `timeout` seconds for events; returns them oldest first ([] on timeout)."""
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        self._wake.clear()
+        with self._lock:
+            events = list(self._pending.values())
+            self._pending.clear()
+        return events
+
+    def close(self):
+        self._bus.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class JobEventBus:
+    """Fans job status events out to subscribers and remembers each job's latest status."""
+
+    def __init__(self, retain: int = JOB_EVENTS_RETAIN):
+        self.retain = retain
+        self._subscribers: Set[JobSubscription] = set()
+        self._latest: 'OrderedDict[str, dict]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def publish(self, event: dict):
+        """Publish a job status (a JobStatus dict with 'id' and 'agent_id')."""
+        with self._lock:
+            self._latest.pop(event['id'], None)
+            if event.get('status') != 'deleted':
+                self._latest[event['id']] = event
+                while len(self._latest) > self.retain:
+                    self._latest.popitem(last=False)
+            subscribers = [s for s in self._subscribers if s.matches(event)]
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+    def latest(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            return self._latest.get(job_id)
+
+    def latest_for_agent(self, agent_id: str) -> Dict[str, dict]:
+        with self._lock:
+            return {job_id: e for job_id, e in self._latest.items() if e.get('agent_id') == agent_id}
+
+    def subscribe(self, agent_id: Optional[str] = None, job_id: Optional[str] = None) -> JobSubscription:
+        """Subscribe from a coroutine to one job, to all jobs of an agent, or (neither) to every job."""
+        subscription = JobSubscription(self, agent_id, job_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: JobSubscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+
+# Global instance
+job_events = JobEventBus()
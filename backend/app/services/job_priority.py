@@ -0,0 +1,72 @@
+"""
+Priority lanes for jobs and LLM calls.
+
+    interactive   A user is waiting on the result: API requests such as
+                  POST /api/compliance/{agent_id}/evaluate, and jobs
+                  submitted with priority 'interactive'
+    bulk          Background jobs (the default for submitted jobs)
+    nightly       Backfills and scheduled sweeps that should only use
+                  capacity nobody else is waiting for
+
+Capacity is reserved for interactive work in two places:
+
+- LLM rate limiter (see llm_rate_limiter): bulk and nightly calls leave a
+  share of every model's concurrency, requests/min and tokens/min
+  (`interactive_reserve`) untouched, and wait while a call of a higher lane
+  is waiting for the same model.
+- Job workers (see job_queue): JOB_INTERACTIVE_WORKERS extra worker threads
+  only claim interactive jobs; the shared workers claim pending jobs in
+  lane order, oldest first within a lane.
+
+Starvation protection: an LLM call waiting longer than the model's
+`max_priority_wait_seconds`, a job pending longer than
+JOB_PRIORITY_MAX_WAIT_SECONDS, or the next chunk of a running job none of
+whose chunks was claimed for that long, is treated as interactive. A
+steady stream of interactive work slows bulk jobs down but never stops them.
+
+The lane of the running code is a context variable. Code outside any job
+(API requests) is interactive; the job queue binds each job's priority
+while its handler runs, and thread pools inside the job propagate it with
+contextvars.copy_context().
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+INTERACTIVE = 'interactive'
+BULK = 'bulk'
+NIGHTLY = 'nightly'
+PRIORITIES = (INTERACTIVE, BULK, NIGHTLY)
+
+# Lower ranks are served first
+PRIORITY_RANK = {priority: rank for rank, priority in enumerate(PRIORITIES)}
+
+_current_priority: ContextVar[str] = ContextVar('current_priority', default=INTERACTIVE)
+
+
+def priority_rank(priority: str) -> int:
+    """Rank of a lane; unknown values rank as bulk."""
+    return PRIORITY_RANK.get(priority, PRIORITY_RANK[BULK])
+
+
+def effective_rank(priority: str, waited_seconds: float, max_wait_seconds: float) -> int:
+    """Rank after starvation protection: work that has waited `max_wait_seconds` ranks as interactive."""
+    if waited_seconds >= max_wait_seconds:
+        return PRIORITY_RANK[INTERACTIVE]
+    return priority_rank(priority)
+
+
+def current_priority() -> str:
+    """Lane of the calling context (interactive unless a job bound another one)."""
+    return _current_priority.get()
+
+
+@contextmanager
+def bind_priority(priority: str):
+    """Run the calling context in `priority`'s lane."""
+    if priority not in PRIORITY_RANK:
+        raise ValueError(f"Unknown priority '{priority}'")
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
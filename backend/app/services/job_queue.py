@@ -0,0 +1,239 @@
+"""
+Worker pool for the persistent job queue.
+
+Jobs are ProcessingJob rows: submitting a job only inserts a 'pending' row and
+wakes the pool. A fixed number of worker threads claim pending jobs one at a
+time (the claim is an atomic compare-and-set on the row, so two workers - or
+two backend processes - never run the same job), run the handler registered
+for the job's type, and heartbeat every running job while it is in progress.
+
+Jobs carry a priority lane (see job_priority). The shared workers claim
+pending jobs in lane order, and JOB_INTERACTIVE_WORKERS extra workers only
+claim interactive jobs, so a user's job never queues behind a bulk backlog.
+Each handler runs with its job's lane bound, which the LLM rate limiter uses
+to order the job's calls.
+
+A job whose heartbeat goes stale was orphaned by a crashed or restarted
+backend; the recovery sweep (on startup, then periodically) puts it back in
+the queue, or fails it once it has used up its attempts.
+
+Evaluation jobs are split into work items (job_chunks rows of
+JOB_CHUNK_SESSIONS sessions, see split_work). The worker that claims the job
+only plans its chunks; every worker of every backend process then claims
+chunks of running jobs (SELECT ... FOR UPDATE SKIP LOCKED on Postgres, the
+same compare-and-set as jobs on SQLite), so one large job is spread over all
+replicas. A claimed chunk is leased for JOB_STALE_SECONDS and the heartbeat
+renews the lease; a chunk whose lease expired is claimed again by any
+worker and resumes from the job's checkpoint.
+
+The pool itself holds no database code: claiming, heartbeats and recovery are
+passed in as callables (see app/routes/jobs.py), which keeps it testable.
+
+Environment:
+    JOB_WORKERS                 Jobs run concurrently per backend process (default 2)
+    JOB_HEARTBEAT_SECONDS       Heartbeat interval for running jobs (default 15)
+    JOB_STALE_SECONDS           Heartbeat age after which a running job is orphaned,
+                                and lease length of a claimed chunk (default 120)
+    JOB_MAX_ATTEMPTS            Claims before an orphaned job is failed instead of requeued (default 3)
+    JOB_INTERACTIVE_WORKERS     Extra workers reserved for interactive jobs (default 1)
+    JOB_PRIORITY_MAX_WAIT_SECONDS
+                                Pending time after which a bulk or nightly job (or
+                                the next chunk of one with no chunk claimed for
+                                that long) is claimed like an interactive one (default 600)
+    JOB_CHUNK_SESSIONS          Sessions per claimable work item of a job (default 100)
+"""
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, Any, Iterable, List, Optional, Tuple
+
+from .job_priority import INTERACTIVE, BULK, bind_priority
+
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))
+JOB_HEARTBEAT_SECONDS = float(os.getenv('JOB_HEARTBEAT_SECONDS', '15'))
+JOB_STALE_SECONDS = float(os.getenv('JOB_STALE_SECONDS', '120'))
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+JOB_INTERACTIVE_WORKERS = int(os.getenv('JOB_INTERACTIVE_WORKERS', '1'))
+JOB_PRIORITY_MAX_WAIT_SECONDS = float(os.getenv('JOB_PRIORITY_MAX_WAIT_SECONDS', '600'))
+JOB_CHUNK_SESSIONS = int(os.getenv('JOB_CHUNK_SESSIONS', '100'))
+
+# How long an idle worker sleeps when no wake-up arrives (jobs enqueued by another process)
+JOB_POLL_SECONDS = 5.0
+
+# A claimed job: {'id', 'job_type', 'input_data', 'priority'}
+ClaimedJob = Dict[str, Any]
+# Lanes a worker may claim from; None claims from every lane
+Lanes = Optional[Tuple[str, ...]]
+JobHandler = Callable[[str, Dict[str, Any]], None]
+
+
+class JobWorkerPool:
+    """
+    Fixed-size pool of worker threads draining the persistent job queue.
+
+    Args:
+        size: Number of shared worker threads (jobs of any lane run concurrently)
+        claim: claim(worker_id, lanes) -> ClaimedJob or None; must atomically
+            move one pending job of `lanes` (any lane if None) to running and
+            return it, highest lane first
+        heartbeat: heartbeat(job_ids) refreshes the heartbeat of running jobs
+        fail: fail(job_id, message) marks a job failed (unknown type, handler crash)
+        recover: recover() requeues orphaned jobs and returns how many it touched
+        heartbeat_interval: Seconds between heartbeats (and recovery sweeps)
+        poll_interval: Seconds an idle worker waits before polling again
+        reserved: Extra worker threads that only claim interactive jobs
+    """
+
+    def __init__(
+        self,
+        size: int,
+        claim: Callable[[str, Lanes], Optional[ClaimedJob]],
+        heartbeat: Callable[[List[str]], None],
+        fail: Callable[[str, str], None],
+        recover: Optional[Callable[[], int]] = None,
+        heartbeat_interval: float = JOB_HEARTBEAT_SECONDS,
+        poll_interval: float = JOB_POLL_SECONDS,
+        reserved: int = 0
+    ):
+        self.size = max(1, size)
+        self.reserved = max(0, reserved)
+        self._claim = claim
+        self._heartbeat = heartbeat
+        self._fail = fail
+        self._recover = recover
+        self.heartbeat_interval = heartbeat_interval
+        self.poll_interval = poll_interval
+
+        self._handlers: Dict[str, JobHandler] = {}
+        self._active: Dict[str, str] = {}  # job_id -> worker_id
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        # Worker ids are unique per process so a claim identifies its owner across restarts
+        self._prefix = uuid.uuid4().hex[:8]
+
+    def register(self, job_type: str, handler: JobHandler):
+        """Run jobs of `job_type` with handler(job_id, input_data)."""
+        self._handlers[job_type] = handler
+
+    def notify(self):
+        """Wake idle workers: a job was just enqueued."""
+        self._wake.set()
+
+    @property
+    def running(self) -> bool:
+        return bool(self._threads) and not self._stop.is_set()
+
+    def active_jobs(self) -> Dict[str, str]:
+        """{job_id: worker_id} of the jobs this process is working on."""
+        with self._lock:
+            return {job_id: worker_id for worker_id, job_id in self._active.items()}
+
+    def active_workers(self) -> Dict[str, str]:
+        """{worker_id: job_id}; several workers can hold chunks of the same job."""
+        with self._lock:
+            return dict(self._active)
+
+    @contextmanager
+    def track(self, job_id: str):
+        """Heartbeat a job run outside the workers (e.g. a resumed batch job)."""
+        worker_id = f'{self._prefix}-external-{job_id}'
+        with self._lock:
+            self._active[worker_id] = job_id
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._active.pop(worker_id, None)
+
+    def start(self):
+        """Start the worker threads and the heartbeat thread (idempotent)."""
+        if self.running:
+            return
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._work, args=(f'{self._prefix}-{n}',), daemon=True)
+            for n in range(self.size)
+        ] + [
+            threading.Thread(target=self._work, args=(f'{self._prefix}-i{n}', (INTERACTIVE,)), daemon=True)
+            for n in range(self.reserved)
+        ]
+        self._threads.append(threading.Thread(target=self._beat, daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop after the current jobs finish."""
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def run_once(self, worker_id: str, lanes: Lanes = None) -> bool:
+        """Claim and run at most one job of `lanes`. Returns True if a job was run."""
+        job = self._claim(worker_id, lanes)
+        if not job:
+            return False
+
+        job_id = job['id']
+        with self._lock:
+            self._active[worker_id] = job_id
+        try:
+            handler = self._handlers.get(job['job_type'])
+            if handler is None:
+                self._fail(job_id, f"No handler for job type '{job['job_type']}'")
+            else:
+                with bind_priority(job.get('priority') or BULK):
+                    handler(job_id, dict(job.get('input_data') or {}))
+        except Exception as e:
+            # Handlers record their own failures; this catches crashes before they could
+            self._fail(job_id, str(e))
+        finally:
+            with self._lock:
+                self._active.pop(worker_id, None)
+        return True
+
+    def _work(self, worker_id: str, lanes: Lanes = None):
+        while not self._stop.is_set():
+            try:
+                if self.run_once(worker_id, lanes):
+                    continue
+            except Exception as e:
+                print(f"Warning: Job worker {worker_id} failed to claim a job: {str(e)}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def _beat(self):
+        while not self._stop.wait(self.heartbeat_interval):
+            try:
+                job_ids = list(self.active_jobs())
+                if job_ids:
+                    self._heartbeat(job_ids)
+                if self._recover is not None and self._recover():
+                    self._wake.set()
+            except Exception as e:
+                print(f"Warning: Job heartbeat failed: {str(e)}")
+
+
+def split_work(item_count: int, planned: Optional[Iterable[int]] = None, chunk_size: int = JOB_CHUNK_SESSIONS) -> List[Tuple[int, int]]:
+    """Split a job's items into claimable chunks.
+
+    Args:
+        item_count: Items in the job's input
+        planned: Indexes of the items with work to do (delta jobs); None
+            means every item
+        chunk_size: Planned items per chunk
+
+    Returns:
+        (item_start, item_end) ranges, each holding up to `chunk_size` planned
+        items; items outside `planned` are skipped by whoever runs the chunk
+    """
+    indexes = sorted(planned) if planned is not None else range(item_count)
+    chunk_size = max(1, chunk_size)
+    return [
+        (indexes[start], indexes[min(start + chunk_size, len(indexes)) - 1] + 1)
+        for start in range(0, len(indexes), chunk_size)
+    ]
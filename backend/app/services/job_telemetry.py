@@ -0,0 +1,316 @@
+"""
+Per-job throughput and latency telemetry.
+
+While a job evaluates sessions, a JobTelemetry is bound to the context
+(bind(); thread pools inside the job propagate it with
+contextvars.copy_context()) and the code doing the work records into it:
+
+- sessions and their latency (file load to evaluations ready), in jobs.py
+- stage time: session file load, deterministic checks, policy evaluation,
+  batch collection, DB flushes
+- every LLM call made through the rate limiter: latency and time queued for
+  capacity, per provider:model, plus errors and rate-limit responses
+- cache effectiveness: verdict cache hits and misses (llm_batching), check
+  results reused from earlier policy versions, and prompt cache reads (the
+  share of LLM input tokens read from the provider's prompt cache)
+
+Nothing is recorded when no telemetry is bound (API requests).
+
+Telemetry is kept as a JSON snapshot of counters and fixed-bucket
+histograms, so snapshots recorded by different workers and processes merge
+exactly (merge_snapshots). Each chunk stores the snapshot of its own runs
+and the job row stores work done outside chunks (planning, offline batch
+evaluation); summarize() turns the merged snapshot into rates and
+percentiles.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, List, Optional
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is unbounded
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 60.0, 120.0, 300.0
+)
+
+_current_telemetry: ContextVar[Optional['JobTelemetry']] = ContextVar('current_telemetry', default=None)
+
+
+def empty_histogram() -> Dict[str, Any]:
+    return {'count': 0, 'sum': 0.0, 'max': 0.0, 'buckets': [0] * (len(LATENCY_BUCKETS) + 1)}
+
+
+def observe(histogram: Dict[str, Any], seconds: float):
+    """Add one observation to a histogram dict, in place."""
+    histogram['count'] += 1
+    histogram['sum'] += seconds
+    histogram['max'] = max(histogram['max'], seconds)
+    histogram['buckets'][bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+
+def merge_histograms(histograms: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    merged = empty_histogram()
+    for histogram in histograms:
+        merged['count'] += histogram['count']
+        merged['sum'] += histogram['sum']
+        merged['max'] = max(merged['max'], histogram['max'])
+        merged['buckets'] = [a + b for a, b in zip(merged['buckets'], histogram['buckets'])]
+    return merged
+
+
+def percentile(histogram: Dict[str, Any], q: float) -> Optional[float]:
+    """Estimate the q-th percentile (0-100), interpolating within the bucket it falls in."""
+    if not histogram['count']:
+        return None
+    rank = q / 100.0 * histogram['count']
+    seen = 0
+    for index, count in enumerate(histogram['buckets']):
+        if count and seen + count >= rank:
+            lower = LATENCY_BUCKETS[index - 1] if index > 0 else 0.0
+            upper = LATENCY_BUCKETS[index] if index < len(LATENCY_BUCKETS) else histogram['max']
+            estimate = lower + (upper - lower) * max(0.0, rank - seen) / count
+            return min(estimate, histogram['max'])
+        seen += count
+    return histogram['max']
+
+
+def latency_summary(histogram: Dict[str, Any]) -> Dict[str, Any]:
+    count = histogram['count']
+    return {
+        'count': count,
+        'mean_seconds': round(histogram['sum'] / count, 4) if count else None,
+        'p50_seconds': _round(percentile(histogram, 50)),
+        'p95_seconds': _round(percentile(histogram, 95)),
+        'p99_seconds': _round(percentile(histogram, 99)),
+        'max_seconds': round(histogram['max'], 4) if count else None,
+    }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 4) if value is not None else None
+
+
+def empty_snapshot() -> Dict[str, Any]:
+    return {
+        'started_at': None,  # Unix time of the first recorded run
+        'finished_at': None,  # Unix time of the latest recorded activity
+        'sessions': 0,
+        'session_latency': empty_histogram(),
+        'stages': {},  # name -> {'count', 'seconds'}
+        'llm': {
+            'calls': 0,
+            'errors': 0,
+            'rate_limited': 0,
+            'latency': empty_histogram(),
+            'queue_wait': empty_histogram(),
+            'models': {},  # "provider:model" -> {'calls', 'latency'}
+        },
+        'counters': {},  # verdict_cache_hits/misses, reused_checks, reusable_checks, input_tokens, cached_input_tokens
+    }
+
+
+class JobTelemetry:
+    """Thread-safe recorder for one run of a job (or of one of its chunks)."""
+
+    def __init__(self, snapshot: Optional[Dict[str, Any]] = None, clock=time.time):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._data = merge_snapshots([snapshot]) if snapshot else empty_snapshot()
+        now = clock()
+        if self._data['started_at'] is None:
+            self._data['started_at'] = now
+        self._data['finished_at'] = now
+
+    def _touch(self):
+        self._data['finished_at'] = self._clock()
+
+    def observe_session(self, seconds: float):
+        with self._lock:
+            self._data['sessions'] += 1
+            observe(self._data['session_latency'], seconds)
+            self._touch()
+
+    def add_stage(self, name: str, seconds: float, count: int = 1):
+        with self._lock:
+            stage = self._data['stages'].setdefault(name, {'count': 0, 'seconds': 0.0})
+            stage['count'] += count
+            stage['seconds'] += seconds
+            self._touch()
+
+    def observe_llm_call(self, provider: str, model: str, latency: float, queued: float = 0.0,
+                         error: bool = False, rate_limited: bool = False):
+        with self._lock:
+            llm = self._data['llm']
+            llm['calls'] += 1
+            llm['errors'] += 1 if error else 0
+            llm['rate_limited'] += 1 if rate_limited else 0
+            observe(llm['latency'], latency)
+            observe(llm['queue_wait'], queued)
+            per_model = llm['models'].setdefault(f'{provider}:{model}', {'calls': 0, 'latency': empty_histogram()})
+            per_model['calls'] += 1
+            observe(per_model['latency'], latency)
+            self._touch()
+
+    def increment(self, name: str, amount: int = 1):
+        with self._lock:
+            self._data['counters'][name] = self._data['counters'].get(name, 0) + amount
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return merge_snapshots([self._data])
+
+
+def merge_snapshots(snapshots: Iterable[Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Combine snapshots of several runs, chunks or processes into one."""
+    merged = empty_snapshot()
+    starts: List[float] = []
+    ends: List[float] = []
+    for snapshot in snapshots:
+        if not snapshot:
+            continue
+        if snapshot.get('started_at') is not None:
+            starts.append(snapshot['started_at'])
+        if snapshot.get('finished_at') is not None:
+            ends.append(snapshot['finished_at'])
+        merged['sessions'] += snapshot.get('sessions', 0)
+        merged['session_latency'] = merge_histograms([merged['session_latency'], snapshot.get('session_latency') or empty_histogram()])
+        for name, stage in (snapshot.get('stages') or {}).items():
+            target = merged['stages'].setdefault(name, {'count': 0, 'seconds': 0.0})
+            target['count'] += stage['count']
+            target['seconds'] += stage['seconds']
+        llm = snapshot.get('llm') or {}
+        for field in ('calls', 'errors', 'rate_limited'):
+            merged['llm'][field] += llm.get(field, 0)
+        for field in ('latency', 'queue_wait'):
+            merged['llm'][field] = merge_histograms([merged['llm'][field], llm.get(field) or empty_histogram()])
+        for key, model in (llm.get('models') or {}).items():
+            target = merged['llm']['models'].setdefault(key, {'calls': 0, 'latency': empty_histogram()})
+            target['calls'] += model['calls']
+            target['latency'] = merge_histograms([target['latency'], model['latency']])
+        for name, value in (snapshot.get('counters') or {}).items():
+            merged['counters'][name] = merged['counters'].get(name, 0) + value
+    merged['started_at'] = min(starts) if starts else None
+    merged['finished_at'] = max(ends) if ends else None
+    return merged
+
+
+def _ratio(part: int, total: int) -> Optional[float]:
+    return round(part / total, 4) if total else None
+
+
+def _hit_rate(hits: int, misses: int) -> Optional[float]:
+    return _ratio(hits, hits + misses)
+
+
+def summarize(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    """Rates, percentiles and stage breakdown of a (merged) snapshot.
+
+    Stage, LLM call and queue seconds add up the time of every thread, so
+    with concurrent sessions they exceed wall_seconds; compare them with
+    each other to see where the time goes.
+    """
+    wall = (snapshot['finished_at'] - snapshot['started_at']) if snapshot.get('started_at') is not None else 0.0
+    llm = snapshot['llm']
+    counters = snapshot['counters']
+    stages = snapshot['stages']
+    return {
+        'sessions': snapshot['sessions'],
+        'wall_seconds': round(wall, 3),
+        'sessions_per_second': round(snapshot['sessions'] / wall, 3) if wall > 0 else None,
+        'session_latency': latency_summary(snapshot['session_latency']),
+        'llm_calls': llm['calls'],
+        'llm_errors': llm['errors'],
+        'llm_rate_limited': llm['rate_limited'],
+        'llm_latency': latency_summary(llm['latency']),
+        'llm_queue_wait': latency_summary(llm['queue_wait']),
+        'llm_call_seconds': round(llm['latency']['sum'], 3),
+        'llm_queue_seconds': round(llm['queue_wait']['sum'], 3),
+        'db_flushes': stages.get('db_flush', {}).get('count', 0),
+        'db_flush_seconds': round(stages.get('db_flush', {}).get('seconds', 0.0), 3),
+        'stage_seconds': {name: round(stage['seconds'], 3) for name, stage in sorted(stages.items())},
+        'cache_hit_rates': {
+            'verdict_cache': _hit_rate(counters.get('verdict_cache_hits', 0), counters.get('verdict_cache_misses', 0)),
+            'reused_checks': _ratio(counters.get('reused_checks', 0), counters.get('reusable_checks', 0)),
+            'prompt_cache': _ratio(counters.get('cached_input_tokens', 0), counters.get('input_tokens', 0)),
+        },
+        'counters': dict(counters),
+    }
+
+
+def histogram_buckets(histogram: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Histogram as [{'le': upper bound in seconds (None: unbounded), 'count'}] for reports."""
+    bounds = list(LATENCY_BUCKETS) + [None]
+    return [{'le': bound, 'count': count} for bound, count in zip(bounds, histogram['buckets'])]
+
+
+def report(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    """summarize() plus the histograms, stage timings and per-model LLM breakdown of a snapshot."""
+    llm = snapshot['llm']
+    return {
+        'summary': summarize(snapshot),
+        'session_latency_histogram': histogram_buckets(snapshot['session_latency']),
+        'llm_latency_histogram': histogram_buckets(llm['latency']),
+        'llm_queue_wait_histogram': histogram_buckets(llm['queue_wait']),
+        'stages': {
+            name: {'count': stage['count'], 'seconds': round(stage['seconds'], 3)}
+            for name, stage in sorted(snapshot['stages'].items())
+        },
+        'models': [
+            {
+                'model': key,
+                'calls': model['calls'],
+                'latency': latency_summary(model['latency']),
+                'latency_histogram': histogram_buckets(model['latency']),
+            }
+            for key, model in sorted(llm['models'].items())
+        ],
+    }
+
+
+def current_telemetry() -> Optional[JobTelemetry]:
+    return _current_telemetry.get()
+
+
+@contextmanager
+def bind(telemetry: JobTelemetry):
+    """Record the calling context's work into `telemetry`."""
+    token = _current_telemetry.set(telemetry)
+    try:
+        yield telemetry
+    finally:
+        _current_telemetry.reset(token)
+
+
+@contextmanager
+def stage(name: str):
+    """Time a block as stage `name` of the bound telemetry (no-op when none is bound)."""
+    telemetry = _current_telemetry.get()
+    if telemetry is None:
+        yield
+        return
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        telemetry.add_stage(name, time.monotonic() - started)
+
+
+def observe_session(seconds: float):
+    telemetry = _current_telemetry.get()
+    if telemetry is not None:
+        telemetry.observe_session(seconds)
+
+
+def increment(name: str, amount: int = 1):
+    telemetry = _current_telemetry.get()
+    if telemetry is not None and amount:
+        telemetry.increment(name, amount)
+
+
+def observe_llm_call(provider: str, model: str, latency: float, queued: float = 0.0,
+                     error: bool = False, rate_limited: bool = False):
+    telemetry = _current_telemetry.get()
+    if telemetry is not None:
+        telemetry.observe_llm_call(provider, model, latency, queued, error=error, rate_limited=rate_limited)
@@ -0,0 +1,371 @@
+"""
+Asynchronous provider batch APIs for offline bulk re-evaluation.
+
+Offline jobs gather every LLM validation up front (see BatchCollector),
+submit them through a provider's batch endpoint, and resume once results
+are available. Batch endpoints trade latency (up to 24h) for lower cost
+and separate rate limits.
+
+Providers:
+- AnthropicBatchProvider: Message Batches API
+- OpenAIBatchProvider: Batch API over /v1/chat/completions
+- LocalFileBatchProvider: file-based stand-in for development and tests
+"""
+import json
+import os
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+from .llm_batching import (
+    BatchCollector, ValidationItem, BATCH_VERDICTS_TOOL_NAME,
+    batch_chunks, batch_verdict_schema, build_batch_prefix, build_batch_prompt,
+    parse_batch_response, attribute_usage, value_digest
+)
+from .llm_client import build_usage_info
+
+# Provider batch endpoints are billed at half the synchronous price
+BATCH_API_DISCOUNT = 0.5
+
+# Normalized batch statuses
+BATCH_IN_PROGRESS = 'in_progress'
+BATCH_ENDED = 'ended'
+BATCH_FAILED = 'failed'
+
+
+class BatchProvider(ABC):
+    """
+    Abstract asynchronous batch endpoint.
+
+    Requests are dicts with keys: custom_id, model, system (static prefix),
+    prompt, schema (the verdicts the model must record), max_tokens.
+    Results map custom_id -> {'text', 'input_tokens', 'output_tokens'} or {'error': str};
+    'text' is the recorded verdicts as JSON.
+    """
+
+    name: str = 'abstract'
+
+    @abstractmethod
+    def submit(self, requests: List[Dict[str, Any]]) -> str:
+        """Submit requests and return the provider batch ID."""
+        pass
+
+    @abstractmethod
+    def status(self, batch_id: str) -> str:
+        """Return BATCH_IN_PROGRESS, BATCH_ENDED or BATCH_FAILED."""
+        pass
+
+    @abstractmethod
+    def results(self, batch_id: str) -> Dict[str, Dict[str, Any]]:
+        """Return results for an ended batch keyed by custom_id."""
+        pass
+
+
+class AnthropicBatchProvider(BatchProvider):
+    """Anthropic Message Batches API."""
+
+    name = 'anthropic'
+
+    def _batches(self):
+        from anthropic import Anthropic
+        api_key = os.getenv('ANTHROPIC_API_KEY')
+        if not api_key:
+            raise Exception('Anthropic API key not configured')
+        client = Anthropic(api_key=api_key)
+        # Older SDKs expose batches under the beta namespace
+        return getattr(client.messages, 'batches', None) or client.beta.messages.batches
+
+    def submit(self, requests: List[Dict[str, Any]]) -> str:
+        batch = self._batches().create(requests=[
+            {
+                'custom_id': r['custom_id'],
+                'params': {
+                    'model': r['model'],
+                    'max_tokens': r['max_tokens'],
+                    'system': [{'type': 'text', 'text': r['system'], 'cache_control': {'type': 'ephemeral'}}],
+                    'messages': [{'role': 'user', 'content': r['prompt']}],
+                    'tools': [{'name': BATCH_VERDICTS_TOOL_NAME, 'input_schema': r['schema']}],
+                    'tool_choice': {'type': 'tool', 'name': BATCH_VERDICTS_TOOL_NAME}
+                }
+            }
+            for r in requests
+        ])
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        batch = self._batches().retrieve(batch_id)
+        if batch.processing_status == 'ended':
+            return BATCH_ENDED
+        if batch.processing_status == 'canceling':
+            return BATCH_FAILED
+        return BATCH_IN_PROGRESS
+
+    def results(self, batch_id: str) -> Dict[str, Dict[str, Any]]:
+        output = {}
+        for entry in self._batches().results(batch_id):
+            if entry.result.type == 'succeeded':
+                message = entry.result.message
+                recorded = next((block.input for block in message.content if getattr(block, 'type', None) == 'tool_use'), None)
+                output[entry.custom_id] = {
+                    'text': json.dumps(recorded),
+                    'input_tokens': message.usage.input_tokens,
+                    'output_tokens': message.usage.output_tokens
+                }
+            else:
+                output[entry.custom_id] = {'error': f'Batch request {entry.result.type}'}
+        return output
+
+
+class OpenAIBatchProvider(BatchProvider):
+    """OpenAI Batch API (JSONL upload to /v1/chat/completions)."""
+
+    name = 'openai'
+
+    def _client(self):
+        from openai import OpenAI
+        api_key = os.getenv('OPENAI_API_KEY')
+        if not api_key:
+            raise Exception('OpenAI API key not configured')
+        return OpenAI(api_key=api_key)
+
+    def submit(self, requests: List[Dict[str, Any]]) -> str:
+        client = self._client()
+        lines = [
+            json.dumps({
+                'custom_id': r['custom_id'],
+                'method': 'POST',
+                'url': '/v1/chat/completions',
+                'body': {
+                    'model': r['model'],
+                    'max_tokens': r['max_tokens'],
+                    'messages': [
+                        {'role': 'system', 'content': r['system']},
+                        {'role': 'user', 'content': r['prompt']}
+                    ],
+                    'response_format': {
+                        'type': 'json_schema',
+                        'json_schema': {'name': BATCH_VERDICTS_TOOL_NAME, 'schema': r['schema'], 'strict': True}
+                    }
+                }
+            })
+            for r in requests
+        ]
+        input_file = client.files.create(
+            file=('batch_requests.jsonl', '\n'.join(lines).encode('utf-8')),
+            purpose='batch'
+        )
+        batch = client.batches.create(
+            input_file_id=input_file.id,
+            endpoint='/v1/chat/completions',
+            completion_window='24h'
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        batch = self._client().batches.retrieve(batch_id)
+        if batch.status == 'completed':
+            return BATCH_ENDED
+        if batch.status in ('failed', 'expired', 'cancelled', 'cancelling'):
+            return BATCH_FAILED
+        return BATCH_IN_PROGRESS
+
+    def results(self, batch_id: str) -> Dict[str, Dict[str, Any]]:
+        client = self._client()
+        batch = client.batches.retrieve(batch_id)
+        output = {}
+        if not batch.output_file_id:
+            return output
+
+        for line in client.files.content(batch.output_file_id).text.splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            response = entry.get('response') or {}
+            body = response.get('body') or {}
+            if entry.get('error') or response.get('status_code') != 200:
+                output[entry['custom_id']] = {'error': str(entry.get('error') or body.get('error') or 'Batch request failed')}
+                continue
+            output[entry['custom_id']] = {
+                'text': body['choices'][0]['message']['content'],
+                'input_tokens': body['usage']['prompt_tokens'],
+                'output_tokens': body['usage']['completion_tokens']
+            }
+        return output
+
+
+class LocalFileBatchProvider(BatchProvider):
+    """
+    File-based stand-in for provider batch endpoints.
+
+    submit() writes <batch_id>.requests.jsonl; the batch has ended once
+    <batch_id>.results.jsonl exists (lines of {custom_id, text, input_tokens,
+    output_tokens} or {custom_id, error}). An optional responder callable
+    produces results immediately at submit time.
+    """
+
+    name = 'local'
+
+    def __init__(self, base_dir: Optional[str] = None, responder: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None):
+        self.base_dir = Path(base_dir or os.getenv('LLM_BATCH_LOCAL_DIR', './data/llm_batches'))
+        self.responder = responder
+
+    def _path(self, batch_id: str, kind: str) -> Path:
+        return self.base_dir / f"{batch_id}.{kind}.jsonl"
+
+    def submit(self, requests: List[Dict[str, Any]]) -> str:
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        batch_id = f"local_{uuid.uuid4().hex}"
+        with open(self._path(batch_id, 'requests'), 'w') as f:
+            for r in requests:
+                f.write(json.dumps(r) + '\n')
+
+        if self.responder:
+            self.write_results(batch_id, [{'custom_id': r['custom_id'], **self.responder(r)} for r in requests])
+        return batch_id
+
+    def write_results(self, batch_id: str, results: List[Dict[str, Any]]):
+        tmp_path = self._path(batch_id, 'results.tmp')
+        with open(tmp_path, 'w') as f:
+            for result in results:
+                f.write(json.dumps(result) + '\n')
+        os.replace(tmp_path, self._path(batch_id, 'results'))
+
+    def read_requests(self, batch_id: str) -> List[Dict[str, Any]]:
+        with open(self._path(batch_id, 'requests')) as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def status(self, batch_id: str) -> str:
+        if self._path(batch_id, 'results').exists():
+            return BATCH_ENDED
+        if self._path(batch_id, 'requests').exists():
+            return BATCH_IN_PROGRESS
+        return BATCH_FAILED
+
+    def results(self, batch_id: str) -> Dict[str, Dict[str, Any]]:
+        output = {}
+        with open(self._path(batch_id, 'results')) as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    output[entry.pop('custom_id')] = entry
+        return output
+
+
+BATCH_PROVIDERS = {
+    'anthropic': AnthropicBatchProvider,
+    'openai': OpenAIBatchProvider,
+    'local': LocalFileBatchProvider,
+}
+
+
+def get_batch_provider(provider: str) -> BatchProvider:
+    """Return the batch provider for an LLM provider (LLM_BATCH_PROVIDER=local overrides all)."""
+    override = os.getenv('LLM_BATCH_PROVIDER')
+    provider_class = BATCH_PROVIDERS.get(override or provider)
+    if not provider_class:
+        raise ValueError(f'No batch API available for LLM provider: {provider}')
+    return provider_class()
+
+
+def submit_pending(
+    collector: BatchCollector,
+    items_per_request: int = 1,
+    provider_factory: Callable[[str], BatchProvider] = get_batch_provider
+) -> Dict[str, Any]:
+    """
+    Submit every validation deferred in the collector through provider batch APIs.
+
+    Items sharing a prompt are packed items_per_request at a time into the
+    multi-item format (the criteria once, as the system prefix; the model
+    records the verdicts through structured output), one provider batch per
+    (provider, model).
+
+    Returns:
+        JSON-serializable batch state to persist on the job
+    """
+    items_per_request = max(1, items_per_request)
+    batches = []
+
+    for provider, model, items in collector.pending_items():
+        requests = []
+        request_items = {}
+        for number, chunk in enumerate(batch_chunks(items, items_per_request)):
+            custom_id = f"req-{number:06d}"
+            requests.append({
+                'custom_id': custom_id,
+                'model': model,
+                'system': build_batch_prefix(chunk[0].prompt),
+                'prompt': build_batch_prompt(chunk),
+                'schema': batch_verdict_schema(),
+                'max_tokens': min(200 + 120 * len(chunk), 8000)
+            })
+            request_items[custom_id] = [
+                {'key': item.key, 'prompt': item.prompt, 'value': str(item.value)} for item in chunk
+            ]
+
+        batch_provider = provider_factory(provider)
+        batches.append({
+            'provider': provider,
+            'batch_provider': batch_provider.name,
+            'model': model,
+            'batch_id': batch_provider.submit(requests),
+            'request_count': len(requests),
+            'item_count': len(items),
+            'requests': request_items
+        })
+
+    return {'batches': batches}
+
+
+def collect_results(
+    batch_state: Dict[str, Any],
+    provider_factory: Callable[[str], BatchProvider] = get_batch_provider
+) -> Tuple[bool, Dict[str, Dict[str, Any]]]:
+    """
+    Poll submitted batches and convert finished results into verdicts.
+
+    Items whose request failed or could not be parsed are left out, so the
+    resumed job validates them synchronously instead.
+
+    Returns:
+        Tuple of (all_batches_finished, verdicts keyed by validation key)
+    """
+    statuses = []
+    for batch in batch_state.get('batches', []):
+        batch_provider = provider_factory(batch['provider'])
+        statuses.append((batch, batch_provider, batch_provider.status(batch['batch_id'])))
+
+    if any(status == BATCH_IN_PROGRESS for _, _, status in statuses):
+        return False, {}
+
+    verdicts = {}
+    for batch, batch_provider, status in statuses:
+        if status != BATCH_ENDED:
+            continue
+
+        results = batch_provider.results(batch['batch_id'])
+        for custom_id, entries in batch['requests'].items():
+            result = results.get(custom_id)
+            if not result or result.get('error'):
+                continue
+
+            parsed = parse_batch_response(result.get('text', ''), len(entries))
+            if parsed is None:
+                continue
+
+            usage = build_usage_info(batch['provider'], batch['model'], result.get('input_tokens', 0), result.get('output_tokens', 0))
+            items = [ValidationItem(prompt=e['prompt'], value=e['value'], key=e['key']) for e in entries]
+            for entry, verdict, item_usage in zip(entries, parsed, attribute_usage(usage, items, parsed)):
+                item_usage['cost_usd'] = round(item_usage['cost_usd'] * BATCH_API_DISCOUNT, 6)
+                item_usage['batch_api'] = True
+                verdicts[entry['key']] = {
+                    'passed': verdict['compliant'],
+                    'response': verdict['reason'],
+                    'confidence': verdict['confidence'],
+                    'value_digest': value_digest(entry['value']),
+                    'error': False,
+                    'usage': item_usage
+                }
+
+    return True, verdicts
@@ -0,0 +1,599 @@
+"""
+Batched LLM validation for the LLM-backed check types.
+
+Packs several values judged against the same prompt into one LLM request:
+the criteria and instructions are sent once, as a cacheable prefix, and the
+model records an array of verdicts through structured output (see
+llm_client.call_llm_structured). A chunk whose verdicts do not cover every
+item exactly once is split and retried. Also provides:
+
+- VerdictCache: process-wide LRU of verdicts for identical inputs, so the
+  same value judged against the same prompt and model is only paid for once.
+- BatchCollector: two-pass collection used by the job runner to gather LLM
+  validations across many sessions and resolve them in shared batches.
+"""
+import hashlib
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+from .llm_client import call_llm_structured, build_usage_info
+from .llm_normalization import NormalizationConfig, normalization_stats
+from .llm_resilience import is_deferrable_error, deferred_result
+from . import job_telemetry
+from .item_retry import raise_for_item_retry
+
+# validator(value, prompt, provider, model) -> {'passed', 'response', 'error', 'usage'}
+Validator = Callable[[Any, str, str, str], Dict[str, Any]]
+
+DEFAULT_BATCH_SIZE = 10
+MAX_BATCH_SIZE = 50
+
+BATCH_VERDICTS_TOOL_NAME = 'record_verdicts'
+
+
+def validation_key(
+    provider: str,
+    model: str,
+    prompt: str,
+    value: Any,
+    namespace: str = '',
+    with_confidence: bool = False
+) -> str:
+    """Stable hash identifying one (provider, model, prompt, value) validation.
+
+    namespace separates keys built from normalized values from raw ones, and
+    with_confidence separates verdicts that must carry a confidence (cascade
+    screening) from plain ones, which never do.
+    """
+    parts = [provider, model, prompt or '', str(value)]
+    if namespace:
+        parts.append(namespace)
+    if with_confidence:
+        parts.append({'verdict': 'confidence'})
+    payload = json.dumps(parts, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def value_digest(value: Any) -> str:
+    """Short hash of the raw value a verdict was produced for."""
+    return hashlib.sha256(str(value).encode('utf-8')).hexdigest()[:16]
+
+
+@dataclass
+class ValidationItem:
+    """A single value to validate against a natural language prompt."""
+    prompt: str
+    value: Any
+    key: str = ''
+    with_confidence: bool = False  # The verdict must report a confidence
+
+
+class VerdictCache:
+    """Thread-safe bounded LRU map of validation key -> verdict."""
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.max_size <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def contains(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def put(self, key: str, result: Dict[str, Any]):
+        """Store a verdict. Errors are never cached."""
+        if self.max_size <= 0 or result.get('error'):
+            return
+        verdict = {'passed': result['passed'], 'response': result['response'], 'error': False}
+        for field in ('confidence', 'reason_code', 'value_digest'):
+            if result.get(field) is not None:
+                verdict[field] = result[field]
+        with self._lock:
+            self._entries[key] = verdict
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def evict(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+# Global instance
+verdict_cache = VerdictCache(max_size=int(os.getenv('LLM_VERDICT_CACHE_SIZE', '10000')))
+
+
+class BatchCollector:
+    """
+    Gathers LLM validations across many evaluations so they can be resolved in shared batches.
+
+    Usage (two passes over the same sessions/policies):
+        collector = BatchCollector()
+        evaluator = PolicyEvaluator(collector=collector)
+        ... evaluate everything once; LLM checks defer their items ...
+        collector.resolve(batch_size=10)
+        ... evaluate again; LLM checks now read resolved verdicts ...
+    """
+
+    def __init__(self):
+        self.collecting = True
+        self._pending: "OrderedDict[Tuple[str, str], OrderedDict[str, ValidationItem]]" = OrderedDict()
+        self._validators: Dict[Tuple[str, str, bool], Validator] = {}
+        self._resolved: Dict[str, Dict[str, Any]] = {}
+        self._usage_claimed: set = set()
+        self._lock = threading.Lock()
+        # Validations seen while collecting (used for pre-flight estimates)
+        self.requested = 0
+        self.cache_hits = 0
+        # Calls that may follow once verdicts exist (cascade escalations, tie-break judges)
+        self.follow_up_calls = 0
+
+    @property
+    def pending_count(self) -> int:
+        with self._lock:
+            return sum(len(items) for items in self._pending.values())
+
+    def record(self, requested: int, cache_hits: int):
+        """Count validations requested while collecting and how many the verdict cache answered."""
+        with self._lock:
+            self.requested += requested
+            self.cache_hits += cache_hits
+
+    def record_follow_ups(self, count: int):
+        """Count calls the evaluation pass may add depending on collected verdicts (worst case)."""
+        with self._lock:
+            self.follow_up_calls += count
+
+    def defer(self, item: ValidationItem, provider: str, model: str, validator: Validator):
+        with self._lock:
+            group = self._pending.setdefault((provider, model), OrderedDict())
+            group.setdefault(item.key, item)
+            # One validator per verdict shape: a plain validator cannot answer with a confidence
+            self._validators.setdefault((provider, model, item.with_confidence), validator)
+
+    def pending_items(self) -> List[Tuple[str, str, List[ValidationItem]]]:
+        """Deferred items grouped as (provider, model, items)."""
+        with self._lock:
+            return [(provider, model, list(items.values())) for (provider, model), items in self._pending.items()]
+
+    def load_verdicts(self, verdicts: Dict[str, Dict[str, Any]]):
+        """Finish collection with verdicts resolved elsewhere (e.g. a provider batch API).
+
+        Anything not covered by `verdicts` is validated synchronously on lookup miss.
+        """
+        with self._lock:
+            self._resolved.update(verdicts)
+            self._pending = OrderedDict()
+            self.collecting = False
+        for key, result in verdicts.items():
+            verdict_cache.put(key, result)
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a resolved verdict; usage is attributed to the first consumer only."""
+        with self._lock:
+            result = self._resolved.get(key)
+            if result is None:
+                return None
+            if key in self._usage_claimed:
+                return {**result, 'usage': None, 'cached': True}
+            self._usage_claimed.add(key)
+            return result
+
+    def resolve(self, batch_size: int = DEFAULT_BATCH_SIZE):
+        """Validate all deferred items in batches grouped by provider and model."""
+        with self._lock:
+            groups = list(self._pending.items())
+            self._pending = OrderedDict()
+            self.collecting = False
+
+        for (provider, model), items_by_key in groups:
+            items = list(items_by_key.values())
+            results = [None] * len(items)
+            for with_confidence in (False, True):
+                positions = [idx for idx, item in enumerate(items) if item.with_confidence == with_confidence]
+                if not positions:
+                    continue
+                validator = self._validators[(provider, model, with_confidence)]
+                shaped = validate_batch([items[idx] for idx in positions], provider, model, batch_size, validator)
+                for idx, result in zip(positions, shaped):
+                    results[idx] = result
+            for item, result in zip(items, results):
+                result.setdefault('value_digest', value_digest(item.value))
+            with self._lock:
+                for item, result in zip(items, results):
+                    self._resolved[item.key] = result
+            for item, result in zip(items, results):
+                verdict_cache.put(item.key, result)
+
+
+def validate_many(
+    values: List[Any],
+    prompt: str,
+    provider: str,
+    model: str,
+    validator: Validator,
+    batch_size: int = 1,
+    collector: Optional[BatchCollector] = None,
+    use_cache: bool = True,
+    normalization: Optional[NormalizationConfig] = None,
+    with_confidence: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Validate several values against one prompt, reusing cached verdicts.
+
+    Identical values are only sent once. When batch_size > 1, misses are packed
+    into multi-item requests; otherwise each miss goes through `validator`.
+    While a collector is collecting, misses are deferred and a placeholder
+    verdict is returned.
+
+    With `normalization`, values are keyed by their masked form, so values that
+    only differ by IDs/dates/numbers share a verdict ('collapsed': True). A
+    sample of collapsed hits is re-validated on the raw value; disagreement
+    ('drift': True) evicts the shared verdict.
+
+    `with_confidence` marks verdicts that must carry a confidence; they are
+    keyed apart from plain verdicts, so a cached plain verdict is never used
+    where a confidence is needed.
+
+    Returns:
+        One result dict per input value, in order
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(values)
+    misses: "OrderedDict[str, ValidationItem]" = OrderedDict()
+    miss_positions: Dict[str, List[int]] = {}
+    keys: List[str] = []
+    cache_hits = 0
+    cache_misses = 0
+    collecting = bool(collector and collector.collecting)
+
+    for idx, value in enumerate(values):
+        if normalization:
+            key = validation_key(
+                provider, model, prompt, normalization.normalize(value), normalization.namespace, with_confidence
+            )
+        else:
+            key = validation_key(provider, model, prompt, value, with_confidence=with_confidence)
+        keys.append(key)
+
+        hit = collector.lookup(key) if collector else None
+        if hit is None and use_cache:
+            cached = verdict_cache.get(key)
+            if cached is not None:
+                hit = {**cached, 'usage': None, 'cached': True}
+                cache_hits += 1
+            else:
+                cache_misses += 1
+        if hit is not None:
+            if normalization and hit.get('value_digest') and hit['value_digest'] != value_digest(value):
+                hit = {**hit, 'collapsed': True}
+            results[idx] = hit
+            continue
+
+        if key not in misses:
+            misses[key] = ValidationItem(prompt=prompt, value=value, key=key, with_confidence=with_confidence)
+        miss_positions.setdefault(key, []).append(idx)
+
+    job_telemetry.increment('verdict_cache_hits', cache_hits)
+    job_telemetry.increment('verdict_cache_misses', cache_misses)
+    if collecting:
+        collector.record(len(values), cache_hits)
+
+    items = list(misses.values())
+
+    if items and collecting:
+        for item in items:
+            collector.defer(item, provider, model, validator)
+        placeholder = {'passed': True, 'response': 'Deferred for batched validation', 'error': False, 'usage': None, 'deferred': True}
+        for positions in miss_positions.values():
+            for idx in positions:
+                results[idx] = dict(placeholder)
+        return results
+
+    if items:
+        if batch_size > 1 and len(items) > 1:
+            item_results = validate_batch(items, provider, model, batch_size, validator)
+        else:
+            item_results = [validator(item.value, item.prompt, provider, model) for item in items]
+
+        for item, result in zip(items, item_results):
+            result['value_digest'] = value_digest(item.value)
+            if use_cache:
+                verdict_cache.put(item.key, result)
+            positions = miss_positions[item.key]
+            results[positions[0]] = result
+            # Duplicates within the same call reuse the verdict without re-counting usage
+            for idx in positions[1:]:
+                duplicate = {**result, 'usage': None, 'cached': True}
+                if normalization and value_digest(values[idx]) != result['value_digest']:
+                    duplicate['collapsed'] = True
+                results[idx] = duplicate
+
+    if normalization and not collecting:
+        _reverify_collapsed(values, keys, results, prompt, provider, model, validator, normalization)
+
+    return results
+
+
+def _reverify_collapsed(
+    values: List[Any],
+    keys: List[str],
+    results: List[Dict[str, Any]],
+    prompt: str,
+    provider: str,
+    model: str,
+    validator: Validator,
+    normalization: NormalizationConfig
+):
+    """Re-validate a sample of collapsed verdicts on their raw values, in place."""
+    reverified = drift = 0
+    for idx, result in enumerate(results):
+        if not result.get('collapsed') or not normalization.should_reverify():
+            continue
+
+        fresh = validator(values[idx], prompt, provider, model)
+        if fresh.get('error'):
+            continue
+
+        reverified += 1
+        if fresh['passed'] != result['passed']:
+            # The masked detail mattered: trust the fresh verdict and drop the shared one
+            drift += 1
+            verdict_cache.evict(keys[idx])
+            results[idx] = {**fresh, 'collapsed': True, 'reverified': True, 'drift': True}
+        else:
+            results[idx] = {**result, 'usage': fresh.get('usage'), 'reverified': True}
+
+    normalization_stats.record(
+        normalized=len(values),
+        collapsed=sum(1 for r in results if r.get('collapsed')),
+        reverified=reverified,
+        drift=drift
+    )
+
+
+def usage_entries(result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """All usage dicts attributable to one validation result, including failed batch attempts."""
+    entries = [result['usage']] if result.get('usage') else []
+    return (entries + list(result.get('retry_usage', [])) + list(result.get('cascade_usage', []))
+            + list(result.get('consensus_usage', [])))
+
+
+def parse_confidence(raw: Any) -> Optional[float]:
+    """Coerce a self-reported confidence to [0, 1]; None if missing or not numeric."""
+    if isinstance(raw, bool) or not isinstance(raw, (int, float)):
+        return None
+    return min(1.0, max(0.0, float(raw)))
+
+
+def batch_verdict_schema() -> Dict[str, Any]:
+    """JSON schema for an array of verdicts, one per item (strict-mode compatible: every property required)."""
+    verdict = {
+        'type': 'object',
+        'properties': {
+            'item': {'type': 'integer', 'description': 'Number of the item'},
+            'compliant': {'type': 'boolean', 'description': 'Whether the value meets the criteria'},
+            'confidence': {'type': 'number', 'description': '0.0 (guessing) to 1.0 (certain)'},
+            'reason': {'type': 'string', 'description': 'At most 20 words'}
+        },
+        'required': ['item', 'compliant', 'confidence', 'reason'],
+        'additionalProperties': False
+    }
+    return {
+        'type': 'object',
+        'properties': {'verdicts': {'type': 'array', 'items': verdict}},
+        'required': ['verdicts'],
+        'additionalProperties': False
+    }
+
+
+def build_batch_prefix(prompt: str) -> str:
+    """Static instructions and the criteria shared by every item of a batch request.
+
+    Sent once per request as a cacheable prompt prefix; only the values
+    (build_batch_prompt) change between requests.
+    """
+    return f"""You are a compliance validator. Evaluate each numbered value in the next message independently against the criteria below.
+
+USER CRITERIA:
+{prompt}
+
+INSTRUCTIONS:
+1. For each item, make a binary decision: does the value meet the criteria or not?
+2. Give a reason of at most 20 words for each decision
+3. Give your confidence in each decision from 0.0 (guessing) to 1.0 (certain)
+
+Answer only with the verdicts (item, compliant, confidence, reason), one per item, covering every item exactly once."""
+
+
+def build_batch_prompt(items: List[ValidationItem]) -> str:
+    """The numbered values of one batch request; the items share one prompt (see build_batch_prefix)."""
+    sections = [f"### ITEM {number}\nVALUE TO EVALUATE:\n{item.value}" for number, item in enumerate(items, start=1)]
+    return f"{len(items)} ITEMS TO EVALUATE:\n\n" + "\n\n".join(sections)
+
+
+def batch_chunks(items: List[ValidationItem], max_batch_size: int) -> List[List[ValidationItem]]:
+    """Split items into requests of at most max_batch_size items sharing one prompt."""
+    by_prompt: "OrderedDict[str, List[ValidationItem]]" = OrderedDict()
+    for item in items:
+        by_prompt.setdefault(item.prompt, []).append(item)
+    return [
+        group[start:start + max_batch_size]
+        for group in by_prompt.values()
+        for start in range(0, len(group), max_batch_size)
+    ]
+
+
+def parse_batch_verdicts(data: Any, expected_count: int) -> Optional[List[Dict[str, Any]]]:
+    """
+    Validate structured batch verdicts ({'verdicts': [...]}, or the bare array).
+
+    Returns:
+        List of {'compliant', 'reason', 'confidence'} ordered by item number, or None if the
+        verdicts are malformed or do not cover every item exactly once.
+    """
+    if isinstance(data, dict):
+        data = data.get('verdicts')
+    if not isinstance(data, list) or len(data) != expected_count:
+        return None
+
+    verdicts: Dict[int, Dict[str, Any]] = {}
+    for position, entry in enumerate(data, start=1):
+        if not isinstance(entry, dict) or not isinstance(entry.get('compliant'), bool):
+            return None
+        number = entry.get('item', position)
+        if not isinstance(number, int) or number < 1 or number > expected_count or number in verdicts:
+            return None
+        verdicts[number] = {
+            'compliant': entry['compliant'],
+            'reason': str(entry.get('reason', '')),
+            'confidence': parse_confidence(entry.get('confidence'))
+        }
+
+    return [verdicts[n] for n in range(1, expected_count + 1)]
+
+
+def parse_batch_response(text: str, expected_count: int) -> Optional[List[Dict[str, Any]]]:
+    """Parse the JSON verdicts of a provider batch API result (see parse_batch_verdicts)."""
+    try:
+        return parse_batch_verdicts(json.loads(text or ''), expected_count)
+    except (json.JSONDecodeError, ValueError):
+        return None
+
+
+def split_tokens(total: int, weights: List[int]) -> List[int]:
+    """Split an integer token count proportionally to weights (largest remainder)."""
+    if not weights:
+        return []
+    weight_sum = sum(weights)
+    if weight_sum <= 0:
+        weights = [1] * len(weights)
+        weight_sum = len(weights)
+
+    exact = [total * w / weight_sum for w in weights]
+    shares = [int(x) for x in exact]
+    remainder = total - sum(shares)
+    by_fraction = sorted(range(len(weights)), key=lambda i: exact[i] - shares[i], reverse=True)
+    for i in by_fraction[:remainder]:
+        shares[i] += 1
+    return shares
+
+
+def attribute_usage(usage: Dict[str, Any], items: List[ValidationItem], verdicts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Attribute one batch call's tokens and cost back to each item."""
+    batch_call_id = uuid.uuid4().hex[:12]
+    # The criteria are sent once per request: only the values differ in size
+    input_weights = [len(str(item.value)) + 1 for item in items]
+    output_weights = [len(v['reason']) + 1 for v in verdicts]
+    input_shares = split_tokens(usage['input_tokens'], input_weights)
+    cached_shares = split_tokens(usage.get('cached_input_tokens', 0), input_weights)
+    cache_write_shares = split_tokens(usage.get('cache_write_tokens', 0), input_weights)
+    output_shares = split_tokens(usage['output_tokens'], output_weights)
+
+    per_item = []
+    for input_tokens, cached, cache_write, output_tokens in zip(input_shares, cached_shares, cache_write_shares, output_shares):
+        item_usage = build_usage_info(
+            usage['provider'], usage['model'], input_tokens, output_tokens,
+            cached_input_tokens=cached, cache_write_tokens=cache_write
+        )
+        item_usage.update({
+            'batched': True,
+            'batch_size': len(items),
+            'batch_call_id': batch_call_id
+        })
+        per_item.append(item_usage)
+    return per_item
+
+
+def validate_batch(
+    items: List[ValidationItem],
+    provider: str,
+    model: str,
+    max_batch_size: int,
+    single_validator: Validator
+) -> List[Dict[str, Any]]:
+    """
+    Validate items in chunks of at most max_batch_size per LLM request.
+
+    Items are grouped by prompt, so each request carries its criteria once.
+    A chunk whose verdicts do not cover every item is split in half and
+    retried; single items fall back to `single_validator`.
+
+    Returns:
+        One result dict per item, in order
+    """
+    max_batch_size = max(1, min(max_batch_size, MAX_BATCH_SIZE))
+    results: Dict[int, Dict[str, Any]] = {}
+    for chunk in batch_chunks(items, max_batch_size):
+        for item, result in zip(chunk, _validate_chunk(chunk, provider, model, single_validator)):
+            results[id(item)] = result
+    return [results[id(item)] for item in items]
+
+
+def _validate_chunk(items: List[ValidationItem], provider: str, model: str, single_validator: Validator) -> List[Dict[str, Any]]:
+    if len(items) == 1:
+        item = items[0]
+        return [single_validator(item.value, item.prompt, provider, model)]
+
+    try:
+        # ~60 output tokens per verdict plus array overhead
+        data, usage = call_llm_structured(
+            provider, model, build_batch_prompt(items), batch_verdict_schema(),
+            name=BATCH_VERDICTS_TOOL_NAME, description='Record one compliance verdict per item',
+            max_tokens=min(200 + 120 * len(items), 8000), prefix=build_batch_prefix(items[0].prompt)
+        )
+    except Exception as e:
+        if is_deferrable_error(e):
+            return [deferred_result(e) for _ in items]
+        raise_for_item_retry(e)
+        message = f'LLM validation error: {str(e)}'
+        return [{'passed': False, 'response': message, 'error': True, 'usage': None} for _ in items]
+
+    verdicts = parse_batch_verdicts(data, len(items))
+    if verdicts is None:
+        # Verdicts missing or duplicated: the tokens were spent, so attribute them to the first half's retry
+        mid = len(items) // 2
+        left = _validate_chunk(items[:mid], provider, model, single_validator)
+        right = _validate_chunk(items[mid:], provider, model, single_validator)
+        failed_usage = dict(usage, batched=True, batch_size=len(items), parse_failed=True)
+        left[0]['retry_usage'] = left[0].get('retry_usage', []) + [failed_usage]
+        return left + right
+
+    per_item_usage = attribute_usage(usage, items, verdicts)
+    return [
+        {'passed': verdict['compliant'], 'response': verdict['reason'], 'confidence': verdict['confidence'], 'error': False, 'usage': item_usage}
+        for verdict, item_usage in zip(verdicts, per_item_usage)
+    ]
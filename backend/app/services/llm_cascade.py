@@ -0,0 +1,109 @@
+"""
+Tiered model cascade for LLM validation checks.
+
+A cheap screening model judges every value first and reports its confidence.
+Verdicts at or above the confidence threshold are final; the rest escalate to
+the check's configured (expensive) model. Usage from both stages is kept on
+the result so llm_usage reflects the full cost of each verdict.
+
+Check config:
+    "cascade": {
+        "model": "claude-haiku-3-5-20241022",   // Required: screening model
+        "provider": "anthropic",                // Optional: defaults to llm_provider
+        "confidence_threshold": 0.85            // Optional: default 0.85
+    }
+"""
+from typing import Dict, Any, List, Optional, Tuple
+
+from .llm_batching import BatchCollector, Validator, validate_many, usage_entries
+from .llm_normalization import NormalizationConfig
+
+DEFAULT_CONFIDENCE_THRESHOLD = 0.85
+
+
+def _tag_usage(entries: List[Dict[str, Any]], stage: str) -> List[Dict[str, Any]]:
+    return [dict(entry, cascade_stage=stage) for entry in entries]
+
+
+def cascade_validate(
+    values: List[Any],
+    prompt: str,
+    provider: str,
+    model: str,
+    validator: Validator,
+    cascade_config: Dict[str, Any],
+    batch_size: int = 1,
+    collector: Optional[BatchCollector] = None,
+    use_cache: bool = True,
+    normalization: Optional[NormalizationConfig] = None
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Validate values with a cheap model, escalating low-confidence verdicts.
+
+    While a collector is collecting only the screening stage is deferred;
+    escalations happen on the evaluation pass once screening verdicts exist.
+
+    Returns:
+        Tuple of (one result per value, cascade stats)
+    """
+    screen_provider = cascade_config.get('provider', provider)
+    screen_model = cascade_config['model']
+    threshold = float(cascade_config.get('confidence_threshold', DEFAULT_CONFIDENCE_THRESHOLD))
+
+    screened = validate_many(
+        values, prompt, screen_provider, screen_model, validator,
+        batch_size=batch_size, collector=collector, use_cache=use_cache, normalization=normalization,
+        with_confidence=True
+    )
+
+    stats = {
+        'screen_model': screen_model,
+        'escalation_model': model,
+        'confidence_threshold': threshold,
+        'screened': len(values),
+        'escalated': 0
+    }
+
+    if any(result.get('deferred') for result in screened):
+        if collector is not None and collector.collecting:
+            # Each deferred screen may escalate once its verdict is known
+            collector.record_follow_ups(sum(1 for result in screened if result.get('deferred')))
+        return screened, stats
+
+    escalate_positions = [
+        idx for idx, result in enumerate(screened)
+        if result.get('error') or result.get('confidence') is None or result['confidence'] < threshold
+    ]
+
+    results = []
+    for result in screened:
+        results.append({
+            **result,
+            'usage': None,
+            'retry_usage': [],
+            'cascade_usage': _tag_usage(usage_entries(result), 'screen'),
+            'cascade': {'stage': 'screen', 'screen_confidence': result.get('confidence')}
+        })
+
+    if escalate_positions:
+        escalated = validate_many(
+            [values[idx] for idx in escalate_positions], prompt, provider, model, validator,
+            batch_size=batch_size, collector=collector, use_cache=use_cache, normalization=normalization
+        )
+        for idx, result in zip(escalate_positions, escalated):
+            screen = screened[idx]
+            results[idx] = {
+                **result,
+                'usage': None,
+                'retry_usage': [],
+                'cascade_usage': results[idx]['cascade_usage'] + _tag_usage(usage_entries(result), 'escalation'),
+                'cascade': {
+                    'stage': 'escalation',
+                    'screen_confidence': screen.get('confidence'),
+                    'screen_passed': screen.get('passed')
+                }
+            }
+
+    stats['escalated'] = len(escalate_positions)
+    stats['escalation_rate'] = round(len(escalate_positions) / len(values), 4) if values else 0.0
+    return results, stats
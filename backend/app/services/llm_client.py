@@ -0,0 +1,267 @@
+"""
+Shared LLM client helpers used by the LLM-backed check types.
+
+Centralizes provider dispatch and token usage/cost accounting so that
+single-item and batched validations report usage in the same shape. Every
+call goes through the process-wide rate limiter (see llm_rate_limiter) and
+the timeout/hedging/circuit-breaker layer (see llm_resilience).
+"""
+import json
+import os
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+from .llm_rate_limiter import rate_limiter, estimate_tokens
+from .llm_resilience import resilient_caller
+from .job_control import job_control
+
+_clients: Dict[Tuple[Any, str], Any] = {}
+_clients_lock = threading.Lock()
+
+
+class LLMConfigurationError(Exception):
+    """Raised when a provider is unknown or its API key is missing."""
+    pass
+
+
+def shared_client(client_class, api_key: str):
+    """One SDK client per provider and key, shared by every thread.
+
+    SDK clients are thread-safe and pool their HTTP connections, so sessions
+    evaluated in parallel reuse warm connections instead of opening new ones.
+    """
+    key = (client_class, api_key)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = client_class(api_key=api_key)
+        return client
+
+
+def build_usage_info(
+    provider: str,
+    model: str,
+    input_tokens: int,
+    output_tokens: int,
+    cached_input_tokens: int = 0,
+    cache_write_tokens: int = 0
+) -> Dict[str, Any]:
+    """Build the per-call usage dict stored in CheckResult.llm_usage['per_call'].
+
+    input_tokens is the full prompt size; cached_input_tokens were read from the
+    provider's prompt cache and cache_write_tokens were written to it.
+    """
+    from .check_types import calculate_llm_cost
+
+    cost = calculate_llm_cost(model, input_tokens, output_tokens, cached_input_tokens, cache_write_tokens)
+    return {
+        'provider': provider,
+        'model': model,
+        'input_tokens': input_tokens,
+        'cached_input_tokens': cached_input_tokens,
+        'cache_write_tokens': cache_write_tokens,
+        'uncached_input_tokens': max(0, input_tokens - cached_input_tokens - cache_write_tokens),
+        'output_tokens': output_tokens,
+        'total_tokens': input_tokens + output_tokens,
+        'cost_usd': round(cost, 6)
+    }
+
+
+def call_llm(
+    provider: str,
+    model: str,
+    prompt: str,
+    max_tokens: int = 1000,
+    prefix: Optional[str] = None,
+    cache_prefix: bool = True,
+    timeout: Optional[float] = None,
+    hedge: bool = True
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Send a single-turn prompt to the configured provider.
+
+    A static `prefix` (instructions, criteria, examples) is sent ahead of the
+    prompt so providers can serve it from their prompt cache: Anthropic via an
+    explicit cache_control breakpoint on the system prompt, OpenAI through its
+    automatic prefix caching of the leading system message. Providers only
+    cache prefixes above a minimum length (~1024 tokens).
+
+    Args:
+        provider: 'anthropic' or 'openai'
+        model: Model identifier
+        prompt: User message content (the part that varies per call)
+        max_tokens: Maximum tokens to generate
+        prefix: Optional static prefix sent as the system prompt
+        cache_prefix: Mark the prefix cacheable (Anthropic only; OpenAI caches automatically)
+        timeout: Seconds to wait for the response (default LLM_CALL_TIMEOUT_SECONDS);
+            also bounds the wait for rate limiter capacity
+        hedge: Allow a duplicate request when the call runs past the model's p95 latency
+
+    Returns:
+        Tuple of (response_text, usage_info)
+
+    Raises:
+        LLMConfigurationError: If the provider is unknown or not configured
+        LLMTimeoutError / CircuitOpenError: See llm_resilience
+        RateLimitTimeout: If rate limiter capacity was not free within `timeout`
+        Exception: Any provider SDK error
+    """
+    response, usage_info = _create(provider, model, prompt, max_tokens, prefix, cache_prefix, timeout, hedge)
+    if provider == 'anthropic':
+        return response.content[0].text, usage_info
+    return response.choices[0].message.content, usage_info
+
+
+def call_llm_structured(
+    provider: str,
+    model: str,
+    prompt: str,
+    schema: Dict[str, Any],
+    name: str,
+    description: str = '',
+    max_tokens: int = 200,
+    prefix: Optional[str] = None,
+    cache_prefix: bool = True,
+    timeout: Optional[float] = None,
+    hedge: bool = True
+) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Like call_llm, but the model must answer with an object matching `schema`.
+
+    Anthropic is forced to call a single tool whose input_schema is `schema`;
+    OpenAI uses strict json_schema structured output. Either way the model
+    emits only the object, with no prose around it.
+
+    Returns:
+        Tuple of (parsed object or None if the provider returned none, usage_info)
+    """
+    if provider == 'anthropic':
+        extra = {
+            'tools': [{'name': name, 'description': description, 'input_schema': schema}],
+            'tool_choice': {'type': 'tool', 'name': name}
+        }
+    else:
+        extra = {
+            'response_format': {
+                'type': 'json_schema',
+                'json_schema': {'name': name, 'description': description, 'schema': schema, 'strict': True}
+            }
+        }
+
+    response, usage_info = _create(provider, model, prompt, max_tokens, prefix, cache_prefix, timeout, hedge, extra)
+
+    if provider == 'anthropic':
+        for block in response.content:
+            if getattr(block, 'type', None) == 'tool_use' and block.name == name:
+                return (block.input if isinstance(block.input, dict) else None), usage_info
+        return None, usage_info
+
+    try:
+        parsed = json.loads(response.choices[0].message.content or '')
+    except (json.JSONDecodeError, ValueError, TypeError):
+        return None, usage_info
+    return (parsed if isinstance(parsed, dict) else None), usage_info
+
+
+def _create(
+    provider: str,
+    model: str,
+    prompt: str,
+    max_tokens: int,
+    prefix: Optional[str],
+    cache_prefix: bool,
+    timeout: Optional[float],
+    hedge: bool,
+    extra: Optional[Dict[str, Any]] = None
+) -> Tuple[Any, Dict[str, Any]]:
+    """Send one request (plus provider-specific `extra` arguments); returns the SDK response and usage."""
+    # A paused or cancelled job stops here, before paying for another call
+    job_control.checkpoint()
+    estimated_tokens = estimate_tokens((prefix or '') + prompt) + max_tokens
+    timeout = timeout or resilient_caller.timeout
+
+    if provider == 'anthropic':
+        from anthropic import Anthropic
+        api_key = os.getenv('ANTHROPIC_API_KEY')
+        if not api_key:
+            raise LLMConfigurationError('Anthropic API key not configured')
+
+        request = {
+            'model': model,
+            'max_tokens': max_tokens,
+            'timeout': timeout,
+            'messages': [{
+                'role': 'user',
+                'content': prompt
+            }],
+            **(extra or {})
+        }
+        if prefix:
+            system_block = {'type': 'text', 'text': prefix}
+            if cache_prefix:
+                system_block['cache_control'] = {'type': 'ephemeral'}
+            request['system'] = [system_block]
+
+        client = shared_client(Anthropic, api_key)
+        response = rate_limiter.call(
+            'anthropic', model, estimated_tokens,
+            lambda: resilient_caller.call(
+                'anthropic', model, lambda: client.messages.create(**request),
+                timeout=timeout, hedge=hedge, estimated_tokens=estimated_tokens
+            ),
+            actual_tokens=lambda r: r.usage.input_tokens + r.usage.output_tokens,
+            timeout=timeout
+        )
+
+        # Anthropic reports cache reads/writes separately from input_tokens
+        cache_read = getattr(response.usage, 'cache_read_input_tokens', 0) or 0
+        cache_write = getattr(response.usage, 'cache_creation_input_tokens', 0) or 0
+        usage_info = build_usage_info(
+            'anthropic', model,
+            response.usage.input_tokens + cache_read + cache_write,
+            response.usage.output_tokens,
+            cached_input_tokens=cache_read,
+            cache_write_tokens=cache_write
+        )
+        return response, usage_info
+
+    elif provider == 'openai':
+        from openai import OpenAI
+        api_key = os.getenv('OPENAI_API_KEY')
+        if not api_key:
+            raise LLMConfigurationError('OpenAI API key not configured')
+
+        messages = [{'role': 'system', 'content': prefix}] if prefix else []
+        messages.append({
+            'role': 'user',
+            'content': prompt
+        })
+
+        client = shared_client(OpenAI, api_key)
+        response = rate_limiter.call(
+            'openai', model, estimated_tokens,
+            lambda: resilient_caller.call(
+                'openai', model,
+                lambda: client.chat.completions.create(
+                    model=model,
+                    max_tokens=max_tokens,
+                    messages=messages,
+                    timeout=timeout,
+                    **(extra or {})
+                ),
+                timeout=timeout, hedge=hedge, estimated_tokens=estimated_tokens
+            ),
+            actual_tokens=lambda r: r.usage.total_tokens,
+            timeout=timeout
+        )
+
+        # prompt_tokens already includes cached tokens
+        details = getattr(response.usage, 'prompt_tokens_details', None)
+        cached = getattr(details, 'cached_tokens', 0) or 0
+        usage_info = build_usage_info(
+            'openai', model, response.usage.prompt_tokens, response.usage.completion_tokens,
+            cached_input_tokens=cached
+        )
+        return response, usage_info
+
+    raise LLMConfigurationError(f'Unknown LLM provider: {provider}')
@@ -0,0 +1,258 @@
+"""
+Multi-model consensus voting for LLM validation checks.
+
+Several judges (the check's own model plus the configured ones) vote on each
+value, and the verdict needs `quorum` matching votes. Judges are started only
+as far as the outcome can still change: the first `quorum` judges run in
+parallel, and more are started only when votes disagree or a judge fails.
+With 2 of 3, unanimous first votes decide the value and the third judge is
+never called. The calls saved that way are reported with the stats.
+
+Values are voted on together: each judge validates every value that needs
+its vote in one validate_many call (batched per the check's batch_size), and
+the votes for different values run concurrently. Once every value a judge
+call was for is decided, the call is no longer waited for; its usage is
+added to those values' consensus_usage when it finishes.
+
+Per-judge usage is tagged with the judge index so llm_usage shows what each
+model cost, and the stats report how often judges agreed, which tells whether
+a policy needs consensus at all.
+
+Check config:
+    "consensus": {
+        "models": [                                   // Additional judges
+            {"provider": "openai", "model": "gpt-4o"},
+            {"model": "claude-haiku-3-5-20241022"}     // provider defaults to llm_provider
+        ],
+        "quorum": 2                                    // Optional: default is a simple majority
+    }
+"""
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Any, List, Optional, Tuple
+
+from .llm_batching import BatchCollector, Validator, validate_many, usage_entries
+from .llm_normalization import NormalizationConfig
+
+
+def parse_judges(provider: str, model: str, consensus_config: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """The check's own model followed by the configured judges, without duplicates."""
+    judges = [(provider, model)]
+    for judge in consensus_config.get('models', []):
+        entry = (judge.get('provider', provider), judge['model'])
+        if entry not in judges:
+            judges.append(entry)
+    return judges
+
+
+def default_quorum(judge_count: int) -> int:
+    return judge_count // 2 + 1
+
+
+def _tag_usage(entries: List[Dict[str, Any]], judge: int) -> List[Dict[str, Any]]:
+    return [dict(entry, consensus_judge=judge) for entry in entries]
+
+
+def _tally(votes: Dict[int, Dict[str, Any]], quorum: int) -> Tuple[int, int, Optional[bool]]:
+    """(passes, fails, decided verdict or None)."""
+    passes = sum(1 for v in votes.values() if v['passed'])
+    fails = len(votes) - passes
+    if passes >= quorum:
+        return passes, fails, True
+    if fails >= quorum:
+        return passes, fails, False
+    return passes, fails, None
+
+
+def _judges_to_start(ballot: Dict[str, Any], judge_count: int, quorum: int) -> List[int]:
+    """Start as many judges as the closest outcome still needs; marks the ballot closed when none can help."""
+    passes, fails, decided = _tally(ballot['votes'], quorum)
+    if decided is not None:
+        ballot['decided'], ballot['closed'] = decided, True
+        return []
+
+    running = ballot['running']
+    remaining = judge_count - ballot['next_judge']
+    if passes + running + remaining < quorum and fails + running + remaining < quorum:
+        ballot['closed'] = True
+        return []
+
+    needed = min(quorum - passes, quorum - fails)
+    start = []
+    while running + len(start) < needed and ballot['next_judge'] < judge_count:
+        start.append(ballot['next_judge'])
+        ballot['next_judge'] += 1
+    if not start and running == 0:
+        ballot['closed'] = True
+    return start
+
+
+def _ballot_result(ballot: Dict[str, Any], judges: List[Tuple[str, str]], quorum: int) -> Dict[str, Any]:
+    votes, failures, decided = ballot['votes'], ballot['failures'], ballot['decided']
+    ballot_votes = [
+        {'judge': index, 'provider': judges[index][0], 'model': judges[index][1], 'passed': votes[index]['passed']}
+        for index in sorted(votes)
+    ]
+    info = {'quorum': quorum, 'judges_called': ballot['next_judge'], 'votes': ballot_votes, 'decided': decided is not None}
+    # Shared with judges still running: their usage is appended when they finish
+    usage = ballot['usage']
+
+    if decided is None:
+        if any(f.get('deferred') for f in failures.values()):
+            return {**next(f for f in failures.values() if f.get('deferred')), 'consensus_usage': usage, 'consensus': info}
+        return {
+            'passed': False,
+            'response': f'No consensus: {len(votes)} of {len(judges)} judges answered, {quorum} matching votes required',
+            'error': True,
+            'usage': None,
+            'consensus_usage': usage,
+            'consensus': info
+        }
+
+    reason = next(votes[index]['response'] for index in sorted(votes) if votes[index]['passed'] == decided)
+    return {
+        'passed': decided,
+        'response': reason,
+        'error': False,
+        'usage': None,
+        'retry_usage': [],
+        'consensus_usage': usage,
+        'consensus': info
+    }
+
+
+def _vote_all(
+    values: List[Any],
+    prompt: str,
+    judges: List[Tuple[str, str]],
+    quorum: int,
+    validator: Validator,
+    batch_size: int,
+    collector: Optional[BatchCollector],
+    use_cache: bool,
+    normalization: Optional[NormalizationConfig]
+) -> List[Dict[str, Any]]:
+    """Collect votes for every value until `quorum` judges agree or agreement is impossible.
+
+    Each judge validates all the values that need it in one validate_many call,
+    so batching and the verdict cache apply, and judges run concurrently. A
+    call whose values were all decided meanwhile is not waited for.
+    """
+    def judge(index: int, batch: List[Any]) -> List[Dict[str, Any]]:
+        judge_provider, judge_model = judges[index]
+        return validate_many(
+            batch, prompt, judge_provider, judge_model, validator,
+            batch_size=batch_size, collector=collector, use_cache=use_cache, normalization=normalization
+        )
+
+    ballots = [
+        {'votes': {}, 'failures': {}, 'usage': [], 'running': 0, 'next_judge': 0, 'decided': None, 'closed': False}
+        for _ in values
+    ]
+    running: Dict[Future, Tuple[int, List[int]]] = {}
+    executor = ThreadPoolExecutor(max_workers=len(judges))
+
+    def start(positions: List[int]):
+        by_judge: Dict[int, List[int]] = {}
+        for pos in positions:
+            for index in _judges_to_start(ballots[pos], len(judges), quorum):
+                by_judge.setdefault(index, []).append(pos)
+        for index, group in sorted(by_judge.items()):
+            for pos in group:
+                ballots[pos]['running'] += 1
+            future = executor.submit(contextvars.copy_context().run, judge, index, [values[pos] for pos in group])
+            running[future] = (index, group)
+
+    def record_late(future: Future, index: int, group: List[int]):
+        # Judges still running when their values were decided: their answers still cost tokens
+        if future.cancelled() or future.exception() is not None:
+            return
+        for pos, result in zip(group, future.result()):
+            ballots[pos]['usage'].extend(_tag_usage(usage_entries(result), index))
+
+    try:
+        start(list(range(len(values))))
+        while running:
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            advanced = []
+            for future in done:
+                index, group = running.pop(future)
+                for pos, result in zip(group, future.result()):
+                    ballot = ballots[pos]
+                    ballot['running'] -= 1
+                    ballot['usage'].extend(_tag_usage(usage_entries(result), index))
+                    if ballot['closed']:
+                        continue
+                    if result.get('error'):
+                        ballot['failures'][index] = result
+                    else:
+                        ballot['votes'][index] = result
+                    advanced.append(pos)
+            start(sorted(set(advanced)))
+
+            for future, (index, group) in list(running.items()):
+                if all(ballots[pos]['closed'] for pos in group):
+                    del running[future]
+                    future.add_done_callback(lambda f, index=index, group=group: record_late(f, index, group))
+    finally:
+        executor.shutdown(wait=False)
+
+    return [_ballot_result(ballot, judges, quorum) for ballot in ballots]
+
+
+def consensus_validate(
+    values: List[Any],
+    prompt: str,
+    provider: str,
+    model: str,
+    validator: Validator,
+    consensus_config: Dict[str, Any],
+    batch_size: int = 1,
+    collector: Optional[BatchCollector] = None,
+    use_cache: bool = True,
+    normalization: Optional[NormalizationConfig] = None
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Validate values by majority (or quorum) vote across several models.
+
+    While a collector is collecting, the first `quorum` judges defer their
+    validations for every value; extra judges needed to break a disagreement
+    are called on the evaluation pass.
+
+    Returns:
+        Tuple of (one result per value, consensus stats)
+    """
+    judges = parse_judges(provider, model, consensus_config)
+    quorum = min(len(judges), max(1, int(consensus_config.get('quorum') or default_quorum(len(judges)))))
+
+    stats: Dict[str, Any] = {
+        'judges': [f'{p}:{m}' for p, m in judges],
+        'quorum': quorum,
+        'values': len(values)
+    }
+
+    if collector is not None and collector.collecting:
+        first = None
+        for judge_provider, judge_model in judges[:quorum]:
+            placeholders = validate_many(
+                values, prompt, judge_provider, judge_model, validator,
+                batch_size=batch_size, collector=collector, use_cache=use_cache, normalization=normalization
+            )
+            first = first or placeholders
+        # Judges beyond the quorum are only called on disagreement
+        collector.record_follow_ups(len(values) * (len(judges) - quorum))
+        return first, stats
+
+    results = _vote_all(values, prompt, judges, quorum, validator, batch_size, collector, use_cache, normalization)
+
+    decided = [r['consensus'] for r in results if r['consensus']['decided']]
+    unanimous = sum(1 for info in decided if len({v['passed'] for v in info['votes']}) == 1)
+    judge_calls = sum(r['consensus']['judges_called'] for r in results)
+    stats.update({
+        'decided': len(decided),
+        'unanimous': unanimous,
+        'agreement_rate': round(unanimous / len(decided), 4) if decided else 0.0,
+        'judge_calls': judge_calls,
+        'calls_saved': len(values) * len(judges) - judge_calls
+    })
+    return results, stats
@@ -0,0 +1,243 @@
+"""
+Input token budgets for LLM check payloads.
+
+Huge tool results or messages make LLM validations slow and expensive. A
+check can cap the tokens of each value it sends and pick how to fit it:
+
+- head / tail / head_tail: keep the start, end, or both ends of the text
+- project: keep only selected fields of a JSON value (dot paths), then
+  fall back to head_tail if the projection is still too large
+- map_reduce: split into chunks, judge each chunk separately, and combine
+  the verdicts (all chunks must pass, or any chunk may pass)
+
+Check config:
+    "input_budget": {
+        "max_tokens": 2000,
+        "strategy": "head_tail",            // head | tail | head_tail | project | map_reduce
+        "fields": ["status", "customer.tier"],  // project only
+        "reduce": "all",                    // map_reduce only: all | any
+        "max_chunks": 8                     // map_reduce only
+    }
+
+Token counts come from a fast local estimator, not a provider tokenizer.
+"""
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Tuple
+
+from .llm_batching import usage_entries
+
+STRATEGIES = ('head', 'tail', 'head_tail', 'project', 'map_reduce')
+DEFAULT_MAX_CHUNKS = 8
+TRUNCATION_MARKER = '\n...[truncated {omitted} tokens]...\n'
+
+# Word pieces and individual punctuation/symbols: a BPE-like approximation
+_TOKEN_PATTERN = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+
+def count_tokens(text: str) -> int:
+    """Estimate BPE tokens: long words count as several pieces, punctuation as one each."""
+    if not text:
+        return 0
+    tokens = 0
+    for piece in _TOKEN_PATTERN.findall(text):
+        # Common BPE vocabularies average ~4 characters per word piece
+        tokens += (len(piece) + 3) // 4 if piece[0].isalnum() else 1
+    return tokens
+
+
+def _to_text(value: Any) -> str:
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def _chars_for_tokens(text: str, tokens: int) -> int:
+    """Characters of `text` that correspond to roughly `tokens` tokens."""
+    total = count_tokens(text)
+    if total <= 0:
+        return len(text)
+    return max(1, int(len(text) * tokens / total))
+
+
+def truncate_text(text: str, max_tokens: int, strategy: str = 'head_tail', head_ratio: float = 0.7) -> str:
+    """Cut text down to about max_tokens, marking where content was removed."""
+    total = count_tokens(text)
+    if total <= max_tokens:
+        return text
+
+    marker = TRUNCATION_MARKER.format(omitted=total - max_tokens)
+    if strategy == 'head':
+        return text[:_chars_for_tokens(text, max_tokens)] + marker
+    if strategy == 'tail':
+        return marker + text[-_chars_for_tokens(text, max_tokens):]
+
+    head_chars = _chars_for_tokens(text, int(max_tokens * head_ratio))
+    tail_chars = _chars_for_tokens(text, max_tokens - int(max_tokens * head_ratio))
+    return text[:head_chars] + marker + text[-tail_chars:]
+
+
+def project_fields(value: Any, paths: List[str]) -> Optional[Any]:
+    """Keep only the given dot paths of a JSON value; None if the value is not JSON."""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except (json.JSONDecodeError, ValueError):
+            return None
+    if not isinstance(value, (dict, list)):
+        return None
+
+    def pick(node: Any, parts: List[str]) -> Any:
+        if not parts:
+            return node
+        if isinstance(node, list):
+            return [pick(item, parts) for item in node]
+        if isinstance(node, dict) and parts[0] in node:
+            return pick(node[parts[0]], parts[1:])
+        return None
+
+    projected: Dict[str, Any] = {}
+    for path in paths:
+        picked = pick(value, path.split('.'))
+        if picked is not None:
+            projected[path] = picked
+    return projected
+
+
+def split_chunks(text: str, chunk_tokens: int, max_chunks: int) -> List[str]:
+    """Split text into roughly equal chunks, preferring line breaks as boundaries."""
+    chunk_chars = _chars_for_tokens(text, chunk_tokens)
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(len(text), start + chunk_chars)
+        if end < len(text):
+            newline = text.rfind('\n', start + chunk_chars // 2, end)
+            if newline > start:
+                end = newline + 1
+        chunks.append(text[start:end])
+        start = end
+
+    if len(chunks) > max_chunks:
+        # Too many chunks: judge the first ones and a truncated remainder
+        remainder = ''.join(chunks[max_chunks - 1:])
+        chunks = chunks[:max_chunks - 1] + [truncate_text(remainder, chunk_tokens, 'head')]
+    return chunks
+
+
+@dataclass
+class InputBudget:
+    """Per-check input token budget."""
+    max_tokens: int
+    strategy: str = 'head_tail'
+    fields: List[str] = field(default_factory=list)
+    reduce: str = 'all'
+    max_chunks: int = DEFAULT_MAX_CHUNKS
+
+    @classmethod
+    def from_check_config(cls, config: Dict[str, Any]) -> Optional['InputBudget']:
+        settings = config.get('input_budget')
+        if not settings or not settings.get('max_tokens'):
+            return None
+        strategy = settings.get('strategy', 'head_tail')
+        if strategy not in STRATEGIES:
+            strategy = 'head_tail'
+        return cls(
+            max_tokens=int(settings['max_tokens']),
+            strategy=strategy,
+            fields=list(settings.get('fields') or []),
+            reduce='any' if settings.get('reduce') == 'any' else 'all',
+            max_chunks=int(settings.get('max_chunks', DEFAULT_MAX_CHUNKS))
+        )
+
+    def prepare(self, values: List[Any]) -> Tuple[List[str], List[List[int]], List[Optional[Dict[str, Any]]]]:
+        """
+        Fit each value into the budget.
+
+        Returns:
+            Tuple of (values to send, indices into them per original value,
+            truncation info per original value or None if it fit)
+        """
+        send_values: List[str] = []
+        groups: List[List[int]] = []
+        infos: List[Optional[Dict[str, Any]]] = []
+
+        for value in values:
+            text = _to_text(value)
+            original_tokens = count_tokens(text)
+            info = {'strategy': self.strategy, 'original_tokens': original_tokens, 'max_tokens': self.max_tokens}
+
+            if original_tokens <= self.max_tokens:
+                parts, info = [text], None
+            elif self.strategy == 'map_reduce':
+                parts = split_chunks(text, self.max_tokens, self.max_chunks)
+                info['chunks'] = len(parts)
+            elif self.strategy == 'project':
+                projected = project_fields(value, self.fields) if self.fields else None
+                if projected is None:
+                    parts = [truncate_text(text, self.max_tokens)]
+                    info['fallback'] = 'head_tail'
+                else:
+                    projected_text = json.dumps(projected, ensure_ascii=False)
+                    if count_tokens(projected_text) > self.max_tokens:
+                        projected_text = truncate_text(projected_text, self.max_tokens)
+                        info['fallback'] = 'head_tail'
+                    parts = [projected_text]
+                    info['fields'] = list(self.fields)
+            else:
+                parts = [truncate_text(text, self.max_tokens, self.strategy)]
+
+            if info is not None:
+                info['sent_tokens'] = sum(count_tokens(p) for p in parts)
+            groups.append(list(range(len(send_values), len(send_values) + len(parts))))
+            send_values.extend(parts)
+            infos.append(info)
+
+        return send_values, groups, infos
+
+    def combine(
+        self,
+        results: List[Dict[str, Any]],
+        groups: List[List[int]],
+        infos: List[Optional[Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """Map per-part results back to one result per original value."""
+        combined = []
+        for positions, info in zip(groups, infos):
+            parts = [results[i] for i in positions]
+            if len(parts) == 1:
+                result = dict(parts[0])
+            else:
+                result = self._reduce_chunks(parts)
+            if info is not None:
+                result['truncation'] = info
+            combined.append(result)
+        return combined
+
+    def _reduce_chunks(self, parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Combine chunk verdicts: 'all' fails on the first failing chunk, 'any' passes on the first passing one."""
+        deferred = next((p for p in parts if p.get('deferred')), None)
+        if deferred is not None:
+            return dict(deferred)
+
+        if self.reduce == 'all':
+            deciding = next((i for i, p in enumerate(parts) if not p['passed']), None)
+            passed = deciding is None
+        else:
+            deciding = next((i for i, p in enumerate(parts) if p['passed']), None)
+            passed = deciding is not None
+
+        if deciding is not None:
+            response = f"Chunk {deciding + 1}/{len(parts)}: {parts[deciding]['response']}"
+        else:
+            response = parts[0]['response'] if passed else f"No chunk of {len(parts)} met the criteria"
+
+        return {
+            'passed': passed,
+            'response': response,
+            'error': any(p.get('error') for p in parts),
+            'usage': None,
+            'retry_usage': [u for p in parts for u in usage_entries(p)],
+            'chunk_verdicts': [p['passed'] for p in parts]
+        }
@@ -0,0 +1,131 @@
+"""
+Input normalization for LLM verdict reuse.
+
+Templated tool results (invoice emails, confirmations) often differ only by
+IDs, dates and amounts. With normalization enabled on a check, those parts
+are masked before the verdict cache key is computed, so inputs that match
+after masking share one LLM verdict. The first raw value seen is what the
+LLM actually judges.
+
+Collapsed reuse is counted, and a configurable sample of collapsed hits is
+re-verified against the raw value to catch drift (a masked detail that did
+matter); a disagreement evicts the shared verdict.
+
+Check config:
+    "normalize_inputs": true,                      // or a subset: ["uuids", "dates", "numbers", "whitespace"]
+    "reverify_sample_rate": 0.02                   // Optional: fraction of collapsed hits re-checked (default 0)
+"""
+import random
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional
+
+UUID_PATTERN = re.compile(r'\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b')
+DATE_PATTERNS = [
+    # ISO dates with optional time and zone: 2025-01-31, 2025-01-31T09:30:00Z, 2025-01-31 09:30:00.123+01:00
+    re.compile(r'\b\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?)?\b'),
+    # Numeric dates: 01/31/2025, 31.01.2025
+    re.compile(r'\b\d{1,2}[/.]\d{1,2}[/.]\d{2,4}\b'),
+    # Written dates: Jan 31, 2025 / 31 January 2025
+    re.compile(r'\b(?:\d{1,2}\s+)?(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\.?\s+\d{1,2}(?:st|nd|rd|th)?(?:,?\s+\d{4})?\b', re.IGNORECASE),
+    # Clock times: 09:30, 9:30:15 pm
+    re.compile(r'\b\d{1,2}:\d{2}(?::\d{2})?(?:\s?[AaPp][Mm])?\b'),
+]
+# Integers and decimals, with thousands separators and an optional sign
+NUMBER_PATTERN = re.compile(r'(?<![\w<])[-+]?\d[\d,]*(?:\.\d+)?(?![\w>])')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+ALL_MASKERS = ['uuids', 'dates', 'numbers', 'whitespace']
+
+
+def normalize_value(value: Any, maskers: List[str]) -> str:
+    """Mask the selected kinds of variable content. Order matters: UUIDs and dates before numbers."""
+    text = str(value)
+    if 'uuids' in maskers:
+        text = UUID_PATTERN.sub('<UUID>', text)
+    if 'dates' in maskers:
+        for pattern in DATE_PATTERNS:
+            text = pattern.sub('<DATE>', text)
+    if 'numbers' in maskers:
+        text = NUMBER_PATTERN.sub('<NUM>', text)
+    if 'whitespace' in maskers:
+        text = WHITESPACE_PATTERN.sub(' ', text).strip()
+    return text
+
+
+@dataclass
+class NormalizationConfig:
+    """Per-check normalization settings."""
+    maskers: List[str]
+    reverify_rate: float = 0.0
+    rng: random.Random = field(default_factory=random.Random)
+
+    @classmethod
+    def from_check_config(cls, config: Dict[str, Any]) -> Optional['NormalizationConfig']:
+        setting = config.get('normalize_inputs')
+        if not setting:
+            return None
+        maskers = list(ALL_MASKERS) if setting is True else [m for m in setting if m in ALL_MASKERS]
+        if not maskers:
+            return None
+        rate = float(config.get('reverify_sample_rate', 0.0) or 0.0)
+        return cls(maskers=maskers, reverify_rate=min(1.0, max(0.0, rate)))
+
+    @property
+    def namespace(self) -> str:
+        """Distinguishes normalized cache keys from raw ones (and different masker sets)."""
+        return 'normalized:' + ','.join(sorted(self.maskers))
+
+    def normalize(self, value: Any) -> str:
+        return normalize_value(value, self.maskers)
+
+    def should_reverify(self) -> bool:
+        return self.reverify_rate > 0 and self.rng.random() < self.reverify_rate
+
+
+class NormalizationStats:
+    """Process-wide counters for normalized verdict reuse."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.normalized = 0
+            self.collapsed = 0
+            self.reverified = 0
+            self.drift = 0
+
+    def record(self, normalized: int = 0, collapsed: int = 0, reverified: int = 0, drift: int = 0):
+        with self._lock:
+            self.normalized += normalized
+            self.collapsed += collapsed
+            self.reverified += reverified
+            self.drift += drift
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'normalized': self.normalized,
+                'collapsed': self.collapsed,
+                'collapse_rate': round(self.collapsed / self.normalized, 4) if self.normalized else 0.0,
+                'reverified': self.reverified,
+                'drift': self.drift,
+                'drift_rate': round(self.drift / self.reverified, 4) if self.reverified else 0.0
+            }
+
+
+def summarize_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Per-check normalization counts from validate_many results."""
+    return {
+        'normalized': len(results),
+        'collapsed': sum(1 for r in results if r.get('collapsed')),
+        'reverified': sum(1 for r in results if r.get('reverified')),
+        'drift': sum(1 for r in results if r.get('drift'))
+    }
+
+
+# Global instance
+normalization_stats = NormalizationStats()
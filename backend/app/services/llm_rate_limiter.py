@@ -0,0 +1,395 @@
+"""
+Process-wide rate limiting and adaptive concurrency for LLM calls.
+
+Every LLM request (check validations, batch prompts, AgentGenerator) goes
+through the shared `rate_limiter`, which keeps one ModelLimiter per
+(provider, model):
+
+- Token buckets for requests/minute and tokens/minute
+- AIMD concurrency: the in-flight limit grows by one per window of successes
+  and is cut multiplicatively on 429s or latency above target
+- Retry-After aware backoff on rate-limit errors, shared by every caller of
+  the same model so one 429 pauses the whole queue instead of each thread
+  retrying independently
+- Priority lanes (see job_priority): bulk and nightly calls leave
+  `interactive_reserve` of the concurrency limit and of both buckets to
+  interactive calls, and yield to waiting calls of a higher lane until they
+  have waited `max_priority_wait_seconds`
+- Every attempt's latency and queueing time is recorded into the calling
+  job's telemetry, if one is bound (see job_telemetry)
+
+Limits come from DEFAULT_LIMITS, overridden by LLM_RATE_LIMITS (JSON keyed by
+"provider" or "provider:model"), e.g.
+    LLM_RATE_LIMITS='{"anthropic": {"rpm": 50, "tpm": 40000, "max_concurrency": 8}}'
+"""
+import json
+import os
+import random
+import threading
+import time
+from typing import Dict, Any, Callable, Optional, Tuple, TypeVar
+
+from .job_priority import PRIORITIES, INTERACTIVE, effective_rank, current_priority
+from . import job_telemetry
+
+T = TypeVar('T')
+
+DEFAULT_LIMITS = {
+    'rpm': 500,
+    'tpm': 200000,
+    'max_concurrency': 16,
+    'min_concurrency': 1,
+    'initial_concurrency': 4,
+    'latency_target_seconds': 30.0,
+    'interactive_reserve': 0.25,  # Share of concurrency, rpm and tpm bulk/nightly calls leave free
+    'max_priority_wait_seconds': 30.0,  # Waiting this long ranks a call as interactive
+}
+
+# Rate-limit retries before the error is surfaced to the caller
+MAX_RATE_LIMIT_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '5'))
+
+# Backoff when the provider does not send Retry-After
+BASE_BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 60.0
+
+
+class RateLimitTimeout(Exception):
+    """Raised when capacity could not be acquired within the caller's timeout."""
+    pass
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at `rate` units per second."""
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = float(capacity)
+        self.rate = float(rate)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float, keep: float = 0.0) -> float:
+        """Seconds until `amount` can be taken leaving `keep` in the bucket (0 if available now)."""
+        self._refill(now)
+        # Requests larger than the bucket are allowed once it is full
+        needed = min(min(amount, self.capacity) + keep, self.capacity)
+        if self.tokens >= needed:
+            return 0.0
+        return (needed - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        self.tokens -= min(amount, self.capacity)
+
+    def adjust(self, delta: float):
+        """Charge (positive) or refund (negative) tokens after the real usage is known."""
+        self.tokens = min(self.capacity, self.tokens - delta)
+
+
+class ModelLimiter:
+    """Rate and concurrency limits for one (provider, model)."""
+
+    def __init__(self, provider: str, model: str, limits: Dict[str, Any]):
+        self.provider = provider
+        self.model = model
+        self.limits = limits
+        self.requests = TokenBucket(limits['rpm'], limits['rpm'] / 60.0)
+        self.tokens = TokenBucket(limits['tpm'], limits['tpm'] / 60.0)
+        self.concurrency_limit = float(limits['initial_concurrency'])
+        self.in_flight = 0
+        self.waiting = 0
+        self._waiters: Dict[object, Tuple[str, float]] = {}  # waiter -> (priority, enqueued at)
+        self.cooldown_until = 0.0
+        self.successes_since_increase = 0
+        self.latency_ewma: Optional[float] = None
+        self.rate_limited_count = 0
+        self._cond = threading.Condition()
+
+    def _rank(self, priority: str, enqueued: float, now: float) -> int:
+        return effective_rank(priority, now - enqueued, self.limits['max_priority_wait_seconds'])
+
+    def _higher_waiting(self, rank: int, now: float) -> bool:
+        return any(self._rank(p, enqueued, now) < rank for p, enqueued in self._waiters.values())
+
+    def _capacity(self, rank: int) -> Tuple[float, int]:
+        """(reserve left to interactive calls, concurrency slots) for a call of `rank`."""
+        reserve = self.limits['interactive_reserve'] if rank > 0 else 0.0
+        return reserve, max(1, int(self.concurrency_limit) - int(self.concurrency_limit * reserve))
+
+    def acquire(self, estimated_tokens: int, timeout: Optional[float] = None, priority: str = INTERACTIVE):
+        """Block until a concurrency slot, a request token and `estimated_tokens` are available.
+
+        Calls below the interactive lane also leave the interactive reserve
+        free and wait for waiting calls of higher lanes (see job_priority).
+        """
+        enqueued = time.monotonic()
+        deadline = enqueued + timeout if timeout is not None else None
+        waiter = object()
+        with self._cond:
+            self.waiting += 1
+            self._waiters[waiter] = (priority, enqueued)
+            try:
+                while True:
+                    now = time.monotonic()
+                    rank = self._rank(priority, enqueued, now)
+                    reserve, slots = self._capacity(rank)
+                    if self.cooldown_until > now:
+                        wait = self.cooldown_until - now
+                    elif rank > 0 and self._higher_waiting(rank, now):
+                        # Re-checked when a higher call acquires or when this one is promoted
+                        wait = enqueued + self.limits['max_priority_wait_seconds'] - now
+                    elif self.in_flight >= slots:
+                        wait = None  # Woken by release()
+                    else:
+                        wait = max(
+                            self.requests.wait_time(1, now, keep=self.requests.capacity * reserve),
+                            self.tokens.wait_time(estimated_tokens, now, keep=self.tokens.capacity * reserve)
+                        )
+                        if wait == 0.0:
+                            self.requests.take(1)
+                            self.tokens.take(estimated_tokens)
+                            self.in_flight += 1
+                            return
+
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            raise RateLimitTimeout(f'Timed out waiting for {self.provider}/{self.model} capacity')
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+            finally:
+                self.waiting -= 1
+                del self._waiters[waiter]
+                # Lower lanes waiting behind this call re-check
+                self._cond.notify_all()
+
+    def try_acquire(self, estimated_tokens: int, priority: str = INTERACTIVE) -> bool:
+        """Take a concurrency slot, a request token and `estimated_tokens` only if all are free now.
+
+        Never waits, and fails while any call is queued so it cannot overtake
+        one. Used for optional requests such as hedges.
+        """
+        with self._cond:
+            now = time.monotonic()
+            reserve, slots = self._capacity(self._rank(priority, now, now))
+            if self.waiting or self.cooldown_until > now or self.in_flight >= slots:
+                return False
+            if self.requests.wait_time(1, now, keep=self.requests.capacity * reserve) > 0 or \
+                    self.tokens.wait_time(estimated_tokens, now, keep=self.tokens.capacity * reserve) > 0:
+                return False
+            self.requests.take(1)
+            self.tokens.take(estimated_tokens)
+            self.in_flight += 1
+            return True
+
+    def hold(self):
+        """Count a request that is still running after its caller released its slot, until release()."""
+        with self._cond:
+            self.in_flight += 1
+
+    def release(self, latency: Optional[float] = None, rate_limited: bool = False,
+                retry_after: Optional[float] = None, token_delta: int = 0):
+        """Return a slot and feed the outcome into the AIMD controller."""
+        with self._cond:
+            self.in_flight -= 1
+            if token_delta:
+                self.tokens.adjust(token_delta)
+
+            if rate_limited:
+                self.rate_limited_count += 1
+                self._decrease(0.5)
+                if retry_after:
+                    self.cooldown_until = max(self.cooldown_until, time.monotonic() + retry_after)
+            elif latency is not None:
+                self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+                if self.latency_ewma > self.limits['latency_target_seconds']:
+                    self._decrease(0.9)
+                else:
+                    # Additive increase: +1 slot after a full window of successes
+                    self.successes_since_increase += 1
+                    if self.successes_since_increase >= int(self.concurrency_limit):
+                        self.concurrency_limit = min(self.limits['max_concurrency'], self.concurrency_limit + 1)
+                        self.successes_since_increase = 0
+
+            self._cond.notify_all()
+
+    def _decrease(self, factor: float):
+        self.concurrency_limit = max(self.limits['min_concurrency'], self.concurrency_limit * factor)
+        self.successes_since_increase = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            now = time.monotonic()
+            self.requests._refill(now)
+            self.tokens._refill(now)
+            return {
+                'provider': self.provider,
+                'model': self.model,
+                'rpm_limit': self.limits['rpm'],
+                'tpm_limit': self.limits['tpm'],
+                'requests_available': int(self.requests.tokens),
+                'tokens_available': int(self.tokens.tokens),
+                'concurrency_limit': int(self.concurrency_limit),
+                'max_concurrency': self.limits['max_concurrency'],
+                'in_flight': self.in_flight,
+                'queue_depth': self.waiting,
+                'queue_depth_by_priority': {
+                    p: sum(1 for priority, _ in self._waiters.values() if priority == p) for p in PRIORITIES
+                },
+                'cooldown_seconds': round(max(0.0, self.cooldown_until - now), 2),
+                'latency_ewma_seconds': round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+                'rate_limited_count': self.rate_limited_count,
+            }
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """True for provider 429 / rate-limit errors (Anthropic and OpenAI SDKs)."""
+    if getattr(error, 'status_code', None) == 429:
+        return True
+    response = getattr(error, 'response', None)
+    if getattr(response, 'status_code', None) == 429:
+        return True
+    return type(error).__name__ == 'RateLimitError'
+
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """Read Retry-After (seconds) from a provider error's HTTP response, if present."""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    for header in ('retry-after', 'Retry-After'):
+        value = headers.get(header) if hasattr(headers, 'get') else None
+        if value:
+            try:
+                return max(0.0, float(value))
+            except (TypeError, ValueError):
+                return None
+    return None
+
+
+class LLMRateLimiter:
+    """Registry of ModelLimiters shared by every LLM caller in the process."""
+
+    def __init__(self, overrides: Optional[Dict[str, Dict[str, Any]]] = None, sleep: Callable[[float], None] = time.sleep):
+        self.overrides = overrides if overrides is not None else self._load_overrides()
+        self.sleep = sleep
+        self._limiters: Dict[Tuple[str, str], ModelLimiter] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _load_overrides() -> Dict[str, Dict[str, Any]]:
+        raw = os.getenv('LLM_RATE_LIMITS')
+        if not raw:
+            return {}
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            print("Warning: LLM_RATE_LIMITS is not valid JSON, using default limits")
+            return {}
+
+    def limits_for(self, provider: str, model: str) -> Dict[str, Any]:
+        limits = dict(DEFAULT_LIMITS)
+        limits.update(self.overrides.get(provider, {}))
+        limits.update(self.overrides.get(f'{provider}:{model}', {}))
+        limits['initial_concurrency'] = min(limits['initial_concurrency'], limits['max_concurrency'])
+        return limits
+
+    def get(self, provider: str, model: str) -> ModelLimiter:
+        key = (provider, model)
+        with self._lock:
+            if key not in self._limiters:
+                self._limiters[key] = ModelLimiter(provider, model, self.limits_for(provider, model))
+            return self._limiters[key]
+
+    def call(
+        self,
+        provider: str,
+        model: str,
+        estimated_tokens: int,
+        fn: Callable[[], T],
+        actual_tokens: Optional[Callable[[T], int]] = None,
+        timeout: Optional[float] = None,
+        priority: Optional[str] = None
+    ) -> T:
+        """
+        Run `fn` under the (provider, model) limits, retrying rate-limit errors.
+
+        Args:
+            provider: LLM provider name
+            model: Model identifier
+            estimated_tokens: Tokens to reserve up front (prompt + max output)
+            fn: Zero-argument function performing the API call
+            actual_tokens: Optional function returning real token usage from fn's result,
+                used to correct the token bucket
+            timeout: Maximum seconds to wait for capacity per attempt
+            priority: Lane of the call; defaults to the calling context's
+                (see job_priority.current_priority)
+
+        Returns:
+            Whatever fn returns
+
+        Raises:
+            RateLimitTimeout: If capacity could not be acquired in time
+            Exception: fn's error once retries are exhausted or for non-rate-limit errors
+        """
+        limiter = self.get(provider, model)
+        priority = priority or current_priority()
+        attempt = 0
+        while True:
+            queued_since = time.monotonic()
+            limiter.acquire(estimated_tokens, timeout=timeout, priority=priority)
+            started = time.monotonic()
+            try:
+                result = fn()
+            except Exception as e:
+                rate_limited = is_rate_limit_error(e)
+                job_telemetry.observe_llm_call(
+                    provider, model, time.monotonic() - started, started - queued_since,
+                    error=not rate_limited, rate_limited=rate_limited
+                )
+                if not rate_limited:
+                    limiter.release()
+                    raise
+                retry_after = get_retry_after(e)
+                limiter.release(rate_limited=True, retry_after=retry_after)
+                attempt += 1
+                if attempt > MAX_RATE_LIMIT_RETRIES:
+                    raise
+                if retry_after is None:
+                    # Exponential backoff with full jitter
+                    self.sleep(random.uniform(0, min(MAX_BACKOFF_SECONDS, BASE_BACKOFF_SECONDS * 2 ** attempt)))
+                # With Retry-After the limiter's cooldown holds every caller back
+                continue
+
+            token_delta = 0
+            if actual_tokens is not None:
+                try:
+                    token_delta = actual_tokens(result) - estimated_tokens
+                except Exception:
+                    token_delta = 0
+            latency = time.monotonic() - started
+            job_telemetry.observe_llm_call(provider, model, latency, started - queued_since)
+            limiter.release(latency=latency, token_delta=token_delta)
+            return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current limits, in-flight counts and queue depth for every model seen so far."""
+        with self._lock:
+            limiters = list(self._limiters.values())
+        models = [limiter.snapshot() for limiter in limiters]
+        return {
+            'defaults': dict(DEFAULT_LIMITS),
+            'models': models,
+            'total_in_flight': sum(m['in_flight'] for m in models),
+            'total_queue_depth': sum(m['queue_depth'] for m in models),
+        }
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token) used for up-front reservation."""
+    return max(1, len(text or '') // 4)
+
+
+# Global instance
+rate_limiter = LLMRateLimiter()
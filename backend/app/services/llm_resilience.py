@@ -0,0 +1,328 @@
+"""
+Tail-latency protection for LLM calls: per-call timeouts, hedged requests and
+a circuit breaker, tracked per (provider, model).
+
+- Timeout: a call that has not answered within its timeout raises
+  LLMTimeoutError instead of stalling the session.
+- Hedging: once enough latencies have been observed, a call still running
+  at the model's p95 latency gets a duplicate request and the first answer
+  wins. Hedges are capped at a fraction of calls (the hedge budget), take a
+  rate limiter slot of their own and are skipped when none is free right
+  away. The losing request still runs to completion, so its tokens are
+  paid for.
+- A request that lost a hedge race or was abandoned on timeout keeps its
+  rate limiter concurrency slot until it actually finishes.
+- Circuit breaker: after consecutive provider failures or timeouts the
+  circuit opens and calls fail fast with CircuitOpenError. After a cooldown
+  one trial call is let through; success closes the circuit.
+
+Checks turn CircuitOpenError, LLMTimeoutError and RateLimitTimeout (no
+rate limiter capacity within the call's timeout) into `deferred` results
+(see deferred_result) so a job can skip the affected evaluations instead of
+recording a verdict that was never made.
+
+Environment:
+    LLM_CALL_TIMEOUT_SECONDS   default per-call timeout (60)
+    LLM_HEDGE_BUDGET           max hedged fraction of calls (0.05, 0 disables hedging)
+    LLM_BREAKER_FAILURES       consecutive failures that open the circuit (5)
+    LLM_BREAKER_RESET_SECONDS  open time before a trial call (30)
+"""
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, Any, Optional, TypeVar
+
+from .llm_rate_limiter import rate_limiter, is_rate_limit_error, RateLimitTimeout
+from .job_priority import current_priority
+
+T = TypeVar('T')
+
+DEFAULT_TIMEOUT_SECONDS = float(os.getenv('LLM_CALL_TIMEOUT_SECONDS', '60'))
+DEFAULT_HEDGE_BUDGET = float(os.getenv('LLM_HEDGE_BUDGET', '0.05'))
+DEFAULT_FAILURE_THRESHOLD = int(os.getenv('LLM_BREAKER_FAILURES', '5'))
+DEFAULT_RESET_SECONDS = float(os.getenv('LLM_BREAKER_RESET_SECONDS', '30'))
+
+# Latencies observed before hedging starts, and how many are kept for the p95
+MIN_HEDGE_SAMPLES = 20
+LATENCY_WINDOW = 200
+
+
+class LLMTimeoutError(Exception):
+    """Raised when an LLM call does not answer within its timeout."""
+    pass
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the provider while its circuit is open."""
+    pass
+
+
+def is_deferrable_error(error: Exception) -> bool:
+    """Errors that mean 'no verdict yet' rather than a failed validation."""
+    return isinstance(error, (LLMTimeoutError, CircuitOpenError, RateLimitTimeout))
+
+
+def deferred_result(error: Exception) -> Dict[str, Any]:
+    """Validation result for a call cut short by a timeout, an open circuit or a saturated rate limiter."""
+    return {'passed': False, 'response': f'LLM validation deferred: {error}', 'error': True, 'deferred': True, 'usage': None}
+
+
+def is_provider_failure(error: Exception) -> bool:
+    """Whether an error says the provider is unhealthy (vs. a bad request or rate limit)."""
+    if isinstance(error, LLMTimeoutError):
+        return True
+    if is_rate_limit_error(error):
+        return False
+    status = getattr(error, 'status_code', None)
+    if isinstance(status, int) and 400 <= status < 500 and status not in (408, 409):
+        return False
+    return True
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker: closed -> open -> half_open -> closed."""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.times_opened = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and self.clock() - self.opened_at >= self.reset_seconds:
+                self.state = 'half_open'
+                self.trial_in_flight = False
+            if self.state == 'half_open' and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                if self.state != 'open':
+                    self.times_opened += 1
+                self.state = 'open'
+                self.opened_at = self.clock()
+                self.trial_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'times_opened': self.times_opened
+            }
+
+
+class ModelHealth:
+    """Latency window, hedge accounting and circuit breaker for one (provider, model)."""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.breaker = CircuitBreaker(failure_threshold, reset_seconds, clock)
+        self.latencies: "deque[float]" = deque(maxlen=LATENCY_WINDOW)
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.timeouts = 0
+        self._lock = threading.Lock()
+
+    def p95(self) -> Optional[float]:
+        with self._lock:
+            if len(self.latencies) < MIN_HEDGE_SAMPLES:
+                return None
+            ordered = sorted(self.latencies)
+            return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def record_call(self):
+        with self._lock:
+            self.calls += 1
+
+    def record_latency(self, latency: float, hedge_won: bool = False):
+        with self._lock:
+            self.latencies.append(latency)
+            if hedge_won:
+                self.hedge_wins += 1
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def take_hedge(self, budget: float) -> bool:
+        with self._lock:
+            if self.hedges + 1 > budget * self.calls:
+                return False
+            self.hedges += 1
+            return True
+
+    def return_hedge(self):
+        """Give back a hedge taken but not sent."""
+        with self._lock:
+            self.hedges -= 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        p95 = self.p95()
+        with self._lock:
+            return {
+                **self.breaker.snapshot(),
+                'calls': self.calls,
+                'timeouts': self.timeouts,
+                'hedges': self.hedges,
+                'hedge_wins': self.hedge_wins,
+                'p95_latency_seconds': round(p95, 3) if p95 is not None else None
+            }
+
+
+class ResilientCaller:
+    """Runs provider calls with a timeout, optional hedging and a circuit breaker."""
+
+    def __init__(
+        self,
+        timeout: float = DEFAULT_TIMEOUT_SECONDS,
+        hedge_budget: float = DEFAULT_HEDGE_BUDGET,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_seconds: float = DEFAULT_RESET_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+        max_workers: int = 64
+    ):
+        self.timeout = timeout
+        self.hedge_budget = hedge_budget
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='llm-call')
+        self._models: Dict[str, ModelHealth] = {}
+        self._lock = threading.Lock()
+
+    def get(self, provider: str, model: str) -> ModelHealth:
+        key = f'{provider}:{model}'
+        with self._lock:
+            health = self._models.get(key)
+            if health is None:
+                health = ModelHealth(self.failure_threshold, self.reset_seconds, self.clock)
+                self._models[key] = health
+            return health
+
+    def _hedge_delay(self, provider: str, model: str, health: ModelHealth) -> Optional[float]:
+        if self.hedge_budget <= 0:
+            return None
+        # Hedging a saturated model only adds load
+        if rate_limiter.get(provider, model).snapshot()['queue_depth'] > 0:
+            return None
+        return health.p95()
+
+    def call(
+        self,
+        provider: str,
+        model: str,
+        fn: Callable[[], T],
+        timeout: Optional[float] = None,
+        hedge: bool = True,
+        estimated_tokens: int = 0
+    ) -> T:
+        """
+        Run `fn`, hedging it at the model's p95 latency and giving up after `timeout`.
+
+        The caller runs this under a rate_limiter slot for the model (see
+        llm_client); if `fn` is still running when this returns or raises, the
+        model's in-flight count keeps it until it finishes. A hedge reserves
+        its own slot and `estimated_tokens`, and is not sent if they are not
+        free right away.
+
+        Raises:
+            CircuitOpenError: If the model's circuit is open (fn is not called)
+            LLMTimeoutError: If no attempt answered within the timeout
+            Exception: fn's error when every attempt failed
+        """
+        health = self.get(provider, model)
+        if not health.breaker.allow():
+            raise CircuitOpenError(f'{provider}/{model} circuit open after repeated failures')
+
+        timeout = timeout or self.timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        hedge_delay = self._hedge_delay(provider, model, health) if hedge else None
+        hedge_at = started + hedge_delay if hedge_delay is not None else None
+
+        health.record_call()
+        limiter = rate_limiter.get(provider, model)
+
+        primary = self._executor.submit(fn)
+        submitted = {primary: started}
+        pending = {primary}
+        last_error: Optional[Exception] = None
+
+        try:
+            while pending:
+                now = time.monotonic()
+                if now >= deadline:
+                    break
+                wait_for = deadline - now
+                if hedge_at is not None:
+                    wait_for = min(wait_for, max(0.0, hedge_at - now))
+
+                done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        last_error = e
+                        continue
+                    health.record_latency(time.monotonic() - submitted[future], hedge_won=future is not primary)
+                    health.breaker.record_success()
+                    return result
+
+                if hedge_at is not None and pending and time.monotonic() >= hedge_at:
+                    hedge_at = None
+                    if health.take_hedge(self.hedge_budget):
+                        if limiter.try_acquire(estimated_tokens, current_priority()):
+                            duplicate = self._executor.submit(fn)
+                            duplicate.add_done_callback(lambda _: limiter.release())
+                            submitted[duplicate] = time.monotonic()
+                            pending.add(duplicate)
+                        else:
+                            # No free slot: a hedge would exceed the model's limits
+                            health.return_hedge()
+        finally:
+            # The caller releases the primary's slot once this returns: a request still running keeps one
+            if not primary.done():
+                limiter.hold()
+                primary.add_done_callback(lambda _: limiter.release())
+
+        if pending:
+            health.record_timeout()
+            health.breaker.record_failure()
+            raise LLMTimeoutError(f'{provider}/{model} did not respond within {timeout:g}s')
+
+        if is_provider_failure(last_error):
+            health.breaker.record_failure()
+        else:
+            health.breaker.record_success()
+        raise last_error
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Breaker state, timeouts, hedges and p95 latency for every model seen so far."""
+        with self._lock:
+            models = dict(self._models)
+        return {key: health.snapshot() for key, health in sorted(models.items())}
+
+
+# Global instance
+resilient_caller = ResilientCaller()
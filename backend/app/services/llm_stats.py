@@ -0,0 +1,104 @@
+"""
+Per-policy LLM statistics aggregated from stored check results.
+
+Evaluations persist each check's result (details and llm_usage) inside their
+violation/compliance details; these helpers roll them up per policy for the
+llm-stats endpoint.
+"""
+from typing import Dict, Any, List
+
+
+def collect_check_results(data: Any) -> List[Dict[str, Any]]:
+    """Recursively collect serialized CheckResult dicts from evaluation details."""
+    checks = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            if 'check_id' in node and 'check_type' in node and 'details' in node:
+                checks.append(node)
+                return
+            for v in node.values():
+                walk(v)
+        elif isinstance(node, list):
+            for item in node:
+                walk(item)
+
+    walk(data)
+    return checks
+
+
+def summarize_policy_checks(checks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Roll up one policy's LLM check results.
+
+    Returns:
+        Dict with call/token/cost totals, cascade escalation stats, consensus
+        agreement stats and normalization collapse stats (None when the
+        feature is unused)
+    """
+    summary = {
+        'api_calls': 0,
+        'input_tokens': 0,
+        'cached_input_tokens': 0,
+        'output_tokens': 0,
+        'cost_usd': 0.0,
+        'cascade': None,
+        'consensus': None,
+        'normalization': None
+    }
+
+    cascade = {'screened': 0, 'escalated': 0, 'screen_cost_usd': 0.0, 'escalation_cost_usd': 0.0}
+    consensus = {'values': 0, 'decided': 0, 'unanimous': 0, 'judge_calls': 0, 'calls_saved': 0, 'judge_cost_usd': {}}
+    normalization = {'normalized': 0, 'collapsed': 0, 'reverified': 0, 'drift': 0}
+    has_cascade = has_consensus = has_normalization = False
+
+    for check in checks:
+        usage = check.get('llm_usage') or {}
+        details = check.get('details') or {}
+
+        summary['api_calls'] += usage.get('api_calls', 0) or 0
+        summary['input_tokens'] += usage.get('total_input_tokens', 0) or 0
+        summary['cached_input_tokens'] += usage.get('total_cached_input_tokens', 0) or 0
+        summary['output_tokens'] += usage.get('total_output_tokens', 0) or 0
+        summary['cost_usd'] += usage.get('total_cost_usd', 0.0) or 0.0
+
+        if details.get('cascade'):
+            has_cascade = True
+            cascade['screened'] += details['cascade'].get('screened', 0)
+            cascade['escalated'] += details['cascade'].get('escalated', 0)
+            for call in usage.get('per_call') or []:
+                if call.get('cascade_stage') == 'screen':
+                    cascade['screen_cost_usd'] += call.get('cost_usd', 0.0)
+                elif call.get('cascade_stage') == 'escalation':
+                    cascade['escalation_cost_usd'] += call.get('cost_usd', 0.0)
+
+        if details.get('consensus'):
+            has_consensus = True
+            for field in ('values', 'decided', 'unanimous', 'judge_calls', 'calls_saved'):
+                consensus[field] += details['consensus'].get(field, 0)
+            for call in usage.get('per_call') or []:
+                if call.get('consensus_judge') is not None:
+                    judge = f"{call['provider']}:{call['model']}"
+                    consensus['judge_cost_usd'][judge] = consensus['judge_cost_usd'].get(judge, 0.0) + call.get('cost_usd', 0.0)
+
+        if details.get('normalization'):
+            has_normalization = True
+            for field in normalization:
+                normalization[field] += details['normalization'].get(field, 0)
+
+    summary['cost_usd'] = round(summary['cost_usd'], 6)
+    if has_cascade:
+        cascade['escalation_rate'] = round(cascade['escalated'] / cascade['screened'], 4) if cascade['screened'] else 0.0
+        cascade['screen_cost_usd'] = round(cascade['screen_cost_usd'], 6)
+        cascade['escalation_cost_usd'] = round(cascade['escalation_cost_usd'], 6)
+        summary['cascade'] = cascade
+    if has_consensus:
+        consensus['agreement_rate'] = round(consensus['unanimous'] / consensus['decided'], 4) if consensus['decided'] else 0.0
+        consensus['judge_cost_usd'] = {judge: round(cost, 6) for judge, cost in consensus['judge_cost_usd'].items()}
+        summary['consensus'] = consensus
+    if has_normalization:
+        normalization['collapse_rate'] = round(normalization['collapsed'] / normalization['normalized'], 4) if normalization['normalized'] else 0.0
+        normalization['drift_rate'] = round(normalization['drift'] / normalization['reverified'], 4) if normalization['reverified'] else 0.0
+        summary['normalization'] = normalization
+
+    return summary
@@ -0,0 +1,155 @@
+"""
+Structured verdict protocol shared by the single-item LLM checks.
+
+The model records its decision through provider-native structured output
+(a forced tool call on Anthropic, strict json_schema on OpenAI) using a
+minimal schema:
+
+    {"compliant": true, "reason_code": "meets_criteria", "short_reason": "Status is approved"}
+
+No prose, no markdown to strip and no keyword guessing: a response that does
+not match the schema is retried, and reported as an error if it still fails.
+Checks that run a model cascade also ask for a `confidence` field, which the
+cascade needs to decide on escalation.
+"""
+from typing import Dict, Any, List, Optional
+
+from .llm_batching import parse_confidence
+from .llm_client import call_llm_structured, LLMConfigurationError
+from .llm_resilience import is_deferrable_error, deferred_result
+from .item_retry import raise_for_item_retry
+
+VERDICT_TOOL_NAME = 'record_verdict'
+REASON_CODES = ['meets_criteria', 'violates_criteria', 'insufficient_information', 'ambiguous']
+
+# A verdict is ~30 output tokens; leave room for the tool-call envelope
+VERDICT_MAX_TOKENS = 150
+SHORT_REASON_MAX_CHARS = 200
+MAX_SCHEMA_RETRIES = 1
+
+
+def verdict_schema(include_confidence: bool = False) -> Dict[str, Any]:
+    """JSON schema for one verdict (strict-mode compatible: every property required)."""
+    properties = {
+        'compliant': {'type': 'boolean', 'description': 'Whether the input meets the criteria'},
+        'reason_code': {'type': 'string', 'enum': REASON_CODES},
+        'short_reason': {'type': 'string', 'description': 'At most 20 words'}
+    }
+    if include_confidence:
+        properties['confidence'] = {'type': 'number', 'description': '0.0 (guessing) to 1.0 (certain)'}
+    return {
+        'type': 'object',
+        'properties': properties,
+        'required': list(properties),
+        'additionalProperties': False
+    }
+
+
+def build_validation_prefix(prompt: str, subject: str = 'value', include_confidence: bool = False) -> str:
+    """Static instructions and criteria for a single-item validation.
+
+    Sent as a cacheable prompt prefix; only the value/content under evaluation
+    changes between calls. The output format is enforced by the verdict schema.
+    """
+    fields = 'compliant, reason_code, short_reason, confidence' if include_confidence else 'compliant, reason_code, short_reason'
+    confidence = '\n4. Give your confidence in the decision from 0.0 (guessing) to 1.0 (certain)' if include_confidence else ''
+    return f"""You are a compliance validator. Evaluate the {subject} in the next message against the criteria below.
+
+USER CRITERIA:
+{prompt}
+
+INSTRUCTIONS:
+1. Make a binary decision: does the {subject} meet the criteria or not?
+2. Pick the reason_code that best explains the decision
+3. Give a short_reason of at most 20 words{confidence}
+
+Answer only with the verdict fields ({fields})."""
+
+
+def parse_verdict(data: Any, include_confidence: bool = False) -> Optional[Dict[str, Any]]:
+    """Validate a structured verdict; None if it does not match the schema."""
+    if not isinstance(data, dict) or not isinstance(data.get('compliant'), bool):
+        return None
+    if data.get('reason_code') not in REASON_CODES:
+        return None
+    reason = data.get('short_reason')
+    if not isinstance(reason, str) or not reason.strip():
+        return None
+
+    confidence = parse_confidence(data.get('confidence'))
+    if include_confidence and confidence is None:
+        return None
+    return {
+        'compliant': data['compliant'],
+        'reason_code': data['reason_code'],
+        'short_reason': reason.strip()[:SHORT_REASON_MAX_CHARS],
+        'confidence': confidence
+    }
+
+
+def validate_with_verdict(
+    value: Any,
+    prompt: str,
+    provider: str,
+    model: str,
+    subject: str,
+    config: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Judge one value with a structured verdict, retrying schema violations.
+
+    Args:
+        value: Value or content under evaluation
+        prompt: The check's validation prompt (with few-shot examples applied)
+        provider: LLM provider
+        model: Model identifier
+        subject: 'value' or 'content', used in the instructions and message label
+        config: The check config (prompt_cache, timeout_seconds, hedge, cascade)
+
+    Returns:
+        Validator result dict: passed, response, reason_code, confidence, error, usage,
+        and retry_usage for attempts that violated the schema
+    """
+    include_confidence = bool(config.get('cascade', {}).get('model'))
+    prefix = build_validation_prefix(prompt, subject, include_confidence)
+    schema = verdict_schema(include_confidence)
+    retry_usage: List[Dict[str, Any]] = []
+
+    try:
+        for _ in range(MAX_SCHEMA_RETRIES + 1):
+            data, usage_info = call_llm_structured(
+                provider, model, f"{subject.upper()} TO EVALUATE:\n{value}", schema,
+                name=VERDICT_TOOL_NAME, description='Record the compliance verdict',
+                max_tokens=VERDICT_MAX_TOKENS, prefix=prefix,
+                cache_prefix=config.get('prompt_cache', True),
+                timeout=config.get('timeout_seconds'), hedge=config.get('hedge', True)
+            )
+            verdict = parse_verdict(data, include_confidence)
+            if verdict is not None:
+                return {
+                    'passed': verdict['compliant'],
+                    'response': verdict['short_reason'],
+                    'reason_code': verdict['reason_code'],
+                    'confidence': verdict['confidence'],
+                    'error': False,
+                    'usage': usage_info,
+                    'retry_usage': retry_usage
+                }
+            # Tokens were spent on the malformed answer: keep them attributed
+            retry_usage.append(dict(usage_info, schema_violation=True))
+    except LLMConfigurationError as e:
+        return {'passed': False, 'response': str(e), 'error': True, 'usage': None, 'retry_usage': retry_usage}
+    except Exception as e:
+        if is_deferrable_error(e):
+            return {**deferred_result(e), 'retry_usage': retry_usage}
+        # Inside a job item a transient error retries the session instead of recording no verdict
+        raise_for_item_retry(e)
+        return {'passed': False, 'response': f'LLM validation error: {str(e)}', 'error': True, 'usage': None, 'retry_usage': retry_usage}
+
+    return {
+        'passed': False,
+        'response': f'LLM validation error: no valid verdict after {MAX_SCHEMA_RETRIES + 1} attempts',
+        'error': True,
+        'usage': None,
+        'retry_usage': retry_usage
+    }
@@ -24,6 +24,7 @@ Supports optional metadata block in JSON files:
 """
 import os
 import json
+import threading
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 from datetime import datetime
@@ -253,6 +254,69 @@ class MemoryLoader:
             print(f"Error loading memory {file_path}: {e}")
             return None
 
+    def max_session_number(self, agent_id: str) -> int:
+        """Highest numeric filename prefix (before "__") of the agent's session files, from names only."""
+        highest = 0
+        for file_path in (self.base_dir / agent_id).glob("*.json"):
+            try:
+                highest = max(highest, int(file_path.name.split("__", 1)[0]))
+            except ValueError:
+                continue
+        return highest
+
+    def find_session_file(self, agent_id: str, session_number: int) -> Optional[str]:
+        """Name of an existing session file numbered `session_number`, if any."""
+        for file_path in sorted((self.base_dir / agent_id).glob(f"{session_number:05d}__*.json")):
+            return file_path.name
+        return None
+
+    def session_filename(self, session_number: int, session_data: Dict[str, Any], scenario_hint: Optional[str]) -> str:
+        """Filename of a generated session: number, first business identifiers and scenario."""
+        biz_ids = session_data["metadata"].get("business_identifiers", {})
+        # Take first 2 business identifier key-value pairs for filename
+        biz_id_parts = []
+        for k, v in list(biz_ids.items())[:2]:
+            # Clean value for filename (remove spaces, limit length)
+            clean_val = str(v).replace(" ", "_").replace("/", "_")[:20]
+            biz_id_parts.append(f"{k}_{clean_val}")
+
+        biz_id_str = "__".join(biz_id_parts) if biz_id_parts else "NO_BIZ_ID"
+
+        # Clean scenario hint for filename
+        scenario_clean = scenario_hint.replace(" ", "_").replace("/", "_")[:30] if scenario_hint else "STANDARD"
+
+        filename = f"{session_number:05d}__{biz_id_str}__{scenario_clean}.json"
+        # Ensure filename isn't too long
+        if len(filename) > 200:
+            filename = filename[:190] + ".json"
+        return filename
+
+    def write_session(self, agent_id: str, filename: str, data: Dict[str, Any], durable: bool = True) -> Path:
+        """
+        Write a session file atomically, never replacing an existing file.
+
+        The JSON is written to a hidden temporary file in the agent directory
+        and hard-linked to its final name, so readers never see a partial file
+        and concurrent writers of the same name cannot overwrite each other.
+        With durable=False the file is not fsynced before it is linked (bulk
+        synthetic corpora, which can be regenerated after a crash).
+
+        Raises:
+            FileExistsError: If a session file with this name already exists
+        """
+        agent_dir = self.base_dir / agent_id
+        session_file = agent_dir / filename
+        tmp_file = agent_dir / f".{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_file, 'w') as f:
+                json.dump(data, f, indent=2)
+                if durable:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.link(tmp_file, session_file)
+        finally:
+            tmp_file.unlink(missing_ok=True)
+        return session_file
 
 # Global instance
 memory_loader = MemoryLoader()
@@ -9,15 +9,20 @@ from .composite_policy_evaluator import CompositePolicyEvaluator
 class PolicyEvaluator:
     """Evaluates agent memories against defined policies."""
 
-    def __init__(self):
-        self.composite_evaluator = CompositePolicyEvaluator()
+    def __init__(self, collector=None):
+        """
+        Args:
+            collector: Optional BatchCollector for batching LLM validations across evaluations
+        """
+        self.composite_evaluator = CompositePolicyEvaluator(collector=collector)
 
     def evaluate(
         self,
         messages: List[Dict[str, Any]],
         policy_type: str,
         config: Dict[str, Any],
-        memory_metadata: Dict[str, Any] = None
+        memory_metadata: Dict[str, Any] = None,
+        precomputed_checks: Dict[str, Any] = None
     ) -> Tuple[bool, List[Dict[str, Any]]]:
         """
         Evaluate messages against a policy.
@@ -27,6 +32,7 @@ class PolicyEvaluator:
             policy_type: Type of policy (now only 'composite' supported)
             config: Policy configuration
             memory_metadata: Optional metadata about the memory
+            precomputed_checks: Optional CheckResults already evaluated, keyed by check id
 
         Returns:
             Tuple of (is_compliant, violations)
@@ -36,7 +42,7 @@ class PolicyEvaluator:
 
         # New system: All policies are composite
         if policy_type == "composite":
-            return self.composite_evaluator.evaluate(messages, memory_metadata, config)
+            return self.composite_evaluator.evaluate(messages, memory_metadata, config, precomputed_checks)
         else:
             # Legacy policy types - not supported in new system
             raise ValueError(
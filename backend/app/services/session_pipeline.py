@@ -0,0 +1,161 @@
+"""
+Bounded parallel evaluation of a job's sessions.
+
+A job keeps up to `concurrency` sessions in flight on a thread pool. Session
+tasks are pulled from an iterator only when a slot frees up, so a 10k-session
+job never loads more than a handful of sessions at once, and windowed work
+(the LLM collection pass of batched jobs) happens lazily as the iterator
+advances.
+
+Completions are handed back on the calling thread: the job's DB writes and
+progress updates all come from that single thread, so evaluations running in
+parallel never write concurrently.
+
+Finished sessions are buffered and written together (see FlushBuffer): one
+transaction upserts their evaluations, appends their job_items and increments
+the job's progress counters every JOB_FLUSH_SESSIONS sessions or
+JOB_FLUSH_INTERVAL_MS, whichever comes first. Progress is published at most
+every JOB_PROGRESS_INTERVAL_SECONDS (see ProgressThrottle).
+
+Environment:
+    JOB_SESSION_CONCURRENCY         Sessions evaluated at once per job (default 4)
+    JOB_FLUSH_SESSIONS              Finished sessions per write transaction (default 50)
+    JOB_FLUSH_INTERVAL_MS           Maximum age of an unwritten session (default 500)
+    JOB_PROGRESS_INTERVAL_SECONDS   Minimum seconds between published progress updates (default 1)
+"""
+import contextvars
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Generic, Iterable, List, Optional, TypeVar
+
+JOB_SESSION_CONCURRENCY = int(os.getenv('JOB_SESSION_CONCURRENCY', '4'))
+JOB_FLUSH_SESSIONS = int(os.getenv('JOB_FLUSH_SESSIONS', '50'))
+JOB_FLUSH_INTERVAL_MS = float(os.getenv('JOB_FLUSH_INTERVAL_MS', '500'))
+JOB_PROGRESS_INTERVAL_SECONDS = float(os.getenv('JOB_PROGRESS_INTERVAL_SECONDS', '1'))
+
+T = TypeVar('T')
+
+
+class FlushBuffer(Generic[T]):
+    """
+    Buffers finished items and hands them to `flush` in groups.
+
+    A group is flushed when it reaches `max_items` or when its oldest item is
+    `max_age_ms` old at the time another item arrives; the caller flushes the
+    remainder with flush() when the job ends.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[List[T]], None],
+        max_items: int = JOB_FLUSH_SESSIONS,
+        max_age_ms: float = JOB_FLUSH_INTERVAL_MS,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self._flush = flush
+        self.max_items = max(1, max_items)
+        self.max_age = max_age_ms / 1000.0
+        self._clock = clock
+        self._items: List[T] = []
+        self._first_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, item: T) -> bool:
+        """Buffer an item; returns True if this flushed the buffer."""
+        if not self._items:
+            self._first_at = self._clock()
+        self._items.append(item)
+        if len(self._items) >= self.max_items or self._clock() - self._first_at >= self.max_age:
+            self.flush()
+            return True
+        return False
+
+    def flush(self):
+        if not self._items:
+            return
+        items, self._items = self._items, []
+        self._first_at = None
+        self._flush(items)
+
+
+class ProgressThrottle:
+    """Lets a progress write through at most once per `interval` seconds.
+
+    The caller writes the final counters unconditionally when the job ends.
+    """
+
+    def __init__(self, interval: float = JOB_PROGRESS_INTERVAL_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.interval = interval
+        self._clock = clock
+        self._last: float = float('-inf')
+
+    def ready(self) -> bool:
+        now = self._clock()
+        if now - self._last < self.interval:
+            return False
+        self._last = now
+        return True
+
+
+def run_bounded(
+    tasks: Iterable[T],
+    work: Callable[[T], object],
+    on_done: Callable[[T, Future], None],
+    concurrency: int = JOB_SESSION_CONCURRENCY,
+    stop: Optional[Callable[[], bool]] = None
+) -> int:
+    """
+    Run work(task) for every task with at most `concurrency` in flight.
+
+    Args:
+        tasks: Task descriptors, consumed lazily in order
+        work: Function run on a pool thread (in a copy of the caller's
+            context) for each task
+        on_done: Called on the calling thread with (task, future) as each task
+            finishes, in completion order; future.result() re-raises errors
+        concurrency: Maximum tasks in flight
+        stop: Checked before pulling each task; once it returns True no new
+            tasks start and the ones in flight are drained through on_done
+
+    Returns:
+        Number of tasks run
+
+    If pulling the next task raises, the tasks in flight are drained the
+    same way and the error is re-raised.
+    """
+    concurrency = max(1, concurrency)
+    task_iter = iter(tasks)
+    in_flight = {}
+    exhausted = False
+    pull_error: Optional[BaseException] = None
+    count = 0
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while True:
+            while not exhausted and len(in_flight) < concurrency:
+                if stop is not None and stop():
+                    exhausted = True
+                    break
+                try:
+                    task = next(task_iter)
+                except StopIteration:
+                    exhausted = True
+                    break
+                except BaseException as e:
+                    pull_error = e
+                    exhausted = True
+                    break
+                in_flight[executor.submit(contextvars.copy_context().run, work, task)] = task
+                count += 1
+
+            if not in_flight:
+                if pull_error is not None:
+                    raise pull_error
+                return count
+
+            done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            for future in done:
+                on_done(in_flight.pop(future), future)
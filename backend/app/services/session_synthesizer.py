@@ -0,0 +1,451 @@
+"""
+Offline synthetic session generator for scale testing.
+
+Builds sessions for an agent from its .agent_metadata.json (tools and
+business identifiers) without any LLM call, so benchmarks can produce
+corpora of 100k+ sessions in seconds. Output is deterministic: session i of
+a corpus depends only on the seed, the profile and i, so a corpus can be
+written in any order, resumed after an interruption, or regenerated exactly.
+
+Each session:
+1. Draws business identifier values (e.g. order_id "ORD-482913")
+2. Walks a Markov chain over the agent's tools from "_start" until "_end"
+   or max_tool_calls (the transition format of pattern_extractor)
+3. Draws tool inputs and results from the profile's distributions
+4. Injects violations at the profile's rates and records them in
+   metadata.custom.synthetic, the ground truth evaluations can be checked
+   against
+
+Profile (every key optional):
+{
+    "transitions": {"_start": {"get_customer_account": 1},
+                    "get_customer_account": {"check_inventory": 0.9, "_end": 0.1}},
+    "max_tool_calls": 12,
+    "parameters": {"create_invoice": {"amount": {"distribution": "lognormal", "mu": 7, "sigma": 1}}},
+    "results": {"check_inventory": {"in_stock": {"distribution": "bool", "p": 0.9}}},
+    "violations": {"skip_tool": {"rate": 0.05, "tools": ["request_human_approval"]},
+                   "error_result": 0.02},
+    "start_date": "2026-01-01",
+    "days": 28
+}
+
+Without transitions the tools form a chain in metadata order (see
+default_transitions); fit_transitions learns them from existing sessions
+instead. Weights need not sum to 1. A tool without parameters gets the
+business identifiers named in the tool name (customer_id for
+get_customer_account), or the first identifier.
+
+Distributions:
+    {"distribution": "identifier", "name": "order_id"}      the session's identifier value
+    {"distribution": "int", "min": 1, "max": 10}
+    {"distribution": "uniform", "min": 0, "max": 100, "decimals": 2}
+    {"distribution": "normal", "mean": 50, "std": 10, "min": 0, "decimals": 2}
+    {"distribution": "lognormal", "mu": 7, "sigma": 1, "decimals": 2}
+    {"distribution": "choice", "values": ["gold", "silver"], "weights": [1, 3]}
+    {"distribution": "bool", "p": 0.9}
+    any other value                                         used as is
+A distribution may set "invalid", the value a bad_parameter violation uses
+(default: outside its range, or missing).
+
+Violations (a rate per session, or {"rate": r, "tools": [...]} to limit the tools):
+    skip_tool       every call of one tool is dropped
+    swap_order      two adjacent calls trade places
+    repeat_tool     one call is made twice
+    forbidden_tool  a tool the session did not call is called
+    bad_parameter   one input gets an out-of-range or missing value
+    error_result    one call returns an error result
+
+Formats:
+    anthropic   assistant tool_use blocks, tool_result blocks in user messages
+                (the format the deterministic checks read)
+    openai      assistant tool_calls, role "tool" results with tool_call_id
+"""
+import json
+import random
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Any, Dict, List, Optional, Tuple
+
+from .pattern_extractor import pattern_extractor
+
+START = '_start'
+END = '_end'
+FORMATS = ('anthropic', 'openai')
+VIOLATION_KINDS = ('skip_tool', 'swap_order', 'repeat_tool', 'forbidden_tool', 'bad_parameter', 'error_result')
+DISTRIBUTIONS = ('identifier', 'int', 'uniform', 'normal', 'lognormal', 'choice', 'bool')
+NUMERIC_DISTRIBUTIONS = ('int', 'uniform', 'normal', 'lognormal')
+
+DEFAULT_MAX_TOOL_CALLS = 12
+DEFAULT_START_DATE = '2026-01-01'
+DEFAULT_DAYS = 28
+
+
+def default_transitions(tools: List[str]) -> Dict[str, Dict[str, float]]:
+    """A chain through the tools in order: the next tool 0.8, skip one 0.1, end 0.1."""
+    if not tools:
+        return {START: {END: 1.0}}
+    transitions = {START: {tools[0]: 1.0}}
+    for i, tool in enumerate(tools):
+        targets = {}
+        if i + 1 < len(tools):
+            targets[tools[i + 1]] = 0.8
+        if i + 2 < len(tools):
+            targets[tools[i + 2]] = 0.1
+        targets[END] = round(1.0 - sum(targets.values()), 6)
+        transitions[tool] = targets
+    return transitions
+
+
+def fit_transitions(sessions: List[Dict[str, Any]], tools: Optional[List[str]] = None) -> Dict[str, Dict[str, int]]:
+    """Transition counts (usable as weights) learned from sessions' tool sequences.
+
+    With `tools`, calls to any other tool are left out of the sequences first.
+    """
+    sequences = [pattern_extractor.extract_tool_sequence(s.get('messages', []))[0] for s in sessions]
+    if tools is not None:
+        sequences = [[tool for tool in sequence if tool in tools] for sequence in sequences]
+    transitions: Dict[str, Dict[str, int]] = {}
+    for (source, target), count in sorted(pattern_extractor.compute_transitions(sequences).items()):
+        transitions.setdefault(source, {})[target] = count
+    return transitions
+
+
+def scenario_hint(session: Dict[str, Any]) -> str:
+    """Scenario label of a synthetic session for its filename: its injected violations."""
+    kinds = [v['kind'] for v in session['metadata']['custom']['synthetic']['violations']]
+    return ' '.join(['synthetic'] + kinds)
+
+
+class SessionSynthesizer:
+    """Deterministic sessions for one agent, seed and profile."""
+
+    def __init__(
+        self,
+        agent_metadata: Dict[str, Any],
+        profile: Optional[Dict[str, Any]] = None,
+        seed: int = 0,
+        format: str = 'anthropic'
+    ):
+        """
+        Args:
+            agent_metadata: Agent metadata with tools and business_identifiers
+            profile: Transitions, distributions and violation rates (see module docstring)
+            seed: Corpus seed
+            format: 'anthropic' or 'openai'
+
+        Raises:
+            ValueError: If the profile or format is invalid for this agent
+        """
+        profile = profile or {}
+        if format not in FORMATS:
+            raise ValueError(f"Unknown format '{format}' (expected one of {', '.join(FORMATS)})")
+        self.seed = seed
+        self.format = format
+        self.tools = [tool['name'] for tool in agent_metadata.get('tools', [])]
+        self.identifiers = list(agent_metadata.get('business_identifiers', {}))
+        self.transitions = profile.get('transitions') or default_transitions(self.tools)
+        self.max_tool_calls = int(profile.get('max_tool_calls', DEFAULT_MAX_TOOL_CALLS))
+        self.parameters = profile.get('parameters', {})
+        self.results = profile.get('results', {})
+        self.violations = {
+            kind: config if isinstance(config, dict) else {'rate': config}
+            for kind, config in profile.get('violations', {}).items()
+        }
+        try:
+            self.start = datetime.fromisoformat(profile.get('start_date', DEFAULT_START_DATE))
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid start_date '{profile.get('start_date')}' (expected YYYY-MM-DD)")
+        self.days = max(1, int(profile.get('days', DEFAULT_DAYS)))
+        self._validate()
+
+        # Cumulative weights per state, so each step is one rng.choices call
+        self._choices = {
+            state: (list(targets), list(accumulate(targets.values())))
+            for state, targets in self.transitions.items()
+        }
+
+    def _validate(self):
+        states = set(self.tools) | {START, END}
+        if START not in self.transitions:
+            raise ValueError(f"Transitions need a '{START}' state")
+        for state, targets in self.transitions.items():
+            unknown = [name for name in [state, *targets] if name not in states]
+            if unknown:
+                raise ValueError(f"Unknown tool '{unknown[0]}' in transitions")
+            weights = list(targets.values())
+            if not weights or any(not isinstance(w, (int, float)) or w < 0 for w in weights) or sum(weights) <= 0:
+                raise ValueError(f"Transitions from '{state}' need non-negative weights with a positive sum")
+
+        for section in ('parameters', 'results'):
+            for tool, specs in getattr(self, section).items():
+                if tool not in self.tools:
+                    raise ValueError(f"Unknown tool '{tool}' in {section}")
+                for name, spec in specs.items():
+                    if isinstance(spec, dict) and 'distribution' in spec:
+                        if spec['distribution'] not in DISTRIBUTIONS:
+                            raise ValueError(f"Unknown distribution '{spec['distribution']}' for {tool}.{name}")
+                        if spec['distribution'] == 'identifier' and spec.get('name') not in self.identifiers:
+                            raise ValueError(f"Unknown business identifier '{spec.get('name')}' for {tool}.{name}")
+                        if spec['distribution'] == 'choice' and not spec.get('values'):
+                            raise ValueError(f"Choice distribution for {tool}.{name} needs values")
+
+        for kind, config in self.violations.items():
+            if kind not in VIOLATION_KINDS:
+                raise ValueError(f"Unknown violation '{kind}' (expected one of {', '.join(VIOLATION_KINDS)})")
+            if not isinstance(config.get('rate'), (int, float)) or not 0 <= config['rate'] <= 1:
+                raise ValueError(f"Violation '{kind}' needs a rate between 0 and 1")
+            unknown = [tool for tool in config.get('tools') or [] if tool not in self.tools]
+            if unknown:
+                raise ValueError(f"Unknown tool '{unknown[0]}' in violation '{kind}'")
+
+    def session(self, index: int, session_number: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Session `index` of the corpus.
+
+        Args:
+            index: 0-based position in the corpus; with the seed, it determines the content
+            session_number: Number used in the session_id (default index + 1)
+
+        Returns:
+            Session dict with metadata and messages
+        """
+        rng = random.Random(f'{self.seed}:{index}')
+        identifiers = {name: _identifier_value(rng, name) for name in self.identifiers}
+        calls = [{'tool': tool, 'input': self._input(rng, tool, identifiers), 'error': False} for tool in self._walk(rng)]
+        violations = self._inject(rng, calls, identifiers)
+        for call in calls:
+            call['result'] = self._result(rng, call, identifiers)
+
+        timestamp = self.start + timedelta(
+            days=rng.randrange(self.days),
+            hours=rng.randint(8, 18),
+            minutes=rng.randrange(60),
+            seconds=rng.randrange(60)
+        )
+        duration = rng.uniform(1.0, 5.0) + sum(rng.uniform(0.3, 4.0) for _ in calls)
+
+        return {
+            'metadata': {
+                'session_id': f'session_{(session_number or index + 1):05d}',
+                'timestamp': timestamp.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'duration_seconds': round(duration, 1),
+                'business_identifiers': identifiers,
+                'tags': ['synthetic'],
+                'custom': {
+                    'synthetic': {
+                        'seed': self.seed,
+                        'index': index,
+                        'format': self.format,
+                        'tool_sequence': [call['tool'] for call in calls],
+                        'violations': violations
+                    }
+                }
+            },
+            'messages': self._messages(rng, calls, identifiers)
+        }
+
+    def _walk(self, rng: random.Random) -> List[str]:
+        """Tool sequence from the Markov chain; a tool without transitions ends the session."""
+        sequence = []
+        state = START
+        while len(sequence) < self.max_tool_calls and state in self._choices:
+            targets, cum_weights = self._choices[state]
+            state = rng.choices(targets, cum_weights=cum_weights)[0]
+            if state == END:
+                break
+            sequence.append(state)
+        return sequence
+
+    def _input(self, rng: random.Random, tool: str, identifiers: Dict[str, Any]) -> Dict[str, Any]:
+        specs = self.parameters.get(tool)
+        if specs is None:
+            names = [name for name in self.identifiers if name.rsplit('_', 1)[0] in tool] or self.identifiers[:1]
+            return {name: identifiers[name] for name in names}
+        return {name: _draw(rng, spec, identifiers) for name, spec in specs.items()}
+
+    def _result(self, rng: random.Random, call: Dict[str, Any], identifiers: Dict[str, Any]) -> Dict[str, Any]:
+        if call['error']:
+            return {'status': 'error', 'error': f"{call['tool']} failed: upstream service returned an error"}
+        result = {'status': 'success'}
+        result.update({name: value for name, value in call['input'].items() if name in identifiers})
+        for name, spec in self.results.get(call['tool'], {}).items():
+            result[name] = _draw(rng, spec, identifiers)
+        return result
+
+    def _inject(self, rng: random.Random, calls: List[Dict[str, Any]], identifiers: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Apply the violations drawn for this session to `calls`; returns what was injected."""
+        injected = []
+        for kind in VIOLATION_KINDS:
+            config = self.violations.get(kind)
+            # The rate is drawn for every configured kind, so sessions stay reproducible
+            if config is None or rng.random() >= config['rate']:
+                continue
+            allowed = config.get('tools') or self.tools
+            eligible = [i for i, call in enumerate(calls) if call['tool'] in allowed]
+
+            if kind == 'skip_tool' and eligible:
+                tool = calls[rng.choice(eligible)]['tool']
+                calls[:] = [call for call in calls if call['tool'] != tool]
+                injected.append({'kind': kind, 'tool': tool})
+            elif kind == 'swap_order':
+                pairs = [i for i in range(len(calls) - 1)
+                         if calls[i]['tool'] != calls[i + 1]['tool'] and (i in eligible or i + 1 in eligible)]
+                if pairs:
+                    i = rng.choice(pairs)
+                    calls[i], calls[i + 1] = calls[i + 1], calls[i]
+                    injected.append({'kind': kind, 'tool': calls[i + 1]['tool'], 'moved_after': calls[i]['tool']})
+            elif kind == 'repeat_tool' and eligible:
+                i = rng.choice(eligible)
+                calls.insert(i + 1, {**calls[i], 'input': dict(calls[i]['input'])})
+                injected.append({'kind': kind, 'tool': calls[i]['tool']})
+            elif kind == 'forbidden_tool':
+                called = {call['tool'] for call in calls}
+                candidates = [tool for tool in allowed if tool not in called]
+                if candidates:
+                    tool = rng.choice(candidates)
+                    calls.insert(rng.randint(0, len(calls)), {
+                        'tool': tool, 'input': self._input(rng, tool, identifiers), 'error': False
+                    })
+                    injected.append({'kind': kind, 'tool': tool})
+            elif kind == 'bad_parameter':
+                with_inputs = [i for i in eligible if calls[i]['input']]
+                if with_inputs:
+                    call = calls[rng.choice(with_inputs)]
+                    name = rng.choice(list(call['input']))
+                    spec = self.parameters.get(call['tool'], {}).get(name)
+                    call['input'][name] = _invalid_value(spec)
+                    injected.append({'kind': kind, 'tool': call['tool'], 'parameter': name, 'value': call['input'][name]})
+            elif kind == 'error_result' and eligible:
+                call = calls[rng.choice(eligible)]
+                call['error'] = True
+                injected.append({'kind': kind, 'tool': call['tool']})
+        return injected
+
+    def _messages(self, rng: random.Random, calls: List[Dict[str, Any]], identifiers: Dict[str, Any]) -> List[Dict[str, Any]]:
+        subject = ', '.join(f"{name.replace('_', ' ')} {value}" for name, value in identifiers.items())
+        messages = [{'role': 'user', 'content': f"Please process the request for {subject or 'this account'}."}]
+
+        for call in calls:
+            text = f"Calling {call['tool']}."
+            result = json.dumps(call['result'])
+            if self.format == 'anthropic':
+                tool_id = f'toolu_01{rng.getrandbits(80):020x}'
+                block = {'type': 'tool_result', 'tool_use_id': tool_id, 'content': result}
+                if call['error']:
+                    block['is_error'] = True
+                messages.append({'role': 'assistant', 'content': [
+                    {'type': 'text', 'text': text},
+                    {'type': 'tool_use', 'id': tool_id, 'name': call['tool'], 'input': call['input']}
+                ]})
+                messages.append({'role': 'user', 'content': [block]})
+            else:
+                tool_id = f'call_{rng.getrandbits(96):024x}'
+                messages.append({'role': 'assistant', 'content': text, 'tool_calls': [{
+                    'id': tool_id,
+                    'type': 'function',
+                    'function': {'name': call['tool'], 'arguments': json.dumps(call['input'])}
+                }]})
+                messages.append({'role': 'tool', 'tool_call_id': tool_id, 'content': result})
+
+        failed = [call['tool'] for call in calls if call['error']]
+        summary = f"Completed {len(calls)} tool calls for {subject or 'this account'}."
+        if failed:
+            summary += f" {', '.join(failed)} returned an error and needs follow-up."
+        messages.append({'role': 'assistant', 'content': summary})
+        return messages
+
+
+def write_sessions(
+    synthesizer: SessionSynthesizer,
+    loader,
+    agent_id: str,
+    indexes: List[int],
+    base_number: int
+) -> List[Tuple[int, Dict[str, Any]]]:
+    """
+    Write sessions of the corpus as files numbered base_number + index + 1.
+
+    Files are written atomically but not fsynced (see MemoryLoader.write_session).
+    A file that already exists was written by an interrupted run of the same
+    corpus; it holds the same session and counts as written.
+
+    Args:
+        synthesizer: Corpus generator
+        loader: MemoryLoader whose agent directory receives the files
+        agent_id: Agent directory
+        indexes: Corpus indexes to write
+        base_number: Session number before the corpus' first session
+
+    Returns:
+        (index, job item result) per session
+    """
+    results = []
+    for index in indexes:
+        session_number = base_number + index + 1
+        session = synthesizer.session(index, session_number)
+        filename = loader.session_filename(session_number, session, scenario_hint(session))
+        try:
+            loader.write_session(agent_id, filename, session, durable=False)
+        except FileExistsError:
+            pass
+        except OSError as e:
+            results.append((index, {'session_number': index + 1, 'status': 'error', 'error': str(e)}))
+            continue
+        results.append((index, {
+            'session_number': index + 1,
+            'filename': filename,
+            'status': 'success',
+            'violations': [v['kind'] for v in session['metadata']['custom']['synthetic']['violations']]
+        }))
+    return results
+
+
+def _identifier_value(rng: random.Random, name: str) -> str:
+    """A business identifier value prefixed after its name: order_id -> 'ORD-482913'."""
+    prefix = ''.join(part[:3] for part in name.split('_') if part != 'id').upper() or 'ID'
+    return f'{prefix}-{rng.randrange(10 ** 6):06d}'
+
+
+def _draw(rng: random.Random, spec: Any, identifiers: Dict[str, Any]) -> Any:
+    if not isinstance(spec, dict) or 'distribution' not in spec:
+        return spec
+    kind = spec['distribution']
+    if kind == 'identifier':
+        return identifiers[spec['name']]
+    if kind == 'choice':
+        return rng.choices(spec['values'], weights=spec.get('weights'))[0]
+    if kind == 'bool':
+        return rng.random() < spec.get('p', 0.5)
+    if kind == 'int':
+        return rng.randint(spec.get('min', 0), spec.get('max', 100))
+
+    if kind == 'uniform':
+        value = rng.uniform(spec.get('min', 0.0), spec.get('max', 1.0))
+    elif kind == 'normal':
+        value = rng.gauss(spec.get('mean', 0.0), spec.get('std', 1.0))
+    else:
+        value = rng.lognormvariate(spec.get('mu', 0.0), spec.get('sigma', 1.0))
+    if 'min' in spec:
+        value = max(value, spec['min'])
+    if 'max' in spec:
+        value = min(value, spec['max'])
+    return round(value, spec.get('decimals', 2))
+
+
+def _invalid_value(spec: Any) -> Any:
+    """The value a bad_parameter violation puts in place of a draw from `spec`."""
+    if not isinstance(spec, dict) or 'distribution' not in spec:
+        return None
+    if 'invalid' in spec:
+        return spec['invalid']
+    kind = spec['distribution']
+    if kind in NUMERIC_DISTRIBUTIONS:
+        upper = spec.get('max', {'int': 100, 'uniform': 1.0}.get(kind))
+        if upper is not None:
+            return upper + abs(upper) + 1
+        if kind == 'normal':
+            return round(spec.get('mean', 0.0) + 10 * spec.get('std', 1.0), spec.get('decimals', 2))
+        return -1
+    if kind == 'choice':
+        return 'INVALID'
+    return None
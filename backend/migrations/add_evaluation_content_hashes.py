@@ -0,0 +1,51 @@
+"""
+Migration: Add session_hash and policy_hash columns to compliance_evaluations
+
+Each evaluation records the hash of the session messages and of the policy
+config it was computed from; delta_evaluate jobs re-evaluate only pairs
+whose hashes changed. Existing rows keep NULL hashes and are re-evaluated by
+the first delta job that covers them.
+"""
+
+from sqlalchemy import create_engine, text
+import os
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./compliance.db")
+
+def upgrade():
+    """Add session_hash and policy_hash columns to compliance_evaluations"""
+    engine = create_engine(DATABASE_URL)
+
+    with engine.connect() as conn:
+        conn.execute(text("ALTER TABLE compliance_evaluations ADD COLUMN session_hash VARCHAR"))
+        conn.execute(text("ALTER TABLE compliance_evaluations ADD COLUMN policy_hash VARCHAR"))
+        conn.commit()
+        print("✓ Added session_hash and policy_hash columns to compliance_evaluations")
+
+def downgrade():
+    """Remove session_hash and policy_hash columns from compliance_evaluations"""
+    engine = create_engine(DATABASE_URL)
+
+    with engine.connect() as conn:
+        conn.execute(text("ALTER TABLE compliance_evaluations DROP COLUMN session_hash"))
+        conn.execute(text("ALTER TABLE compliance_evaluations DROP COLUMN policy_hash"))
+        conn.commit()
+        print("✓ Removed session_hash and policy_hash columns from compliance_evaluations")
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Usage: python add_evaluation_content_hashes.py [upgrade|downgrade]")
+        sys.exit(1)
+
+    action = sys.argv[1]
+
+    if action == "upgrade":
+        upgrade()
+    elif action == "downgrade":
+        downgrade()
+    else:
+        print(f"Unknown action: {action}")
+        print("Use 'upgrade' or 'downgrade'")
+        sys.exit(1)
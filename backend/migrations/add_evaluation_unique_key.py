@@ -0,0 +1,60 @@
+"""
+Migration: Add unique key (agent_id, memory_id, policy_id) to compliance_evaluations
+
+Evaluations are written with INSERT ... ON CONFLICT DO UPDATE on this key.
+Duplicate rows left by the old delete-then-insert writes are removed first,
+keeping the most recent evaluation of each pair.
+"""
+
+from sqlalchemy import create_engine, text
+import os
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./compliance.db")
+
+def upgrade():
+    """Deduplicate compliance_evaluations and add the unique index"""
+    engine = create_engine(DATABASE_URL)
+
+    with engine.connect() as conn:
+        result = conn.execute(text("""
+            DELETE FROM compliance_evaluations
+            WHERE id NOT IN (
+                SELECT MAX(id) FROM compliance_evaluations
+                GROUP BY agent_id, memory_id, policy_id
+            )
+        """))
+        print(f"✓ Removed {result.rowcount} duplicate evaluations")
+
+        conn.execute(text("""
+            CREATE UNIQUE INDEX IF NOT EXISTS uq_evaluation_agent_memory_policy
+            ON compliance_evaluations (agent_id, memory_id, policy_id)
+        """))
+        conn.commit()
+        print("✓ Added unique key (agent_id, memory_id, policy_id) to compliance_evaluations")
+
+def downgrade():
+    """Drop the unique index"""
+    engine = create_engine(DATABASE_URL)
+
+    with engine.connect() as conn:
+        conn.execute(text("DROP INDEX IF EXISTS uq_evaluation_agent_memory_policy"))
+        conn.commit()
+        print("✓ Removed unique key from compliance_evaluations")
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Usage: python add_evaluation_unique_key.py [upgrade|downgrade]")
+        sys.exit(1)
+
+    action = sys.argv[1]
+
+    if action == "upgrade":
+        upgrade()
+    elif action == "downgrade":
+        downgrade()
+    else:
+        print(f"Unknown action: {action}")
+        print("Use 'upgrade' or 'downgrade'")
+        sys.exit(1)
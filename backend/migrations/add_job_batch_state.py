@@ -0,0 +1,53 @@
+"""
+Migration: Add batch_state column to processing_jobs table
+
+Offline batch jobs ('offline_batch' mode) persist the provider batch IDs and
+the request -> validation mapping here while in 'waiting_on_batch' state.
+"""
+
+from sqlalchemy import create_engine, text
+import os
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./compliance.db")
+
+def upgrade():
+    """Add batch_state column to processing_jobs table"""
+    engine = create_engine(DATABASE_URL)
+
+    with engine.connect() as conn:
+        conn.execute(text("""
+            ALTER TABLE processing_jobs
+            ADD COLUMN batch_state JSON
+        """))
+        conn.commit()
+        print("✓ Added batch_state column to processing_jobs table")
+
+def downgrade():
+    """Remove batch_state column from processing_jobs table"""
+    engine = create_engine(DATABASE_URL)
+
+    with engine.connect() as conn:
+        conn.execute(text("""
+            ALTER TABLE processing_jobs
+            DROP COLUMN batch_state
+        """))
+        conn.commit()
+        print("✓ Removed batch_state column from processing_jobs table")
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Usage: python add_job_batch_state.py [upgrade|downgrade]")
+        sys.exit(1)
+
+    action = sys.argv[1]
+
+    if action == "upgrade":
+        upgrade()
+    elif action == "downgrade":
+        downgrade()
+    else:
+        print(f"Unknown action: {action}")
+        print("Use 'upgrade' or 'downgrade'")
+        sys.exit(1)
@@ -0,0 +1,48 @@
+"""
+Migration: Add chunk_claimed_at column to processing_jobs
+
+Starvation aging of chunk claims is keyed on how long a planned job has
+waited for one of its chunks to be claimed, not on the job's age. Jobs
+planned before this column existed get no aging until they are planned again.
+"""
+
+from sqlalchemy import create_engine, text
+import os
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./compliance.db")
+
+def upgrade():
+    """Add chunk_claimed_at column to processing_jobs"""
+    engine = create_engine(DATABASE_URL)
+
+    with engine.connect() as conn:
+        conn.execute(text("ALTER TABLE processing_jobs ADD COLUMN chunk_claimed_at TIMESTAMP"))
+        conn.commit()
+        print("✓ Added chunk_claimed_at column to processing_jobs")
+
+def downgrade():
+    """Remove chunk_claimed_at column from processing_jobs"""
+    engine = create_engine(DATABASE_URL)
+
+    with engine.connect() as conn:
+        conn.execute(text("ALTER TABLE processing_jobs DROP COLUMN chunk_claimed_at"))
+        conn.commit()
+        print("✓ Removed chunk_claimed_at column from processing_jobs")
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Usage: python add_job_chunk_claimed_at.py [upgrade|downgrade]")
+        sys.exit(1)
+
+    action = sys.argv[1]
+
+    if action == "upgrade":
+        upgrade()
+    elif action == "downgrade":
+        downgrade()
+    else:
+        print(f"Unknown action: {action}")
+        print("Use 'upgrade' or 'downgrade'")
+        sys.exit(1)
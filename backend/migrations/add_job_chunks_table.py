@@ -0,0 +1,67 @@
+"""
+Migration: Add job_chunks table
+
+Evaluation jobs are split into chunks of sessions that any worker of any
+backend process claims (SELECT ... FOR UPDATE SKIP LOCKED) under a lease.
+Jobs already running when this migration is applied are chunked the next
+time a worker claims them; their job_items checkpoint is kept.
+"""
+
+from sqlalchemy import create_engine, text
+import os
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./compliance.db")
+
+def upgrade():
+    """Create job_chunks table"""
+    engine = create_engine(DATABASE_URL)
+    id_column = "INTEGER PRIMARY KEY AUTOINCREMENT" if DATABASE_URL.startswith("sqlite") else "SERIAL PRIMARY KEY"
+
+    with engine.connect() as conn:
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS job_chunks (
+                id {id_column},
+                job_id VARCHAR NOT NULL REFERENCES processing_jobs(id),
+                chunk_index INTEGER NOT NULL,
+                item_start INTEGER NOT NULL,
+                item_end INTEGER NOT NULL,
+                session_policy_ids JSON,
+                status VARCHAR NOT NULL,
+                worker_id VARCHAR,
+                lease_expires_at TIMESTAMP,
+                attempts INTEGER DEFAULT 0,
+                completed_at TIMESTAMP,
+                CONSTRAINT uq_job_chunk UNIQUE (job_id, chunk_index)
+            )
+        """))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_job_chunks_job_id ON job_chunks (job_id)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_job_chunks_job_status ON job_chunks (job_id, status)"))
+        conn.commit()
+        print("✓ Created job_chunks table")
+
+def downgrade():
+    """Drop job_chunks table"""
+    engine = create_engine(DATABASE_URL)
+
+    with engine.connect() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS job_chunks"))
+        conn.commit()
+        print("✓ Dropped job_chunks table")
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Usage: python add_job_chunks_table.py [upgrade|downgrade]")
+        sys.exit(1)
+
+    action = sys.argv[1]
+
+    if action == "upgrade":
+        upgrade()
+    elif action == "downgrade":
+        downgrade()
+    else:
+        print(f"Unknown action: {action}")
+        print("Use 'upgrade' or 'downgrade'")
+        sys.exit(1)
@@ -0,0 +1,47 @@
+"""
+Migration: Add control_action column to processing_jobs
+
+Cancel and pause requests for running jobs are recorded here; the worker
+running the job picks them up on its next heartbeat.
+"""
+
+from sqlalchemy import create_engine, text
+import os
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./compliance.db")
+
+def upgrade():
+    """Add control_action column to processing_jobs"""
+    engine = create_engine(DATABASE_URL)
+
+    with engine.connect() as conn:
+        conn.execute(text("ALTER TABLE processing_jobs ADD COLUMN control_action VARCHAR"))
+        conn.commit()
+        print("✓ Added control_action column to processing_jobs")
+
+def downgrade():
+    """Remove control_action column from processing_jobs"""
+    engine = create_engine(DATABASE_URL)
+
+    with engine.connect() as conn:
+        conn.execute(text("ALTER TABLE processing_jobs DROP COLUMN control_action"))
+        conn.commit()
+        print("✓ Removed control_action column from processing_jobs")
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Usage: python add_job_control_action.py [upgrade|downgrade]")
+        sys.exit(1)
+
+    action = sys.argv[1]
+
+    if action == "upgrade":
+        upgrade()
+    elif action == "downgrade":
+        downgrade()
+    else:
+        print(f"Unknown action: {action}")
+        print("Use 'upgrade' or 'downgrade'")
+        sys.exit(1)
@@ -0,0 +1,81 @@
+"""
+Migration: Add unique key (job_id, item_index) to job_items
+
+Job items are written with INSERT ... ON CONFLICT DO NOTHING on this key, so
+a chunk re-run after a lost lease cannot record an item twice. Duplicates
+already recorded are removed first, keeping the first row of each item, and
+the progress counters of the jobs they belonged to are recounted.
+"""
+
+from sqlalchemy import create_engine, text
+import os
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./compliance.db")
+
+def upgrade():
+    """Deduplicate job_items and replace the (job_id, item_index) index with a unique one"""
+    engine = create_engine(DATABASE_URL)
+
+    with engine.connect() as conn:
+        job_ids = [row[0] for row in conn.execute(text("""
+            SELECT DISTINCT job_id FROM job_items
+            GROUP BY job_id, item_index
+            HAVING COUNT(*) > 1
+        """))]
+        result = conn.execute(text("""
+            DELETE FROM job_items
+            WHERE id NOT IN (
+                SELECT MIN(id) FROM job_items
+                GROUP BY job_id, item_index
+            )
+        """))
+        print(f"✓ Removed {result.rowcount} duplicate job items")
+
+        for job_id in job_ids:
+            conn.execute(text("""
+                UPDATE processing_jobs SET
+                    completed_items = (SELECT COUNT(*) FROM job_items WHERE job_id = :job_id),
+                    failed_items = (
+                        SELECT COUNT(*) FROM job_items
+                        WHERE job_id = :job_id AND status IN ('not_found', 'error')
+                    )
+                WHERE id = :job_id
+            """), {"job_id": job_id})
+        if job_ids:
+            print(f"✓ Recounted progress of {len(job_ids)} jobs")
+
+        conn.execute(text("DROP INDEX IF EXISTS ix_job_items_job_index"))
+        conn.execute(text("""
+            CREATE UNIQUE INDEX IF NOT EXISTS uq_job_item
+            ON job_items (job_id, item_index)
+        """))
+        conn.commit()
+        print("✓ Added unique key (job_id, item_index) to job_items")
+
+def downgrade():
+    """Restore the non-unique (job_id, item_index) index"""
+    engine = create_engine(DATABASE_URL)
+
+    with engine.connect() as conn:
+        conn.execute(text("DROP INDEX IF EXISTS uq_job_item"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_job_items_job_index ON job_items (job_id, item_index)"))
+        conn.commit()
+        print("✓ Removed unique key from job_items")
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Usage: python add_job_item_unique_key.py [upgrade|downgrade]")
+        sys.exit(1)
+
+    action = sys.argv[1]
+
+    if action == "upgrade":
+        upgrade()
+    elif action == "downgrade":
+        downgrade()
+    else:
+        print(f"Unknown action: {action}")
+        print("Use 'upgrade' or 'downgrade'")
+        sys.exit(1)
@@ -0,0 +1,61 @@
+"""
+Migration: Add job_items table
+
+Jobs append one row per processed item here instead of rewriting the
+processing_jobs.results JSON after every session. Rows written before this
+migration stay readable from processing_jobs.results.
+"""
+
+from sqlalchemy import create_engine, text
+import os
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./compliance.db")
+
+def upgrade():
+    """Create job_items table"""
+    engine = create_engine(DATABASE_URL)
+    id_column = "INTEGER PRIMARY KEY AUTOINCREMENT" if DATABASE_URL.startswith("sqlite") else "SERIAL PRIMARY KEY"
+
+    with engine.connect() as conn:
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS job_items (
+                id {id_column},
+                job_id VARCHAR NOT NULL,
+                item_index INTEGER NOT NULL,
+                memory_id VARCHAR,
+                status VARCHAR NOT NULL,
+                result JSON NOT NULL,
+                created_at TIMESTAMP
+            )
+        """))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_job_items_job_id ON job_items (job_id)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_job_items_job_index ON job_items (job_id, item_index)"))
+        conn.commit()
+        print("✓ Created job_items table")
+
+def downgrade():
+    """Drop job_items table"""
+    engine = create_engine(DATABASE_URL)
+
+    with engine.connect() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS job_items"))
+        conn.commit()
+        print("✓ Dropped job_items table")
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Usage: python add_job_items_table.py [upgrade|downgrade]")
+        sys.exit(1)
+
+    action = sys.argv[1]
+
+    if action == "upgrade":
+        upgrade()
+    elif action == "downgrade":
+        downgrade()
+    else:
+        print(f"Unknown action: {action}")
+        print("Use 'upgrade' or 'downgrade'")
+        sys.exit(1)
@@ -0,0 +1,47 @@
+"""
+Migration: Add priority column to processing_jobs
+
+Jobs run in priority lanes (interactive | bulk | nightly); workers claim
+pending jobs in lane order. Existing jobs become bulk jobs.
+"""
+
+from sqlalchemy import create_engine, text
+import os
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./compliance.db")
+
+def upgrade():
+    """Add priority column to processing_jobs"""
+    engine = create_engine(DATABASE_URL)
+
+    with engine.connect() as conn:
+        conn.execute(text("ALTER TABLE processing_jobs ADD COLUMN priority VARCHAR NOT NULL DEFAULT 'bulk'"))
+        conn.commit()
+        print("✓ Added priority column to processing_jobs")
+
+def downgrade():
+    """Remove priority column from processing_jobs"""
+    engine = create_engine(DATABASE_URL)
+
+    with engine.connect() as conn:
+        conn.execute(text("ALTER TABLE processing_jobs DROP COLUMN priority"))
+        conn.commit()
+        print("✓ Removed priority column from processing_jobs")
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Usage: python add_job_priority.py [upgrade|downgrade]")
+        sys.exit(1)
+
+    action = sys.argv[1]
+
+    if action == "upgrade":
+        upgrade()
+    elif action == "downgrade":
+        downgrade()
+    else:
+        print(f"Unknown action: {action}")
+        print("Use 'upgrade' or 'downgrade'")
+        sys.exit(1)
@@ -0,0 +1,67 @@
+"""
+Migration: Add job queue columns to processing_jobs table
+
+Pending jobs are claimed by the worker pool: worker_id records the claiming
+worker, heartbeat_at its last heartbeat (stale heartbeats mark orphaned jobs)
+and attempts how many times the job was claimed.
+"""
+
+from sqlalchemy import create_engine, text
+import os
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./compliance.db")
+
+COLUMNS = [
+    ("worker_id", "VARCHAR"),
+    ("heartbeat_at", "TIMESTAMP"),
+    ("attempts", "INTEGER DEFAULT 0"),
+]
+
+def upgrade():
+    """Add worker_id, heartbeat_at and attempts columns to processing_jobs table"""
+    engine = create_engine(DATABASE_URL)
+
+    with engine.connect() as conn:
+        for name, column_type in COLUMNS:
+            conn.execute(text(f"""
+                ALTER TABLE processing_jobs
+                ADD COLUMN {name} {column_type}
+            """))
+        conn.execute(text("""
+            CREATE INDEX IF NOT EXISTS ix_processing_jobs_heartbeat_at
+            ON processing_jobs (heartbeat_at)
+        """))
+        conn.commit()
+        print("✓ Added job queue columns to processing_jobs table")
+
+def downgrade():
+    """Remove job queue columns from processing_jobs table"""
+    engine = create_engine(DATABASE_URL)
+
+    with engine.connect() as conn:
+        conn.execute(text("DROP INDEX IF EXISTS ix_processing_jobs_heartbeat_at"))
+        for name, _ in COLUMNS:
+            conn.execute(text(f"""
+                ALTER TABLE processing_jobs
+                DROP COLUMN {name}
+            """))
+        conn.commit()
+        print("✓ Removed job queue columns from processing_jobs table")
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Usage: python add_job_queue_columns.py [upgrade|downgrade]")
+        sys.exit(1)
+
+    action = sys.argv[1]
+
+    if action == "upgrade":
+        upgrade()
+    elif action == "downgrade":
+        downgrade()
+    else:
+        print(f"Unknown action: {action}")
+        print("Use 'upgrade' or 'downgrade'")
+        sys.exit(1)
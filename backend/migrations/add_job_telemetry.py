@@ -0,0 +1,50 @@
+"""
+Migration: Add telemetry columns to processing_jobs and job_chunks
+
+Each chunk stores the telemetry of its own runs (session latency, stage
+timings, LLM calls, cache hits) and the job row stores work done outside
+chunks; /api/jobs/{job_id}/status and /report merge them.
+"""
+
+from sqlalchemy import create_engine, text
+import os
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./compliance.db")
+
+def upgrade():
+    """Add telemetry columns to processing_jobs and job_chunks"""
+    engine = create_engine(DATABASE_URL)
+
+    with engine.connect() as conn:
+        conn.execute(text("ALTER TABLE processing_jobs ADD COLUMN telemetry JSON"))
+        conn.execute(text("ALTER TABLE job_chunks ADD COLUMN telemetry JSON"))
+        conn.commit()
+        print("✓ Added telemetry columns to processing_jobs and job_chunks")
+
+def downgrade():
+    """Remove telemetry columns from processing_jobs and job_chunks"""
+    engine = create_engine(DATABASE_URL)
+
+    with engine.connect() as conn:
+        conn.execute(text("ALTER TABLE processing_jobs DROP COLUMN telemetry"))
+        conn.execute(text("ALTER TABLE job_chunks DROP COLUMN telemetry"))
+        conn.commit()
+        print("✓ Removed telemetry columns from processing_jobs and job_chunks")
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Usage: python add_job_telemetry.py [upgrade|downgrade]")
+        sys.exit(1)
+
+    action = sys.argv[1]
+
+    if action == "upgrade":
+        upgrade()
+    elif action == "downgrade":
+        downgrade()
+    else:
+        print(f"Unknown action: {action}")
+        print("Use 'upgrade' or 'downgrade'")
+        sys.exit(1)
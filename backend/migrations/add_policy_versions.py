@@ -0,0 +1,109 @@
+"""
+Migration: Add policy_versions table and compliance_evaluations.policy_version_id
+
+Every policy gets version 1 from its current config. Evaluations whose
+policy_hash matches that config are linked to it; the rest stay unlinked
+and are re-evaluated by the next delta job that covers them.
+
+The config hash is computed as in app/services/content_hash.policy_hash
+(SHA-256 of the canonical JSON of policy_type and config).
+"""
+
+from sqlalchemy import create_engine, text
+import hashlib
+import json
+import os
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./compliance.db")
+
+def _policy_hash(policy_type, config):
+    canonical = json.dumps({'policy_type': policy_type, 'config': config}, sort_keys=True,
+                           separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def upgrade():
+    """Create policy_versions, add policy_version_id and backfill version 1 of every policy"""
+    engine = create_engine(DATABASE_URL)
+    id_column = "INTEGER PRIMARY KEY AUTOINCREMENT" if DATABASE_URL.startswith("sqlite") else "SERIAL PRIMARY KEY"
+
+    with engine.connect() as conn:
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS policy_versions (
+                id {id_column},
+                policy_id INTEGER NOT NULL REFERENCES policies (id),
+                version INTEGER NOT NULL,
+                policy_type VARCHAR NOT NULL,
+                config JSON NOT NULL,
+                config_hash VARCHAR NOT NULL,
+                created_at TIMESTAMP,
+                CONSTRAINT uq_policy_version UNIQUE (policy_id, version)
+            )
+        """))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_policy_versions_policy_id ON policy_versions (policy_id)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_policy_versions_config_hash ON policy_versions (config_hash)"))
+        conn.execute(text("ALTER TABLE compliance_evaluations ADD COLUMN policy_version_id INTEGER REFERENCES policy_versions (id)"))
+        conn.execute(text("""
+            CREATE INDEX IF NOT EXISTS ix_compliance_evaluations_policy_version_id
+            ON compliance_evaluations (policy_version_id)
+        """))
+        print("✓ Created policy_versions table and policy_version_id column")
+
+        policies = conn.execute(text("""
+            SELECT id, policy_type, config, updated_at FROM policies
+            WHERE id NOT IN (SELECT policy_id FROM policy_versions)
+        """)).fetchall()
+        for policy_id, policy_type, config, updated_at in policies:
+            if isinstance(config, str):
+                config = json.loads(config)
+            config_hash = _policy_hash(policy_type, config)
+            conn.execute(text("""
+                INSERT INTO policy_versions (policy_id, version, policy_type, config, config_hash, created_at)
+                VALUES (:policy_id, 1, :policy_type, :config, :config_hash, :created_at)
+            """), {
+                'policy_id': policy_id,
+                'policy_type': policy_type,
+                'config': json.dumps(config),
+                'config_hash': config_hash,
+                'created_at': updated_at
+            })
+
+        linked = conn.execute(text("""
+            UPDATE compliance_evaluations
+            SET policy_version_id = (
+                SELECT policy_versions.id FROM policy_versions
+                WHERE policy_versions.policy_id = compliance_evaluations.policy_id
+                AND policy_versions.config_hash = compliance_evaluations.policy_hash
+            )
+            WHERE policy_version_id IS NULL AND policy_hash IS NOT NULL
+        """))
+        conn.commit()
+        print(f"✓ Recorded version 1 of {len(policies)} policies, linked {linked.rowcount} evaluations")
+
+def downgrade():
+    """Drop policy_version_id and the policy_versions table"""
+    engine = create_engine(DATABASE_URL)
+
+    with engine.connect() as conn:
+        conn.execute(text("DROP INDEX IF EXISTS ix_compliance_evaluations_policy_version_id"))
+        conn.execute(text("ALTER TABLE compliance_evaluations DROP COLUMN policy_version_id"))
+        conn.execute(text("DROP TABLE IF EXISTS policy_versions"))
+        conn.commit()
+        print("✓ Removed policy versions")
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Usage: python add_policy_versions.py [upgrade|downgrade]")
+        sys.exit(1)
+
+    action = sys.argv[1]
+
+    if action == "upgrade":
+        upgrade()
+    elif action == "downgrade":
+        downgrade()
+    else:
+        print(f"Unknown action: {action}")
+        print("Use 'upgrade' or 'downgrade'")
+        sys.exit(1)
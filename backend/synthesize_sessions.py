@@ -0,0 +1,103 @@
+"""
+Synthesize sessions for an agent offline, without LLM calls.
+
+Writes a deterministic corpus (see app/services/session_synthesizer.py) into
+an agent directory under agent_data/, numbered after the sessions already
+there. The same agent metadata, profile, seed and count always produce the
+same sessions.
+
+Usage:
+    python synthesize_sessions.py order_to_invoice --count 100000 --seed 42
+    python synthesize_sessions.py order_to_invoice --count 5000 --profile profile.json --target bench_otc
+    python synthesize_sessions.py order_to_invoice --count 5000 --fit --format openai
+
+--target writes into another agent directory (created with a copy of the
+source agent's metadata), keeping benchmark corpora apart from real
+sessions. Do not run it against an agent that has a generation or
+synthesis job running: the jobs reserve their session numbers in the
+database, this script does not.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from app.services.memory_loader import MemoryLoader
+from app.services.session_synthesizer import SessionSynthesizer, fit_transitions, write_sessions, FORMATS
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "agent_data")
+
+# Sessions written between progress lines
+PROGRESS_EVERY = 10000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthesize agent sessions offline (no LLM calls).")
+    parser.add_argument("agent_id", help="Agent whose .agent_metadata.json describes the tools and business identifiers")
+    parser.add_argument("--count", type=int, required=True, help="Number of sessions to write")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus seed (default: 0)")
+    parser.add_argument("--format", choices=FORMATS, default="anthropic", help="Message format (default: anthropic)")
+    parser.add_argument("--profile", help="JSON file with transitions, distributions and violation rates "
+                                          "(default: the 'synthesis' block of the agent metadata)")
+    parser.add_argument("--fit", action="store_true", help="Learn tool transitions from the agent's existing sessions")
+    parser.add_argument("--target", help="Agent directory to write into (default: agent_id)")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="agent_data directory")
+    args = parser.parse_args()
+
+    loader = MemoryLoader(base_dir=args.data_dir)
+    metadata_file = loader.base_dir / args.agent_id / ".agent_metadata.json"
+    if not metadata_file.exists():
+        sys.exit(f"Agent metadata not found: {metadata_file}")
+    with open(metadata_file) as f:
+        agent_metadata = json.load(f)
+
+    profile = agent_metadata.get("synthesis") or {}
+    if args.profile:
+        with open(args.profile) as f:
+            profile = json.load(f)
+    if args.fit:
+        tools = [tool["name"] for tool in agent_metadata.get("tools", [])]
+        profile = {**profile, "transitions": fit_transitions(loader.list_memories(args.agent_id), tools)}
+        if not profile["transitions"]:
+            sys.exit("No existing sessions with tool calls to learn transitions from")
+
+    try:
+        synthesizer = SessionSynthesizer(agent_metadata, profile, args.seed, args.format)
+    except ValueError as e:
+        sys.exit(f"Invalid synthesis profile: {e}")
+
+    target = args.target or args.agent_id
+    target_dir = loader.base_dir / target
+    if not target_dir.exists():
+        target_dir.mkdir(parents=True)
+        with open(target_dir / ".agent_metadata.json", "w") as f:
+            json.dump({**agent_metadata, "agent_id": target}, f, indent=2)
+        print(f"Created agent directory {target_dir}")
+
+    base_number = loader.max_session_number(target)
+    print(f"Writing {args.count} sessions to {target_dir} (seed {args.seed}, numbers {base_number + 1}-{base_number + args.count})")
+
+    started = time.time()
+    written = failed = violating = 0
+    for start in range(0, args.count, PROGRESS_EVERY):
+        indexes = list(range(start, min(start + PROGRESS_EVERY, args.count)))
+        for _, result in write_sessions(synthesizer, loader, target, indexes, base_number):
+            if result["status"] != "success":
+                failed += 1
+                print(f"  Session {result['session_number']} failed: {result['error']}")
+                continue
+            written += 1
+            violating += 1 if result["violations"] else 0
+        print(f"  {indexes[-1] + 1}/{args.count}")
+
+    elapsed = time.time() - started
+    print(f"Wrote {written} sessions ({violating} with injected violations, {failed} failed) "
+          f"in {elapsed:.1f}s ({written / max(elapsed, 1e-9):.0f} sessions/s)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
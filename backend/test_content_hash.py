@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""Tests for the content hashes that drive delta evaluation."""
+
+import asyncio
+import copy
+import json
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base, ComplianceEvaluation, PolicyVersion
+from app.routes import jobs
+from app.routes.policies import create_policy, update_policy
+from app.schemas import PolicyCreate, PolicyUpdate
+from app.services.content_hash import session_hash, policy_hash, stale_policy_ids, check_hash, reusable_check_results
+
+CONFIG = {
+    'checks': [
+        {'id': 'has_approval', 'name': 'Approval requested', 'type': 'tool_call', 'tool_name': 'request_human_approval'}
+    ],
+    'violation_logic': {'type': 'REQUIRE_ALL', 'requirements': ['has_approval']}
+}
+
+
+def _load_messages():
+    path = os.path.join(os.path.dirname(__file__), '..', 'sample_memories', 'backoffice_with_rejection.json')
+    with open(path) as f:
+        return json.load(f)['messages']
+
+
+def test_hashes_follow_content_not_layout():
+    messages = _load_messages()
+    reordered_config = json.loads(json.dumps(CONFIG, sort_keys=True))
+
+    assert session_hash(messages) == session_hash(copy.deepcopy(messages))
+    assert policy_hash('composite', CONFIG) == policy_hash('composite', reordered_config)
+
+    edited = copy.deepcopy(messages)
+    edited[-1]['content'] = 'changed'
+    assert session_hash(edited) != session_hash(messages)
+    assert policy_hash('composite', {**CONFIG, 'violation_logic': {'type': 'REQUIRE_ANY'}}) != policy_hash('composite', CONFIG)
+    print("✓ PASS: Same content, same hash; changed content, new hash")
+
+
+def test_only_changed_or_missing_pairs_are_stale():
+    print("\n" + "="*80)
+    print("TEST: Delta evaluation picks pairs with changed or missing hashes")
+    print("="*80)
+
+    messages = _load_messages()
+    digest = session_hash(messages)
+    current = policy_hash('composite', CONFIG)
+    policies = [
+        {'id': 1, 'config_hash': current},
+        {'id': 2, 'config_hash': current},
+        {'id': 3, 'config_hash': current},
+        {'id': 4, 'config_hash': policy_hash('composite', {**CONFIG, 'checks': []})},
+    ]
+    stored = {
+        1: (digest, current),               # unchanged
+        2: (None, None),                    # evaluated before hashes were stored
+        4: (digest, current),               # policy config edited since
+    }
+
+    assert stale_policy_ids(digest, policies, stored) == [2, 3, 4]
+    # The session itself changed: every pair is re-evaluated
+    assert stale_policy_ids('other', policies, stored) == [1, 2, 3, 4]
+    print("✓ PASS: Pair 1 reused; missing, legacy and edited pairs evaluated")
+
+
+def test_unchanged_checks_reuse_results_across_versions():
+    print("\n" + "="*80)
+    print("TEST: A new policy version reuses results of its unchanged checks")
+    print("="*80)
+
+    llm_check = {'id': 'status_ok', 'name': 'Status approved', 'type': 'llm_tool_response',
+                 'tool_name': 'request_human_approval', 'parameter': 'status', 'validation_prompt': 'Must be approved'}
+    v1 = {**CONFIG, 'checks': CONFIG['checks'] + [llm_check]}
+    stored = [
+        {'check_id': 'has_approval', 'check_name': 'Approval requested', 'check_type': 'tool_call',
+         'passed': True, 'message': 'found', 'details': {}},
+        {'check_id': 'status_ok', 'check_name': 'Status approved', 'check_type': 'llm_tool_response',
+         'passed': False, 'message': 'rejected', 'details': {}, 'llm_usage': {'cost_usd': 0.01}}
+    ]
+
+    # v2 renames the LLM check and tightens the tool call check
+    v2 = {
+        'checks': [
+            {**CONFIG['checks'][0], 'tool_name': 'request_manager_approval'},
+            {**llm_check, 'id': 'approved', 'name': 'Approved by a human'}
+        ],
+        'violation_logic': {'type': 'REQUIRE_ALL', 'requirements': ['has_approval', 'approved']}
+    }
+    assert check_hash(llm_check) == check_hash(v2['checks'][1])
+
+    reused = reusable_check_results(v1, stored, v2)
+    assert set(reused) == {'approved'}
+    assert reused['approved']['check_name'] == 'Approved by a human'
+    assert reused['approved']['passed'] is False
+
+    # Deferred results have no verdict to reuse
+    stored[1]['deferred'] = True
+    assert reusable_check_results(v1, stored, v2) == {}
+    print("✓ PASS: Renamed LLM check reused, modified check evaluated again")
+
+
+def test_policy_edits_record_versions_and_reuse_stored_checks(tmp_path, monkeypatch):
+    print("\n" + "="*80)
+    print("TEST: Editing a check records a new version; stored results of the others are reused")
+    print("="*80)
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'policies.db'}", connect_args={'check_same_thread': False})
+    Base.metadata.create_all(engine)
+    sessions = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(jobs, 'SessionLocal', sessions)
+
+    llm_check = {'id': 'status_ok', 'name': 'Status approved', 'type': 'llm_tool_response',
+                 'tool_name': 'request_human_approval', 'parameter': 'status', 'validation_prompt': 'Must be approved'}
+    v1 = {**CONFIG, 'checks': CONFIG['checks'] + [llm_check]}
+    messages = _load_messages()
+
+    db = sessions()
+    policy = asyncio.run(create_policy('agent', PolicyCreate(name='Approval', config=v1), db))
+    first = db.query(PolicyVersion).filter(PolicyVersion.policy_id == policy.id).one()
+    db.add(ComplianceEvaluation(
+        agent_id='agent', memory_id='m1', policy_id=policy.id, is_compliant=False,
+        violations=[
+            {'check_id': 'has_approval', 'check_name': 'Approval requested', 'check_type': 'tool_call',
+             'passed': True, 'message': 'found', 'details': {}},
+            {'check_id': 'status_ok', 'check_name': 'Status approved', 'check_type': 'llm_tool_response',
+             'passed': False, 'message': 'rejected', 'details': {}, 'llm_usage': {'cost_usd': 0.01}}
+        ],
+        session_hash=session_hash(messages), policy_hash=first.config_hash, policy_version_id=first.id
+    ))
+    db.commit()
+
+    # Saved again unchanged (keys reordered) with a new name: same version
+    asyncio.run(update_policy('agent', policy.id, PolicyUpdate(name='Approvals', config=json.loads(json.dumps(v1, sort_keys=True))), db))
+    assert db.query(PolicyVersion).filter(PolicyVersion.policy_id == policy.id).count() == 1
+
+    # One check edited: version 2
+    v2 = {**v1, 'checks': [{**CONFIG['checks'][0], 'tool_name': 'request_manager_approval'}, llm_check]}
+    asyncio.run(update_policy('agent', policy.id, PolicyUpdate(config=v2), db))
+    versions = db.query(PolicyVersion).filter(PolicyVersion.policy_id == policy.id).order_by(PolicyVersion.version).all()
+    assert [(v.version, v.config) for v in versions] == [(1, v1), (2, v2)]
+    db.close()
+
+    policies_data = jobs._load_policies_data('agent', [policy.id])
+    assert policies_data[0]['version_id'] == versions[1].id
+    reused = jobs._reusable_checks('agent', {'id': 'm1', 'messages': messages}, policies_data)
+    assert list(reused) == [policy.id] and list(reused[policy.id]) == ['status_ok']
+    assert reused[policy.id]['status_ok'].passed is False
+    assert reused[policy.id]['status_ok'].llm_usage is None
+    print("✓ PASS: Re-save kept version 1; the edit made version 2 and only the LLM check's result is reused")
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Tests for evaluation upserts and the migration adding their unique key (temporary SQLite databases)."""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base, ComplianceEvaluation
+from app.routes.compliance import upsert_evaluations
+from migrations import add_evaluation_unique_key
+
+
+def evaluation(memory_id, is_compliant, policy_id=1, session_hash=None):
+    return {
+        'agent_id': 'agent',
+        'memory_id': memory_id,
+        'policy_id': policy_id,
+        'is_compliant': is_compliant,
+        'violations': [] if is_compliant else [{'check_id': 'c1'}],
+        'session_hash': session_hash
+    }
+
+
+def stored(db):
+    return {
+        (row.memory_id, row.policy_id): (row.is_compliant, row.session_hash)
+        for row in db.query(ComplianceEvaluation).order_by(ComplianceEvaluation.id)
+    }
+
+
+def test_upsert_keeps_one_row_with_the_latest_values(tmp_path):
+    print("\n" + "="*80)
+    print("TEST: Upserting a pair again, or twice in one batch, leaves one row with the latest verdict")
+    print("="*80)
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'evaluations.db'}")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+
+    upsert_evaluations(db, [evaluation('m1', True, session_hash='a'), evaluation('m2', True)])
+    db.commit()
+    upsert_evaluations(db, [evaluation('m1', False, session_hash='b'), evaluation('m1', True, policy_id=2)])
+    db.commit()
+    # Duplicates within one batch: the last one wins
+    upsert_evaluations(db, [
+        evaluation('m2', False, session_hash='x'),
+        evaluation('m3', False),
+        evaluation('m2', True, session_hash='y')
+    ])
+    db.commit()
+
+    assert db.query(ComplianceEvaluation).count() == 4
+    assert stored(db) == {
+        ('m1', 1): (False, 'b'),
+        ('m2', 1): (True, 'y'),
+        ('m1', 2): (True, None),
+        ('m3', 1): (False, None)
+    }
+    db.close()
+    print("✓ PASS: 4 rows, one per (agent, memory, policy), each holding its last write")
+
+
+def test_migration_removes_duplicates_before_adding_the_key(tmp_path, monkeypatch):
+    print("\n" + "="*80)
+    print("TEST: The unique-key migration keeps the latest of each duplicated evaluation")
+    print("="*80)
+
+    url = f"sqlite:///{tmp_path / 'legacy.db'}"
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        # The table as the old delete-then-insert writes left it: no unique key
+        conn.execute(text("""
+            CREATE TABLE compliance_evaluations (
+                id INTEGER PRIMARY KEY,
+                agent_id VARCHAR NOT NULL,
+                memory_id VARCHAR NOT NULL,
+                policy_id INTEGER NOT NULL,
+                is_compliant BOOLEAN NOT NULL
+            )
+        """))
+        conn.execute(text("""
+            INSERT INTO compliance_evaluations (id, agent_id, memory_id, policy_id, is_compliant) VALUES
+                (1, 'agent', 'm1', 1, 1),
+                (2, 'agent', 'm2', 1, 1),
+                (3, 'agent', 'm1', 1, 0),
+                (4, 'other', 'm1', 1, 1),
+                (5, 'agent', 'm2', 1, 0),
+                (6, 'agent', 'm1', 1, 1)
+        """))
+        conn.commit()
+
+    monkeypatch.setattr(add_evaluation_unique_key, 'DATABASE_URL', url)
+    add_evaluation_unique_key.upgrade()
+
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT id FROM compliance_evaluations ORDER BY id")).fetchall()
+        assert [row[0] for row in rows] == [4, 5, 6]
+        try:
+            conn.execute(text("""
+                INSERT INTO compliance_evaluations (agent_id, memory_id, policy_id, is_compliant)
+                VALUES ('agent', 'm1', 1, 0)
+            """))
+            assert False, "expected the unique key to reject a duplicate"
+        except IntegrityError:
+            pass
+
+    # Running it again is harmless
+    add_evaluation_unique_key.upgrade()
+    print("✓ PASS: The newest row of each pair is kept and the unique index is in place")
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Tests for per-item retries of job sessions (no API calls)."""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from app.services.item_retry import (
+    call_with_retries, backoff_seconds, is_transient_error, raise_for_item_retry, failure_details,
+    ItemFailed, TransientItemError, TRANSIENT, PERMANENT
+)
+from app.services.job_control import JobControl, JobInterrupted, PAUSE
+from app.services.llm_resilience import LLMTimeoutError
+
+
+class FakeAPIError(Exception):
+    """Mimics an SDK error carrying an HTTP status."""
+
+    def __init__(self, status_code):
+        super().__init__(f'HTTP {status_code}')
+        self.status_code = status_code
+
+
+class InternalServerError(Exception):
+    """Named like the SDKs' 5xx error, without a status code."""
+    pass
+
+
+def test_error_classification():
+    print("\n" + "="*80)
+    print("TEST: Transient errors are retried, permanent ones are not")
+    print("="*80)
+
+    for error in [FakeAPIError(500), FakeAPIError(503), FakeAPIError(429), FakeAPIError(408),
+                  InternalServerError('overloaded'), ConnectionError('reset'), LLMTimeoutError('slow')]:
+        assert is_transient_error(error), error
+    for error in [FakeAPIError(400), FakeAPIError(401), ValueError('bad config'), KeyError('messages')]:
+        assert not is_transient_error(error), error
+    print("✓ PASS: 5xx/429/408, connection errors and timeouts are transient; 4xx and bad input are permanent")
+
+
+def test_backoff_is_exponential_with_full_jitter():
+    assert backoff_seconds(1, base_seconds=1, max_seconds=30, rng=lambda: 1.0) == 1
+    assert backoff_seconds(3, base_seconds=1, max_seconds=30, rng=lambda: 1.0) == 4
+    assert backoff_seconds(10, base_seconds=1, max_seconds=30, rng=lambda: 1.0) == 30
+    assert backoff_seconds(3, base_seconds=1, max_seconds=30, rng=lambda: 0.5) == 2
+    print("✓ PASS: 1s, 4s, capped at 30s, scaled by the jitter")
+
+
+def test_transient_failure_is_retried_until_it_succeeds():
+    sleeps = []
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise FakeAPIError(502)
+        return ['evaluation']
+
+    result, attempts = call_with_retries(flaky, max_retries=2, base_seconds=1, max_seconds=30, sleep=sleeps.append)
+    assert result == ['evaluation']
+    assert attempts == 3
+    assert len(sleeps) == 2 and sleeps[0] <= 1 and sleeps[1] <= 2
+    print("✓ PASS: Two 502s, then a result on the third attempt")
+
+
+def test_dead_letter_details():
+    print("\n" + "="*80)
+    print("TEST: Exhausted and permanent failures become dead letters with their class and attempts")
+    print("="*80)
+
+    def always_down():
+        raise FakeAPIError(503)
+
+    try:
+        call_with_retries(always_down, max_retries=2, sleep=lambda s: None)
+        assert False, "expected ItemFailed"
+    except ItemFailed as e:
+        assert failure_details(e) == {'error': 'HTTP 503', 'error_class': TRANSIENT, 'attempts': 3}
+
+    calls = []
+
+    def bad_session():
+        calls.append(1)
+        raise ValueError('Invalid session file')
+
+    try:
+        call_with_retries(bad_session, max_retries=2, sleep=lambda s: None)
+        assert False, "expected ItemFailed"
+    except ItemFailed as e:
+        assert failure_details(e) == {'error': 'Invalid session file', 'error_class': PERMANENT, 'attempts': 1}
+    assert len(calls) == 1
+    print("✓ PASS: 3 attempts on a transient error, 1 on a permanent one")
+
+
+def test_stop_request_ends_retries():
+    control = JobControl()
+    control.request('job', PAUSE)
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        raise FakeAPIError(500)
+
+    with control.bind('job'):
+        try:
+            call_with_retries(flaky, max_retries=5, sleep=lambda s: None, before_retry=control.checkpoint)
+            assert False, "expected JobInterrupted"
+        except JobInterrupted as e:
+            assert e.action == PAUSE
+    assert len(calls) == 1
+    print("✓ PASS: A pause request stops the session after its first failed attempt")
+
+
+def test_llm_errors_escalate_only_inside_job_items():
+    # Outside a job item (API requests) checks record the error as a validation result
+    raise_for_item_retry(FakeAPIError(500))
+
+    def check_with_llm_error():
+        try:
+            raise FakeAPIError(500)
+        except Exception as e:
+            raise_for_item_retry(e)
+            return {'passed': False, 'error': True}
+
+    def check_with_bad_request():
+        try:
+            raise FakeAPIError(400)
+        except Exception as e:
+            raise_for_item_retry(e)
+            return {'passed': False, 'error': True}
+
+    attempts_seen = []
+
+    def session():
+        attempts_seen.append(1)
+        if len(attempts_seen) == 1:
+            return check_with_llm_error()
+        return check_with_bad_request()
+
+    result, attempts = call_with_retries(session, max_retries=2, sleep=lambda s: None)
+    # The 500 retried the session; the 400 is recorded as an errored validation
+    assert attempts == 2 and result == {'passed': False, 'error': True}
+    assert is_transient_error(TransientItemError('x'))
+    print("✓ PASS: A transient LLM error retries the session, a permanent one is recorded")
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
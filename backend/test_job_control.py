@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Tests for cooperative job cancellation and pausing."""
+
+import sys
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+import pytest
+
+from app.services.job_control import JobControl, JobInterrupted, CANCEL, PAUSE
+from app.services.session_pipeline import run_bounded
+
+
+def test_checkpoint_raises_only_for_the_bound_job():
+    print("\n" + "="*80)
+    print("TEST: checkpoint() stops the job bound to the calling context")
+    print("="*80)
+
+    control = JobControl()
+    control.request('job-a', PAUSE)
+
+    # Unbound code (API requests, other jobs) is never interrupted
+    control.checkpoint()
+    with control.bind('job-b'):
+        control.checkpoint()
+
+    with control.bind('job-a'):
+        with pytest.raises(JobInterrupted) as excinfo:
+            control.checkpoint()
+    assert excinfo.value.job_id == 'job-a' and excinfo.value.action == PAUSE
+
+    control.clear('job-a')
+    with control.bind('job-a'):
+        control.checkpoint()
+    print("✓ PASS: Only job-a is interrupted, and only until cleared")
+
+
+def test_cancel_is_not_downgraded_to_pause():
+    control = JobControl()
+    control.request('job', CANCEL)
+    control.request('job', PAUSE)
+    assert control.requested('job') == CANCEL
+
+    with pytest.raises(ValueError):
+        control.request('job', 'explode')
+    print("✓ PASS: A later pause does not undo a cancel")
+
+
+def test_interrupt_passes_through_llm_error_handlers():
+    print("\n" + "="*80)
+    print("TEST: JobInterrupted escapes `except Exception` in pool threads")
+    print("="*80)
+
+    control = JobControl()
+    control.request('job', CANCEL)
+
+    def llm_check():
+        # How checks turn LLM failures into error verdicts
+        try:
+            control.checkpoint()
+            return 'called the LLM'
+        except Exception as e:
+            return f'error verdict: {e}'
+
+    with control.bind('job'):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            future = executor.submit(contextvars.copy_context().run, llm_check)
+            with pytest.raises(JobInterrupted):
+                future.result()
+
+            # Without the copied context the worker thread does not know the job
+            assert executor.submit(llm_check).result() == 'called the LLM'
+    print("✓ PASS: The interrupt reaches the job instead of becoming an error verdict")
+
+
+def test_stop_drains_sessions_in_flight():
+    print("\n" + "="*80)
+    print("TEST: A stop request starts no new sessions and finishes the ones in flight")
+    print("="*80)
+
+    control = JobControl()
+    finished = []
+    started = []
+    lock = threading.Lock()
+
+    def work(idx):
+        with lock:
+            started.append(idx)
+        if idx == 2:
+            control.request('job', PAUSE)
+        time.sleep(0.02)
+        return idx
+
+    def on_done(idx, future):
+        finished.append(future.result())
+
+    count = run_bounded(range(100), work, on_done, concurrency=3, stop=lambda: control.requested('job') is not None)
+
+    assert count == len(started) < 100
+    assert sorted(finished) == sorted(started)
+    print(f"✓ PASS: Stopped after {count} sessions, all of them recorded")
+
+
+def test_task_error_drains_in_flight_before_raising():
+    finished = []
+
+    def tasks():
+        yield from range(3)
+        raise JobInterrupted('job', CANCEL)
+
+    def work(idx):
+        time.sleep(0.01)
+        return idx
+
+    with pytest.raises(JobInterrupted):
+        run_bounded(tasks(), work, lambda idx, future: finished.append(future.result()), concurrency=3)
+    assert sorted(finished) == [0, 1, 2]
+    print("✓ PASS: Sessions in flight are recorded before the interrupt propagates")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Tests for pre-flight job estimates (no API calls)."""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from app.services.llm_batching import BatchCollector, validate_many, validation_key, verdict_cache
+from app.services.llm_client import build_usage_info
+from app.services.llm_cascade import cascade_validate
+from app.services.llm_consensus import consensus_validate
+from app.services.job_estimator import estimate_collected
+
+
+def _never_called(value, prompt, provider, model):
+    raise AssertionError('estimates must not call the LLM')
+
+
+def test_estimate_excludes_cache_hits_and_duplicates():
+    print("\n" + "="*80)
+    print("TEST: Estimate counts unique, uncached validations only")
+    print("="*80)
+
+    verdict_cache.clear()
+    verdict_cache.put(
+        validation_key('openai', 'gpt-4o', 'Must say ok', 'cached-value'),
+        {'passed': True, 'response': 'ok', 'error': False, 'usage': build_usage_info('openai', 'gpt-4o', 10, 1)}
+    )
+
+    collector = BatchCollector()
+    # Two sessions: one value is cached, one repeats across sessions
+    validate_many(['cached-value', 'a', 'b'], 'Must say ok', 'openai', 'gpt-4o', _never_called, collector=collector)
+    validate_many(['a', 'c'], 'Must say ok', 'openai', 'gpt-4o', _never_called, collector=collector)
+
+    estimate = estimate_collected(collector, session_count=2)
+    assert estimate['llm_check_invocations'] == 5
+    assert estimate['verdict_cache_hits'] == 1
+    assert estimate['duplicate_validations'] == 1
+    assert estimate['llm_validations'] == 3
+    assert estimate['llm_calls'] == 3
+    assert estimate['estimated_cost_usd'] > 0
+    assert estimate['estimated_seconds'] > 0
+
+    batched = estimate_collected(collector, session_count=2, llm_batch_size=10)
+    assert batched['llm_calls'] == 1
+
+    offline = estimate_collected(collector, session_count=2, mode='offline_batch')
+    assert offline['estimated_seconds'] is None
+    assert abs(offline['estimated_cost_usd'] - estimate['estimated_cost_usd'] / 2) < 1e-6
+    verdict_cache.clear()
+    print("✓ PASS: 5 invocations -> 3 LLM calls after cache hits and duplicates")
+
+
+def test_estimate_bounds_escalations_and_tie_breaks():
+    print("\n" + "="*80)
+    print("TEST: Cascade escalations and tie-break judges are bounded, not counted as calls")
+    print("="*80)
+
+    verdict_cache.clear()
+    collector = BatchCollector()
+    cascade_validate(
+        ['a', 'b'], 'Must say ok', 'openai', 'gpt-4o', _never_called,
+        {'model': 'gpt-4o-mini'}, collector=collector
+    )
+    consensus_validate(
+        ['c', 'd', 'e'], 'Must be polite', 'openai', 'gpt-4o', _never_called,
+        {'models': [{'model': 'gpt-4o-mini'}, {'model': 'gpt-4.1'}]}, collector=collector
+    )
+
+    estimate = estimate_collected(collector, session_count=1)
+    # 2 screens + 3 values x 2 quorum judges
+    assert estimate['llm_calls'] == 8
+    # Each screen may escalate; each value may need the third judge
+    assert estimate['max_follow_up_calls'] == 5
+    verdict_cache.clear()
+    print("✓ PASS: 8 first-stage calls, at most 5 more after verdicts are known")
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Tests for the job progress event bus behind the server-sent-events endpoints."""
+
+import asyncio
+import sys
+import os
+import threading
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from app.services.job_events import JobEventBus
+
+
+def _event(job_id, agent_id='agent', status='running', completed=0):
+    return {'id': job_id, 'agent_id': agent_id, 'status': status, 'completed_items': completed}
+
+
+def test_subscribers_filter_by_job_and_agent():
+    print("\n" + "="*80)
+    print("TEST: Every subscriber gets the events of the jobs it follows")
+    print("="*80)
+
+    async def run():
+        bus = JobEventBus()
+        with bus.subscribe(job_id='j1') as one_job, \
+                bus.subscribe(agent_id='agent') as agent_stream, \
+                bus.subscribe(agent_id='agent') as second_tab, \
+                bus.subscribe(agent_id='other') as other_agent:
+            bus.publish(_event('j1'))
+            bus.publish(_event('j2'))
+            bus.publish(_event('j3', agent_id='other'))
+
+            assert [e['id'] for e in await one_job.get(timeout=1)] == ['j1']
+            assert [e['id'] for e in await agent_stream.get(timeout=1)] == ['j1', 'j2']
+            assert [e['id'] for e in await second_tab.get(timeout=1)] == ['j1', 'j2']
+            assert [e['id'] for e in await other_agent.get(timeout=1)] == ['j3']
+
+            # Nothing new: the wait times out empty (the stream sends a keepalive)
+            assert await one_job.get(timeout=0.01) == []
+            assert bus.subscriber_count() == 4
+        assert bus.subscriber_count() == 0
+
+    asyncio.run(run())
+    print("✓ PASS: One job stream, two agent streams and another agent's stream")
+
+
+def test_slow_subscriber_gets_latest_status_per_job():
+    async def run():
+        bus = JobEventBus()
+        with bus.subscribe(agent_id='agent') as subscription:
+            for completed in range(100):
+                bus.publish(_event('j1', completed=completed))
+            bus.publish(_event('j2', status='pending'))
+            bus.publish(_event('j1', completed=100))
+
+            events = await subscription.get(timeout=1)
+        # Progress is coalesced, and j1 is ordered by its latest change
+        assert [(e['id'], e['completed_items']) for e in events] == [('j2', 0), ('j1', 100)]
+
+    asyncio.run(run())
+    print("✓ PASS: 102 events published, 2 delivered")
+
+
+def test_worker_threads_wake_subscribers():
+    print("\n" + "="*80)
+    print("TEST: Events published from worker threads reach the event loop")
+    print("="*80)
+
+    async def run():
+        bus = JobEventBus()
+        with bus.subscribe(job_id='j1') as subscription:
+            worker = threading.Thread(target=bus.publish, args=(_event('j1', status='completed'),))
+            worker.start()
+            events = await subscription.get(timeout=2)
+            worker.join()
+        assert events[0]['status'] == 'completed'
+
+    asyncio.run(run())
+    print("✓ PASS: Subscriber woken by a publish from another thread")
+
+
+def test_latest_status_is_retained_for_new_subscribers():
+    bus = JobEventBus(retain=2)
+    bus.publish(_event('j1'))
+    bus.publish(_event('j2'))
+    bus.publish(_event('j1', completed=5))
+    bus.publish(_event('j3', agent_id='other'))
+
+    # j2 is the least recently updated and is dropped first
+    assert bus.latest('j2') is None
+    assert bus.latest('j1')['completed_items'] == 5
+    assert set(bus.latest_for_agent('agent')) == {'j1'}
+
+    bus.publish({'id': 'j1', 'agent_id': 'agent', 'status': 'deleted'})
+    assert bus.latest('j1') is None
+    print("✓ PASS: Latest status kept for the most recently updated jobs")
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""Tests for the persistent job queue: the worker pool (job table faked in memory)
+and chunk claims, leases and recovery (against a temporary SQLite database)."""
+
+import asyncio
+import sys
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base, Policy, ProcessingJob, JobChunk, JobItem
+from app.routes import jobs
+from app.services.job_queue import JobWorkerPool, split_work
+from app.services.job_priority import PRIORITY_RANK, INTERACTIVE, current_priority
+
+
+class FakeJobTable:
+    """In-memory stand-in for processing_jobs with the same compare-and-set claim."""
+
+    def __init__(self, jobs):
+        self.jobs = {j['id']: dict({'priority': 'bulk'}, **j, status='pending', attempts=0, worker_id=None) for j in jobs}
+        self.lock = threading.Lock()
+        self.heartbeats = []
+        self.failed = {}
+
+    def add(self, job):
+        with self.lock:
+            self.jobs[job['id']] = dict({'priority': 'bulk'}, **job, status='pending', attempts=0, worker_id=None)
+
+    def claim(self, worker_id, lanes=None):
+        with self.lock:
+            pending = [j for j in self.jobs.values() if j['status'] == 'pending' and (lanes is None or j['priority'] in lanes)]
+            # Lane order, then submission order (dicts keep insertion order)
+            for job in sorted(pending, key=lambda j: PRIORITY_RANK[j['priority']]):
+                job.update(status='running', worker_id=worker_id, attempts=job['attempts'] + 1)
+                return {'id': job['id'], 'job_type': job['job_type'], 'input_data': job.get('input_data'), 'priority': job['priority']}
+        return None
+
+    def heartbeat(self, job_ids):
+        self.heartbeats.append(sorted(job_ids))
+
+    def fail(self, job_id, message):
+        self.jobs[job_id]['status'] = 'failed'
+        self.failed[job_id] = message
+
+    def complete(self, job_id):
+        self.jobs[job_id]['status'] = 'completed'
+
+
+def _wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_pool_bounds_concurrency_and_runs_each_job_once():
+    print("\n" + "="*80)
+    print("TEST: Ten queued jobs run on a 3-worker pool, each exactly once")
+    print("="*80)
+
+    table = FakeJobTable([{'id': f'job-{n}', 'job_type': 'batch_evaluate', 'input_data': {'n': n}} for n in range(10)])
+    lock = threading.Lock()
+    state = {'running': 0, 'peak': 0, 'seen': []}
+
+    def handler(job_id, input_data):
+        with lock:
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+            state['seen'].append(input_data['n'])
+        time.sleep(0.02)
+        with lock:
+            state['running'] -= 1
+        table.complete(job_id)
+
+    pool = JobWorkerPool(size=3, claim=table.claim, heartbeat=table.heartbeat, fail=table.fail, poll_interval=0.01)
+    pool.register('batch_evaluate', handler)
+    pool.start()
+    pool.notify()
+    try:
+        assert _wait_until(lambda: all(j['status'] == 'completed' for j in table.jobs.values()))
+    finally:
+        pool.stop(timeout=2)
+
+    assert sorted(state['seen']) == list(range(10))
+    assert 1 < state['peak'] <= 3
+    assert all(j['attempts'] == 1 for j in table.jobs.values())
+    print(f"✓ PASS: Peak concurrency {state['peak']}, no job claimed twice")
+
+
+def test_unknown_type_and_crashing_handler_fail_the_job():
+    table = FakeJobTable([
+        {'id': 'a', 'job_type': 'mystery'},
+        {'id': 'b', 'job_type': 'batch_evaluate', 'input_data': {}}
+    ])
+
+    def handler(job_id, input_data):
+        raise RuntimeError('boom')
+
+    pool = JobWorkerPool(size=1, claim=table.claim, heartbeat=table.heartbeat, fail=table.fail)
+    pool.register('batch_evaluate', handler)
+
+    assert pool.run_once('w-0') and pool.run_once('w-0')
+    assert not pool.run_once('w-0')
+    assert table.failed == {'a': "No handler for job type 'mystery'", 'b': 'boom'}
+    assert pool.active_jobs() == {}
+    print("✓ PASS: Failures are recorded on the job and the worker moves on")
+
+
+def test_heartbeats_cover_running_and_tracked_jobs():
+    print("\n" + "="*80)
+    print("TEST: Running jobs heartbeat; recovery sweeps run alongside")
+    print("="*80)
+
+    table = FakeJobTable([{'id': 'slow', 'job_type': 'batch_evaluate', 'input_data': {}}])
+    release = threading.Event()
+    sweeps = []
+
+    def handler(job_id, input_data):
+        release.wait(5)
+        table.complete(job_id)
+
+    pool = JobWorkerPool(
+        size=1, claim=table.claim, heartbeat=table.heartbeat, fail=table.fail,
+        recover=lambda: sweeps.append(1) or 0, heartbeat_interval=0.02, poll_interval=0.01
+    )
+    pool.register('batch_evaluate', handler)
+    pool.start()
+    pool.notify()
+    try:
+        with pool.track('resumed-batch'):
+            assert _wait_until(lambda: ['resumed-batch', 'slow'] in table.heartbeats)
+        release.set()
+        assert _wait_until(lambda: table.jobs['slow']['status'] == 'completed')
+    finally:
+        pool.stop(timeout=2)
+
+    assert sweeps
+    assert pool.active_jobs() == {}
+    print("✓ PASS: Heartbeats sent for worker and externally tracked jobs")
+
+
+def test_interactive_jobs_skip_the_bulk_backlog():
+    print("\n" + "="*80)
+    print("TEST: An interactive job runs on the reserved worker while bulk jobs hold the shared one")
+    print("="*80)
+
+    table = FakeJobTable([{'id': f'bulk-{n}', 'job_type': 'batch_evaluate', 'input_data': {}} for n in range(3)])
+    release = threading.Event()
+    lanes = {}
+
+    def handler(job_id, input_data):
+        lanes[job_id] = current_priority()
+        if job_id.startswith('bulk'):
+            release.wait(5)
+        table.complete(job_id)
+
+    pool = JobWorkerPool(size=1, claim=table.claim, heartbeat=table.heartbeat, fail=table.fail, poll_interval=0.01, reserved=1)
+    pool.register('batch_evaluate', handler)
+    pool.start()
+    try:
+        assert _wait_until(lambda: table.jobs['bulk-0']['status'] == 'running')
+        table.add({'id': 'click', 'job_type': 'batch_evaluate', 'input_data': {}, 'priority': INTERACTIVE})
+        pool.notify()
+        assert _wait_until(lambda: table.jobs['click']['status'] == 'completed')
+        # The reserved worker never picks up bulk work
+        assert [j['status'] for j in table.jobs.values() if j['id'] != 'click'] == ['running', 'pending', 'pending']
+        release.set()
+        assert _wait_until(lambda: all(j['status'] == 'completed' for j in table.jobs.values()))
+    finally:
+        release.set()
+        pool.stop(timeout=2)
+
+    assert lanes == {'bulk-0': 'bulk', 'click': 'interactive', 'bulk-1': 'bulk', 'bulk-2': 'bulk'}
+    print("✓ PASS: Interactive job finished while the bulk backlog waited; handlers ran in their lane")
+
+
+def test_split_work_into_chunks():
+    assert split_work(10, chunk_size=4) == [(0, 4), (4, 8), (8, 10)]
+    assert split_work(0, chunk_size=4) == []
+
+    # Delta jobs: each chunk holds the same number of planned sessions, gaps are skipped
+    assert split_work(100, planned=[90, 3, 4, 50, 51, 52], chunk_size=2) == [(3, 5), (50, 52), (52, 91)]
+    print("✓ PASS: Chunks hold up to chunk_size planned items")
+
+
+def test_chunks_of_one_job_run_on_several_workers():
+    print("\n" + "="*80)
+    print("TEST: Workers holding chunks of the same job are tracked and heartbeat separately")
+    print("="*80)
+
+    chunks = [{'id': 'job', 'job_type': 'job_chunk', 'input_data': {'chunk': n}} for n in range(4)]
+    lock = threading.Lock()
+    release = threading.Event()
+    running = []
+
+    def claim(worker_id, lanes):
+        with lock:
+            return dict(chunks.pop(0), priority='bulk') if chunks else None
+
+    def handler(job_id, input_data):
+        running.append(input_data['chunk'])
+        release.wait(5)
+
+    table = FakeJobTable([])
+    pool = JobWorkerPool(size=2, claim=claim, heartbeat=table.heartbeat, fail=table.fail, heartbeat_interval=0.02, poll_interval=0.01)
+    pool.register('job_chunk', handler)
+    pool.start()
+    try:
+        assert _wait_until(lambda: len(pool.active_workers()) == 2)
+        assert set(pool.active_workers().values()) == {'job'}
+        assert list(pool.active_jobs()) == ['job']
+        assert _wait_until(lambda: ['job'] in table.heartbeats)
+        release.set()
+        assert _wait_until(lambda: not chunks and not pool.active_workers())
+    finally:
+        release.set()
+        pool.stop(timeout=2)
+
+    assert sorted(running) == [0, 1, 2, 3]
+    print("✓ PASS: Four chunks of one job ran two at a time")
+
+
+def make_db(tmp_path, monkeypatch):
+    """A fresh SQLite database that the jobs routes use instead of the app's."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}", connect_args={'check_same_thread': False})
+    Base.metadata.create_all(engine)
+    sessions = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(jobs, 'SessionLocal', sessions)
+    return sessions
+
+
+def add_planned_job(sessions, job_id, priority='bulk', created_at=None, chunk_claimed_at=None, chunks=2, chunk_size=10):
+    """A running job whose chunks are planned and pending."""
+    now = datetime.utcnow()
+    db = sessions()
+    db.add(ProcessingJob(
+        id=job_id, agent_id='agent', status='running', job_type='batch_evaluate', priority=priority,
+        total_items=chunks * chunk_size, completed_items=0, failed_items=0,
+        input_data={'agent_id': 'agent', 'memory_ids': [f'm{n}' for n in range(chunks * chunk_size)]},
+        created_at=created_at or now, chunk_claimed_at=chunk_claimed_at or now
+    ))
+    for n in range(chunks):
+        db.add(JobChunk(
+            job_id=job_id, chunk_index=n, item_start=n * chunk_size, item_end=(n + 1) * chunk_size,
+            status='pending', attempts=0
+        ))
+    db.commit()
+    db.close()
+
+
+def test_long_running_bulk_job_does_not_outrank_interactive_chunks(tmp_path, monkeypatch):
+    print("\n" + "="*80)
+    print("TEST: Chunk aging follows the job's last chunk claim, not its age")
+    print("="*80)
+
+    sessions = make_db(tmp_path, monkeypatch)
+    now = datetime.utcnow()
+    # Submitted two hours ago and still getting chunks claimed
+    add_planned_job(sessions, 'bulk', created_at=now - timedelta(hours=2), chunk_claimed_at=now - timedelta(seconds=5), chunks=4)
+    add_planned_job(sessions, 'click', priority=INTERACTIVE, chunks=1)
+
+    assert jobs.claim_next_chunk('w-1')['id'] == 'click'
+    assert jobs.claim_next_chunk('w-2')['id'] == 'bulk'
+
+    # A bulk job with no chunk claimed for longer than the max wait gets one chunk ahead...
+    db = sessions()
+    db.query(ProcessingJob).filter(ProcessingJob.id == 'bulk').update(
+        {ProcessingJob.chunk_claimed_at: now - timedelta(seconds=jobs.JOB_PRIORITY_MAX_WAIT_SECONDS + 60)}
+    )
+    db.commit()
+    db.close()
+    add_planned_job(sessions, 'click-2', priority=INTERACTIVE, chunks=2)
+    assert jobs.claim_next_chunk('w-3')['id'] == 'bulk'
+    # ...and that claim resets its wait
+    assert [jobs.claim_next_chunk(f'w-{n}')['id'] for n in (4, 5)] == ['click-2', 'click-2']
+    print("✓ PASS: Interactive chunks first; a starved bulk job gets exactly one chunk ahead")
+
+
+def test_chunk_items_are_recorded_exactly_once_across_lease_loss(tmp_path, monkeypatch):
+    print("\n" + "="*80)
+    print("TEST: Two workers, one expired lease: items and counters are exactly-once")
+    print("="*80)
+
+    sessions = make_db(tmp_path, monkeypatch)
+    add_planned_job(sessions, 'job', chunks=1, chunk_size=4)
+
+    first = jobs.claim_next_chunk('w-1')['input_data']
+    assert first['worker_id'] == 'w-1'
+    # Held by w-1: another worker finds nothing to claim
+    assert jobs.claim_next_chunk('w-2') is None
+
+    def session(idx, status='success'):
+        return (idx, {'memory_id': f'm{idx}', 'status': status, 'evaluations': 0}, [])
+
+    lease_1 = (first['chunk_id'], 'w-1')
+    jobs._write_sessions('job', 'agent', [session(0), session(1, 'error')], lease=lease_1)
+
+    # w-1 stalls past its lease; recovery sees the chunk as claimable and w-2 claims it
+    db = sessions()
+    db.query(JobChunk).update({JobChunk.lease_expires_at: datetime.utcnow() - timedelta(seconds=1)})
+    db.commit()
+    db.close()
+    assert jobs.recover_stale_jobs() == 1
+    second = jobs.claim_next_chunk('w-2')['input_data']
+    assert second['chunk_id'] == first['chunk_id'] and second['worker_id'] == 'w-2'
+    assert jobs.load_checkpoint('job') == {0: 'success', 1: 'error'}
+
+    # The stalled worker wakes up: its flush is rejected and writes nothing
+    try:
+        jobs._write_sessions('job', 'agent', [session(2), session(3)], lease=lease_1)
+        assert False, "expected ChunkLeaseLost"
+    except jobs.ChunkLeaseLost:
+        pass
+
+    # The new owner writes the rest; an item recorded twice is only counted once
+    lease_2 = (second['chunk_id'], 'w-2')
+    jobs._write_sessions('job', 'agent', [session(1, 'error'), session(2), session(3)], lease=lease_2)
+
+    db = sessions()
+    items = db.query(JobItem.item_index).filter(JobItem.job_id == 'job').order_by(JobItem.item_index).all()
+    job = db.query(ProcessingJob).filter(ProcessingJob.id == 'job').one()
+    assert [idx for (idx,) in items] == [0, 1, 2, 3]
+    assert (job.completed_items, job.failed_items) == (4, 1)
+    db.close()
+    print("✓ PASS: 4 items, completed 4 of 4, failed 1; the stale worker's flush was fenced off")
+
+
+def test_batch_job_resumes_with_the_policies_it_submitted(tmp_path, monkeypatch):
+    print("\n" + "="*80)
+    print("TEST: An offline batch job resumes against its submit-time policies snapshot")
+    print("="*80)
+
+    sessions = make_db(tmp_path, monkeypatch)
+    config = {'checks': [{'id': 'c1', 'name': 'Inventory', 'type': 'tool_call', 'tool_name': 'check_inventory'}]}
+    db = sessions()
+    db.add(Policy(id=1, agent_id='agent', name='Inventory', policy_type='composite', config=config))
+    db.add(ProcessingJob(
+        id='job', agent_id='agent', status='running', job_type='batch_evaluate', total_items=1,
+        input_data={'agent_id': 'agent', 'memory_ids': ['m0'], 'policy_ids': [1]}
+    ))
+    db.commit()
+    db.close()
+
+    class Pending:
+        pending_count = 1
+
+    monkeypatch.setattr(jobs, '_collect_pending', lambda *args: Pending())
+    monkeypatch.setattr(jobs, 'submit_pending', lambda collector, items_per_request: {'batches': []})
+    submitted = jobs._load_policies_data('agent', [1])
+    assert jobs._submit_offline_batches('job', 'agent', ['m0'], submitted, 1)
+
+    # The policy is edited while the provider batch runs
+    db = sessions()
+    db.query(Policy).filter(Policy.id == 1).update({Policy.config: {**config, 'checks': []}})
+    db.commit()
+    db.close()
+
+    evaluated = []
+    monkeypatch.setattr(jobs, 'collect_results', lambda batch_state: (True, {}))
+    monkeypatch.setattr(jobs, '_run_evaluations', lambda job_id, agent_id, memory_ids, policies_data, **kwargs: evaluated.append(policies_data))
+    monkeypatch.setattr(jobs, '_finish_job', lambda *args: None)
+    assert jobs.resume_batch_job('job') == 'completed'
+
+    assert evaluated == [submitted]
+    assert evaluated[0][0]['config'] == config
+    print("✓ PASS: The verdicts are applied to the policy version their prompts were built from")
+
+
+def test_retry_failed_requeues_dead_letters_and_deferred_items(tmp_path, monkeypatch):
+    print("\n" + "="*80)
+    print("TEST: /retry-failed evaluates failed and deferred items again, and nothing else")
+    print("="*80)
+
+    sessions = make_db(tmp_path, monkeypatch)
+    add_planned_job(sessions, 'job', chunks=1, chunk_size=4)
+    statuses = ['success', 'deferred', 'error', 'not_found']
+    jobs.record_job_items('job', [(idx, {'memory_id': f'm{idx}', 'status': status}) for idx, status in enumerate(statuses)])
+    db = sessions()
+    db.query(ProcessingJob).update({ProcessingJob.status: 'completed'})
+    db.commit()
+
+    status = asyncio.run(jobs.retry_failed_items('job', db))
+    assert (status.status, status.completed_items, status.failed_items) == ('pending', 1, 0)
+    assert db.query(JobChunk).count() == 0
+    db.close()
+    assert jobs.load_checkpoint('job') == {0: 'success'}
+    print("✓ PASS: Items 1-3 removed from the checkpoint; counters match the success left")
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""Tests for per-job telemetry: histograms, merging and recording from bound contexts."""
+
+import contextvars
+import sys
+import os
+import threading
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from app.services import job_telemetry
+from app.services.job_telemetry import JobTelemetry, empty_histogram, observe, percentile, merge_snapshots, summarize
+from app.services.llm_rate_limiter import LLMRateLimiter
+
+
+class FakeRateLimitError(Exception):
+    def __init__(self):
+        super().__init__('rate limited')
+        self.status_code = 429
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_percentiles_from_histogram():
+    print("\n" + "="*80)
+    print("TEST: Percentiles are estimated within the bucket they fall in")
+    print("="*80)
+
+    histogram = empty_histogram()
+    assert percentile(histogram, 50) is None
+    for i in range(1, 1001):
+        observe(histogram, i / 1000.0)  # Uniform over (0, 1] second
+
+    p50, p95, p99 = percentile(histogram, 50), percentile(histogram, 95), percentile(histogram, 99)
+    assert 0.25 <= p50 <= 0.5
+    assert 0.5 <= p95 <= 1.0 and 0.5 <= p99 <= 1.0
+    assert p50 < p95 < p99 <= histogram['max'] == 1.0
+    # Slow outliers land in the unbounded bucket and are capped at the maximum seen
+    observe(histogram, 900.0)
+    assert percentile(histogram, 100) == 900.0
+    print(f"✓ PASS: p50={p50:.3f}s p95={p95:.3f}s p99={p99:.3f}s")
+
+
+def test_snapshots_merge_exactly():
+    clock = FakeClock()
+    first, second, single = JobTelemetry(clock=clock), JobTelemetry(clock=clock), JobTelemetry(clock=clock)
+    for i, seconds in enumerate([0.02, 0.3, 1.7, 4.0, 0.08, 12.0]):
+        (first if i % 2 else second).observe_session(seconds)
+        single.observe_session(seconds)
+    for recorder in (first, single):
+        recorder.add_stage('db_flush', 0.5)
+        recorder.observe_llm_call('anthropic', 'claude-sonnet-4-5', 2.0, queued=0.1)
+        recorder.increment('verdict_cache_hits', 3)
+    clock.now += 10
+
+    merged = merge_snapshots([first.snapshot(), None, second.snapshot()])
+    assert merged['session_latency'] == single.snapshot()['session_latency']
+    assert merged['sessions'] == 6
+    assert merged['llm']['models']['anthropic:claude-sonnet-4-5']['calls'] == 1
+    assert merged['counters'] == {'verdict_cache_hits': 3}
+
+    # A resumed run starts from the stored snapshot and keeps the first start time
+    resumed = JobTelemetry(merged, clock=clock)
+    resumed.observe_session(0.5)
+    assert resumed.snapshot()['sessions'] == 7
+    assert resumed.snapshot()['started_at'] == 1000.0
+    print("✓ PASS: Two recorders merge to what one recorder would have seen")
+
+
+def test_summary_rates_and_cache_hit_rates():
+    clock = FakeClock()
+    telemetry = JobTelemetry(clock=clock)
+    for _ in range(40):
+        telemetry.observe_session(0.2)
+    telemetry.add_stage('db_flush', 0.25)
+    telemetry.add_stage('db_flush', 0.75)
+    telemetry.increment('verdict_cache_hits', 30)
+    telemetry.increment('verdict_cache_misses', 10)
+    telemetry.increment('input_tokens', 1000)
+    telemetry.increment('cached_input_tokens', 800)
+    clock.now += 20
+    telemetry.observe_session(0.2)
+
+    summary = summarize(telemetry.snapshot())
+    assert summary['sessions'] == 41
+    assert summary['wall_seconds'] == 20.0
+    assert summary['sessions_per_second'] == 2.05
+    assert summary['db_flushes'] == 2 and summary['db_flush_seconds'] == 1.0
+    assert summary['cache_hit_rates'] == {'verdict_cache': 0.75, 'reused_checks': None, 'prompt_cache': 0.8}
+    assert summary['llm_latency']['p50_seconds'] is None
+    print("✓ PASS: sessions/sec, flush time and cache hit rates")
+
+
+def test_llm_calls_recorded_into_the_bound_job():
+    print("\n" + "="*80)
+    print("TEST: Rate-limited LLM calls are recorded into the telemetry bound to their context")
+    print("="*80)
+
+    limiter = LLMRateLimiter(overrides={})
+    limiter.sleep = lambda seconds: None
+    telemetry = JobTelemetry()
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise FakeRateLimitError()
+        return 'ok'
+
+    # Unbound calls (API requests) record nothing
+    limiter.call('openai', 'gpt-4o', 10, lambda: 'ok')
+
+    with job_telemetry.bind(telemetry):
+        assert limiter.call('openai', 'gpt-4o', 10, flaky) == 'ok'
+        # Pool threads inherit the binding through the copied context
+        context = contextvars.copy_context()
+        worker = threading.Thread(target=context.run, args=(limiter.call, 'anthropic', 'claude-haiku-4-5', 10, lambda: 'ok'))
+        worker.start()
+        worker.join()
+    limiter.call('openai', 'gpt-4o', 10, lambda: 'ok')
+
+    llm = telemetry.snapshot()['llm']
+    assert llm['calls'] == 3
+    assert llm['rate_limited'] == 1 and llm['errors'] == 0
+    assert {key: model['calls'] for key, model in llm['models'].items()} == {
+        'openai:gpt-4o': 2,
+        'anthropic:claude-haiku-4-5': 1
+    }
+    print("✓ PASS: 2 attempts + 1 pool-thread call recorded, unbound calls ignored")
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
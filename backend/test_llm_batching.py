@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""Tests for batched LLM validation (no API calls; the LLM is stubbed)."""
+
+import json
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from app.services import llm_batching
+from app.services.llm_batching import (
+    ValidationItem,
+    BatchCollector,
+    parse_batch_response,
+    parse_batch_verdicts,
+    split_tokens,
+    validate_batch,
+    validate_many,
+    validation_key,
+    verdict_cache,
+    build_batch_prompt,
+)
+from app.services.llm_client import build_usage_info
+
+
+def _single_validator(value, prompt, provider, model):
+    return {
+        'passed': 'ok' in str(value),
+        'response': 'single',
+        'error': False,
+        'usage': build_usage_info(provider, model, 100, 10)
+    }
+
+
+def _items(values, prompt="Value must say ok"):
+    return [ValidationItem(prompt=prompt, value=v, key=validation_key('openai', 'gpt-4o', prompt, v)) for v in values]
+
+
+def _fake_batch_llm(calls, malformed_sizes=(), prefixes=None):
+    """Record one verdict per ITEM section, optionally leaving items out."""
+    def fake_call_llm_structured(provider, model, prompt, schema, name, description='', max_tokens=200, prefix=None, **kwargs):
+        count = prompt.count('### ITEM ')
+        calls.append(count)
+        if prefixes is not None:
+            prefixes.append(prefix)
+        if count in malformed_sizes:
+            return {'verdicts': [{'item': 1, 'compliant': True, 'confidence': 1.0, 'reason': 'only one'}]}, \
+                build_usage_info(provider, model, 500, 5)
+        values = [section.split('VALUE TO EVALUATE:\n', 1)[1].split('\n', 1)[0] for section in prompt.split('### ITEM ')[1:]]
+        verdicts = [{'item': i + 1, 'compliant': 'ok' in v, 'confidence': 0.9, 'reason': f'checked {v}'} for i, v in enumerate(values)]
+        return {'verdicts': verdicts}, build_usage_info(provider, model, 1000, 60)
+    return fake_call_llm_structured
+
+
+def test_parse_batch_response():
+    print("\n" + "="*80)
+    print("TEST: Parse array-of-verdicts response")
+    print("="*80)
+
+    text = '{"verdicts": [{"item": 2, "compliant": false, "reason": "b"}, {"item": 1, "compliant": true, "confidence": 0.7, "reason": "a"}]}'
+    parsed = parse_batch_response(text, 2)
+    assert parsed == [{'compliant': True, 'reason': 'a', 'confidence': 0.7}, {'compliant': False, 'reason': 'b', 'confidence': None}]
+    assert parse_batch_verdicts(json.loads(text), 2) == parsed
+
+    # Wrong count, duplicates and non-boolean verdicts are rejected
+    assert parse_batch_response('[{"item": 1, "compliant": true}]', 2) is None
+    assert parse_batch_response('[{"item": 1, "compliant": true}, {"item": 1, "compliant": true}]', 2) is None
+    assert parse_batch_response('[{"item": 1, "compliant": "yes"}]', 1) is None
+    print("✓ PASS: Malformed batch responses rejected, valid ones reordered by item")
+
+
+def test_split_tokens_preserves_totals():
+    shares = split_tokens(1001, [1, 1, 1])
+    assert sum(shares) == 1001
+    assert max(shares) - min(shares) <= 1
+    assert split_tokens(10, [0, 0]) == [5, 5]
+    print("✓ PASS: Token attribution preserves totals")
+
+
+def test_validate_batch_attributes_usage(monkeypatch):
+    print("\n" + "="*80)
+    print("TEST: Batched validation attributes usage per item")
+    print("="*80)
+
+    calls = []
+    monkeypatch.setattr(llm_batching, 'call_llm_structured', _fake_batch_llm(calls))
+
+    results = validate_batch(_items(['ok-1', 'bad-2', 'ok-3']), 'openai', 'gpt-4o', 10, _single_validator)
+
+    assert calls == [3]
+    assert [r['passed'] for r in results] == [True, False, True]
+    assert sum(r['usage']['input_tokens'] for r in results) == 1000
+    assert sum(r['usage']['output_tokens'] for r in results) == 60
+    assert len({r['usage']['batch_call_id'] for r in results}) == 1
+    print("✓ PASS: One request for three items, tokens attributed back to each item")
+
+
+def test_criteria_sent_once_per_request(monkeypatch):
+    print("\n" + "="*80)
+    print("TEST: A batch request carries its criteria once, as the prompt prefix")
+    print("="*80)
+
+    calls, prefixes = [], []
+    monkeypatch.setattr(llm_batching, 'call_llm_structured', _fake_batch_llm(calls, prefixes=prefixes))
+
+    items = _items(['ok-1', 'bad-2']) + _items(['ok-3'], prompt="Value must be short") + _items(['ok-4'])
+    results = validate_batch(items, 'openai', 'gpt-4o', 10, _single_validator)
+
+    # Mixed prompts are grouped: one request per prompt, results in input order
+    assert calls == [3]
+    assert [r['response'] for r in results] == ['checked ok-1', 'checked bad-2', 'single', 'checked ok-4']
+    assert prefixes[0].count('Value must say ok') == 1
+    assert 'Value must say ok' not in build_batch_prompt(items[:2])
+    print("✓ PASS: Criteria in the cacheable prefix only; values grouped by prompt")
+
+
+def test_validate_batch_splits_on_parse_failure(monkeypatch):
+    print("\n" + "="*80)
+    print("TEST: A batch missing verdicts is split and retried")
+    print("="*80)
+
+    calls = []
+    monkeypatch.setattr(llm_batching, 'call_llm_structured', _fake_batch_llm(calls, malformed_sizes=(4,)))
+
+    results = validate_batch(_items(['ok-1', 'bad-2', 'ok-3', 'bad-4']), 'openai', 'gpt-4o', 10, _single_validator)
+
+    assert calls == [4, 2, 2]
+    assert [r['passed'] for r in results] == [True, False, True, False]
+    # Tokens spent on the failed attempt are still accounted for
+    assert results[0]['retry_usage'][0]['parse_failed'] is True
+    print("✓ PASS: Failed batch of 4 retried as two batches of 2")
+
+
+def test_collector_defers_then_resolves(monkeypatch):
+    print("\n" + "="*80)
+    print("TEST: Cross-evaluation collection resolves in shared batches")
+    print("="*80)
+
+    verdict_cache.clear()
+    calls = []
+    monkeypatch.setattr(llm_batching, 'call_llm_structured', _fake_batch_llm(calls))
+
+    collector = BatchCollector()
+    first = validate_many(['ok-a', 'bad-b'], 'Value must say ok', 'openai', 'gpt-4o', _single_validator, collector=collector)
+    second = validate_many(['ok-a', 'ok-c'], 'Value must say ok', 'openai', 'gpt-4o', _single_validator, collector=collector)
+    assert all(r.get('deferred') for r in first + second)
+    assert collector.pending_count == 3  # 'ok-a' deduplicated
+
+    collector.resolve(batch_size=10)
+    assert calls == [3]
+
+    resolved = validate_many(['ok-a', 'bad-b', 'ok-a'], 'Value must say ok', 'openai', 'gpt-4o', _single_validator, collector=collector)
+    assert [r['passed'] for r in resolved] == [True, False, True]
+    # Usage for a shared verdict is only counted once
+    assert resolved[0]['usage'] is not None and resolved[2]['usage'] is None
+    verdict_cache.clear()
+    print("✓ PASS: Three unique items from two evaluations resolved in one request")
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
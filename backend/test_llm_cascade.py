@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Tests for the cheap -> expensive model cascade (no API calls; validators are stubbed)."""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from app.services.check_types import aggregate_llm_usage
+from app.services.llm_batching import BatchCollector, usage_entries, validate_many, verdict_cache
+from app.services.llm_cascade import cascade_validate
+from app.services.llm_client import build_usage_info
+from app.services.llm_stats import summarize_policy_checks
+
+CASCADE = {'model': 'claude-haiku-3-5-20241022', 'confidence_threshold': 0.8}
+
+
+def _validator(calls):
+    """Cheap model is unsure about values containing 'hard'; the expensive model is always sure."""
+    def validate(value, prompt, provider, model):
+        calls.append((model, value))
+        confident = model == 'claude-sonnet-4-5-20250929' or 'hard' not in value
+        return {
+            'passed': 'ok' in value,
+            'response': f'{model} judged {value}',
+            'confidence': 0.95 if confident else 0.4,
+            'error': False,
+            'usage': build_usage_info('anthropic', model, 200, 20)
+        }
+    return validate
+
+
+def test_low_confidence_items_escalate():
+    print("\n" + "="*80)
+    print("TEST: Only low-confidence screening verdicts escalate")
+    print("="*80)
+
+    verdict_cache.clear()
+    calls = []
+    results, stats = cascade_validate(
+        ['ok-easy', 'bad-easy', 'ok-hard'], 'Must say ok', 'anthropic', 'claude-sonnet-4-5-20250929',
+        _validator(calls), CASCADE, use_cache=False
+    )
+
+    assert [m for m, _ in calls] == ['claude-haiku-3-5-20241022'] * 3 + ['claude-sonnet-4-5-20250929']
+    assert [r['passed'] for r in results] == [True, False, True]
+    assert [r['cascade']['stage'] for r in results] == ['screen', 'screen', 'escalation']
+    assert stats['screened'] == 3 and stats['escalated'] == 1
+    assert stats['escalation_rate'] == round(1 / 3, 4)
+
+    # Escalated item carries both stages' usage
+    stages = [u['cascade_stage'] for u in usage_entries(results[2])]
+    assert stages == ['screen', 'escalation']
+
+    usage = aggregate_llm_usage([u for r in results for u in usage_entries(r)])
+    assert usage['api_calls'] == 4
+    print("✓ PASS: 3 screened, 1 escalated, usage from both stages recorded")
+
+
+def test_collection_defers_screening_only():
+    verdict_cache.clear()
+    calls = []
+    collector = BatchCollector()
+    results, stats = cascade_validate(
+        ['ok-hard'], 'Must say ok', 'anthropic', 'claude-sonnet-4-5-20250929',
+        _validator(calls), CASCADE, collector=collector
+    )
+    assert results[0].get('deferred')
+    assert calls == []
+    assert [model for _, model, _ in collector.pending_items()] == ['claude-haiku-3-5-20241022']
+    verdict_cache.clear()
+    print("✓ PASS: Escalation waits until screening verdicts are resolved")
+
+
+def _plain_validator(calls):
+    """A check without a cascade: verdicts carry no confidence."""
+    def validate(value, prompt, provider, model):
+        calls.append((model, value))
+        return {
+            'passed': 'ok' in value, 'response': 'plain', 'error': False,
+            'usage': build_usage_info('anthropic', model, 200, 20)
+        }
+    return validate
+
+
+def test_plain_verdicts_are_not_reused_for_screening():
+    print("\n" + "="*80)
+    print("TEST: A cached plain verdict from the screening model does not answer a screen")
+    print("="*80)
+
+    verdict_cache.clear()
+    plain_calls = []
+    validate_many(['ok-easy'], 'Must say ok', 'anthropic', 'claude-haiku-3-5-20241022', _plain_validator(plain_calls))
+
+    calls = []
+    results, stats = cascade_validate(
+        ['ok-easy'], 'Must say ok', 'anthropic', 'claude-sonnet-4-5-20250929', _validator(calls), CASCADE
+    )
+    # Screened afresh with a confidence, so the confident verdict does not escalate
+    assert calls == [('claude-haiku-3-5-20241022', 'ok-easy')]
+    assert stats['escalated'] == 0 and results[0]['confidence'] == 0.95
+
+    # Both shapes deferred to one collector keep their own validators
+    plain_calls, calls = [], []
+    collector = BatchCollector()
+    validate_many(['ok-hard'], 'Must say ok', 'anthropic', 'claude-haiku-3-5-20241022',
+                  _plain_validator(plain_calls), collector=collector, use_cache=False)
+    cascade_validate(['ok-hard'], 'Must say ok', 'anthropic', 'claude-sonnet-4-5-20250929',
+                     _validator(calls), CASCADE, collector=collector, use_cache=False)
+    collector.resolve(batch_size=1)
+    assert plain_calls == [('claude-haiku-3-5-20241022', 'ok-hard')]
+    assert calls == [('claude-haiku-3-5-20241022', 'ok-hard')]
+    verdict_cache.clear()
+    print("✓ PASS: Screening verdicts are keyed and validated apart from plain ones")
+
+
+def test_policy_stats_escalation_rate():
+    screen = dict(build_usage_info('anthropic', 'claude-haiku-3-5-20241022', 100, 10), cascade_stage='screen')
+    escalation = dict(build_usage_info('anthropic', 'claude-sonnet-4-5-20250929', 100, 10), cascade_stage='escalation')
+    check = {
+        'check_id': 'approval', 'check_type': 'llm_tool_response',
+        'details': {'cascade': {'screened': 2, 'escalated': 1}},
+        'llm_usage': aggregate_llm_usage([screen, screen, escalation])
+    }
+
+    summary = summarize_policy_checks([check, check])
+    assert summary['api_calls'] == 6
+    assert summary['cascade']['screened'] == 4
+    assert summary['cascade']['escalation_rate'] == 0.5
+    assert summary['cascade']['escalation_cost_usd'] > summary['cascade']['screen_cost_usd'] / 2
+    print("✓ PASS: Per-policy escalation rate aggregated")
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
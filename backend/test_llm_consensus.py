@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""Tests for multi-model consensus voting (no API calls; validators are stubbed)."""
+
+import sys
+import os
+import threading
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from app.services import llm_consensus
+from app.services.check_types import aggregate_llm_usage, run_llm_validations
+from app.services.llm_batching import BatchCollector, usage_entries, verdict_cache
+from app.services.llm_client import build_usage_info
+from app.services.llm_stats import summarize_policy_checks
+
+SONNET = 'claude-sonnet-4-5-20250929'
+HAIKU = 'claude-haiku-3-5-20241022'
+CONFIG = {
+    'consensus': {'models': [{'provider': 'openai', 'model': 'gpt-4o'}, {'model': HAIKU}]},
+    'cache_verdicts': False
+}
+
+
+def _validator(calls, dissenter=None):
+    """Every judge passes values containing 'ok'; `dissenter` votes the other way."""
+    lock = threading.Lock()
+
+    def validate(value, prompt, provider, model):
+        with lock:
+            calls.append(model)
+        passed = 'ok' in value
+        if model == dissenter:
+            passed = not passed
+        return {'passed': passed, 'response': f'{model} judged {value}', 'error': False,
+                'usage': build_usage_info(provider, model, 200, 20)}
+    return validate
+
+
+def test_agreement_stops_early():
+    print("\n" + "="*80)
+    print("TEST: Two agreeing judges decide 2-of-3; the third is never called")
+    print("="*80)
+
+    calls = []
+    results, stats = run_llm_validations(['ok value', 'bad value'], 'Must say ok', 'anthropic', SONNET,
+                                         _validator(calls), CONFIG)
+
+    assert [r['passed'] for r in results] == [True, False]
+    assert HAIKU not in calls and len(calls) == 4
+    consensus = stats['consensus']
+    assert consensus['quorum'] == 2 and consensus['judges'] == [f'anthropic:{SONNET}', 'openai:gpt-4o', f'anthropic:{HAIKU}']
+    assert consensus['judge_calls'] == 4 and consensus['calls_saved'] == 2
+    assert consensus['agreement_rate'] == 1.0
+
+    # Per-judge usage is tagged and broken down per model
+    usage = aggregate_llm_usage([u for r in results for u in usage_entries(r)])
+    assert usage['api_calls'] == 4
+    assert {m['model'] for m in usage['per_model']} == {SONNET, 'gpt-4o'}
+    assert sorted(u['consensus_judge'] for u in usage['per_call']) == [0, 0, 1, 1]
+    print("✓ PASS: 4 of 6 possible judge calls made")
+
+
+def test_disagreement_calls_tiebreaker():
+    print("\n" + "="*80)
+    print("TEST: A split vote starts the next judge")
+    print("="*80)
+
+    calls = []
+    results, stats = run_llm_validations(['ok value'], 'Must say ok', 'anthropic', SONNET,
+                                         _validator(calls, dissenter='gpt-4o'), CONFIG)
+
+    result = results[0]
+    assert result['passed'] is True
+    assert sorted(calls) == sorted([SONNET, 'gpt-4o', HAIKU])
+    assert result['consensus']['judges_called'] == 3
+    assert [v['passed'] for v in result['consensus']['votes']] == [True, False, True]
+    assert stats['consensus']['agreement_rate'] == 0.0
+
+    checks = [{'check_id': 'c', 'check_type': 'llm_response_validation', 'details': stats,
+               'llm_usage': aggregate_llm_usage(usage_entries(result))}]
+    summary = summarize_policy_checks(checks)['consensus']
+    assert summary['decided'] == 1 and summary['unanimous'] == 0
+    assert set(summary['judge_cost_usd']) == {f'anthropic:{SONNET}', 'openai:gpt-4o', f'anthropic:{HAIKU}'}
+    print("✓ PASS: Tie broken by the third judge; disagreement reported")
+
+
+def test_judges_validate_all_values_together(monkeypatch):
+    print("\n" + "="*80)
+    print("TEST: Each judge validates every value needing its vote in one call")
+    print("="*80)
+
+    batches = []
+    validate_many = llm_consensus.validate_many
+
+    def recording(values, prompt, provider, model, validator, **kwargs):
+        batches.append((model, list(values), kwargs['batch_size']))
+        return validate_many(values, prompt, provider, model, validator, **kwargs)
+
+    monkeypatch.setattr(llm_consensus, 'validate_many', recording)
+    calls = []
+    results, stats = run_llm_validations(['ok a', 'ok b', 'bad c'], 'Must say ok', 'anthropic', SONNET,
+                                         _validator(calls, dissenter='gpt-4o'), dict(CONFIG, batch_size=1))
+
+    assert [r['passed'] for r in results] == [True, True, False]
+    # Every value is split 1-1, so the tie-breaker also runs once for all three
+    assert sorted(batches) == sorted([
+        (SONNET, ['ok a', 'ok b', 'bad c'], 1),
+        ('gpt-4o', ['ok a', 'ok b', 'bad c'], 1),
+        (HAIKU, ['ok a', 'ok b', 'bad c'], 1)
+    ])
+    assert stats['consensus']['judge_calls'] == 9
+    print("✓ PASS: 3 judge calls of 3 values each instead of 9 single-value calls")
+
+
+def test_undecidable_values_do_not_wait_for_running_judges():
+    print("\n" + "="*80)
+    print("TEST: A judge still running after the outcome is settled is not waited for")
+    print("="*80)
+
+    release = threading.Event()
+
+    def validate(value, prompt, provider, model):
+        usage = build_usage_info(provider, model, 200, 20)
+        if model == SONNET:
+            return {'passed': False, 'response': 'LLM validation error: boom', 'error': True, 'usage': usage}
+        release.wait(5)
+        return {'passed': True, 'response': 'ok', 'error': False, 'usage': usage}
+
+    # Two judges, both needed: once the first fails no consensus is possible
+    config = {'consensus': {'models': [{'provider': 'openai', 'model': 'gpt-4o'}]}, 'cache_verdicts': False}
+    started = time.monotonic()
+    results, _ = run_llm_validations(['ok value'], 'Must say ok', 'anthropic', SONNET, validate, config)
+    assert time.monotonic() - started < 2
+    assert results[0]['error'] is True and 'No consensus' in results[0]['response']
+    assert [u['model'] for u in results[0]['consensus_usage']] == [SONNET]
+
+    # The abandoned judge's usage is attached once it answers
+    release.set()
+    deadline = time.monotonic() + 2
+    while len(results[0]['consensus_usage']) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert sorted(u['consensus_judge'] for u in results[0]['consensus_usage']) == [0, 1]
+    print("✓ PASS: Returned without the running judge; its usage was recorded when it finished")
+
+
+def test_collection_defers_quorum_judges():
+    verdict_cache.clear()
+    collector = BatchCollector()
+    calls = []
+    config = {'consensus': CONFIG['consensus']}
+    run_llm_validations(['ok value'], 'Must say ok', 'anthropic', SONNET, _validator(calls), config, collector=collector)
+
+    assert calls == []
+    assert sorted(model for _, model, _ in collector.pending_items()) == ['claude-sonnet-4-5-20250929', 'gpt-4o']
+
+    collector.resolve(batch_size=1)
+    results, _ = run_llm_validations(['ok value'], 'Must say ok', 'anthropic', SONNET, _validator(calls), config, collector=collector)
+    assert results[0]['passed'] is True and len(calls) == 2
+    verdict_cache.clear()
+    print("✓ PASS: Quorum judges deferred to the collector and resolved once")
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Tests for LLM check input budgets (no API calls; the validator is stubbed)."""
+
+import json
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from app.services.check_types import run_llm_validations
+from app.services.llm_batching import verdict_cache
+from app.services.llm_client import build_usage_info
+from app.services.llm_input_budget import InputBudget, count_tokens, truncate_text, project_fields
+
+
+def _validator(calls, verdict=lambda value: True):
+    def validate(value, prompt, provider, model):
+        calls.append(value)
+        return {'passed': verdict(value), 'response': f'judged {len(value)} chars', 'error': False,
+                'usage': build_usage_info(provider, model, count_tokens(value), 10)}
+    return validate
+
+
+def test_token_estimate_and_truncation():
+    assert count_tokens('') == 0
+    assert count_tokens('ok, done.') == 4
+    assert count_tokens('{"a": 1}') == 7
+
+    text = '\n'.join(f'line {i} of the tool output' for i in range(500))
+    for strategy in ('head', 'tail', 'head_tail'):
+        cut = truncate_text(text, 200, strategy)
+        assert count_tokens(cut) < 230
+        assert '[truncated' in cut
+    head_tail = truncate_text(text, 200, 'head_tail')
+    assert head_tail.startswith('line 0 ') and head_tail.endswith('line 499 of the tool output')
+    assert truncate_text('short', 200) == 'short'
+    print("✓ PASS: Oversized text cut to the budget with a truncation marker")
+
+
+def test_project_fields():
+    value = {'status': 'refunded', 'customer': {'tier': 'gold', 'notes': 'x' * 1000}, 'items': [{'sku': 'A', 'blob': 'y'}]}
+    assert project_fields(value, ['status', 'customer.tier', 'items.sku', 'missing']) == {
+        'status': 'refunded', 'customer.tier': 'gold', 'items.sku': ['A']
+    }
+    assert project_fields(json.dumps(value), ['status']) == {'status': 'refunded'}
+    assert project_fields('not json', ['status']) is None
+    print("✓ PASS: Dot-path projection of JSON values")
+
+
+def test_budget_applied_and_recorded():
+    print("\n" + "="*80)
+    print("TEST: Values over budget are truncated before the LLM sees them")
+    print("="*80)
+
+    verdict_cache.clear()
+    calls = []
+    big = {'status': 'refunded', 'audit_log': ['event ' * 50] * 40}
+    config = {'input_budget': {'max_tokens': 100, 'strategy': 'project', 'fields': ['status']}}
+
+    results, stats = run_llm_validations(['small value', big], 'Refund policy followed', 'openai', 'gpt-4o',
+                                         _validator(calls), config)
+
+    assert calls == ['small value', json.dumps({'status': 'refunded'})]
+    assert 'truncation' not in results[0]
+    truncation = results[1]['truncation']
+    assert truncation['strategy'] == 'project' and truncation['original_tokens'] > 100
+    assert truncation['sent_tokens'] <= 100
+    assert stats['input_budget'] == {'max_tokens': 100, 'strategy': 'project', 'truncated': 1}
+    assert InputBudget.from_check_config({}) is None
+    verdict_cache.clear()
+    print("✓ PASS: Only the oversized value was projected; truncation recorded")
+
+
+def test_map_reduce_judges_every_chunk():
+    print("\n" + "="*80)
+    print("TEST: map_reduce splits long content and combines chunk verdicts")
+    print("="*80)
+
+    verdict_cache.clear()
+    text = '\n'.join(f'paragraph {i}: all good here' for i in range(60))
+    text = text.replace('paragraph 45: all good here', 'paragraph 45: SSN 123-45-6789')
+
+    calls = []
+    config = {'input_budget': {'max_tokens': 120, 'strategy': 'map_reduce'}}
+    results, stats = run_llm_validations([text], 'No PII', 'openai', 'gpt-4o',
+                                         _validator(calls, verdict=lambda v: 'SSN' not in v), config)
+
+    result = results[0]
+    chunks = result['truncation']['chunks']
+    assert chunks == len(calls) > 1
+    assert ''.join(calls) == text
+    assert result['passed'] is False
+    assert result['response'].startswith('Chunk ')
+    assert result['chunk_verdicts'].count(False) == 1
+    # Every chunk's usage is attributed to the combined result
+    assert len(result['retry_usage']) == chunks
+
+    calls = []
+    any_config = {'input_budget': {'max_tokens': 120, 'strategy': 'map_reduce', 'reduce': 'any'}}
+    results, _ = run_llm_validations([text], 'Mentions an SSN', 'openai', 'gpt-4o',
+                                     _validator(calls, verdict=lambda v: 'SSN' in v), any_config)
+    assert results[0]['passed'] is True
+    verdict_cache.clear()
+    print(f"✓ PASS: {chunks} chunks judged; one failing chunk fails the value")
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
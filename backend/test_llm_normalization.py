@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Tests for normalized-content verdict reuse (no API calls; the validator is stubbed)."""
+
+import random
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from app.services.llm_batching import validate_many, verdict_cache
+from app.services.llm_client import build_usage_info
+from app.services.llm_normalization import NormalizationConfig, normalize_value, normalization_stats, ALL_MASKERS
+
+
+def _validator(calls, verdict=lambda value: True):
+    def validate(value, prompt, provider, model):
+        calls.append(value)
+        return {'passed': verdict(value), 'response': f'judged {value}', 'error': False,
+                'usage': build_usage_info(provider, model, 100, 10)}
+    return validate
+
+
+def test_masks_ids_dates_numbers_and_whitespace():
+    text = 'Invoice INV-10442 for $1,250.00 due 2025-01-31T09:30:00Z\n\n  ref 3f2a9c1e-1b2c-4d5e-8f90-123456789abc'
+    assert normalize_value(text, ALL_MASKERS) == 'Invoice INV-<NUM> for $<NUM> due <DATE> ref <UUID>'
+    assert normalize_value('Total 12 items', ['whitespace']) == 'Total 12 items'
+
+    config = NormalizationConfig.from_check_config({'normalize_inputs': ['numbers', 'bogus']})
+    assert config.maskers == ['numbers']
+    assert NormalizationConfig.from_check_config({}) is None
+    print("✓ PASS: Variable content masked per configured maskers")
+
+
+def test_templated_values_share_one_verdict():
+    print("\n" + "="*80)
+    print("TEST: Values equal after normalization share one LLM call")
+    print("="*80)
+
+    verdict_cache.clear()
+    normalization_stats.reset()
+    calls = []
+    config = NormalizationConfig(maskers=list(ALL_MASKERS))
+    emails = [
+        'Dear customer, invoice INV-1001 for $120.00 is attached.',
+        'Dear customer, invoice INV-2002 for $75.50 is attached.',
+    ]
+
+    first = validate_many(emails, 'Email is polite', 'openai', 'gpt-4o', _validator(calls), normalization=config)
+    later = validate_many(['Dear customer, invoice INV-3003 for $9.99 is attached.'], 'Email is polite', 'openai', 'gpt-4o',
+                          _validator(calls), normalization=config)
+
+    assert calls == [emails[0]]
+    assert first[1]['collapsed'] and later[0]['collapsed']
+    assert normalization_stats.snapshot()['collapsed'] == 2
+
+    # Normalized keys never collide with raw-value keys
+    validate_many([emails[1]], 'Email is polite', 'openai', 'gpt-4o', _validator(calls))
+    assert calls == [emails[0], emails[1]]
+    verdict_cache.clear()
+    print("✓ PASS: Three templated emails, one LLM call, two collapses tracked")
+
+
+def test_sampled_reverification_detects_drift():
+    print("\n" + "="*80)
+    print("TEST: Re-verification catches verdicts that depended on masked content")
+    print("="*80)
+
+    verdict_cache.clear()
+    normalization_stats.reset()
+    calls = []
+    config = NormalizationConfig(maskers=['numbers'], reverify_rate=1.0, rng=random.Random(7))
+    # The criteria depends on the amount, which normalization masks
+    under_limit = _validator(calls, verdict=lambda value: int(value.split()[-1]) <= 1000)
+
+    validate_many(['Refund amount 500'], 'Refund must be at most 1000', 'openai', 'gpt-4o', under_limit, normalization=config)
+    results = validate_many(['Refund amount 5000'], 'Refund must be at most 1000', 'openai', 'gpt-4o', under_limit, normalization=config)
+
+    assert results[0]['drift'] and results[0]['passed'] is False
+    assert results[0]['usage'] is not None  # Re-verification cost is recorded
+    stats = normalization_stats.snapshot()
+    assert stats['reverified'] == 1 and stats['drift'] == 1
+
+    # The drifted shared verdict was evicted
+    validate_many(['Refund amount 700'], 'Refund must be at most 1000', 'openai', 'gpt-4o', under_limit, normalization=config)
+    assert calls[-1] == 'Refund amount 700'
+    verdict_cache.clear()
+    print("✓ PASS: Drift detected, fresh verdict used, shared verdict evicted")
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Tests for prompt-prefix caching and cached-token pricing (no API calls)."""
+
+import sys
+import os
+import types
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from app.services.check_types import calculate_llm_cost, aggregate_llm_usage, apply_few_shot_examples, build_validation_prefix
+from app.services.llm_client import build_usage_info, call_llm
+
+
+def test_cached_tokens_priced_at_cache_rates():
+    print("\n" + "="*80)
+    print("TEST: Cached input tokens are priced at the cache-read rate")
+    print("="*80)
+
+    full = calculate_llm_cost('claude-sonnet-4-5-20250929', 10_000, 100)
+    cached = calculate_llm_cost('claude-sonnet-4-5-20250929', 10_000, 100, cached_input_tokens=9_000)
+    written = calculate_llm_cost('claude-sonnet-4-5-20250929', 10_000, 100, cache_write_tokens=9_000)
+
+    assert abs(full - (0.03 + 0.0015)) < 1e-9
+    assert abs(cached - (0.003 + 0.0027 + 0.0015)) < 1e-9
+    assert written > full  # Cache writes carry a premium on Anthropic
+
+    openai_cached = calculate_llm_cost('gpt-4o', 2_000, 0, cached_input_tokens=2_000)
+    assert abs(openai_cached - calculate_llm_cost('gpt-4o', 2_000, 0) / 2) < 1e-9
+    print("✓ PASS: Cache reads cheaper, cache writes at a premium")
+
+
+def test_usage_records_cached_and_uncached_tokens():
+    usage = build_usage_info('openai', 'gpt-4o', 1500, 20, cached_input_tokens=1024)
+    assert usage['uncached_input_tokens'] == 476
+    assert usage['cached_input_tokens'] == 1024
+
+    summary = aggregate_llm_usage([usage, build_usage_info('openai', 'gpt-4o', 1500, 20)])
+    assert summary['total_input_tokens'] == 3000
+    assert summary['total_cached_input_tokens'] == 1024
+    print("✓ PASS: llm_usage splits cached and uncached input tokens")
+
+
+def test_prefix_is_static_across_values():
+    prompt = apply_few_shot_examples('Status must indicate approval', [
+        {'value': 'approved', 'compliant': True, 'reason': 'explicit approval'},
+        {'value': 'pending', 'compliant': False, 'reason': 'not decided'},
+    ])
+    assert 'EXAMPLES:' in prompt and '"compliant": false' in prompt
+    assert apply_few_shot_examples('criteria', None) == 'criteria'
+
+    prefix = build_validation_prefix(prompt, 'value')
+    assert 'pending' in prefix and 'VALUE TO EVALUATE' not in prefix
+    print("✓ PASS: Criteria and examples live in the prefix, not the per-value message")
+
+
+def test_anthropic_prefix_marked_cacheable(monkeypatch):
+    print("\n" + "="*80)
+    print("TEST: Anthropic requests carry a cache_control breakpoint on the prefix")
+    print("="*80)
+
+    requests = []
+
+    class FakeMessages:
+        def create(self, **kwargs):
+            requests.append(kwargs)
+            usage = types.SimpleNamespace(input_tokens=50, output_tokens=10, cache_read_input_tokens=1200, cache_creation_input_tokens=0)
+            return types.SimpleNamespace(content=[types.SimpleNamespace(text='{"compliant": true, "reason": "ok"}')], usage=usage)
+
+    class FakeAnthropic:
+        def __init__(self, api_key):
+            self.messages = FakeMessages()
+
+    monkeypatch.setitem(sys.modules, 'anthropic', types.SimpleNamespace(Anthropic=FakeAnthropic))
+    monkeypatch.setenv('ANTHROPIC_API_KEY', 'test')
+
+    text, usage = call_llm('anthropic', 'claude-sonnet-4-5-20250929', 'VALUE TO EVALUATE:\napproved', prefix='static instructions')
+
+    assert requests[0]['system'] == [{'type': 'text', 'text': 'static instructions', 'cache_control': {'type': 'ephemeral'}}]
+    assert requests[0]['messages'][0]['content'] == 'VALUE TO EVALUATE:\napproved'
+    assert usage['input_tokens'] == 1250
+    assert usage['cached_input_tokens'] == 1200
+    assert usage['uncached_input_tokens'] == 50
+    print("✓ PASS: Prefix cached, cache reads reported in usage")
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""Tests for the shared LLM rate limiter (no API calls)."""
+
+import sys
+import os
+import threading
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from app.services.llm_rate_limiter import LLMRateLimiter, TokenBucket, RateLimitTimeout, get_retry_after
+
+
+class FakeRateLimitError(Exception):
+    """Mimics an SDK 429 error carrying a Retry-After header."""
+
+    def __init__(self, retry_after=None):
+        super().__init__('rate limited')
+        self.status_code = 429
+        self.response = type('Response', (), {'headers': {'retry-after': retry_after} if retry_after else {}})()
+
+
+def test_token_bucket_wait_time():
+    bucket = TokenBucket(capacity=10, rate=10)
+    now = bucket.updated
+    assert bucket.wait_time(10, now) == 0.0
+    bucket.take(10)
+    assert abs(bucket.wait_time(5, now) - 0.5) < 1e-9
+    # Oversized requests only need a full bucket
+    assert abs(bucket.wait_time(50, now) - 1.0) < 1e-9
+    print("✓ PASS: Token bucket refill timing")
+
+
+def test_aimd_concurrency():
+    print("\n" + "="*80)
+    print("TEST: AIMD concurrency grows on success and halves on 429")
+    print("="*80)
+
+    limiter = LLMRateLimiter(overrides={'openai': {'initial_concurrency': 4, 'max_concurrency': 6}})
+    model = limiter.get('openai', 'gpt-4o')
+
+    for _ in range(4):
+        limiter.call('openai', 'gpt-4o', 10, lambda: 'ok')
+    assert int(model.concurrency_limit) == 5
+
+    model.acquire(10)
+    model.release(rate_limited=True)
+    assert int(model.concurrency_limit) == 2
+    assert model.rate_limited_count == 1
+    print("✓ PASS: Additive increase, multiplicative decrease")
+
+
+def test_retries_rate_limit_errors_with_retry_after():
+    print("\n" + "="*80)
+    print("TEST: 429 retried after Retry-After cooldown")
+    print("="*80)
+
+    limiter = LLMRateLimiter(overrides={}, sleep=lambda s: None)
+    attempts = []
+
+    def flaky():
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise FakeRateLimitError(retry_after='0.05')
+        return 'done'
+
+    assert limiter.call('anthropic', 'claude', 10, flaky) == 'done'
+    assert len(attempts) == 2
+    assert attempts[1] - attempts[0] >= 0.04
+    assert get_retry_after(FakeRateLimitError(retry_after='3')) == 3.0
+    print("✓ PASS: Second attempt waited for the shared cooldown")
+
+
+def test_non_rate_limit_errors_propagate():
+    limiter = LLMRateLimiter(overrides={})
+
+    def broken():
+        raise ValueError('bad request')
+
+    try:
+        limiter.call('openai', 'gpt-4o', 10, broken)
+        assert False, 'expected ValueError'
+    except ValueError:
+        pass
+    assert limiter.get('openai', 'gpt-4o').in_flight == 0
+    print("✓ PASS: Non-429 errors are not retried and release their slot")
+
+
+def test_concurrency_limit_and_queue_depth():
+    print("\n" + "="*80)
+    print("TEST: Calls beyond the concurrency limit queue")
+    print("="*80)
+
+    limiter = LLMRateLimiter(overrides={'openai': {'initial_concurrency': 1}})
+    started = threading.Event()
+    proceed = threading.Event()
+
+    def slow():
+        started.set()
+        proceed.wait(2)
+        return 'slow'
+
+    worker = threading.Thread(target=limiter.call, args=('openai', 'gpt-4o', 10, slow))
+    worker.start()
+    started.wait(2)
+
+    waiter = threading.Thread(target=limiter.call, args=('openai', 'gpt-4o', 10, lambda: 'fast'))
+    waiter.start()
+    time.sleep(0.05)
+    snapshot = limiter.snapshot()
+    assert snapshot['total_in_flight'] == 1
+    assert snapshot['total_queue_depth'] == 1
+
+    try:
+        limiter.get('openai', 'gpt-4o').acquire(10, timeout=0.01)
+        assert False, 'expected RateLimitTimeout'
+    except RateLimitTimeout:
+        pass
+
+    proceed.set()
+    worker.join(2)
+    waiter.join(2)
+    assert limiter.snapshot()['total_queue_depth'] == 0
+    print("✓ PASS: Queue depth reported while waiting for a slot")
+
+
+def test_bulk_calls_leave_the_interactive_reserve():
+    limiter = LLMRateLimiter(overrides={'openai': {'initial_concurrency': 4, 'tpm': 100, 'interactive_reserve': 0.25}})
+    model = limiter.get('openai', 'gpt-4o')
+
+    model.acquire(60, priority='bulk')
+    # 20 more would leave less than the 25 reserved tokens
+    try:
+        model.acquire(20, timeout=0.01, priority='bulk')
+        assert False, 'expected RateLimitTimeout'
+    except RateLimitTimeout:
+        pass
+    model.acquire(20)
+
+    # One of the four slots is reserved: three bulk calls fit, the fourth does not
+    model = limiter.get('openai', 'gpt-4o-mini')
+    for priority in ('bulk', 'bulk', 'nightly'):
+        model.acquire(0, priority=priority)
+    try:
+        model.acquire(0, timeout=0.01, priority='bulk')
+        assert False, 'expected RateLimitTimeout'
+    except RateLimitTimeout:
+        pass
+    model.acquire(0)
+    assert model.in_flight == 4
+    print("✓ PASS: Interactive calls use the tokens and slot bulk calls leave free")
+
+
+def test_waiting_interactive_call_goes_first():
+    print("\n" + "="*80)
+    print("TEST: A freed slot goes to the waiting interactive call, not the older bulk call")
+    print("="*80)
+
+    limiter = LLMRateLimiter(overrides={'openai': {'initial_concurrency': 1}})
+    model = limiter.get('openai', 'gpt-4o')
+    order = []
+
+    model.acquire(10)
+    bulk = threading.Thread(target=lambda: (model.acquire(10, priority='bulk'), order.append('bulk'), model.release()))
+    bulk.start()
+    time.sleep(0.05)
+    interactive = threading.Thread(target=lambda: (model.acquire(10), order.append('interactive'), model.release()))
+    interactive.start()
+    time.sleep(0.05)
+    assert model.snapshot()['queue_depth_by_priority'] == {'interactive': 1, 'bulk': 1, 'nightly': 0}
+
+    model.release()
+    bulk.join(2)
+    interactive.join(2)
+    assert order == ['interactive', 'bulk']
+    print("✓ PASS: Interactive call served first")
+
+
+def test_starved_bulk_call_is_promoted():
+    print("\n" + "="*80)
+    print("TEST: A bulk call waiting past max_priority_wait_seconds stops yielding")
+    print("="*80)
+
+    limiter = LLMRateLimiter(overrides={'openai': {'tpm': 60, 'interactive_reserve': 0, 'max_priority_wait_seconds': 0.1}})
+    model = limiter.get('openai', 'gpt-4o')
+    model.tokens.take(60)
+
+    # An interactive call waiting about a minute for tokens...
+    stuck = threading.Thread(target=lambda: _expect_timeout(model, 60, 0.5))
+    stuck.start()
+    time.sleep(0.02)
+
+    # ...holds back a bulk call only until it is promoted
+    started = time.monotonic()
+    model.acquire(0, timeout=2, priority='bulk')
+    waited = time.monotonic() - started
+    stuck.join(2)
+    assert 0.05 <= waited < 0.45
+    print(f"✓ PASS: Bulk call went ahead after {waited:.2f}s")
+
+
+def _expect_timeout(model, tokens, timeout):
+    try:
+        model.acquire(tokens, timeout=timeout)
+    except RateLimitTimeout:
+        pass
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""Tests for LLM call timeouts, hedging and the circuit breaker (no API calls)."""
+
+import sys
+import os
+import threading
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+import pytest
+
+from app.services import llm_resilience, llm_verdict
+from app.services.composite_policy_evaluator import CompositePolicyEvaluator
+from app.services.llm_batching import verdict_cache
+from app.services.llm_rate_limiter import LLMRateLimiter, RateLimitTimeout
+from app.services.llm_resilience import (
+    ResilientCaller, CircuitBreaker, CircuitOpenError, LLMTimeoutError, MIN_HEDGE_SAMPLES
+)
+
+
+class ProviderError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f'HTTP {status_code}')
+        self.status_code = status_code
+
+
+def test_breaker_opens_and_recovers():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=30, clock=lambda: now[0])
+
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == 'open' and not breaker.allow()
+
+    # After the cooldown exactly one trial call is let through
+    now[0] = 31
+    assert breaker.allow() and not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+
+    now[0] = 62
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed' and breaker.allow()
+    assert breaker.snapshot()['times_opened'] == 2
+    print("✓ PASS: Closed -> open -> half-open trial -> closed")
+
+
+def test_timeout_and_fail_fast():
+    print("\n" + "="*80)
+    print("TEST: Slow calls time out and repeated failures open the circuit")
+    print("="*80)
+
+    caller = ResilientCaller(timeout=0.05, hedge_budget=0, failure_threshold=2, reset_seconds=60)
+    release = threading.Event()
+
+    started = time.monotonic()
+    with pytest.raises(LLMTimeoutError):
+        caller.call('openai', 'gpt-4o', lambda: release.wait(5))
+    assert time.monotonic() - started < 1.0
+
+    # Bad requests are the caller's fault and do not count against the provider
+    with pytest.raises(ProviderError):
+        caller.call('openai', 'gpt-4o', lambda: (_ for _ in ()).throw(ProviderError(400)))
+    assert caller.get('openai', 'gpt-4o').breaker.state == 'closed'
+
+    with pytest.raises(LLMTimeoutError):
+        caller.call('openai', 'gpt-4o', lambda: release.wait(5))
+    with pytest.raises(ProviderError):
+        caller.call('openai', 'gpt-4o', lambda: (_ for _ in ()).throw(ProviderError(503)))
+
+    calls = []
+    with pytest.raises(CircuitOpenError):
+        caller.call('openai', 'gpt-4o', lambda: calls.append(1))
+    assert calls == []
+    release.set()
+    print("✓ PASS: Timeouts bounded; open circuit fails without calling the provider")
+
+
+def test_hedge_at_p95_within_budget():
+    print("\n" + "="*80)
+    print("TEST: A call past the p95 latency is hedged and the first answer wins")
+    print("="*80)
+
+    caller = ResilientCaller(timeout=2.0, hedge_budget=0.05)
+    for _ in range(MIN_HEDGE_SAMPLES):
+        caller.call('anthropic', 'claude-haiku-3-5-20241022', lambda: time.sleep(0.01) or 'fast')
+
+    attempts = []
+    lock = threading.Lock()
+
+    def first_attempt_stalls():
+        with lock:
+            attempts.append(1)
+            attempt = len(attempts)
+        if attempt == 1:
+            time.sleep(1.0)
+            return 'slow'
+        return 'hedged'
+
+    started = time.monotonic()
+    assert caller.call('anthropic', 'claude-haiku-3-5-20241022', first_attempt_stalls) == 'hedged'
+    assert time.monotonic() - started < 0.5
+
+    health = caller.snapshot()['anthropic:claude-haiku-3-5-20241022']
+    assert health['hedges'] == 1 and health['hedge_wins'] == 1
+
+    # Budget spent (5% of 22 calls allows one hedge): the next slow call is not hedged
+    attempts.clear()
+    assert caller.call('anthropic', 'claude-haiku-3-5-20241022', first_attempt_stalls) == 'slow'
+    assert len(attempts) == 1
+    print("✓ PASS: One hedge won; hedging stops when the budget is spent")
+
+
+def test_hedges_and_abandoned_calls_hold_rate_limiter_slots(monkeypatch):
+    print("\n" + "="*80)
+    print("TEST: Hedges need a free slot; calls abandoned on timeout keep theirs until they finish")
+    print("="*80)
+
+    limiter = LLMRateLimiter(overrides={'anthropic': {'initial_concurrency': 2, 'max_concurrency': 2}})
+    monkeypatch.setattr(llm_resilience, 'rate_limiter', limiter)
+    model = limiter.get('anthropic', 'claude-haiku-3-5-20241022')
+    caller = ResilientCaller(timeout=2.0, hedge_budget=1.0)
+
+    def call(fn, timeout=None):
+        return limiter.call('anthropic', 'claude-haiku-3-5-20241022', 10, lambda: caller.call(
+            'anthropic', 'claude-haiku-3-5-20241022', fn, timeout=timeout, estimated_tokens=10
+        ))
+
+    for _ in range(MIN_HEDGE_SAMPLES):
+        call(lambda: time.sleep(0.01) or 'fast')
+
+    release = threading.Event()
+    in_flight = []
+
+    def stalls():
+        in_flight.append(model.snapshot()['in_flight'])
+        release.wait(5)
+        return 'slow'
+
+    # The other slot is taken: the stalled call is not hedged
+    model.acquire(10)
+    started = time.monotonic()
+    with pytest.raises(LLMTimeoutError):
+        call(stalls, timeout=0.3)
+    assert time.monotonic() - started < 1.0
+    assert in_flight == [2]
+    assert caller.snapshot()['anthropic:claude-haiku-3-5-20241022']['hedges'] == 0
+
+    # The abandoned request is still running: it still holds its slot
+    assert model.snapshot()['in_flight'] == 2
+    release.set()
+    deadline = time.monotonic() + 2
+    while model.snapshot()['in_flight'] != 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert model.snapshot()['in_flight'] == 1
+    model.release()
+
+    # With a slot free the hedge is sent and holds it; the losing request releases it when done
+    release.clear()
+    attempts = []
+
+    def first_attempt_stalls():
+        attempts.append(model.snapshot()['in_flight'])
+        if len(attempts) == 1:
+            release.wait(5)
+            return 'slow'
+        return 'hedged'
+
+    assert call(first_attempt_stalls) == 'hedged'
+    assert attempts == [1, 2]
+    assert model.snapshot()['in_flight'] == 1
+    release.set()
+    deadline = time.monotonic() + 2
+    while model.snapshot()['in_flight'] != 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert model.snapshot()['in_flight'] == 0
+    print("✓ PASS: No hedge without a slot; abandoned and losing requests count until they finish")
+
+
+def test_saturated_limiter_times_out_within_the_call_timeout():
+    print("\n" + "="*80)
+    print("TEST: Waiting for rate limiter capacity is bounded by the call's timeout")
+    print("="*80)
+
+    limiter = LLMRateLimiter(overrides={'anthropic': {'initial_concurrency': 1, 'max_concurrency': 1}})
+    model = limiter.get('anthropic', 'claude-haiku-3-5-20241022')
+    model.acquire(10)
+
+    started = time.monotonic()
+    with pytest.raises(RateLimitTimeout) as error:
+        limiter.call('anthropic', 'claude-haiku-3-5-20241022', 10, lambda: 'never sent', timeout=0.2)
+    assert time.monotonic() - started < 1.0
+    assert llm_resilience.is_deferrable_error(error.value)
+    model.release()
+    print("✓ PASS: RateLimitTimeout raised after the timeout and treated as deferrable")
+
+
+@pytest.mark.parametrize('error', [
+    CircuitOpenError('anthropic/claude-sonnet-4-5-20250929 circuit open after repeated failures'),
+    RateLimitTimeout('Timed out waiting for anthropic/claude-sonnet-4-5-20250929 capacity')
+])
+def test_unavailable_llm_defers_check(monkeypatch, error):
+    print("\n" + "="*80)
+    print("TEST: Checks whose LLM calls cannot run are marked deferred")
+    print("="*80)
+
+    verdict_cache.clear()
+
+    def unavailable(*args, **kwargs):
+        raise error
+
+    monkeypatch.setattr(llm_verdict, 'call_llm_structured', unavailable)
+    messages = [{'role': 'user', 'content': 'hi'}, {'role': 'assistant', 'content': 'Hello, how can I help?'}]
+    policy = {
+        'name': 'Polite',
+        'checks': [
+            {'id': 'polite', 'type': 'llm_response_validation', 'name': 'Polite', 'validation_prompt': 'Be polite'},
+            {'id': 'short', 'type': 'response_length', 'name': 'Short', 'max_tokens': 500}
+        ],
+        'violation_logic': {'type': 'REQUIRE_ALL', 'requirements': ['polite', 'short']}
+    }
+
+    _, details = CompositePolicyEvaluator().evaluate(messages, {}, policy)
+
+    assert details[0]['deferred_checks'] == ['polite']
+    failed = details[0]['failed_requirements']
+    assert failed[0]['deferred'] is True
+    assert 'deferred' in failed[0]['message']
+    verdict_cache.clear()
+    print(f"✓ PASS: {type(error).__name__} produced a deferred check instead of a verdict")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Tests for the structured verdict protocol (no API calls; provider SDKs are faked)."""
+
+import json
+import sys
+import os
+import types
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from app.services.llm_verdict import (
+    parse_verdict, verdict_schema, validate_with_verdict, VERDICT_MAX_TOKENS, VERDICT_TOOL_NAME
+)
+
+
+def _anthropic_response(tool_input):
+    block = types.SimpleNamespace(type='tool_use', name=VERDICT_TOOL_NAME, input=tool_input)
+    usage = types.SimpleNamespace(input_tokens=300, output_tokens=25, cache_read_input_tokens=0, cache_creation_input_tokens=0)
+    return types.SimpleNamespace(content=[block], usage=usage)
+
+
+def _fake_anthropic(monkeypatch, responses, requests):
+    class FakeMessages:
+        def create(self, **kwargs):
+            requests.append(kwargs)
+            return _anthropic_response(responses.pop(0))
+
+    class FakeAnthropic:
+        def __init__(self, api_key):
+            self.messages = FakeMessages()
+
+    monkeypatch.setitem(sys.modules, 'anthropic', types.SimpleNamespace(Anthropic=FakeAnthropic))
+    monkeypatch.setenv('ANTHROPIC_API_KEY', 'test')
+
+
+def test_parse_verdict():
+    good = {'compliant': True, 'reason_code': 'meets_criteria', 'short_reason': ' Status is approved '}
+    assert parse_verdict(good) == {'compliant': True, 'reason_code': 'meets_criteria',
+                                   'short_reason': 'Status is approved', 'confidence': None}
+    assert parse_verdict({**good, 'compliant': 'yes'}) is None
+    assert parse_verdict({**good, 'reason_code': 'looks_fine'}) is None
+    assert parse_verdict({**good, 'short_reason': ''}) is None
+    assert parse_verdict(None) is None
+    # Cascades need a confidence
+    assert parse_verdict(good, include_confidence=True) is None
+    assert parse_verdict({**good, 'confidence': 0.9}, include_confidence=True)['confidence'] == 0.9
+
+    schema = verdict_schema()
+    assert schema['required'] == ['compliant', 'reason_code', 'short_reason']
+    assert schema['additionalProperties'] is False
+    assert 'confidence' in verdict_schema(include_confidence=True)['required']
+    print("✓ PASS: Verdicts validated against the minimal schema")
+
+
+def test_anthropic_forced_tool_call_with_retry(monkeypatch):
+    print("\n" + "="*80)
+    print("TEST: Anthropic verdicts use a forced tool call; schema violations are retried")
+    print("="*80)
+
+    requests = []
+    responses = [
+        {'compliant': 'maybe', 'reason_code': 'ambiguous', 'short_reason': 'unclear'},
+        {'compliant': False, 'reason_code': 'violates_criteria', 'short_reason': 'Status is rejected'}
+    ]
+    _fake_anthropic(monkeypatch, responses, requests)
+
+    result = validate_with_verdict('rejected', 'Status must be approved', 'anthropic',
+                                   'claude-sonnet-4-5-20250929', 'value', {})
+
+    assert result['passed'] is False and result['error'] is False
+    assert result['response'] == 'Status is rejected'
+    assert result['reason_code'] == 'violates_criteria'
+    assert len(requests) == 2
+    assert requests[0]['tool_choice'] == {'type': 'tool', 'name': VERDICT_TOOL_NAME}
+    assert requests[0]['tools'][0]['input_schema'] == verdict_schema()
+    assert requests[0]['max_tokens'] == VERDICT_MAX_TOKENS
+    assert requests[0]['messages'][0]['content'] == 'VALUE TO EVALUATE:\nrejected'
+
+    # The malformed attempt's tokens are still attributed
+    assert len(result['retry_usage']) == 1 and result['retry_usage'][0]['schema_violation'] is True
+    print("✓ PASS: One retry after a schema violation, usage of both attempts kept")
+
+
+def test_persistent_schema_violation_is_an_error(monkeypatch):
+    requests = []
+    _fake_anthropic(monkeypatch, [{'compliant': True}, {'compliant': True}], requests)
+
+    result = validate_with_verdict('approved', 'Status must be approved', 'anthropic',
+                                   'claude-sonnet-4-5-20250929', 'value', {})
+
+    assert result['error'] is True and result['passed'] is False
+    assert len(result['retry_usage']) == 2
+    print("✓ PASS: No keyword guessing: invalid verdicts end in an error")
+
+
+def test_openai_strict_json_schema(monkeypatch):
+    print("\n" + "="*80)
+    print("TEST: OpenAI verdicts use strict json_schema structured output")
+    print("="*80)
+
+    requests = []
+
+    class FakeCompletions:
+        def create(self, **kwargs):
+            requests.append(kwargs)
+            content = json.dumps({'compliant': True, 'reason_code': 'meets_criteria',
+                                  'short_reason': 'Polite greeting', 'confidence': 0.8})
+            message = types.SimpleNamespace(content=content)
+            usage = types.SimpleNamespace(prompt_tokens=200, completion_tokens=20, total_tokens=220, prompt_tokens_details=None)
+            return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)], usage=usage)
+
+    class FakeOpenAI:
+        def __init__(self, api_key):
+            self.chat = types.SimpleNamespace(completions=FakeCompletions())
+
+    monkeypatch.setitem(sys.modules, 'openai', types.SimpleNamespace(OpenAI=FakeOpenAI))
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+
+    config = {'cascade': {'model': 'gpt-4o-mini'}}
+    result = validate_with_verdict('Hello!', 'Be polite', 'openai', 'gpt-4o', 'content', config)
+
+    assert result['passed'] is True and result['confidence'] == 0.8
+    response_format = requests[0]['response_format']
+    assert response_format['type'] == 'json_schema'
+    assert response_format['json_schema']['strict'] is True
+    assert response_format['json_schema']['schema'] == verdict_schema(include_confidence=True)
+    assert requests[0]['messages'][1]['content'] == 'CONTENT TO EVALUATE:\nHello!'
+    print("✓ PASS: Strict schema with confidence requested for cascade checks")
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Tests for writing generated session files (no API calls)."""
+
+import json
+import sys
+import os
+import tempfile
+import threading
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from app.services.memory_loader import MemoryLoader
+
+
+def make_loader(tmp):
+    os.makedirs(os.path.join(tmp, 'agent'))
+    return MemoryLoader(base_dir=tmp)
+
+
+def test_session_numbers_from_filenames():
+    print("\n" + "="*80)
+    print("TEST: The next session number follows the highest filename prefix")
+    print("="*80)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        loader = make_loader(tmp)
+        assert loader.max_session_number('agent') == 0
+        for name in ['00002__order_1__STANDARD.json', '00017__order_9__STANDARD.json', 'agent_metadata.json']:
+            loader.write_session('agent', name, {'messages': []})
+        assert loader.max_session_number('agent') == 17
+    print("✓ PASS: Highest prefix is 17; non-numbered files are ignored")
+
+
+def test_find_session_file_by_number():
+    print("\n" + "="*80)
+    print("TEST: A session written before a crash is found by its number, whatever its name")
+    print("="*80)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        loader = make_loader(tmp)
+        loader.write_session('agent', '00003__order_A1__STANDARD.json', {'messages': []})
+        loader.write_session('agent', '00030__order_B2__STANDARD.json', {'messages': []})
+        # Generated again the business IDs differ, so only the number identifies it
+        assert loader.find_session_file('agent', 3) == '00003__order_A1__STANDARD.json'
+        assert loader.find_session_file('agent', 4) is None
+    print("✓ PASS: Session 3 found by number; session 4 has no file")
+
+
+def test_write_is_atomic_and_never_replaces():
+    print("\n" + "="*80)
+    print("TEST: Concurrent writers of one filename leave exactly one complete file")
+    print("="*80)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        loader = make_loader(tmp)
+        outcomes = []
+
+        def write(n):
+            try:
+                loader.write_session('agent', '00001__order_1__STANDARD.json', {'writer': n, 'messages': ['x'] * 1000})
+                outcomes.append('written')
+            except FileExistsError:
+                outcomes.append('exists')
+
+        threads = [threading.Thread(target=write, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(outcomes) == ['exists'] * 7 + ['written']
+        assert os.listdir(os.path.join(tmp, 'agent')) == ['00001__order_1__STANDARD.json']
+        with open(os.path.join(tmp, 'agent', '00001__order_1__STANDARD.json')) as f:
+            assert len(json.load(f)['messages']) == 1000
+    print("✓ PASS: One writer wins, the others get FileExistsError, no temporary files remain")
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""Tests for parallel session evaluation: the bounded pipeline and the deterministic check pool."""
+
+import json
+import sys
+import os
+import threading
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from app.services.session_pipeline import run_bounded, FlushBuffer, ProgressThrottle
+from app.services.check_pool import DeterministicCheckPool, evaluate_deterministic_checks
+from app.services.policy_evaluator import PolicyEvaluator
+
+POLICY = {
+    'id': 7,
+    'name': 'Invoices need approval',
+    'description': '',
+    'policy_type': 'composite',
+    'config': {
+        'checks': [
+            {'id': 'has_approval', 'name': 'Approval requested', 'type': 'tool_call', 'tool_name': 'request_human_approval'},
+            {'id': 'has_invoice', 'name': 'Invoice created', 'type': 'tool_call', 'tool_name': 'create_invoice'},
+            {'id': 'status_ok', 'name': 'Status approved', 'type': 'llm_tool_response',
+             'tool_name': 'request_human_approval', 'parameter': 'status', 'validation_prompt': 'Must be approved'}
+        ],
+        'violation_logic': {'type': 'REQUIRE_ALL', 'requirements': ['has_approval', 'has_invoice']}
+    }
+}
+
+
+def _load_messages():
+    path = os.path.join(os.path.dirname(__file__), '..', 'sample_memories', 'backoffice_with_rejection.json')
+    with open(path) as f:
+        return json.load(f)['messages']
+
+
+def test_bounded_in_flight_and_single_writer_thread():
+    print("\n" + "="*80)
+    print("TEST: At most N sessions in flight; completions handled on the calling thread")
+    print("="*80)
+
+    lock = threading.Lock()
+    state = {'running': 0, 'peak': 0, 'pulled': 0}
+    caller = threading.current_thread()
+    slots = [None] * 12
+    done_threads = set()
+
+    def tasks():
+        for idx in range(12):
+            state['pulled'] += 1
+            # Tasks are pulled lazily: never more than 3 ahead of completions
+            assert state['pulled'] - sum(1 for s in slots if s is not None) <= 3
+            yield idx
+
+    def work(idx):
+        with lock:
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+        # Later sessions finish first
+        time.sleep(0.005 * (12 - idx))
+        with lock:
+            state['running'] -= 1
+        if idx == 5:
+            raise ValueError('bad session')
+        return idx * 10
+
+    def on_done(idx, future):
+        done_threads.add(threading.current_thread())
+        try:
+            slots[idx] = future.result()
+        except ValueError as e:
+            slots[idx] = str(e)
+
+    count = run_bounded(tasks(), work, on_done, concurrency=3)
+
+    assert count == 12
+    assert state['peak'] == 3
+    assert done_threads == {caller}
+    assert slots == [0, 10, 20, 30, 40, 'bad session', 60, 70, 80, 90, 100, 110]
+    print("✓ PASS: Peak 3 in flight, results placed by index, errors isolated")
+
+
+def test_progress_writes_are_throttled():
+    now = [100.0]
+    throttle = ProgressThrottle(interval=1.0, clock=lambda: now[0])
+
+    writes = 0
+    for _ in range(50):
+        if throttle.ready():
+            writes += 1
+        now[0] += 0.1
+    # 5 simulated seconds: the first session, then one write per second
+    assert writes == 5
+    print("✓ PASS: 50 finished sessions, 5 progress writes")
+
+
+def test_flush_every_n_sessions_or_t_ms():
+    print("\n" + "="*80)
+    print("TEST: Finished sessions are written in groups of N, or after T ms")
+    print("="*80)
+
+    now = [0.0]
+    flushes = []
+    buffer = FlushBuffer(flushes.append, max_items=3, max_age_ms=500, clock=lambda: now[0])
+
+    for idx in range(7):
+        buffer.add(idx)
+    assert flushes == [[0, 1, 2], [3, 4, 5]] and len(buffer) == 1
+
+    # A slow session: the group is flushed once its oldest item is 500 ms old
+    now[0] = 0.6
+    assert buffer.add(7) is True
+    assert flushes[-1] == [6, 7]
+
+    buffer.add(8)
+    buffer.flush()
+    buffer.flush()
+    assert flushes[-1] == [8] and len(flushes) == 4
+    print("✓ PASS: 9 sessions written in 4 transactions")
+
+
+def test_deterministic_checks_skip_llm_checks():
+    results = evaluate_deterministic_checks(_load_messages(), {}, [POLICY])
+
+    assert set(results[7]) == {'has_approval', 'has_invoice'}
+    assert all(r.passed for r in results[7].values())
+    print("✓ PASS: Only non-LLM checks are precomputed")
+
+
+def test_process_pool_matches_inline_evaluation():
+    print("\n" + "="*80)
+    print("TEST: Checks evaluated in a worker process give the same verdict")
+    print("="*80)
+
+    messages = _load_messages()
+    deterministic_policy = dict(POLICY, config={
+        **POLICY['config'],
+        'checks': POLICY['config']['checks'][:2]
+    })
+
+    pool = DeterministicCheckPool(processes=1)
+    try:
+        precomputed = pool.evaluate(messages, {}, [deterministic_policy])
+    finally:
+        pool.shutdown()
+    assert set(precomputed[7]) == {'has_approval', 'has_invoice'}
+
+    evaluator = PolicyEvaluator()
+    config = deterministic_policy['config']
+    inline = evaluator.evaluate(messages, 'composite', config)
+    pooled = evaluator.evaluate(messages, 'composite', config, precomputed_checks=precomputed[7])
+    assert inline[0] is True and inline == pooled
+
+    assert DeterministicCheckPool(processes=0).evaluate(messages, {}, [deterministic_policy]) == {}
+    print("✓ PASS: Precomputed results feed the violation logic unchanged")
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
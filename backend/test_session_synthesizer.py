@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Tests for the offline synthetic session generator (no API calls)."""
+
+import json
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from app.services.memory_loader import MemoryLoader
+from app.services.session_synthesizer import SessionSynthesizer, fit_transitions, write_sessions
+from app.services.check_types import ToolAbsenceCheck, ToolCallCheck, ToolResponseCheck
+
+AGENT = {
+    'agent_id': 'order_to_invoice',
+    'tools': [{'name': name, 'description': ''} for name in [
+        'get_customer_account', 'check_inventory', 'create_invoice', 'request_human_approval', 'send_invoice_email'
+    ]],
+    'business_identifiers': {'order_id': 'Order', 'customer_id': 'Customer'}
+}
+
+PROFILE = {
+    'transitions': {
+        '_start': {'get_customer_account': 1},
+        'get_customer_account': {'check_inventory': 1},
+        'check_inventory': {'create_invoice': 1},
+        'create_invoice': {'send_invoice_email': 1},
+        'send_invoice_email': {'_end': 1}
+    },
+    'parameters': {
+        'create_invoice': {
+            'order_id': {'distribution': 'identifier', 'name': 'order_id'},
+            'amount': {'distribution': 'uniform', 'min': 10, 'max': 5000}
+        }
+    },
+    'results': {'check_inventory': {'in_stock': True}}
+}
+
+
+def test_sessions_are_deterministic():
+    print("\n" + "="*80)
+    print("TEST: Session i depends only on the seed, the profile and i")
+    print("="*80)
+
+    first = SessionSynthesizer(AGENT, PROFILE, seed=42)
+    again = SessionSynthesizer(AGENT, PROFILE, seed=42)
+    assert [first.session(i) for i in range(50)] == [again.session(i) for i in reversed(range(50))][::-1]
+    assert first.session(7) != SessionSynthesizer(AGENT, PROFILE, seed=43).session(7)
+
+    session = first.session(0)
+    assert session['metadata']['custom']['synthetic']['tool_sequence'] == [
+        'get_customer_account', 'check_inventory', 'create_invoice', 'send_invoice_email'
+    ]
+    invoice = session['messages'][5]['content'][1]
+    assert invoice['input']['order_id'] == session['metadata']['business_identifiers']['order_id']
+    assert 10 <= invoice['input']['amount'] <= 5000
+    print("✓ PASS: Same seed, same sessions in any order; the chain and distributions are followed")
+
+
+def test_injected_violations_are_caught_by_checks():
+    print("\n" + "="*80)
+    print("TEST: Injected violations are recorded and fail the matching checks")
+    print("="*80)
+
+    profile = {**PROFILE, 'violations': {
+        'skip_tool': {'rate': 0.3, 'tools': ['check_inventory']},
+        'forbidden_tool': {'rate': 0.2, 'tools': ['request_human_approval']},
+        'error_result': {'rate': 0.2, 'tools': ['create_invoice']}
+    }}
+    synthesizer = SessionSynthesizer(AGENT, profile, seed=1)
+    inventory = ToolCallCheck('c1', 'Inventory checked', {'tool_name': 'check_inventory'})
+    no_approval = ToolAbsenceCheck('c2', 'No approval', {'tool_name': 'request_human_approval'})
+    invoiced = ToolResponseCheck('c3', 'Invoice created', {'tool_name': 'create_invoice', 'expect_success': True})
+
+    counts = {'skip_tool': 0, 'forbidden_tool': 0, 'error_result': 0}
+    for i in range(1000):
+        session = synthesizer.session(i)
+        kinds = {v['kind'] for v in session['metadata']['custom']['synthetic']['violations']}
+        for kind in kinds:
+            counts[kind] += 1
+        messages = session['messages']
+        assert inventory.evaluate(messages, {}).passed == ('skip_tool' not in kinds)
+        assert no_approval.evaluate(messages, {}).passed == ('forbidden_tool' not in kinds)
+        assert invoiced.evaluate(messages, {}).passed == ('error_result' not in kinds)
+
+    assert 240 <= counts['skip_tool'] <= 360
+    assert 140 <= counts['forbidden_tool'] <= 260
+    assert 140 <= counts['error_result'] <= 260
+    print(f"✓ PASS: Ground truth matches every check over 1000 sessions ({counts})")
+
+
+def test_openai_format_and_fitted_transitions():
+    fitted = fit_transitions([SessionSynthesizer(AGENT, PROFILE, seed=5).session(i) for i in range(10)])
+    assert fitted['_start'] == {'get_customer_account': 10}
+    assert fitted['send_invoice_email'] == {'_end': 10}
+
+    session = SessionSynthesizer(AGENT, {'transitions': fitted}, seed=5, format='openai').session(0)
+    call = session['messages'][1]
+    assert call['tool_calls'][0]['function']['name'] == 'get_customer_account'
+    assert json.loads(call['tool_calls'][0]['function']['arguments']) == {
+        'customer_id': session['metadata']['business_identifiers']['customer_id']
+    }
+    assert session['messages'][2] == {
+        'role': 'tool',
+        'tool_call_id': call['tool_calls'][0]['id'],
+        'content': session['messages'][2]['content']
+    }
+    print("✓ PASS: Transitions learned from sessions; OpenAI tool_calls and tool messages")
+
+
+def test_invalid_profiles_are_rejected():
+    for profile, error in [
+        ({'transitions': {'_start': {'delete_everything': 1}}}, "Unknown tool 'delete_everything'"),
+        ({'transitions': {'get_customer_account': {'_end': 1}}}, "'_start' state"),
+        ({'violations': {'skip_tool': 1.5}}, "rate between 0 and 1"),
+        ({'violations': {'typo': 0.1}}, "Unknown violation 'typo'"),
+        ({'parameters': {'create_invoice': {'amount': {'distribution': 'pareto'}}}}, "Unknown distribution 'pareto'")
+    ]:
+        try:
+            SessionSynthesizer(AGENT, profile)
+            assert False, f"expected ValueError for {profile}"
+        except ValueError as e:
+            assert error in str(e), str(e)
+    print("✓ PASS: Unknown tools, kinds and distributions and bad rates raise ValueError")
+
+
+def test_resumed_corpus_writes_the_same_files():
+    print("\n" + "="*80)
+    print("TEST: Writing part of a corpus again finds identical files already written")
+    print("="*80)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.makedirs(os.path.join(tmp, 'agent'))
+        loader = MemoryLoader(base_dir=tmp)
+        synthesizer = SessionSynthesizer(AGENT, PROFILE, seed=9)
+
+        first = write_sessions(synthesizer, loader, 'agent', list(range(0, 30)), base_number=100)
+        # An interrupted run recorded nothing past item 19 and writes 20-39 again
+        resumed = write_sessions(synthesizer, loader, 'agent', list(range(20, 40)), base_number=100)
+
+        assert all(result['status'] == 'success' for _, result in first + resumed)
+        assert [result['filename'] for _, result in first[20:]] == [result['filename'] for _, result in resumed[:10]]
+        assert len(os.listdir(os.path.join(tmp, 'agent'))) == 40
+        assert loader.max_session_number('agent') == 140
+    print("✓ PASS: 40 files numbered 101-140; the 10 rewritten sessions were already on disk")
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -15,8 +15,8 @@ function GenerateSessionsModal({ agentId, agentName, agentDescription, onClose,
   const handleSubmit = async (e) => {
     e.preventDefault();
 
-    if (formData.num_sessions < 1 || formData.num_sessions > 100) {
-      toast.error('Number of sessions must be between 1 and 100', 'Validation Error');
+    if (formData.num_sessions < 1 || formData.num_sessions > 1000) {
+      toast.error('Number of sessions must be between 1 and 1000', 'Validation Error');
       return;
     }
 
@@ -56,12 +56,12 @@ function GenerateSessionsModal({ agentId, agentName, agentDescription, onClose,
               value={formData.num_sessions}
               onChange={(e) => setFormData({...formData, num_sessions: parseInt(e.target.value) || 1})}
               min="1"
-              max="100"
+              max="1000"
               required
               style={{ width: '150px' }}
             />
             <small style={{ color: 'var(--color-text-secondary)', fontSize: '0.813rem', display: 'block', marginTop: '0.25rem' }}>
-              Maximum 100 sessions per batch
+              Maximum 1000 sessions per batch
             </small>
           </div>
 
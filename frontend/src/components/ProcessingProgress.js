@@ -3,6 +3,8 @@ import React from 'react';
 function ProcessingProgress({
   jobStatus,
   onCancel,
+  onPause,
+  onResume,
   title = "Processing Sessions"
 }) {
   if (!jobStatus) return null;
@@ -13,22 +15,38 @@ function ProcessingProgress({
     completed_items,
     failed_items,
     progress_percent,
+    control_action,
     error_message
   } = jobStatus;
 
   const isRunning = status === 'pending' || status === 'running';
+  const isPaused = status === 'paused';
   const isCompleted = status === 'completed';
   const isFailed = status === 'failed';
+  // Requested but not yet honored: the worker stops after the sessions in flight
+  const isStopping = Boolean(control_action);
 
   return (
     <div className="processing-progress">
       <div className="progress-header">
         <h4>{title}</h4>
-        {isRunning && onCancel && (
-          <button className="btn btn-sm btn-secondary" onClick={onCancel}>
-            Cancel
-          </button>
-        )}
+        <div className="progress-actions">
+          {isRunning && !isStopping && onPause && (
+            <button className="btn btn-sm btn-secondary" onClick={onPause}>
+              Pause
+            </button>
+          )}
+          {isPaused && onResume && (
+            <button className="btn btn-sm btn-primary" onClick={onResume}>
+              Resume
+            </button>
+          )}
+          {(isRunning || isPaused) && control_action !== 'cancel' && onCancel && (
+            <button className="btn btn-sm btn-secondary" onClick={onCancel}>
+              Cancel
+            </button>
+          )}
+        </div>
       </div>
 
       <div className="progress-bar-container">
@@ -50,10 +68,20 @@ function ProcessingProgress({
         <div className="progress-status">Preparing job...</div>
       )}
 
-      {status === 'running' && (
+      {status === 'running' && !isStopping && (
         <div className="progress-status">Evaluating compliance policies...</div>
       )}
 
+      {status === 'running' && isStopping && (
+        <div className="progress-status">
+          {control_action === 'cancel' ? 'Cancelling' : 'Pausing'} after the sessions in progress...
+        </div>
+      )}
+
+      {isPaused && (
+        <div className="progress-status">Paused. Resuming continues from the last finished session.</div>
+      )}
+
       {isCompleted && (
         <div className="progress-status success">
           Processing complete
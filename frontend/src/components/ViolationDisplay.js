@@ -200,6 +200,7 @@ function CheckItem({ check, type }) {
   };
 
   const getStatusBadge = () => {
+    if (check.deferred) return <span className="status-badge deferred">⏳ Deferred</span>;
     if (type === 'passed') return <span className="status-badge passed">✓ Passed</span>;
     if (type === 'failed') return <span className="status-badge failed">✗ Failed</span>;
     if (type === 'triggered') return <span className="status-badge triggered">▶ Triggered</span>;
@@ -248,6 +249,12 @@ function CheckItem({ check, type }) {
                   <span className="usage-label">Input Tokens:</span>
                   <span className="usage-value">{check.llm_usage.total_input_tokens || check.llm_usage.input_tokens}</span>
                 </div>
+                {check.llm_usage.total_cached_input_tokens > 0 && (
+                  <div className="usage-row">
+                    <span className="usage-label">Cached Input Tokens:</span>
+                    <span className="usage-value">{check.llm_usage.total_cached_input_tokens}</span>
+                  </div>
+                )}
                 <div className="usage-row">
                   <span className="usage-label">Output Tokens:</span>
                   <span className="usage-value">{check.llm_usage.total_output_tokens || check.llm_usage.output_tokens}</span>
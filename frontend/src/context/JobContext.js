@@ -23,58 +23,71 @@ export function JobProvider({ children }) {
     }
   }, [activeJobId]);
 
-  // Global polling - runs regardless of which page you're on
+  // Global job stream - runs regardless of which page you're on.
+  // The server pushes each status change, so nothing polls the API.
   useEffect(() => {
     if (!activeJobId) return;
 
-    let cancelled = false;
-    const pollInterval = setInterval(async () => {
-      if (cancelled) return;
+    const source = jobsAPI.events(activeJobId);
 
-      try {
-        const response = await jobsAPI.getStatus(activeJobId);
-        const status = response.data;
+    source.addEventListener('job', (message) => {
+      const status = JSON.parse(message.data);
 
-        if (!cancelled) {
-          setJobStatus(status);
+      if (status.status === 'deleted') {
+        source.close();
+        setActiveJobId(null);
+        setJobStatus(null);
+        return;
+      }
 
-          if (status.status === 'completed' || status.status === 'failed') {
-            clearInterval(pollInterval);
-            setActiveJobId(null);
-            setIsProcessing(false);
+      setJobStatus(status);
 
-            if (status.status === 'completed') {
-              toast.success(`Processed ${status.completed_items} session(s)`, 'Complete');
-            } else {
-              toast.error(status.error_message || 'Processing failed', 'Error');
-            }
+      if (status.status === 'completed' || status.status === 'failed' || status.status === 'cancelled') {
+        source.close();
+        setActiveJobId(null);
+        setIsProcessing(false);
 
-            // Dispatch event so pages can refresh their data
-            window.dispatchEvent(new CustomEvent('jobCompleted', { detail: status }));
-          }
-        }
-      } catch (err) {
-        if (!cancelled) {
-          console.error('Polling error:', err);
-          if (err.response?.status === 404) {
-            setActiveJobId(null);
-            setIsProcessing(false);
-          }
+        if (status.status === 'completed') {
+          toast.success(`Processed ${status.completed_items} session(s)`, 'Complete');
+        } else if (status.status === 'cancelled') {
+          toast.info(`Cancelled after ${status.completed_items} session(s)`, 'Cancelled');
+        } else {
+          toast.error(status.error_message || 'Processing failed', 'Error');
         }
+
+        // Dispatch event so pages can refresh their data
+        window.dispatchEvent(new CustomEvent('jobCompleted', { detail: status }));
+      } else if (status.status === 'waiting_on_batch') {
+        // Offline batch jobs resume server-side once provider results arrive (up to 24h)
+        source.close();
+        setActiveJobId(null);
+        setIsProcessing(false);
+        toast.info('Submitted to provider batch API. Results will be applied when the batch finishes.', 'Waiting on batch');
+      }
+      // A paused job stays active (still processing) and keeps its stream open,
+      // so resuming it needs no reconnect
+    });
+
+    source.onerror = () => {
+      // EventSource reconnects on its own after network errors; it only
+      // closes for good when the server refuses the stream (job not found)
+      if (source.readyState === EventSource.CLOSED) {
+        console.error('Job stream closed:', activeJobId);
+        setActiveJobId(null);
+        setIsProcessing(false);
       }
-    }, 500);
+    };
 
     return () => {
-      cancelled = true;
-      clearInterval(pollInterval);
+      source.close();
     };
   }, [activeJobId, toast]);
 
-  const submitJob = useCallback(async (agentId, memoryIds, policyIds = null, refreshVariants = true) => {
+  const submitJob = useCallback(async (agentId, memoryIds, policyIds = null, refreshVariants = true, jobType = 'batch_evaluate') => {
     try {
       setIsProcessing(true);
       setJobStatus(null);
-      const response = await jobsAPI.submit(agentId, memoryIds, policyIds, refreshVariants);
+      const response = await jobsAPI.submit(agentId, memoryIds, policyIds, refreshVariants, jobType);
       setActiveJobId(response.data.job_id);
       return response.data;
     } catch (err) {
@@ -83,6 +96,24 @@ export function JobProvider({ children }) {
     }
   }, []);
 
+  const cancelJob = useCallback(async () => {
+    if (!activeJobId) return;
+    const response = await jobsAPI.cancel(activeJobId);
+    setJobStatus(response.data);
+  }, [activeJobId]);
+
+  const pauseJob = useCallback(async () => {
+    if (!activeJobId) return;
+    const response = await jobsAPI.pause(activeJobId);
+    setJobStatus(response.data);
+  }, [activeJobId]);
+
+  const resumeJob = useCallback(async () => {
+    if (!activeJobId) return;
+    const response = await jobsAPI.resume(activeJobId);
+    setJobStatus(response.data);
+  }, [activeJobId]);
+
   const clearJob = useCallback(() => {
     setActiveJobId(null);
     setJobStatus(null);
@@ -95,6 +126,9 @@ export function JobProvider({ children }) {
       jobStatus,
       isProcessing,
       submitJob,
+      cancelJob,
+      pauseJob,
+      resumeJob,
       clearJob
     }}>
       {children}
@@ -39,7 +39,7 @@ function MemoriesPage() {
   const [resetting, setResetting] = useState(false);
   const navigate = useNavigate();
   const toast = useToast();
-  const { jobStatus, isProcessing, submitJob } = useJob();
+  const { jobStatus, isProcessing, submitJob, cancelJob, pauseJob, resumeJob } = useJob();
 
   useEffect(() => {
     if (agentId) {
@@ -198,7 +198,13 @@ function MemoriesPage() {
       {/* Inline progress bar when processing */}
       {isProcessing && jobStatus && (
         <div className="inline-progress">
-          <ProcessingProgress jobStatus={jobStatus} title="Processing Sessions" />
+          <ProcessingProgress
+            jobStatus={jobStatus}
+            onCancel={cancelJob}
+            onPause={pauseJob}
+            onResume={resumeJob}
+            title="Processing Sessions"
+          />
         </div>
       )}
 
@@ -18,7 +18,7 @@ function PoliciesPage() {
   const [deleteConfirm, setDeleteConfirm] = useState(null);
   const [availableTools, setAvailableTools] = useState([]);
   const toast = useToast();
-  const { jobStatus, isProcessing, submitJob } = useJob();
+  const { jobStatus, isProcessing, submitJob, cancelJob, pauseJob, resumeJob } = useJob();
   const prevProcessing = useRef(false);
 
   useEffect(() => {
@@ -198,6 +198,9 @@ function PoliciesPage() {
         <div className="inline-progress">
           <ProcessingProgress
             jobStatus={jobStatus}
+            onCancel={cancelJob}
+            onPause={pauseJob}
+            onResume={resumeJob}
             title={`Evaluating "${policies.find(p => p.id === evaluatingPolicyId)?.name || 'policy'}"`}
           />
         </div>
@@ -31,6 +31,7 @@ export const policyAPI = {
   create: (agentId, data) => api.post(`/api/policies/${agentId}/`, data),
   update: (agentId, id, data) => api.put(`/api/policies/${agentId}/${id}`, data),
   delete: (agentId, id) => api.delete(`/api/policies/${agentId}/${id}`),
+  versions: (agentId, id) => api.get(`/api/policies/${agentId}/${id}/versions`),
 };
 
 // Compliance API
@@ -70,43 +71,67 @@ export const agentsAPI = {
   delete: (agentId) => api.delete(`/api/agents/${agentId}`),
   create: (data) => api.post('/api/agents/', data),
   generateSessions: (agentId, data) => api.post(`/api/agents/${agentId}/generate-sessions`, data),
+  synthesizeSessions: (agentId, data) => api.post(`/api/agents/${agentId}/synthesize-sessions`, data),
 };
 
 // Jobs API (Async Processing)
 export const jobsAPI = {
-  submit: (agentId, memoryIds, policyIds = null, refreshVariants = true) =>
+  submit: (agentId, memoryIds, policyIds = null, refreshVariants = true, jobType = 'batch_evaluate', priority = 'bulk') =>
     api.post('/api/jobs/submit', {
       agent_id: agentId,
       memory_ids: memoryIds,
       policy_ids: policyIds,
-      refresh_variants: refreshVariants
+      refresh_variants: refreshVariants,
+      job_type: jobType,
+      priority
+    }),
+  estimate: (agentId, memoryIds, policyIds = null, options = {}) =>
+    api.post('/api/jobs/estimate', {
+      agent_id: agentId,
+      memory_ids: memoryIds,
+      policy_ids: policyIds,
+      ...options
     }),
   getStatus: (jobId) => api.get(`/api/jobs/${jobId}/status`),
-  getResult: (jobId) => api.get(`/api/jobs/${jobId}/result`),
+  getReport: (jobId) => api.get(`/api/jobs/${jobId}/report`),
+  getResult: (jobId, offset = 0, limit = 500) =>
+    api.get(`/api/jobs/${jobId}/result`, { params: { offset, limit } }),
   list: (status = null, limit = 10) =>
     api.get('/api/jobs/', { params: { status, limit } }),
   delete: (jobId) => api.delete(`/api/jobs/${jobId}`),
+  cancel: (jobId) => api.post(`/api/jobs/${jobId}/cancel`),
+  pause: (jobId) => api.post(`/api/jobs/${jobId}/pause`),
+  resume: (jobId) => api.post(`/api/jobs/${jobId}/resume`),
+  deadLetters: (jobId, offset = 0, limit = 500) =>
+    api.get(`/api/jobs/${jobId}/dead-letters`, { params: { offset, limit } }),
+  retryFailed: (jobId) => api.post(`/api/jobs/${jobId}/retry-failed`),
+  // Server-sent events: a job's status on every change, until it finishes
+  events: (jobId) => new EventSource(`${API_URL}/api/jobs/${jobId}/events`),
+  // Server-sent events for all jobs of an agent on one connection
+  agentEvents: (agentId) =>
+    new EventSource(`${API_URL}/api/jobs/events?agent_id=${encodeURIComponent(agentId)}`),
 
-  // Helper: Poll until job completes
-  pollUntilComplete: async (jobId, onProgress, intervalMs = 500, maxAttempts = 600) => {
-    let attempts = 0;
-    while (attempts < maxAttempts) {
-      const response = await api.get(`/api/jobs/${jobId}/status`);
-      const status = response.data;
+  // Helper: Follow the job's event stream until it finishes
+  waitUntilComplete: (jobId, onProgress) => new Promise((resolve, reject) => {
+    const source = jobsAPI.events(jobId);
+    source.addEventListener('job', (message) => {
+      const status = JSON.parse(message.data);
 
       if (onProgress) {
         onProgress(status);
       }
 
-      if (status.status === 'completed' || status.status === 'failed') {
-        return status;
+      if (['completed', 'failed', 'cancelled', 'deleted'].includes(status.status)) {
+        source.close();
+        resolve(status);
       }
-
-      await new Promise(resolve => setTimeout(resolve, intervalMs));
-      attempts++;
-    }
-    throw new Error('Job polling timeout');
-  }
+    });
+    source.onerror = () => {
+      if (source.readyState === EventSource.CLOSED) {
+        reject(new Error('Job stream closed'));
+      }
+    };
+  })
 };
 
 export default api;